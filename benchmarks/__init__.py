@@ -0,0 +1 @@
+"""Benchmarks de rendimiento para los módulos de core y utils."""
@@ -0,0 +1,148 @@
+"""
+Benchmark de concurrencia para la asignación de camiones del layout.
+
+Lanza varios procesos, cada uno con varios hilos, que asignan camiones del
+packing list al mismo tiempo sobre un único scans.db. Verifica que ningún
+camión del layout se entregue a dos camiones del packing list y reporta
+asignaciones por segundo.
+
+Uso:
+    python benchmarks/bench_assignment_concurrency.py [--processes 4] [--threads 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.db_manager import DatabaseManager
+from core.truck_assignment import assign_packing_truck_to_layout
+
+
+def _worker(db_path: str, worker_id: int, threads: int, per_thread: int,
+            layout_trucks: list, barrier, results_queue):
+    """Proceso que asigna camiones desde varios hilos."""
+    DatabaseManager(db_path)
+    results = []
+    lock = threading.Lock()
+
+    def run(thread_id: int):
+        local = []
+        for n in range(per_thread):
+            # Cada camión se pide dos veces para ejercitar "ya asignado"
+            packing_truck_id = f"P{worker_id}-{thread_id}-{n}"
+            for _ in range(2):
+                success, _, layout_truck_id = assign_packing_truck_to_layout(
+                    packing_truck_id, layout_trucks, db_path
+                )
+                local.append((packing_truck_id, success, layout_truck_id))
+        with lock:
+            results.extend(local)
+
+    barrier.wait()
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    results_queue.put(results)
+
+
+def run_benchmark(processes: int, threads: int, per_thread: int, layout_count: int) -> dict:
+    """Ejecuta la prueba de estrés y retorna métricas y verificaciones."""
+    ctx = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'scans.db')
+        DatabaseManager(db_path)
+
+        layout_trucks = list(range(1, layout_count + 1))
+        barrier = ctx.Barrier(processes + 1)
+        results_queue = ctx.Queue()
+
+        workers = [
+            ctx.Process(target=_worker, args=(
+                db_path, w, threads, per_thread, layout_trucks, barrier, results_queue
+            ))
+            for w in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Esperar a que todos los procesos importen y abran la BD
+        barrier.wait()
+        start = time.perf_counter()
+        results = []
+        for _ in workers:
+            results.extend(results_queue.get())
+        elapsed = time.perf_counter() - start
+        for worker in workers:
+            worker.join()
+
+    # Cada camión del layout debe pertenecer a un solo camión del packing list
+    owners = {}
+    double_assigned = set()
+    inconsistent = set()
+    first_answer = {}
+    for packing_truck_id, success, layout_truck_id in results:
+        if not success:
+            continue
+        owner = owners.setdefault(layout_truck_id, packing_truck_id)
+        if owner != packing_truck_id:
+            double_assigned.add(layout_truck_id)
+        answer = first_answer.setdefault(packing_truck_id, layout_truck_id)
+        if answer != layout_truck_id:
+            inconsistent.add(packing_truck_id)
+
+    assigned = Counter(r[1] for r in results)
+    expected_assigned = min(layout_count, processes * threads * per_thread)
+
+    return {
+        'calls': len(results),
+        'elapsed_s': elapsed,
+        'calls_per_sec': len(results) / elapsed,
+        'packing_trucks_assigned': len(first_answer),
+        'expected_assigned': expected_assigned,
+        'blocked_calls': assigned[False],
+        'double_assigned_layout_trucks': sorted(double_assigned),
+        'inconsistent_packing_trucks': sorted(inconsistent)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--per-thread', type=int, default=25)
+    parser.add_argument('--layout-trucks', type=int, default=200)
+    args = parser.parse_args()
+
+    metrics = run_benchmark(args.processes, args.threads, args.per_thread, args.layout_trucks)
+
+    print(f"Llamadas:                 {metrics['calls']:,}")
+    print(f"Tiempo:                   {metrics['elapsed_s']:.2f}s")
+    print(f"Llamadas/seg:             {metrics['calls_per_sec']:,.0f}")
+    print(f"Camiones asignados:       {metrics['packing_trucks_assigned']} "
+          f"(esperados {metrics['expected_assigned']})")
+    print(f"Llamadas bloqueadas:      {metrics['blocked_calls']}")
+    print(f"Doble asignación:         {metrics['double_assigned_layout_trucks'] or 'ninguna'}")
+    print(f"Respuestas inconsistentes: {metrics['inconsistent_packing_trucks'] or 'ninguna'}")
+
+    ok = (
+        not metrics['double_assigned_layout_trucks']
+        and not metrics['inconsistent_packing_trucks']
+        and metrics['packing_trucks_assigned'] == metrics['expected_assigned']
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de escaneos por segundo en la base de datos.
+
+Compara el patrón anterior (una conexión nueva por operación, journal por
+defecto) contra DatabaseManager sobre el pool de conexiones compartidas.
+
+Uso:
+    python benchmarks/bench_db_scans.py [--scans 2000]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import scan_rows
+from core.connection_pool import close_all_connections
+from core.db_manager import DatabaseManager
+
+
+def bench_per_call_connections(db_path: str, rows: list) -> dict:
+    """Reproduce el patrón original: connect/commit/close en cada llamada."""
+    DatabaseManager(db_path)
+    close_all_connections()
+
+    # Volver al journal por defecto para medir el comportamiento original
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+
+    start = time.perf_counter()
+    for row in rows:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute('''
+            INSERT OR REPLACE INTO pallet_scans
+            (packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
+             first_serial, last_serial, ubicacion, slot)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', row)
+        conn.commit()
+        conn.close()
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row in rows:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute('''
+            SELECT COUNT(*) FROM pallet_scans
+            WHERE packing_truck_id = ? AND pallet_number = ?
+        ''', (row[0], row[2])).fetchone()
+        conn.close()
+    read_time = time.perf_counter() - start
+
+    return {
+        'scans_per_sec': len(rows) / write_time,
+        'lookups_per_sec': len(rows) / read_time
+    }
+
+
+def bench_pooled_connections(db_path: str, rows: list) -> dict:
+    """Mide DatabaseManager usando las conexiones compartidas."""
+    db = DatabaseManager(db_path)
+
+    start = time.perf_counter()
+    for row in rows:
+        db.register_pallet_scan(*row)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row in rows:
+        db.is_pallet_scanned(row[0], row[2])
+    read_time = time.perf_counter() - start
+
+    close_all_connections()
+    return {
+        'scans_per_sec': len(rows) / write_time,
+        'lookups_per_sec': len(rows) / read_time
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = list(scan_rows(args.scans))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_per_call_connections(os.path.join(tmp, 'before.db'), rows)
+        after = bench_pooled_connections(os.path.join(tmp, 'after.db'), rows)
+
+    print(f"{'':<22}{'antes':>12}{'después':>12}{'mejora':>10}")
+    for key in ('scans_per_sec', 'lookups_per_sec'):
+        ratio = after[key] / before[key]
+        print(f"{key:<22}{before[key]:>12,.0f}{after[key]:>12,.0f}{ratio:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
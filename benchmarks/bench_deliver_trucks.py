@@ -0,0 +1,122 @@
+"""
+Benchmark de la entrega masiva de camiones al final del turno.
+
+Compara entregar N camiones completos uno por uno (deliver_truck como era
+antes, más un estatus encolado por camión, que reescribe el archivo de
+pendientes cada vez) contra deliver_trucks: una transacción, una
+actualización de los índices en memoria y un solo lote de estatus.
+
+Uso:
+    python benchmarks/bench_deliver_trucks.py [--trucks 60] [--layout-trucks 80]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import PALLETS_PER_TRUCK, truck_scans
+from core.connection_pool import close_all_connections
+from core.db_manager import DatabaseManager
+from core.event_log import append_events, deliver_event
+from core.location_view import get_location_view
+from core.occupancy_index import get_occupancy_index
+from core.sheets_writeback import StatusWriteQueue
+
+
+def legacy_deliver_truck(db: DatabaseManager, packing_truck_id: str) -> bool:
+    """Copia de la versión anterior de deliver_truck, para comparar."""
+    try:
+        with db._db.transaction() as conn:
+            cursor = conn.execute('''
+                DELETE FROM pallet_scans
+                WHERE packing_truck_id = ?
+            ''', (str(packing_truck_id),))
+
+            deleted_count = cursor.rowcount
+
+            conn.execute('''
+                DELETE FROM truck_assignments
+                WHERE packing_truck_id = ?
+            ''', (str(packing_truck_id),))
+
+            append_events(conn, [deliver_event(str(packing_truck_id))])
+
+        db._events.record_appended(1)
+        db._occupancy.record_delivery(str(packing_truck_id))
+        db._locations.record_delivery(str(packing_truck_id))
+
+        print(f"Entregado camión {packing_truck_id}: {deleted_count} registros eliminados")
+        return True
+
+    except Exception as e:
+        print(f"Error entregando camión: {e}")
+        return False
+
+
+def prepare(path: str, trucks: int, layout_trucks: int) -> DatabaseManager:
+    db = DatabaseManager(os.path.join(path, 'scans.db'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for truck in range(trucks):
+            db.register_pallet_scans_bulk(truck_scans(truck, layout_trucks=layout_trucks))
+    # Índices en memoria cargados, como en la app después del primer escaneo
+    get_occupancy_index(db.db_path).ensure_loaded()
+    get_location_view(db.db_path).ensure_loaded()
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trucks', type=int, default=60)
+    parser.add_argument('--layout-trucks', type=int, default=80)
+    args = parser.parse_args()
+    truck_ids = [f'T{truck}' for truck in range(args.trucks)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = os.path.join(tmp, 'anterior')
+        bulk_dir = os.path.join(tmp, 'lote')
+        os.makedirs(legacy_dir)
+        os.makedirs(bulk_dir)
+        legacy_db = prepare(legacy_dir, args.trucks, args.layout_trucks)
+        bulk_db = prepare(bulk_dir, args.trucks, args.layout_trucks)
+        legacy_queue = StatusWriteQueue(persist_path=os.path.join(legacy_dir, 'pending.json'))
+        bulk_queue = StatusWriteQueue(persist_path=os.path.join(bulk_dir, 'pending.json'))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for truck_id in truck_ids:
+                legacy_deliver_truck(legacy_db, truck_id)
+                legacy_queue.enqueue(truck_id, 'Entregado')
+            legacy_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            success, result = bulk_db.deliver_trucks(truck_ids, status_queue=bulk_queue)
+            bulk_s = time.perf_counter() - start
+
+        assert success and len(result['delivered']) == args.trucks
+        assert legacy_queue.pending == bulk_queue.pending
+        consistent = (
+            get_occupancy_index(bulk_db.db_path).check_consistency()[0]
+            and get_location_view(bulk_db.db_path).check_consistency()[0]
+        )
+        close_all_connections()
+
+    pallets = args.trucks * PALLETS_PER_TRUCK
+    print(f"Entrega: {args.trucks} camiones x {PALLETS_PER_TRUCK} pallets = {pallets:,} registros")
+    print(f"{'Versión':<12}{'Total':>10}{'Camiones/s':>13}")
+    for name, seconds in (('uno por uno', legacy_s), ('lote', bulk_s)):
+        print(f"{name:<12}{seconds * 1000:>8.0f}ms{args.trucks / seconds:>13,.0f}")
+    print(f"Aceleración: {legacy_s / bulk_s:.1f}x")
+    print(f"Liberados: {len(result['freed_layout_trucks'])} camiones del layout, "
+          f"{len(result['freed_locations']):,} ubicaciones; índices consistentes: {consistent}")
+
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de arranque con la bitácora de eventos.
+
+Simula turnos de operación (camiones de 114 pallets que se escanean y se
+entregan, con ~20 camiones en el almacén a la vez) hasta distintas longitudes
+de bitácora. Para cada longitud mide cuánto tarda en reconstruirse el estado:
+- replay completo de la bitácora (sin fotos)
+- foto más reciente + cola de la bitácora (lo que hace el arranque)
+- consulta de pallet_scans completa (el arranque anterior del índice)
+
+Uso:
+    python benchmarks/bench_event_log.py [--lengths 10000 50000 200000] [--tail 1000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import PALLETS_PER_TRUCK, truck_scans
+from core.connection_pool import close_all_connections, get_connection_manager
+from core.db_manager import DatabaseManager
+from core.event_log import get_event_log
+
+TRUCKS_IN_WAREHOUSE = 20
+
+
+def simulate(db: DatabaseManager, events: int, start_truck: int = 0) -> int:
+    """Escanea y entrega camiones hasta agregar ``events`` eventos. Retorna el siguiente camión."""
+    truck = start_truck
+    written = 0
+    while written < events:
+        db.register_pallet_scans_bulk(truck_scans(truck, TRUCKS_IN_WAREHOUSE))
+        written += PALLETS_PER_TRUCK
+        if truck >= TRUCKS_IN_WAREHOUSE:
+            db.deliver_truck(f'T{truck - TRUCKS_IN_WAREHOUSE}')
+            written += 1
+        truck += 1
+    return truck
+
+
+def _time(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_length(length: int, tail: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'scans.db')
+        db = DatabaseManager(db_path)
+        event_log = get_event_log(db_path)
+        # Sin fotos automáticas: la foto se toma a mano antes de la cola
+        event_log.snapshot_interval = float('inf')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            truck = simulate(db, length - tail)
+            event_log.write_snapshot()
+            simulate(db, tail, truck)
+
+        def legacy_table_load():
+            with get_connection_manager(db_path).reader() as conn:
+                conn.execute('''
+                    SELECT packing_truck_id, pallet_number, layout_truck_id
+                    FROM pallet_scans WHERE layout_truck_id IS NOT NULL
+                ''').fetchall()
+                conn.execute('SELECT packing_truck_id, layout_truck_id FROM truck_assignments').fetchall()
+
+        state = event_log.load_state()
+        assert state.assignments == event_log.replay_all().assignments
+
+        with get_connection_manager(db_path).reader() as conn:
+            total_events = conn.execute('SELECT COUNT(*) FROM scan_events').fetchone()[0]
+
+        metrics = {
+            'events': total_events,
+            'live_scans': state.scan_count,
+            'replay_s': _time(event_log.replay_all),
+            'snapshot_tail_s': _time(event_log.load_state),
+            'table_s': _time(legacy_table_load)
+        }
+        close_all_connections()
+        return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--tail', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'Eventos':>10}{'En almacén':>12}{'Replay completo':>17}{'Foto + cola':>14}{'Tabla':>10}")
+    for length in args.lengths:
+        m = bench_length(length, args.tail)
+        print(f"{m['events']:>10,}{m['live_scans']:>12,}"
+              f"{m['replay_s'] * 1000:>15.0f}ms{m['snapshot_tail_s'] * 1000:>12.0f}ms"
+              f"{m['table_s'] * 1000:>8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
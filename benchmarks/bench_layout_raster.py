@@ -0,0 +1,129 @@
+"""
+Benchmark del raster del layout con capa de ocupación.
+
+Con un almacén de K camiones del layout a media ocupación mide:
+- viewport en frío: componer los tiles de una pantalla de teléfono
+  (1080x1920) dibujando el layout desde cero
+- viewport al reabrir: lo mismo con los tiles base ya guardados en disco
+- por escaneo: lo que cuesta actualizar la vista después de cada escaneo,
+  recoloreando un control por forma (como una vista con controles de
+  Flet) contra LayoutRaster.refresh + los tiles visibles que cambiaron
+
+Al final compara cada tile visible contra uno compuesto desde cero.
+
+Uso:
+    python benchmarks/bench_layout_raster.py [--layout-trucks 100] [--samples 30]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import ImageChops
+
+from benchmarks.generators import LOCATIONS_PER_TRUCK, layout_shapes, scan_rows
+from core.connection_pool import close_all_connections
+from core.db_manager import DatabaseManager
+from utils.layout_model import LayoutModel, content_hash
+from utils.layout_raster import OCCUPANCY_FILLS, LayoutRaster
+
+VIEWPORT = (1080, 1920)
+
+SCAN_FIELDS = ('packing_truck_id', 'layout_truck_id', 'pallet_number',
+               'pallet_sequence_index', 'first_serial', 'last_serial')
+
+
+def recolor_controls(shapes_data, assignments) -> list:
+    """Un control por forma con el color de su ubicación (vista sin raster)."""
+    controls = []
+    for shape in shapes_data:
+        slots = assignments.get(shape['ubicacion'])
+        fill = OCCUPANCY_FILLS[min(len(slots), 2) - 1] if slots else shape.get('fill')
+        controls.append({**shape, 'fill': fill})
+    return controls
+
+
+def compose_viewport(raster: LayoutRaster, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        raster.tile(*key)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--layout-trucks', type=int, default=100)
+    parser.add_argument('--samples', type=int, default=30)
+    args = parser.parse_args()
+
+    locations, shapes_data = layout_shapes(args.layout_trucks)
+    model = LayoutModel(locations, shapes_data, content_hash(repr(shapes_data)))
+
+    capacity = args.layout_trucks * LOCATIONS_PER_TRUCK * 2
+    rows = scan_rows(capacity, layout_trucks=args.layout_trucks, pallets=LOCATIONS_PER_TRUCK * 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tiles_dir = os.path.join(tmp, 'tiles')
+        db = DatabaseManager(os.path.join(tmp, 'scans.db'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.register_pallet_scans_bulk([
+                dict(zip(SCAN_FIELDS, row)) for row in (next(rows) for _ in range(capacity // 2))
+            ])
+
+            raster = LayoutRaster(model, cache_dir=tiles_dir)
+            raster.refresh(db)
+            viewport = raster.tiles_in(
+                0, raster.origin[0], raster.origin[1],
+                raster.origin[0] + VIEWPORT[0], raster.origin[1] + VIEWPORT[1]
+            )
+            cold_s = compose_viewport(raster, viewport)
+
+            reopened = LayoutRaster(model, cache_dir=tiles_dir)
+            reopened.refresh(db)
+            warm_s = compose_viewport(reopened, viewport)
+
+            visible = set(viewport)
+            legacy_s = raster_s = 0.0
+            controls = repainted = 0
+            for _ in range(args.samples):
+                db.register_pallet_scan(*next(rows))
+
+                start = time.perf_counter()
+                controls += len(recolor_controls(shapes_data, db.get_location_assignments()))
+                legacy_s += time.perf_counter() - start
+
+                start = time.perf_counter()
+                for key in visible.intersection(reopened.refresh(db)):
+                    reopened.tile(*key)
+                    repainted += 1
+                raster_s += time.perf_counter() - start
+
+            fresh = LayoutRaster(model, cache_dir=None)
+            fresh.set_assignments(db.get_location_assignments())
+            same = all(
+                ImageChops.difference(reopened.tile(*key), fresh.tile(*key)).getbbox() is None
+                for key in viewport
+            )
+
+        close_all_connections()
+
+    print(f"Layout: {len(model):,} ubicaciones, {len(shapes_data):,} formas, "
+          f"{raster.levels} niveles; viewport {VIEWPORT[0]}x{VIEWPORT[1]} = {len(viewport)} tiles")
+    print(f"Viewport en frío:   {cold_s * 1000:8.1f}ms")
+    print(f"Viewport al reabrir:{warm_s * 1000:8.1f}ms")
+    print(f"Por escaneo: controles {legacy_s / args.samples * 1000:.2f}ms "
+          f"({controls // args.samples:,} recoloreados) -> raster "
+          f"{raster_s / args.samples * 1000:.2f}ms ({repainted / args.samples:.1f} tiles visibles)")
+    print(f"Tiles iguales a componer desde cero: {same}")
+
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
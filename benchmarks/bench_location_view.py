@@ -0,0 +1,118 @@
+"""
+Benchmark del refresco del layout después de cada escaneo.
+
+Llena el almacén por lotes y, en varios niveles de ocupación, registra
+escaneos individuales y mide lo que cuesta obtener lo necesario para
+repintar el layout después de cada uno:
+- anterior: get_location_assignments como antes (recorre y ordena toda
+  pallet_scans y arma el dict completo)
+- completo: get_location_assignments desde la vista en memoria
+- cambios: get_location_changes (solo las ubicaciones que cambiaron)
+
+Uso:
+    python benchmarks/bench_location_view.py [--layout-trucks 100] [--samples 30]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import LOCATIONS_PER_TRUCK, scan_rows
+from core.connection_pool import close_all_connections
+from core.db_manager import DatabaseManager
+
+LEVELS = (0.1, 0.25, 0.5, 0.75, 0.95)
+
+
+def legacy_get_location_assignments(db: DatabaseManager) -> dict:
+    """Copia de la versión anterior, para comparar."""
+    with db._db.reader() as conn:
+        rows = conn.execute('''
+            SELECT ubicacion, packing_truck_id, pallet_number, slot
+            FROM pallet_scans
+            WHERE ubicacion IS NOT NULL
+            ORDER BY ubicacion, slot
+        ''').fetchall()
+
+    assignments = {}
+    for row in rows:
+        ubicacion = row[0]
+        pallet_data = {
+            'packing_truck': row[1],
+            'pallet': row[2],
+            'slot': row[3]
+        }
+
+        if ubicacion not in assignments:
+            assignments[ubicacion] = []
+        assignments[ubicacion].append(pallet_data)
+
+    return assignments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--layout-trucks', type=int, default=100)
+    parser.add_argument('--samples', type=int, default=30)
+    args = parser.parse_args()
+
+    # Un pallet por slot: 2 por ubicación
+    capacity = args.layout_trucks * LOCATIONS_PER_TRUCK * 2
+    rows = scan_rows(capacity, layout_trucks=args.layout_trucks, pallets=LOCATIONS_PER_TRUCK * 2)
+
+    print(f"Almacén: {args.layout_trucks} camiones del layout, {capacity:,} slots")
+    print(f"{'Ocupación':<12}{'Escaneos':>10}{'Anterior':>12}{'Completo':>12}{'Cambios':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'scans.db'))
+        version, _ = db.get_location_changes(0)
+        filled = 0
+        results = []
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for level in LEVELS:
+                target = int(capacity * level)
+                db.register_pallet_scans_bulk([
+                    dict(zip(('packing_truck_id', 'layout_truck_id', 'pallet_number',
+                              'pallet_sequence_index', 'first_serial', 'last_serial'), row))
+                    for row in (next(rows) for _ in range(target - filled))
+                ])
+                filled = target
+                version, _ = db.get_location_changes(version)
+
+                timings = {'anterior': 0.0, 'completo': 0.0, 'cambios': 0.0}
+                for _ in range(args.samples):
+                    db.register_pallet_scan(*next(rows))
+                    filled += 1
+
+                    start = time.perf_counter()
+                    version, changed = db.get_location_changes(version)
+                    timings['cambios'] += time.perf_counter() - start
+                    assert changed is not None and len(changed) == 1
+
+                    start = time.perf_counter()
+                    legacy_get_location_assignments(db)
+                    timings['anterior'] += time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    db.get_location_assignments()
+                    timings['completo'] += time.perf_counter() - start
+
+                results.append((level, filled, {k: v / args.samples for k, v in timings.items()}))
+
+        close_all_connections()
+
+    for level, filled, timings in results:
+        print(f"{level:>10.0%}  {filled:>10,}"
+              f"{timings['anterior'] * 1e6:>10.0f}µs{timings['completo'] * 1e6:>10.0f}µs"
+              f"{timings['cambios'] * 1e6:>10.1f}µs")
+
+
+if __name__ == '__main__':
+    main()
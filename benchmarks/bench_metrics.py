@@ -0,0 +1,114 @@
+"""
+Benchmark del costo de las métricas en el camino de escaneo.
+
+Mide cuánto agrega el decorador timed por llamada (función vacía y
+is_pallet_scanned real) con las métricas desactivadas (timed deja la
+función original), con la envoltura anterior que revisaba la bandera en
+cada llamada y con las métricas activadas, y el costo de registrar una
+muestra en el histograma.
+
+Uso:
+    python benchmarks/bench_metrics.py [--calls 200000]
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import scan_rows
+from core.db_manager import DatabaseManager
+from utils import metrics
+
+
+def per_call_ns(func, calls: int, *args) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter_ns() - start) / calls
+
+
+def noop():
+    return None
+
+
+@metrics.timed('bench.noop')
+def timed_noop():
+    return None
+
+
+def legacy_timed(name: str):
+    """Copia del decorador anterior (siempre envuelve), para comparar."""
+    def decorator(func):
+        histogram = metrics.REGISTRY.histogram(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.is_enabled():
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record((time.perf_counter_ns() - start) // 1000, False)
+
+        return wrapper
+
+    return decorator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    calls = args.calls
+
+    module = sys.modules[__name__]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'scans.db'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for row in scan_rows(2000):
+                db.register_pallet_scan(*row)
+        db_calls = calls // 10
+        metrics.disable()
+        plain_scanned = DatabaseManager.is_pallet_scanned
+
+        # (nombre, original, envoltura anterior, función decorada vigente, llamadas, argumentos)
+        cases = (
+            ('función vacía', noop, legacy_timed('bench.legacy')(noop),
+             lambda: module.timed_noop, calls, ()),
+            ('is_pallet_scanned', plain_scanned, legacy_timed('bench.legacy')(plain_scanned),
+             lambda: DatabaseManager.is_pallet_scanned, db_calls, (db, 'T3', '150'))
+        )
+        rows = []
+        for name, plain, legacy, decorated, count, call_args in cases:
+            metrics.disable()
+            plain_ns = per_call_ns(plain, count, *call_args)
+            disabled_ns = per_call_ns(decorated(), count, *call_args)
+            legacy_ns = per_call_ns(legacy, count, *call_args)
+            metrics.enable()
+            enabled_ns = per_call_ns(decorated(), count, *call_args)
+            rows.append((name, plain_ns, disabled_ns, legacy_ns, enabled_ns))
+
+        record_ns = per_call_ns(metrics.REGISTRY.histogram('bench.record').record, calls, 1234)
+        summary = metrics.REGISTRY.histogram('db.is_pallet_scanned').summary()
+        metrics.disable()
+        metrics.reset()
+
+    print(f"{'Llamada':<20}{'Sin decorar':>14}{'Desactivadas':>16}{'Anterior':>12}{'Activadas':>14}")
+    for name, plain, disabled, legacy, enabled in rows:
+        print(f"{name:<20}{plain:>12.0f}ns{disabled:>14.0f}ns{legacy:>10.0f}ns{enabled:>12.0f}ns")
+    print(f"Histogram.record: {record_ns:.0f}ns por muestra")
+    print(f"is_pallet_scanned (activadas): p50 {summary['p50_ms'] * 1000:.0f}µs, "
+          f"p99 {summary['p99_ms'] * 1000:.0f}µs en {summary['count']:,} llamadas")
+
+
+if __name__ == '__main__':
+    main()
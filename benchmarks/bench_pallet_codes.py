@@ -0,0 +1,87 @@
+"""
+Microbenchmark de extracción de números de pallet desde códigos escaneados.
+
+Compara la versión anterior (hasta cuatro re.search sin compilar por código)
+contra el patrón combinado precompilado, con y sin memoria LRU, y contra la
+versión vectorizada para una columna completa. La equivalencia con la
+versión anterior se prueba en tests/test_pallet_codes.py.
+
+Uso:
+    python benchmarks/bench_pallet_codes.py [--codes 200000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import pallet_codes
+from core.pallet_ordering import (
+    _extract_pallet_number_cached,
+    extract_pallet_number,
+    extract_pallet_numbers
+)
+
+
+def legacy_extract_pallet_number(pallet_code):
+    """Copia de la versión anterior, para comparar."""
+    try:
+        match = re.search(r'(\d{2,3})$', pallet_code)
+        if match:
+            return int(match.group(1))
+        match = re.search(r'(?:PALLET|PLT|P)[_-]?(\d{2,3})', pallet_code, re.IGNORECASE)
+        if match:
+            return int(match.group(1))
+        if pallet_code.isdigit():
+            return int(pallet_code)
+        match = re.search(r'(\d{2,3})', pallet_code)
+        if match:
+            return int(match.group(1))
+        return None
+    except:
+        return None
+
+
+def _rate(func, codes: list) -> float:
+    start = time.perf_counter()
+    func(codes)
+    return len(codes) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--codes', type=int, default=200000)
+    args = parser.parse_args()
+
+    codes = pallet_codes(args.codes)
+
+    def run_uncached(batch):
+        # Sin memoria: cada código se evalúa con el patrón
+        _extract_pallet_number_cached.cache_clear()
+        for code in batch:
+            _extract_pallet_number_cached.__wrapped__(code)
+
+    def run_cached(batch):
+        for code in batch:
+            extract_pallet_number(code)
+
+    series = pd.Series(codes, dtype=object)
+    rates = {
+        'anterior': _rate(lambda batch: [legacy_extract_pallet_number(c) for c in batch], codes),
+        'compilado': _rate(run_uncached, codes),
+        'compilado+LRU': _rate(run_cached, codes),
+        'vectorizado': _rate(lambda batch: extract_pallet_numbers(series), codes),
+    }
+
+    print(f"{'Versión':<16}{'códigos/seg':>14}{'vs anterior':>13}")
+    for name, rate in rates.items():
+        print(f"{name:<16}{rate:>14,.0f}{rate / rates['anterior']:>12.1f}x")
+
+
+if __name__ == '__main__':
+    main()
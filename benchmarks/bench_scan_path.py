@@ -0,0 +1,207 @@
+"""
+Benchmark del camino de escaneo sin pandas.
+
+Genera un shipment sintético (camiones de 114 pallets, en el formato de
+get_all_values) y compara, por escaneo:
+- validar: índice secuencial + ubicación del pallet escaneado
+  (anterior: filtrar el DataFrame del shipment y ordenar el camión;
+  ahora: ShipmentTable + TruckPalletIndex)
+- consultar: escaneos del camión (anterior: pd.read_sql; ahora: ScanTable)
+
+La memoria residente máxima se mide en un proceso nuevo por variante,
+cargando solo lo que esa variante necesita.
+
+Uso:
+    python benchmarks/bench_scan_path.py [--trucks 200] [--scans 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import PALLETS_PER_TRUCK, pallet_number, shipment_values
+from core.connection_pool import close_all_connections, get_connection_manager
+from core.db_manager import DatabaseManager
+from core.pallet_ordering import ShipmentPalletIndex, calculate_location_from_index
+from core.records import ShipmentTable
+
+
+def legacy_sequence_index(pallet_number: str, truck_pallets_df) -> int:
+    """
+    Copia de get_pallet_sequence_index original (ordena el camión en cada escaneo).
+
+    El original leía la columna con row.__getattribute__('Pallet number'), que
+    itertuples renombra por tener espacio; aquí se lee por posición.
+    """
+    sorted_pallets = truck_pallets_df.sort_values('Pallet number')
+    position = list(sorted_pallets.columns).index('Pallet number') + 1
+    for idx, row in enumerate(sorted_pallets.itertuples(), start=1):
+        if str(row[position]) == str(pallet_number):
+            return idx
+    return None
+
+
+def build_dataframe(values: list):
+    import pandas as pd
+
+    df = pd.DataFrame(values[2:], columns=values[1])
+    return df[df['CAMION'].str.strip() != '']
+
+
+def build_columnar(values: list):
+    table = ShipmentTable.from_values(values, 1)
+    index = ShipmentPalletIndex()
+    index.load(table)
+    return table, index
+
+
+def _per_call(func, calls: list) -> float:
+    """Tiempo medio por llamada en microsegundos."""
+    start = time.perf_counter()
+    for args in calls:
+        func(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def bench_latency(values: list, scans: int) -> dict:
+    rng = random.Random(11)
+    trucks = sorted({row[0] for row in values[2:]})
+    calls = [
+        (rng.choice(trucks), pallet_number(rng.randint(1, PALLETS_PER_TRUCK)))
+        for _ in range(scans)
+    ]
+
+    df = build_dataframe(values)
+    _, pallet_index = build_columnar(values)
+
+    def legacy_validate(truck, pallet):
+        index = legacy_sequence_index(pallet, df[df['CAMION'].astype(str) == truck])
+        return calculate_location_from_index(index, 'C1')
+
+    def columnar_validate(truck, pallet):
+        return pallet_index.get(truck).get_location(pallet, 'C1')
+
+    for truck, pallet in calls[:200]:
+        assert legacy_validate(truck, pallet) == columnar_validate(truck, pallet)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'scans.db')
+        db = DatabaseManager(db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, truck in enumerate(trucks[:20], start=1):
+                db.register_pallet_scans_bulk(
+                    [{'packing_truck_id': truck, 'layout_truck_id': f'C{i}', 'pallet_number': pallet_number(p)}
+                     for p in range(1, PALLETS_PER_TRUCK + 1)],
+                    pallet_index=pallet_index
+                )
+        reads = [(rng.choice(trucks[:20]),) for _ in range(min(scans, 500))]
+
+        import pandas as pd
+
+        def legacy_read(truck):
+            with get_connection_manager(db_path).reader() as conn:
+                return pd.read_sql('''
+                    SELECT * FROM pallet_scans
+                    WHERE packing_truck_id = ?
+                    ORDER BY pallet_sequence_index
+                ''', conn, params=(truck,))
+
+        assert legacy_read(reads[0][0])['ubicacion'].tolist() == list(
+            db.get_truck_scan_records(reads[0][0]).column('ubicacion'))
+
+        results = {
+            'validate_legacy_us': _per_call(legacy_validate, calls[:min(scans, 300)]),
+            'validate_columnar_us': _per_call(columnar_validate, calls),
+            'read_legacy_us': _per_call(legacy_read, reads),
+            'read_columnar_us': _per_call(db.get_truck_scan_records, reads)
+        }
+        close_all_connections()
+    return results
+
+
+def peak_rss_mb() -> float:
+    """Memoria residente máxima del proceso en MB."""
+    # ru_maxrss de un hijo puede heredar el pico del padre (fork antes de
+    # exec); VmHWM se reinicia con el exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child_memory(variant: str, trucks: int):
+    """Proceso hijo: carga el shipment con una variante y reporta su memoria."""
+    values = shipment_values(trucks)
+
+    def load():
+        if variant == 'pandas':
+            data = build_dataframe(values)
+            data.groupby('CAMION', sort=False)['Pallet number'].count()
+            return data
+        return build_columnar(values)
+
+    data = load()
+    rss_mb = peak_rss_mb()
+
+    # Tamaño de las estructuras (con los módulos ya importados)
+    tracemalloc.start()
+    data = load()
+    structure, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({'rss_mb': rss_mb, 'structure_mb': structure / 1e6}))
+
+
+def bench_memory(trucks: int) -> dict:
+    results = {}
+    for variant in ('pandas', 'columnar'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--trucks', str(trucks), '--child', variant],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trucks', type=int, default=200)
+    parser.add_argument('--scans', type=int, default=2000)
+    parser.add_argument('--child', choices=('pandas', 'columnar'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_memory(args.child, args.trucks)
+        return
+
+    values = shipment_values(args.trucks)
+    print(f"Shipment sintético: {args.trucks} camiones, {len(values) - 2:,} pallets")
+
+    latency = bench_latency(values, args.scans)
+    print(f"{'Operación':<12}{'Anterior':>12}{'Columnar':>12}{'Aceleración':>13}")
+    for name, key in (('validar', 'validate'), ('consultar', 'read')):
+        legacy, columnar = latency[f'{key}_legacy_us'], latency[f'{key}_columnar_us']
+        print(f"{name:<12}{legacy:>10.0f}µs{columnar:>10.1f}µs{legacy / columnar:>12.0f}x")
+
+    memory = bench_memory(args.trucks)
+    print(f"\n{'Variante':<12}{'RSS máx':>10}{'Datos':>10}")
+    for variant, m in memory.items():
+        print(f"{variant:<12}{m['rss_mb']:>8.0f}MB{m['structure_mb']:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark del siguiente pallet esperado durante un turno.
+
+Simula el modo de escaneo estricto: por cada escaneo se pregunta cuál es el
+siguiente pallet esperado del camión. Compara la función anterior (ordena
+el DataFrame y recorre la lista de escaneados en cada llamada) contra un
+SequenceTracker por camión. Los números de pallet tienen distinta cantidad
+de dígitos (9, 10, ... 122) para mostrar el error del orden como texto.
+
+Uso:
+    python benchmarks/bench_sequence_tracker.py [--trucks 20] [--pallets 114]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from core.pallet_ordering import TruckPalletIndex
+from core.sequence_tracker import SequenceTracker
+
+
+def legacy_get_next_expected_pallet(scanned_pallets: list, all_pallets_df: pd.DataFrame):
+    """Copia de la función anterior, para comparar."""
+    sorted_pallets = all_pallets_df.sort_values('Pallet number')
+    for idx, row in sorted_pallets.iterrows():
+        pallet_num = str(row['Pallet number'])
+        if pallet_num not in scanned_pallets:
+            return {
+                'pallet_number': pallet_num,
+                'index': len([p for p in sorted_pallets['Pallet number'] if str(p) <= pallet_num]),
+                'first_serial': row['first_serial'],
+                'last_serial': row['last_serial']
+            }
+    return None
+
+
+def truck_frame(pallets: int) -> pd.DataFrame:
+    numbers = [str(9 + i) for i in range(pallets)]
+    return pd.DataFrame({
+        'Pallet number': numbers[::-1],
+        'first_serial': [f'A{n}' for n in numbers[::-1]],
+        'last_serial': [f'Z{n}' for n in numbers[::-1]]
+    })
+
+
+def run_legacy(frames: list) -> tuple:
+    start = time.perf_counter()
+    mismatches = 0
+    for df in frames:
+        scanned = []
+        for expected in sorted(df['Pallet number'], key=int):
+            result = legacy_get_next_expected_pallet(scanned, df)
+            if result['pallet_number'] != expected:
+                mismatches += 1
+            # El operador escanea el pallet correcto en orden numérico
+            scanned.append(expected)
+    return time.perf_counter() - start, mismatches
+
+
+def run_tracker(frames: list) -> tuple:
+    start = time.perf_counter()
+    mismatches = 0
+    for df in frames:
+        tracker = SequenceTracker(TruckPalletIndex.from_dataframe('T', df))
+        for expected in sorted(df['Pallet number'], key=int):
+            if tracker.next_expected()['pallet_number'] != expected:
+                mismatches += 1
+            tracker.record(expected)
+        assert tracker.complete and not tracker.gaps()
+    return time.perf_counter() - start, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trucks', type=int, default=20)
+    parser.add_argument('--pallets', type=int, default=114)
+    args = parser.parse_args()
+
+    frames = [truck_frame(args.pallets) for _ in range(args.trucks)]
+    scans = args.trucks * args.pallets
+
+    legacy_s, legacy_wrong = run_legacy(frames)
+    tracker_s, tracker_wrong = run_tracker(frames)
+
+    print(f"Turno: {args.trucks} camiones x {args.pallets} pallets = {scans:,} escaneos")
+    print(f"{'Versión':<10}{'Total':>10}{'Por escaneo':>14}{'Errores':>10}")
+    for name, seconds, wrong in (('anterior', legacy_s, legacy_wrong), ('tracker', tracker_s, tracker_wrong)):
+        print(f"{name:<10}{seconds * 1000:>8.0f}ms{seconds / scans * 1e6:>12.1f}µs{wrong:>10,}")
+    print(f"Aceleración: {legacy_s / tracker_s:.0f}x")
+
+    sys.exit(0 if tracker_wrong == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
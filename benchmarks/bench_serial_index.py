@@ -0,0 +1,127 @@
+"""
+Benchmark de la búsqueda de unidades por serial.
+
+Llena la base con pallets de N unidades cada uno (rangos SN1..SN50,
+SN51..SN100, ... con ancho variable) hasta cubrir ~1M de seriales y compara:
+- anterior: la consulta SQL que compara first_serial/last_serial como texto
+  (recorre toda pallet_scans y falla con anchos distintos: 'SN9' > 'SN10')
+- índice: SerialIndex (bisect sobre los rangos ordenados en memoria)
+
+También mide armar el índice desde cero, cargarlo desde el arreglo guardado
+y buscar una lista pegada de seriales.
+
+Uso:
+    python benchmarks/bench_serial_index.py [--pallets 20000] [--units 50] [--batch 1000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import PALLETS_PER_TRUCK, pallet_number
+from core.connection_pool import close_all_connections
+from core.db_manager import DatabaseManager
+from core.serial_index import SerialIndex
+
+
+def legacy_find_serial(db: DatabaseManager, serial: str):
+    """Búsqueda por comparación de texto en SQL, como se haría sin el índice."""
+    with db._db.reader() as conn:
+        return conn.execute('''
+            SELECT packing_truck_id, pallet_number, ubicacion, slot
+            FROM pallet_scans
+            WHERE first_serial <= ? AND last_serial >= ?
+            ORDER BY first_serial DESC
+            LIMIT 1
+        ''', (serial, serial)).fetchone()
+
+
+def pallet_scans(pallets: int, units: int):
+    """Escaneos con rangos contiguos de `units` seriales por pallet."""
+    trucks = -(-pallets // PALLETS_PER_TRUCK)
+    for index in range(pallets):
+        truck, position = divmod(index, PALLETS_PER_TRUCK)
+        yield {
+            'packing_truck_id': f'T{truck}',
+            'layout_truck_id': f'C{truck % trucks + 1}',
+            'pallet_number': pallet_number(position + 1),
+            'pallet_sequence_index': position + 1,
+            'first_serial': f'SN{index * units + 1}',
+            'last_serial': f'SN{(index + 1) * units}'
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pallets', type=int, default=20000)
+    parser.add_argument('--units', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    total = args.pallets * args.units
+    rng = random.Random(7)
+    samples = [rng.randint(1, total) for _ in range(args.samples)]
+    pasted = [f'SN{rng.randint(1, total)}' for _ in range(args.batch)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'scans.db'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.register_pallet_scans_bulk(pallet_scans(args.pallets, args.units))
+
+        # Desde cero (estado de la bitácora + ordenar) y desde el arreglo guardado
+        start = time.perf_counter()
+        SerialIndex(db.db_path).load()
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        index = SerialIndex(db.db_path)
+        index.load()
+        load_s = time.perf_counter() - start
+
+        legacy_mismatches = 0
+        start = time.perf_counter()
+        for n in samples:
+            row = legacy_find_serial(db, f'SN{n}')
+            if row is None or row[1] != pallet_number((n - 1) // args.units % PALLETS_PER_TRUCK + 1):
+                legacy_mismatches += 1
+        legacy_s = (time.perf_counter() - start) / len(samples)
+
+        mismatches = 0
+        start = time.perf_counter()
+        for n in samples:
+            match = index.lookup(f'SN{n}')
+            expected = (n - 1) // args.units
+            if (match is None
+                    or match['packing_truck'] != f'T{expected // PALLETS_PER_TRUCK}'
+                    or match['pallet'] != pallet_number(expected % PALLETS_PER_TRUCK + 1)):
+                mismatches += 1
+        lookup_s = (time.perf_counter() - start) / len(samples)
+
+        start = time.perf_counter()
+        found = index.lookup_many(pasted)
+        batch_s = time.perf_counter() - start
+        missing = sum(1 for match in found.values() if match is None)
+
+        close_all_connections()
+
+    print(f"Seriales: {args.pallets:,} pallets x {args.units} unidades = {total:,}")
+    print(f"Armar desde cero: {build_s * 1000:.0f}ms; cargar guardado: {load_s * 1000:.0f}ms")
+    print(f"{'Búsqueda':<22}{'Tiempo':>12}{'Errores':>10}")
+    print(f"{'anterior (SQL texto)':<22}{legacy_s * 1e6:>10.0f}µs{legacy_mismatches:>10}")
+    print(f"{'índice':<22}{lookup_s * 1e6:>10.1f}µs{mismatches:>10}")
+    print(f"Lista pegada de {args.batch:,}: {batch_s * 1000:.1f}ms "
+          f"({batch_s / args.batch * 1e6:.1f}µs por serial), sin encontrar: {missing}")
+    print(f"Aceleración por búsqueda: {legacy_s / lookup_s:,.0f}x")
+
+    sys.exit(0 if mismatches == 0 and missing == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de la recarga incremental del shipment.
+
+Carga una hoja sintética grande y la recarga después de distintos cambios,
+midiendo el trabajo posterior a get_all_values (la descarga y la copia local
+cuestan lo mismo en ambos casos):
+- completa: armar el DataFrame, la ShipmentTable, revisar los índices de
+  pallets de todos los camiones y las filas de la cola de estatus
+- diff: comparar con la carga anterior y aplicar solo las filas cambiadas
+
+Uso:
+    python benchmarks/bench_sheet_diff.py [--trucks 877] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import PALLETS_PER_TRUCK, shipment_values
+from core.sheets_manager import SheetsManager
+
+
+def edit_status(values, count):
+    """Cambia el estatus de `count` filas repartidas en la hoja."""
+    step = max(1, (len(values) - 2) // count)
+    for i in range(2, len(values), step)[:count]:
+        values[i][4] = 'Listo'
+
+
+def edit_pallet(values, count):
+    """Corrige el número de pallet de `count` filas."""
+    for i in range(2, 2 + count):
+        values[i][1] = f'9{i}'
+
+
+def insert_row(values, count):
+    """Agrega `count` filas a la mitad de la hoja (las siguientes se recorren)."""
+    middle = len(values) // 2
+    for i in range(count):
+        values.insert(middle, ['T0', f'8{i}', 'SN0', 'SN1', ''])
+
+
+SCENARIOS = (
+    ('1 estatus', edit_status, 1),
+    ('100 estatus', edit_status, 100),
+    ('10 pallets', edit_pallet, 10),
+    ('1 fila nueva', insert_row, 1)
+)
+
+
+def full_reload(manager: SheetsManager, values):
+    df, header_row = manager._parse_shipment_values(values)
+    manager._on_data_loaded(df, header_row, values[header_row], None, 'network')
+    return df
+
+
+def diff_reload(manager: SheetsManager, values):
+    df, header_row, diff, pruned = manager._reload_values('bench', values)
+    manager._on_data_loaded(df, header_row, values[header_row], None, 'network', diff)
+    manager._last_network_load = ('bench', None, pruned, df)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trucks', type=int, default=877)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    base = shipment_values(args.trucks)
+    print(f"Hoja: {args.trucks} camiones x {PALLETS_PER_TRUCK} pallets = {len(base) - 2:,} filas")
+    print(f"{'Cambio':<16}{'Completa':>11}{'Diff':>11}{'Filas':>8}{'Camiones':>10}")
+
+    consistent = True
+    for name, edit, count in SCENARIOS:
+        full_s = diff_s = float('inf')
+        for _ in range(args.repeat):
+            edited = copy.deepcopy(base)
+            edit(edited, count)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                full = SheetsManager(pending_file=None)
+                full_reload(full, base)
+                start = time.perf_counter()
+                full_reload(full, edited)
+                full_s = min(full_s, time.perf_counter() - start)
+
+                incremental = SheetsManager(pending_file=None)
+                diff_reload(incremental, base)
+                start = time.perf_counter()
+                df = diff_reload(incremental, edited)
+                diff_s = min(diff_s, time.perf_counter() - start)
+
+        expected, _ = full._parse_shipment_values(edited)
+        consistent = consistent and df.equals(expected) and all(
+            getattr(incremental.shipment, column) == getattr(full.shipment, column)
+            for column in ('trucks', 'pallet_numbers', 'first_serials', 'last_serials', 'row_labels')
+        ) and incremental.pallet_index._fingerprints == full.pallet_index._fingerprints
+        diff = incremental.last_diff
+        print(f"{name:<16}{full_s * 1000:>9.1f}ms{diff_s * 1000:>9.1f}ms"
+              f"{len(diff):>8}{len(diff.trucks):>10}")
+
+    print(f"Resultados iguales a la recarga completa: {consistent}")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark del DataFrame tipado del shipment.
+
+Arma una hoja sintética de ~100k filas con las columnas extra de un packing
+list real (cliente, modelo, pesos, fechas...) y compara el cargador
+anterior (todas las columnas como texto, filtro con str.strip) contra
+build_shipment_frame: tiempo y memory_usage(deep=True) antes y después.
+También mide la búsqueda del header con filas de título encima.
+
+Uso:
+    python benchmarks/bench_shipment_loader.py [--trucks 877] [--title-rows 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from benchmarks.generators import PALLETS_PER_TRUCK, shipment_values
+from core.shipment_loader import build_shipment_frame, find_header_row
+
+EXTRA_HEADERS = [
+    'Cliente', 'Destino', 'Modelo', 'Descripción', 'Cantidad', 'Peso neto',
+    'Peso bruto', 'Largo', 'Ancho', 'Alto', 'Factura', 'Orden', 'Fecha',
+    'Turno'
+]
+
+
+def legacy_find_header_row(all_values):
+    """Copia de la búsqueda anterior, para comparar."""
+    for idx, row in enumerate(all_values):
+        if 'CAMION' in [cell.upper() for cell in row]:
+            return idx
+    return None
+
+
+def legacy_parse(all_values):
+    """Copia del armado anterior del DataFrame, para comparar."""
+    header_row = legacy_find_header_row(all_values)
+    headers = all_values[header_row]
+    data = all_values[header_row + 1:]
+    df = pd.DataFrame(data, columns=headers)
+    df = df[df['CAMION'].str.strip() != '']
+    return df, header_row
+
+
+def wide_sheet(trucks: int, title_rows: int, seed: int = 7):
+    """Hoja con columnas extra, filas de título y algunas filas vacías."""
+    rng = random.Random(seed)
+    values = shipment_values(trucks, seed=seed)
+    # El estatus queda en la columna 19 (S), como en la hoja real
+    headers = values[1][:4] + EXTRA_HEADERS + values[1][4:]
+    title = values[0] + [''] * (len(headers) - 1)
+    sheet = [list(title) for _ in range(title_rows)]
+    sheet.append(headers)
+    for i, row in enumerate(values[2:]):
+        sheet.append(row[:4] + [
+            'CLIENTE SA', 'MTY', f'MOD-{i % 40}', 'Refrigerador', str(rng.randint(1, 60)),
+            f'{rng.uniform(100, 900):.1f}', f'{rng.uniform(100, 900):.1f}', '120', '100', '180',
+            f'F{i // 500}', f'OC{i // 1000}', '2024-05-01', rng.choice(('A', 'B'))
+        ] + [rng.choice(('', '', 'Listo', 'Entregado'))])
+        if i % 1000 == 999:
+            sheet.append([''] * len(sheet[-1]))
+    return sheet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trucks', type=int, default=877)
+    parser.add_argument('--title-rows', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    values = wide_sheet(args.trucks, args.title_rows)
+
+    legacy_s = typed_s = legacy_header_s = header_s = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        legacy, header_row = legacy_parse(values)
+        legacy_s = min(legacy_s, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        typed = build_shipment_frame(values, find_header_row(values))
+        typed_s = min(typed_s, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        legacy_find_header_row(values)
+        legacy_header_s = min(legacy_header_s, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        found = find_header_row(values)
+        header_s = min(header_s, time.perf_counter() - start)
+
+    legacy_memory = legacy.memory_usage(deep=True)
+    typed_memory = typed.memory_usage(deep=True)
+    same_rows = (
+        found == header_row
+        and typed.index.equals(legacy.index)
+        and typed['CAMION'].astype(str).tolist() == legacy['CAMION'].str.strip().tolist()
+        and typed['Pallet number'].astype(str).tolist() == [str(int(p)) for p in legacy['Pallet number']]
+    )
+
+    print(f"Hoja: {len(values) - header_row - 1:,} filas x {len(values[header_row])} columnas "
+          f"({args.trucks} camiones x {PALLETS_PER_TRUCK} pallets), header en la fila {header_row + 1}")
+    print(f"{'Columna':<16}{'Antes':>12}{'Después':>12}  Tipo")
+    for name in typed.columns:
+        print(f"{name:<16}{legacy_memory[name] / 1e6:>10.2f}MB{typed_memory[name] / 1e6:>10.2f}MB  {typed[name].dtype}")
+    dropped = legacy_memory.drop(['Index', *typed.columns]).sum()
+    print(f"{'(descartadas)':<16}{dropped / 1e6:>10.2f}MB{0:>10.2f}MB")
+    print(f"{'Total':<16}{legacy_memory.sum() / 1e6:>10.2f}MB{typed_memory.sum() / 1e6:>10.2f}MB"
+          f"  ({legacy_memory.sum() / typed_memory.sum():.1f}x menos)")
+    print(f"Armar DataFrame: {legacy_s * 1000:.0f}ms -> {typed_s * 1000:.0f}ms")
+    print(f"Buscar header: {legacy_header_s * 1e6:.0f}µs -> {header_s * 1e6:.0f}µs")
+    print(f"Mismas filas que el cargador anterior: {same_rows}")
+
+    sys.exit(0 if same_rows else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark de arranque de la app.
+
+Cada escenario corre en un proceso nuevo de Python:
+- Con ``-X importtime`` para sumar el tiempo de importación y listar los
+  módulos más caros.
+- Sin instrumentar, para medir el tiempo hasta el primer cuadro (imports que
+  main.py necesita antes de dibujar) y hasta el primer escaneo (base de datos
+  abierta y ocupación consultada).
+
+"antes" reproduce el arranque con imports ansiosos (core/__init__ cargaba
+db_manager y pallet_ordering, que a su vez cargaban pandas y numpy; SheetsManager
+cargaba gspread y google-auth al importarse). "ahora" usa los imports perezosos.
+Flet se importa solo si está instalado; sin él, el primer cuadro mide lo demás.
+
+Uso:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 8]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'numpy', 'gspread', 'google.oauth2')
+
+EAGER_IMPORTS = '''
+import numpy, pandas, gspread
+from google.oauth2 import service_account
+import core.truck_assignment, core.pallet_ordering, core.db_manager, core.occupancy_index
+import core.sheets_manager
+import utils.svg_parser, utils.layout_model
+'''
+
+LAZY_IMPORTS = '''
+import core, utils
+'''
+
+FIRST_FRAME = '''
+import asyncio
+try:
+    import flet
+except ImportError:
+    pass
+from ui.update_batcher import UpdateBatcher
+'''
+
+FIRST_SCAN = '''
+from core import DatabaseManager, TruckPalletIndex, validate_pallet_can_scan
+db = DatabaseManager(DB_PATH)
+index = TruckPalletIndex('T1', [str(100 + i) for i in range(1, 115)])
+validate_pallet_can_scan(index.get_index('101'), 'C1', ['C1-1'])
+db.is_pallet_scanned('T1', '101')
+db.get_location_assignments()
+'''
+
+REPORT = '''
+import sys
+print('LOADED=' + ','.join(m for m in HEAVY_MODULES if m in sys.modules))
+'''
+
+SCENARIOS = {
+    'antes': EAGER_IMPORTS,
+    'ahora': LAZY_IMPORTS
+}
+
+
+def _script(imports: str, stage: str, db_path: str) -> str:
+    body = imports + FIRST_FRAME
+    if stage == 'scan':
+        body += FIRST_SCAN
+    header = (
+        f'import sys, contextlib, io\n'
+        f'sys.path.insert(0, {ROOT!r})\n'
+        f'DB_PATH = {db_path!r}\n'
+        f'HEAVY_MODULES = {HEAVY_MODULES!r}\n'
+    )
+    # Los mensajes de la app no forman parte de la medición
+    indented = ''.join(f'    {line}\n' for line in body.strip().splitlines())
+    return header + 'with contextlib.redirect_stdout(io.StringIO()):\n' + indented + REPORT
+
+
+def _run(script: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    return subprocess.run(command + ['-c', script], capture_output=True, text=True, check=True)
+
+
+def wall_time(script: str, repeat: int) -> float:
+    """Mejor tiempo total del proceso (incluye el arranque del intérprete)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(script)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def import_profile(script: str) -> dict:
+    """
+    Ejecuta el script con -X importtime.
+
+    Returns:
+        Dict con 'total_ms' (suma de imports de primer nivel), 'top' (módulos
+        de primer nivel con mayor tiempo acumulado) y 'loaded' (módulos pesados
+        presentes al terminar)
+    """
+    result = _run(script, importtime=True)
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        # Los imports anidados vienen indentados bajo su padre
+        if not raw_name.startswith('   '):
+            top_level.append((int(cumulative_us), raw_name.strip()))
+
+    loaded = ''
+    for line in result.stdout.splitlines():
+        if line.startswith('LOADED='):
+            loaded = line[len('LOADED='):]
+
+    top_level.sort(reverse=True)
+    return {
+        'total_ms': sum(us for us, _ in top_level) / 1000,
+        'top': top_level,
+        'loaded': loaded or '-'
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    try:
+        import flet  # noqa: F401
+    except ImportError:
+        print("ℹ️ Flet no está instalado: el primer cuadro no incluye su import")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, imports in SCENARIOS.items():
+            db_path = os.path.join(tmp, f'{name}.db')
+            profile = import_profile(_script(imports, 'scan', db_path))
+            results[name] = {
+                'profile': profile,
+                'frame_s': wall_time(_script(imports, 'frame', db_path), args.repeat),
+                'scan_s': wall_time(_script(imports, 'scan', db_path), args.repeat)
+            }
+
+    print(f"{'Escenario':<10}{'importtime':>12}{'Primer cuadro':>15}{'Primer escaneo':>16}  Módulos pesados")
+    for name, r in results.items():
+        print(f"{name:<10}{r['profile']['total_ms']:>10.0f}ms{r['frame_s'] * 1000:>13.0f}ms"
+              f"{r['scan_s'] * 1000:>14.0f}ms  {r['profile']['loaded']}")
+
+    for name, r in results.items():
+        print(f"\nImports más caros ({name}):")
+        for us, module in r['profile']['top'][:args.top]:
+            print(f"  {us / 1000:>8.1f}ms  {module}")
+
+    before, after = results['antes'], results['ahora']
+    print(f"\nPrimer cuadro: {before['frame_s'] / after['frame_s']:.1f}x más rápido; "
+          f"primer escaneo: {before['scan_s'] / after['scan_s']:.1f}x más rápido")
+
+    # El escaneo no debe cargar pandas ni las librerías de Google
+    sys.exit(0 if after['profile']['loaded'] == '-' else 1)
+
+
+if __name__ == '__main__':
+    main()
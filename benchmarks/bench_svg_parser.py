@@ -0,0 +1,124 @@
+"""
+Benchmark del parser de layouts SVG.
+
+Genera un SVG sintético al estilo de un export de CAD (ver
+generators.layout_svg) y compara el parser anterior (regex sobre el XML +
+árbol completo) contra el parser en streaming.
+Verifica que ambos produzcan las mismas ubicaciones y formas.
+
+Uso:
+    python benchmarks/bench_svg_parser.py [--elements 50000] [--repeat 3]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import LOCATIONS_PER_TRUCK, layout_svg
+from utils.svg_parser import parse_svg_layout
+
+# rect con ID + texto + línea de decoración por ubicación
+ELEMENTS_PER_LOCATION = 3
+
+
+def legacy_parse_svg_xml(xml_content: str):
+    """Copia del parser anterior, para comparar."""
+    xml_content = re.sub(r'xmlns="[^"]+"', '', xml_content)
+    xml_content = re.sub(r'xmlns:[\w]+="[^"]+"', '', xml_content)
+
+    root = ET.fromstring(xml_content)
+
+    locations = []
+    shapes_data = []
+    for element in root.iter():
+        element_id = element.get('id', '')
+        if re.match(r'^C\d+-\d+$', element_id):
+            locations.append(element_id)
+            shape_info = {'ubicacion': element_id}
+            tag = element.tag.split('}')[-1] if '}' in element.tag else element.tag
+            if tag == 'rect':
+                shape_info['type'] = 'rect'
+                shape_info['x'] = float(element.get('x', 0))
+                shape_info['y'] = float(element.get('y', 0))
+                shape_info['width'] = float(element.get('width', 50))
+                shape_info['height'] = float(element.get('height', 30))
+                shape_info['fill'] = element.get('fill', '#cccccc')
+                shape_info['stroke'] = element.get('stroke', '#666666')
+            elif tag == 'polygon':
+                shape_info['type'] = 'polygon'
+                points_str = element.get('points', '')
+                shape_info['points'] = points_str.split()
+                shape_info['fill'] = element.get('fill', '#cccccc')
+                shape_info['stroke'] = element.get('stroke', '#666666')
+            elif tag == 'circle':
+                shape_info['type'] = 'circle'
+                shape_info['cx'] = float(element.get('cx', 0))
+                shape_info['cy'] = float(element.get('cy', 0))
+                shape_info['r'] = float(element.get('r', 20))
+                shape_info['fill'] = element.get('fill', '#cccccc')
+                shape_info['stroke'] = element.get('stroke', '#666666')
+            elif tag == 'text':
+                shape_info['type'] = 'text'
+                shape_info['x'] = float(element.get('x', 0))
+                shape_info['y'] = float(element.get('y', 0))
+                shape_info['content'] = element.text or element_id
+            else:
+                shape_info['type'] = 'unknown'
+                shape_info['x'] = float(element.get('x', 0))
+                shape_info['y'] = float(element.get('y', 0))
+            shapes_data.append(shape_info)
+
+    locations.sort(key=lambda x: (int(x.split('-')[0][1:]), int(x.split('-')[1])))
+    return locations, shapes_data
+
+
+def _measure(func, xml_content: str, repeat: int) -> dict:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(xml_content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(xml_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': best, 'peak_mb': peak / 1e6, 'result': result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--elements', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    layout_trucks = max(1, args.elements // (ELEMENTS_PER_LOCATION * LOCATIONS_PER_TRUCK))
+    xml_content = layout_svg(layout_trucks)
+    print(f"SVG sintético: {args.elements:,} elementos, {len(xml_content) / 1e6:.1f} MB")
+
+    legacy = _measure(legacy_parse_svg_xml, xml_content, args.repeat)
+    streaming = _measure(
+        lambda content: (lambda r: (r[0].locations, r[1]))(parse_svg_layout(content)),
+        xml_content, args.repeat
+    )
+
+    same = legacy['result'] == streaming['result']
+
+    print(f"{'Parser':<12}{'Tiempo':>10}{'Memoria pico':>15}")
+    for name, metrics in (('anterior', legacy), ('streaming', streaming)):
+        print(f"{name:<12}{metrics['seconds'] * 1000:>8.0f}ms{metrics['peak_mb']:>12.1f} MB")
+    print(f"Aceleración: {legacy['seconds'] / streaming['seconds']:.1f}x")
+    print(f"Ubicaciones: {len(streaming['result'][0]):,} - resultados idénticos: {'sí' if same else 'NO'}")
+
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Generadores de datos sintéticos para los benchmarks.
+
+Todos son deterministas (semilla fija) para que dos corridas midan
+exactamente los mismos datos:
+- Shipments de N camiones del packing list x M pallets, en el formato de
+  get_all_values (título, header y filas).
+- Escaneos listos para register_pallet_scan / register_pallet_scans_bulk.
+- Layouts SVG de K camiones del layout x 57 ubicaciones, al estilo de un
+  export de CAD (grupos, namespace, decoraciones sin ID).
+- Formas de un almacén de K camiones acomodados en cuadrícula, en el
+  formato de shapes_data.
+- Códigos de pallet con la mezcla de formatos que llegan del escáner.
+"""
+
+import random
+from typing import Dict, Iterator, List, Tuple
+
+PALLETS_PER_TRUCK = 114
+LOCATIONS_PER_TRUCK = 57
+
+SHIPMENT_HEADERS = ['CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus']
+
+
+def pallet_number(position: int) -> str:
+    """Número de pallet de una posición (1-based) dentro del camión."""
+    return str(100 + position)
+
+
+def serials(truck: int, position: int) -> Tuple[str, str]:
+    """Primer y último serial de un pallet."""
+    return f'SN{truck:05d}{position:03d}A', f'SN{truck:05d}{position:03d}Z'
+
+
+def shipment_values(
+    trucks: int,
+    pallets: int = PALLETS_PER_TRUCK,
+    seed: int = 7,
+    shuffle: bool = True
+) -> List[List[str]]:
+    """
+    Valores de una hoja de shipment, como los retorna get_all_values.
+
+    Args:
+        trucks: Camiones del packing list (T1..TN)
+        pallets: Pallets por camión
+        seed: Semilla del orden de las filas
+        shuffle: Desordenar los pallets de cada camión (como en el sheet real)
+
+    Returns:
+        Filas: título, header y una fila por pallet
+    """
+    rng = random.Random(seed)
+    values = [['Shipment sintético'], list(SHIPMENT_HEADERS)]
+    for truck in range(1, trucks + 1):
+        positions = list(range(1, pallets + 1))
+        if shuffle:
+            rng.shuffle(positions)
+        for position in positions:
+            values.append([f'T{truck}', pallet_number(position), *serials(truck, position), ''])
+    return values
+
+
+def truck_scans(truck: int, layout_trucks: int = 20, pallets: int = PALLETS_PER_TRUCK) -> List[Dict]:
+    """
+    Escaneos de un camión completo para register_pallet_scans_bulk.
+
+    El camión T{truck} va al camión del layout C{truck % layout_trucks + 1}.
+    """
+    layout = f'C{truck % layout_trucks + 1}'
+    return [
+        {
+            'packing_truck_id': f'T{truck}',
+            'layout_truck_id': layout,
+            'pallet_number': pallet_number(i),
+            'pallet_sequence_index': i,
+            'first_serial': serials(truck, i)[0],
+            'last_serial': serials(truck, i)[1]
+        }
+        for i in range(1, pallets + 1)
+    ]
+
+
+def scan_rows(count: int, layout_trucks: int = 20, pallets: int = PALLETS_PER_TRUCK) -> Iterator[tuple]:
+    """
+    Filas de escaneo en el orden de argumentos de register_pallet_scan.
+
+    (packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
+    first_serial, last_serial, ubicacion, slot)
+    """
+    for i in range(count):
+        truck, position = divmod(i, pallets)
+        index = position + 1
+        layout = truck % layout_trucks + 1
+        first, last = serials(truck, index)
+        yield (
+            f'T{truck}', f'C{layout}', pallet_number(index), index,
+            first, last, f'C{layout}-{(index + 1) // 2}', (index - 1) % 2 + 1
+        )
+
+
+def layout_svg(layout_trucks: int, locations: int = LOCATIONS_PER_TRUCK) -> str:
+    """
+    SVG de un layout con K camiones x ``locations`` ubicaciones.
+
+    Por cada ubicación: un rect con ID CX-Y, un texto sin ID y una línea de
+    decoración; cada camión va en un grupo con transform.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink" width="20000" height="20000">'
+    ]
+    for truck in range(layout_trucks):
+        parts.append(f'<g id="grupo-{truck + 1}" transform="translate({truck * 700},0)">')
+        for position in range(locations):
+            x = (position % 10) * 60
+            y = (position // 10) * 40
+            parts.append(
+                f'<rect id="C{truck + 1}-{position + 1}" x="{x}" y="{y}" '
+                f'width="50" height="30" fill="#eeeeee" stroke="#333333"/>'
+            )
+            parts.append(f'<text x="{x + 25}" y="{y + 15}">{position + 1}</text>')
+            parts.append(f'<line x1="{x}" y1="{y}" x2="{x + 50}" y2="{y}"/>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def layout_locations(layout_trucks: int, locations: int = LOCATIONS_PER_TRUCK) -> List[str]:
+    """Ubicaciones de un layout de K camiones (ej: ['C1-1', 'C1-2', ...])."""
+    return [f'C{truck}-{position}' for truck in range(1, layout_trucks + 1)
+            for position in range(1, locations + 1)]
+
+
+def layout_shapes(
+    layout_trucks: int,
+    locations: int = LOCATIONS_PER_TRUCK,
+    trucks_per_row: int = 10
+) -> Tuple[List[str], List[Dict]]:
+    """
+    Layout de K camiones acomodados en cuadrícula (coordenadas absolutas).
+
+    Cada camión es un bloque de 10 columnas de ubicaciones; cada ubicación
+    tiene un rect y una etiqueta, como create_simple_layout_from_text.
+
+    Returns:
+        Tuple (locations, shapes_data)
+    """
+    names = []
+    shapes_data = []
+    for truck in range(layout_trucks):
+        block_x = (truck % trucks_per_row) * 700
+        block_y = (truck // trucks_per_row) * (-(-locations // 10) * 40 + 60)
+        for position in range(locations):
+            ubicacion = f'C{truck + 1}-{position + 1}'
+            x = block_x + (position % 10) * 60
+            y = block_y + (position // 10) * 40
+            names.append(ubicacion)
+            shapes_data.append({
+                'type': 'rect', 'ubicacion': ubicacion, 'x': x, 'y': y,
+                'width': 50, 'height': 30, 'fill': '#eeeeee', 'stroke': '#333333'
+            })
+            shapes_data.append({
+                'type': 'text', 'ubicacion': ubicacion, 'x': x + 25, 'y': y + 15,
+                'content': str(position + 1)
+            })
+    return names, shapes_data
+
+
+def pallet_codes(count: int, seed: int = 7) -> List[str]:
+    """Códigos de pallet con la mezcla de formatos que llegan del escáner."""
+    rng = random.Random(seed)
+    formats = [
+        lambda n: f'PALLET{n:03d}',
+        lambda n: f'PLT-{n:03d}',
+        lambda n: f'P_{n:03d}',
+        lambda n: str(n),
+        lambda n: f'SN{rng.randint(10**6, 10**7)}-P{n:02d}X',
+        lambda n: f'plt_{n}',
+        lambda n: f'LOTE {rng.randint(1, 9)} P-{n:02d} OK',
+    ]
+    return [rng.choice(formats)(rng.randint(1, 120)) for _ in range(count)]
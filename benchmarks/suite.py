@@ -0,0 +1,380 @@
+"""
+Suite de benchmarks de los caminos críticos de core y utils.
+
+Mide, a varias escalas de datos sintéticos (ver generators):
+- register_pallet_scan: un escaneo por llamada sobre una base nueva
+- is_pallet_scanned: búsqueda de pallets escaneados
+- assign_packing_truck_to_layout: asignación de camiones al layout
+- get_location_assignments: ocupación completa del layout
+- parse_svg_xml: parseo de un layout SVG de K camiones x 57 ubicaciones
+- get_pallet_sequence_index: índice secuencial con TruckPalletIndex
+
+El resultado se escribe como JSON (µs por operación, mejor de varias
+rondas). Cada ronda de un caso va precedida por una ronda de una carga de
+referencia fija; la comparación usa la mediana de (caso / referencia) por
+ronda, así los cambios de velocidad de la máquina durante la corrida
+(frecuencia de CPU, otros procesos) afectan a ambos por igual. Con
+--baseline se compara contra un resultado guardado y el proceso termina con
+código 1 si algún caso es más lento que la tolerancia.
+
+Uso:
+    python benchmarks/suite.py [--scales small medium] [--output resultados.json]
+    python benchmarks/suite.py --baseline benchmarks/baseline.json [--tolerance 0.5]
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import (
+    LOCATIONS_PER_TRUCK,
+    PALLETS_PER_TRUCK,
+    layout_svg,
+    pallet_number,
+    scan_rows,
+    shipment_values,
+    truck_scans
+)
+from core.connection_pool import close_all_connections
+from core.db_manager import DatabaseManager
+from core.pallet_ordering import ShipmentPalletIndex, get_pallet_sequence_index
+from core.records import ShipmentTable
+from core.truck_assignment import assign_packing_truck_to_layout
+from utils.svg_parser import parse_svg_xml
+
+SUITE_FORMAT = 2
+
+# Camiones del packing list y del layout por escala
+SCALES = {
+    'small': {'packing_trucks': 10, 'layout_trucks': 20},
+    'medium': {'packing_trucks': 50, 'layout_trucks': 60},
+    'large': {'packing_trucks': 200, 'layout_trucks': 200}
+}
+
+DEFAULT_SCALES = ('small', 'medium')
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_ROUNDS = 7
+
+# Cada ronda repite el caso hasta durar al menos esto, para que las
+# operaciones de pocos µs no queden dominadas por el ruido
+MIN_ROUND_SECONDS = 0.2
+
+
+def _quiet():
+    """Silencia los mensajes de la app durante la medición."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _measure(run: Callable[[], int], rounds: int) -> Dict:
+    """
+    Ejecuta ``run`` en varias rondas; cada llamada retorna cuántas operaciones hizo.
+
+    Antes de cada ronda se mide la carga de referencia (reference_us).
+
+    Returns:
+        Dict con 'ops', 'us_per_op' (mejor ronda), 'us_per_op_median' y
+        'ratio' (mediana de µs por operación / µs de la referencia, la
+        medida que se compara contra la línea base)
+    """
+    samples = []
+    ratios = []
+    ops = 0
+    for _ in range(rounds):
+        reference = reference_us()
+        ops = 0
+        start = time.perf_counter()
+        with _quiet():
+            while True:
+                ops += run()
+                elapsed = time.perf_counter() - start
+                if elapsed >= MIN_ROUND_SECONDS:
+                    break
+        samples.append(elapsed / ops * 1e6)
+        ratios.append(samples[-1] / reference)
+    return {
+        'ops': ops,
+        'us_per_op': min(samples),
+        'us_per_op_median': statistics.median(samples),
+        'ratio': statistics.median(ratios)
+    }
+
+
+def _reference_load():
+    """Carga fija de Python puro y SQLite en memoria (como los casos)."""
+    table = {f'k{i}': i for i in range(5000)}
+    sorted(table.items(), key=lambda item: -item[1])
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (k TEXT PRIMARY KEY, v INTEGER)')
+    conn.executemany('INSERT INTO t VALUES (?, ?)', table.items())
+    for i in range(0, 5000, 10):
+        conn.execute('SELECT v FROM t WHERE k = ?', (f'k{i}',)).fetchone()
+    conn.close()
+
+
+def reference_us(repeat: int = 3) -> float:
+    """Tiempo (µs) de la carga de referencia, mejor de ``repeat``."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _reference_load()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+class _TempDatabase:
+    """Base de datos temporal; cada ronda usa un archivo nuevo."""
+
+    def __init__(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._count = 0
+
+    def new_path(self) -> str:
+        self._count += 1
+        return os.path.join(self._dir.name, f'scans_{self._count}.db')
+
+    def close(self):
+        close_all_connections()
+        self._dir.cleanup()
+
+
+def _populated_db(path: str, packing_trucks: int, layout_trucks: int) -> DatabaseManager:
+    """Base con todos los camiones del packing list escaneados."""
+    db = DatabaseManager(path)
+    with _quiet():
+        for truck in range(packing_trucks):
+            db.register_pallet_scans_bulk(truck_scans(truck, layout_trucks))
+    return db
+
+
+def case_register_pallet_scan(scale: Dict, rounds: int, tmp: _TempDatabase) -> Dict:
+    rows = list(scan_rows(scale['packing_trucks'] * PALLETS_PER_TRUCK, scale['layout_trucks']))
+
+    def run():
+        db = DatabaseManager(tmp.new_path())
+        for row in rows:
+            db.register_pallet_scan(*row)
+        return len(rows)
+
+    return _measure(run, rounds)
+
+
+def case_is_pallet_scanned(scale: Dict, rounds: int, tmp: _TempDatabase) -> Dict:
+    db = _populated_db(tmp.new_path(), scale['packing_trucks'], scale['layout_trucks'])
+    # Mitad de las búsquedas encuentran el pallet, mitad no
+    lookups = [
+        (f'T{truck}', pallet_number(position))
+        for truck in range(scale['packing_trucks'] * 2)
+        for position in range(1, PALLETS_PER_TRUCK + 1, 3)
+    ]
+
+    def run():
+        for truck, pallet in lookups:
+            db.is_pallet_scanned(truck, pallet)
+        return len(lookups)
+
+    return _measure(run, rounds)
+
+
+def case_assign_packing_truck_to_layout(scale: Dict, rounds: int, tmp: _TempDatabase) -> Dict:
+    layout_trucks = list(range(1, scale['layout_trucks'] + 1))
+    # Se asignan hasta llenar el layout y cada camión se pide dos veces
+    requests = [f'P{n}' for n in range(scale['layout_trucks'])] * 2
+
+    def run():
+        db_path = tmp.new_path()
+        DatabaseManager(db_path)
+        for packing_truck_id in requests:
+            assign_packing_truck_to_layout(packing_truck_id, layout_trucks, db_path)
+        return len(requests)
+
+    return _measure(run, rounds)
+
+
+def case_get_location_assignments(scale: Dict, rounds: int, tmp: _TempDatabase) -> Dict:
+    db = _populated_db(tmp.new_path(), scale['packing_trucks'], scale['layout_trucks'])
+    calls = 20
+
+    def run():
+        for _ in range(calls):
+            db.get_location_assignments()
+        return calls
+
+    return _measure(run, rounds)
+
+
+def case_parse_svg_xml(scale: Dict, rounds: int, tmp: _TempDatabase) -> Dict:
+    content = layout_svg(scale['layout_trucks'])
+    expected = scale['layout_trucks'] * LOCATIONS_PER_TRUCK
+
+    def run():
+        locations, _ = parse_svg_xml(content)
+        assert len(locations) == expected
+        return 1
+
+    return _measure(run, rounds)
+
+
+def case_get_pallet_sequence_index(scale: Dict, rounds: int, tmp: _TempDatabase) -> Dict:
+    pallet_index = ShipmentPalletIndex()
+    pallet_index.load(ShipmentTable.from_values(shipment_values(scale['packing_trucks']), 1))
+    lookups = [
+        (pallet_index.get(f'T{truck}'), pallet_number(position))
+        for truck in range(1, scale['packing_trucks'] + 1)
+        for position in range(1, PALLETS_PER_TRUCK + 1)
+    ]
+
+    def run():
+        for truck_index, pallet in lookups:
+            get_pallet_sequence_index(pallet, truck_index)
+        return len(lookups)
+
+    return _measure(run, rounds)
+
+
+CASES = {
+    'register_pallet_scan': case_register_pallet_scan,
+    'is_pallet_scanned': case_is_pallet_scanned,
+    'assign_packing_truck_to_layout': case_assign_packing_truck_to_layout,
+    'get_location_assignments': case_get_location_assignments,
+    'parse_svg_xml': case_parse_svg_xml,
+    'get_pallet_sequence_index': case_get_pallet_sequence_index
+}
+
+
+def run_suite(scales: List[str], cases: List[str], rounds: int) -> Dict:
+    """
+    Ejecuta los casos indicados en cada escala.
+
+    Returns:
+        Dict serializable a JSON con 'meta' y 'results'
+        ({caso: {escala: {'ops', 'us_per_op', 'us_per_op_median', 'ratio'}}})
+    """
+    results = {}
+    for name in cases:
+        results[name] = {}
+        for scale_name in scales:
+            tmp = _TempDatabase()
+            try:
+                results[name][scale_name] = CASES[name](SCALES[scale_name], rounds, tmp)
+            finally:
+                tmp.close()
+            print(f"  {name:<34}{scale_name:<8}{results[name][scale_name]['us_per_op']:>12.1f} µs/op",
+                  file=sys.stderr)
+    return {
+        'meta': {
+            'format': SUITE_FORMAT,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rounds': rounds,
+            'reference_us': reference_us(),
+            'scales': {name: SCALES[name] for name in scales},
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, normalize: bool = True) -> List[Dict]:
+    """
+    Compara un resultado contra la línea base.
+
+    Solo se comparan los casos y escalas presentes en ambos. Con normalize
+    se compara la mediana de (caso / referencia) de cada corrida, así una
+    máquina más lenta (o con otra frecuencia de CPU) no aparece como
+    regresión; sin normalize, las medianas de µs por operación.
+
+    Returns:
+        Lista de filas {'case', 'scale', 'baseline_us', 'current_us', 'ratio', 'regression'}
+    """
+    rows = []
+    for name, scales in current['results'].items():
+        for scale_name, metrics in scales.items():
+            base = baseline.get('results', {}).get(name, {}).get(scale_name)
+            if base is None:
+                continue
+            if normalize:
+                ratio = metrics['ratio'] / base['ratio']
+            else:
+                ratio = metrics['us_per_op_median'] / base['us_per_op_median']
+            rows.append({
+                'case': name,
+                'scale': scale_name,
+                'baseline_us': base['us_per_op_median'],
+                'current_us': metrics['us_per_op_median'],
+                'ratio': ratio,
+                'regression': ratio > 1 + tolerance
+            })
+    return rows
+
+
+def _write_json(path: str, data: Dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=list(DEFAULT_SCALES))
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--output', help="Archivo JSON de resultados (default: salida estándar)")
+    parser.add_argument('--baseline', help="JSON de línea base para detectar regresiones")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Lentitud permitida sobre la línea base (0.5 = 50%%)")
+    parser.add_argument('--no-normalize', action='store_true',
+                        help="Compara tiempos absolutos, sin la carga de referencia")
+    parser.add_argument('--save-baseline', help="Guarda el resultado como nueva línea base")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('format') != SUITE_FORMAT:
+            print(f"❌ {args.baseline} es de otro formato; regenerarla con --save-baseline",
+                  file=sys.stderr)
+            sys.exit(1)
+
+    print("Ejecutando suite de benchmarks...", file=sys.stderr)
+    current = run_suite(args.scales, args.cases, args.rounds)
+
+    if args.output:
+        _write_json(args.output, current)
+    if args.save_baseline:
+        _write_json(args.save_baseline, current)
+        print(f"✅ Línea base guardada en {args.save_baseline}", file=sys.stderr)
+    if not args.output and not args.save_baseline:
+        print(json.dumps(current, indent=2, sort_keys=True))
+
+    if baseline is None:
+        return
+
+    rows = compare(current, baseline, args.tolerance, normalize=not args.no_normalize)
+    print(f"\n{'Caso':<34}{'Escala':<8}{'Base':>10}{'Actual':>10}{'Cambio':>9}", file=sys.stderr)
+    for row in rows:
+        mark = '  ❌' if row['regression'] else ''
+        print(f"{row['case']:<34}{row['scale']:<8}{row['baseline_us']:>8.1f}µs{row['current_us']:>8.1f}µs"
+              f"{(row['ratio'] - 1) * 100:>+8.0f}%{mark}", file=sys.stderr)
+
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        print(f"❌ {len(regressions)} regresiones sobre la tolerancia de {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Sin regresiones ({len(rows)} casos comparados)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,85 @@
-"""Core modules for warehouse management system."""
-
-from .truck_assignment import (
-    get_layout_trucks_from_locations,
-    get_empty_layout_trucks,
-    assign_packing_truck_to_layout,
-    get_layout_truck_statistics
-)
-
-from .pallet_ordering import (
-    extract_pallet_number,
-    get_pallet_sequence_index,
-    calculate_location_from_index,
-    validate_pallet_can_scan
-)
-
-from .db_manager import DatabaseManager
-
-__all__ = [
-    'get_layout_trucks_from_locations',
-    'get_empty_layout_trucks',
-    'assign_packing_truck_to_layout',
-    'get_layout_truck_statistics',
-    'extract_pallet_number',
-    'get_pallet_sequence_index',
-    'calculate_location_from_index',
-    'validate_pallet_can_scan',
-    'DatabaseManager'
-]
+"""
+Core modules for warehouse management system.
+
+Los submódulos se importan en el primer acceso a cada nombre (PEP 562):
+``import core`` no carga pandas, gspread ni google-auth.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# Nombre exportado -> submódulo que lo define
+_EXPORTS = {
+    'get_layout_trucks_from_locations': 'truck_assignment',
+    'get_empty_layout_trucks': 'truck_assignment',
+    'assign_packing_truck_to_layout': 'truck_assignment',
+    'get_layout_truck_statistics': 'truck_assignment',
+    'extract_pallet_number': 'pallet_ordering',
+    'extract_pallet_numbers': 'pallet_ordering',
+    'get_pallet_sequence_index': 'pallet_ordering',
+    'calculate_location_from_index': 'pallet_ordering',
+    'validate_pallet_can_scan': 'pallet_ordering',
+    'plan_truck_locations': 'pallet_ordering',
+    'TruckPalletIndex': 'pallet_ordering',
+    'ShipmentPalletIndex': 'pallet_ordering',
+    'DatabaseManager': 'db_manager',
+    'get_occupancy_index': 'occupancy_index',
+    'LocationView': 'location_view',
+    'get_location_view': 'location_view',
+    'SerialIndex': 'serial_index',
+    'get_serial_index': 'serial_index',
+    'ScanJournal': 'scan_journal',
+    'SheetDiff': 'sheet_diff',
+    'diff_shipment_values': 'sheet_diff',
+    'build_shipment_frame': 'shipment_loader',
+    'find_header_row': 'shipment_loader',
+    'JournalSyncWorker': 'scan_journal',
+    'ScanRecord': 'records',
+    'ScanTable': 'records',
+    'ShipmentTable': 'records',
+    'SequenceTracker': 'sequence_tracker',
+    'SequenceTrackers': 'sequence_tracker'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    submodule = _EXPORTS.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{submodule}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .truck_assignment import (
+        get_layout_trucks_from_locations,
+        get_empty_layout_trucks,
+        assign_packing_truck_to_layout,
+        get_layout_truck_statistics
+    )
+    from .pallet_ordering import (
+        extract_pallet_number,
+        extract_pallet_numbers,
+        get_pallet_sequence_index,
+        calculate_location_from_index,
+        validate_pallet_can_scan,
+        plan_truck_locations,
+        TruckPalletIndex,
+        ShipmentPalletIndex
+    )
+    from .db_manager import DatabaseManager
+    from .occupancy_index import get_occupancy_index
+    from .location_view import LocationView, get_location_view
+    from .serial_index import SerialIndex, get_serial_index
+    from .scan_journal import ScanJournal, JournalSyncWorker
+    from .sheet_diff import SheetDiff, diff_shipment_values
+    from .shipment_loader import build_shipment_frame, find_header_row
+    from .records import ScanRecord, ScanTable, ShipmentTable
+    from .sequence_tracker import SequenceTracker, SequenceTrackers
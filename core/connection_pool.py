@@ -0,0 +1,247 @@
+"""
+Módulo de conexiones SQLite compartidas.
+
+Mantiene, por cada archivo de base de datos, una conexión de escritura de larga
+duración y un pequeño pool de conexiones de lectura. Todas las conexiones usan
+modo WAL (lectores concurrentes mientras se escribe) y pragmas ajustados para
+escaneo de alta frecuencia.
+
+Como las conexiones viven durante toda la sesión, la caché de sentencias
+preparadas de sqlite3 (``cached_statements``) se reutiliza entre llamadas:
+la misma consulta SQL solo se compila una vez por conexión.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+# Tamaño del pool de lectores por base de datos
+READER_POOL_SIZE = 4
+
+# Número de sentencias preparadas que se mantienen compiladas por conexión
+STATEMENT_CACHE_SIZE = 256
+
+# Segundos que se espera un lock de otra conexión/proceso antes de fallar
+BUSY_TIMEOUT = 5.0
+
+# Pragmas aplicados a todas las conexiones
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous = NORMAL',   # Seguro con WAL, evita fsync por commit
+    'PRAGMA cache_size = -8000',     # ~8 MB de caché de páginas
+    'PRAGMA mmap_size = 67108864',   # 64 MB de lectura mapeada en memoria
+    'PRAGMA temp_store = MEMORY',
+)
+
+
+def _is_memory_database(db_path: str) -> bool:
+    """Indica si la ruta apunta a una base de datos en memoria."""
+    return db_path == ':memory:' or db_path.startswith('file::memory:')
+
+
+class ConnectionManager:
+    """
+    Conexiones compartidas para un archivo de base de datos.
+
+    - Una sola conexión de escritura, serializada con un lock.
+    - Hasta ``pool_size`` conexiones de lectura reutilizables.
+
+    Las conexiones se abren en modo autocommit (``isolation_level=None``);
+    las escrituras deben hacerse dentro de ``transaction()``.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = READER_POOL_SIZE):
+        """
+        Inicializa el gestor de conexiones.
+
+        Args:
+            db_path: Ruta al archivo de base de datos SQLite
+            pool_size: Número máximo de conexiones de lectura
+        """
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+
+        self._write_lock = threading.RLock()
+        self._pool_lock = threading.Lock()
+        self._writer = None
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+
+        # Una base de datos en memoria solo existe dentro de su conexión,
+        # así que los lectores comparten la conexión de escritura.
+        self._shared_connection = _is_memory_database(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión nueva con los pragmas del módulo."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            uri=self.db_path.startswith('file:')
+        )
+
+        if not self._shared_connection:
+            conn.execute('PRAGMA journal_mode = WAL')
+
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        """Retorna la conexión de escritura, creándola si no existe."""
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    @contextmanager
+    def transaction(self, mode: str = 'DEFERRED') -> Iterator[sqlite3.Connection]:
+        """
+        Ejecuta un bloque dentro de una transacción de escritura.
+
+        Hace COMMIT al salir del bloque o ROLLBACK si se lanza una excepción.
+
+        Args:
+            mode: Tipo de transacción SQLite ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+        Yields:
+            Conexión de escritura
+        """
+        with self._write_lock:
+            conn = self._get_writer()
+            conn.execute(f'BEGIN {mode}')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+
+    def data_version(self) -> int:
+        """
+        Versión de los datos vista por la conexión de escritura.
+
+        SQLite la cambia cuando otra conexión confirma cambios en el archivo
+        (en la práctica, otro proceso); las escrituras de este proceso pasan
+        por la conexión de escritura y no la cambian.
+
+        Returns:
+            Valor de PRAGMA data_version
+        """
+        with self._write_lock:
+            return self._get_writer().execute('PRAGMA data_version').fetchone()[0]
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Presta una conexión de lectura del pool.
+
+        Yields:
+            Conexión de solo lectura (por convención)
+        """
+        if self._shared_connection:
+            with self._write_lock:
+                yield self._get_writer()
+            return
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Toma un lector libre, abre uno nuevo o espera a que se libere uno."""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            if self._reader_count < self.pool_size:
+                self._reader_count += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._pool_lock:
+                    self._reader_count -= 1
+                raise
+
+        return self._readers.get()
+
+    def close(self):
+        """Cierra todas las conexiones abiertas."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._pool_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
+
+
+_managers: Dict[tuple, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def database_key(db_path: str) -> tuple:
+    """
+    Llave para registrar estado compartido por base de datos.
+
+    Usa la ruta absoluta y el PID, de modo que un proceso hijo nunca
+    reutiliza conexiones o cachés heredadas del padre.
+
+    Args:
+        db_path: Ruta al archivo de base de datos SQLite
+
+    Returns:
+        Tupla (pid, ruta)
+    """
+    path_key = db_path if _is_memory_database(db_path) else os.path.abspath(db_path)
+    return os.getpid(), path_key
+
+
+def get_connection_manager(db_path: str = 'scans.db') -> ConnectionManager:
+    """
+    Obtiene el gestor de conexiones compartido para una base de datos.
+
+    Args:
+        db_path: Ruta al archivo de base de datos SQLite
+
+    Returns:
+        ConnectionManager asociado a la ruta
+    """
+    key = database_key(db_path)
+
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = ConnectionManager(db_path)
+                _managers[key] = manager
+    return manager
+
+
+def close_all_connections():
+    """Cierra todas las conexiones compartidas (útil en pruebas y al salir)."""
+    with _managers_lock:
+        for manager in _managers.values():
+            manager.close()
+        _managers.clear()
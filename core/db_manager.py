@@ -5,11 +5,64 @@ Maneja la base de datos de escaneos de pallets con el esquema mejorado
 que incluye tracking de índice secuencial y relación packing_truck -> layout_truck.
 """
 
-import sqlite3
-import pandas as pd
-from typing import Optional, List, Dict, Tuple
+from typing import TYPE_CHECKING, Optional, List, Dict, Tuple, Iterable, Union
 from datetime import datetime
 
+from .connection_pool import get_connection_manager
+from .event_log import (
+    append_events,
+    clear_event,
+    create_event_log_schema,
+    deliver_event,
+    get_event_log,
+    scan_event
+)
+from .location_view import get_location_view
+from .occupancy_index import get_occupancy_index, parse_layout_truck_id
+from .pallet_ordering import (
+    as_location_set,
+    TruckPalletIndex,
+    ShipmentPalletIndex,
+    calculate_location_from_index,
+    validate_pallet_can_scan
+)
+from .records import ScanTable, ShipmentTable
+from .serial_index import get_serial_index
+from utils.metrics import increment, timed
+
+# pandas solo se usa como adaptador de exportación (get_truck_scans)
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+INSERT_SCAN_SQL = '''
+    INSERT OR REPLACE INTO pallet_scans 
+    (packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
+     first_serial, last_serial, ubicacion, slot)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+RESERVE_TRUCK_SQL = '''
+    INSERT OR IGNORE INTO truck_assignments (packing_truck_id, layout_truck_id)
+    VALUES (?, ?)
+'''
+
+# Días que se guarda una clave de la bitácora local que nadie liberó
+JOURNAL_KEY_RETENTION_DAYS = 30
+
+
+def _in_chunks(values: list, size: int = 500):
+    """
+    Parte valores para consultas con IN (?, ...) sin pasar el límite de
+    parámetros de SQLite.
+
+    Yields:
+        Tuple (marcadores '?,?,...', lista de valores)
+    """
+    for start in range(0, len(values), size):
+        chunk = list(values[start:start + size])
+        yield ','.join('?' * len(chunk)), chunk
+
 
 class DatabaseManager:
     """Gestor de base de datos SQLite para el sistema de warehouse."""
@@ -22,13 +75,20 @@ class DatabaseManager:
             db_path: Ruta al archivo de base de datos SQLite
         """
         self.db_path = db_path
+        self._db = get_connection_manager(db_path)
+        self._occupancy = get_occupancy_index(db_path)
+        self._locations = get_location_view(db_path)
+        self._serials = get_serial_index(db_path)
+        self._events = get_event_log(db_path)
         self._initialize_database()
     
     def _initialize_database(self):
         """Crea las tablas necesarias si no existen."""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
+        with self._db.transaction('IMMEDIATE') as conn:
+            self._create_schema(conn.cursor())
+    
+    def _create_schema(self, cursor):
+        """Ejecuta las sentencias DDL del esquema."""
         # Tabla de escaneos de pallets con esquema mejorado
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS pallet_scans (
@@ -62,9 +122,37 @@ class DatabaseManager:
             ON pallet_scans(ubicacion)
         ''')
         
-        conn.commit()
-        conn.close()
+        # Reserva packing_truck -> layout_truck, escrita al asignar (antes del
+        # primer escaneo) para que dos escáneres no reciban el mismo camión
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS truck_assignments (
+                packing_truck_id TEXT PRIMARY KEY,
+                layout_truck_id TEXT NOT NULL UNIQUE,
+                assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Bases de datos anteriores: reservar los camiones que ya tienen pallets
+        cursor.execute('''
+            INSERT OR IGNORE INTO truck_assignments (packing_truck_id, layout_truck_id)
+            SELECT packing_truck_id, MIN(layout_truck_id)
+            FROM pallet_scans
+            WHERE layout_truck_id IS NOT NULL
+            GROUP BY packing_truck_id
+        ''')
+        
+        # Bitácora de eventos y fotos del estado
+        create_event_log_schema(cursor)
+        
+        # Claves de idempotencia de la bitácora local (scan_journal) ya aplicadas
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS journal_applied (
+                journal_key TEXT PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
     
+    @timed('db.register_pallet_scan')
     def register_pallet_scan(
         self,
         packing_truck_id: str,
@@ -93,15 +181,7 @@ class DatabaseManager:
             True si se registró exitosamente, False en caso de error
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO pallet_scans 
-                (packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
-                 first_serial, last_serial, ubicacion, slot)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            params = (
                 str(packing_truck_id),
                 str(layout_truck_id),
                 str(pallet_number),
@@ -110,16 +190,289 @@ class DatabaseManager:
                 str(last_serial),
                 str(ubicacion),
                 int(slot)
-            ))
+            )
+            with self._db.transaction() as conn:
+                conn.execute(INSERT_SCAN_SQL, params)
+                conn.execute(RESERVE_TRUCK_SQL, (str(packing_truck_id), str(layout_truck_id)))
+                append_events(conn, [scan_event(params)])
             
-            conn.commit()
-            conn.close()
+            self._events.record_appended(1)
+            self._occupancy.record_scans([
+                (str(packing_truck_id), str(pallet_number), str(layout_truck_id))
+            ])
+            self._locations.record_scans([(params[0], params[2], params[6], params[7])])
+            self._serials.record_scans([(params[0], params[2], params[4], params[5], params[6], params[7])])
+            increment('scans.registered')
             return True
             
         except Exception as e:
             print(f"Error registrando pallet scan: {e}")
+            increment('scans.failed')
             return False
     
+    @timed('db.register_pallet_scans_bulk')
+    def register_pallet_scans_bulk(
+        self,
+        scans: Iterable[Dict],
+        shipment_df: Optional[Union[ShipmentTable, 'pd.DataFrame']] = None,
+        layout_locations: Optional[list] = None,
+        strict: bool = False,
+        pallet_index: Optional[ShipmentPalletIndex] = None
+    ) -> List[Dict]:
+        """
+        Registra muchos escaneos en una sola transacción.
+        
+        Pensado para re-enviar escaneos hechos sin conexión o cargar un camión
+        completo. Cada escaneo es un dict con:
+        - packing_truck_id, layout_truck_id, pallet_number (obligatorios)
+        - first_serial, last_serial (opcionales, se toman del shipment)
+        - pallet_sequence_index (opcional, se calcula desde el shipment)
+        
+        La ubicación y el slot siempre se calculan a partir del índice.
+        
+        Todas las filas se validan antes de escribir. Las filas válidas se
+        insertan con executemany y un único commit.
+        
+        Args:
+            scans: Iterable de dicts con los escaneos
+            shipment_df: ShipmentTable o DataFrame del shipment (columnas 'CAMION',
+                         'Pallet number', 'first_serial', 'last_serial') para
+                         calcular índices
+            layout_locations: Ubicaciones del layout para validar (lista, set o
+                              LayoutModel; opcional)
+            strict: Si es True, una sola fila inválida cancela todo el lote
+            pallet_index: Índices de pallets ya construidos para el shipment;
+                          si se indica, se usa en lugar de shipment_df
+        
+        Returns:
+            Lista con un dict de resultado por fila, en el mismo orden:
+            {'row': 0, 'packing_truck_id': 'T1', 'pallet_number': '101',
+             'success': True, 'pallet_sequence_index': 1, 'ubicacion': 'C1-1',
+             'slot': 1, 'error': None}
+        """
+        truck_indexes = {}
+        results = []
+        params = []
+        if layout_locations:
+            layout_locations = as_location_set(layout_locations)
+        if shipment_df is not None and pallet_index is None and not isinstance(shipment_df, ShipmentTable):
+            shipment_df = ShipmentTable.from_dataframe(shipment_df)
+        
+        for row_num, scan in enumerate(scans):
+            result = {
+                'row': row_num,
+                'packing_truck_id': scan.get('packing_truck_id'),
+                'pallet_number': scan.get('pallet_number'),
+                'success': False,
+                'pallet_sequence_index': None,
+                'ubicacion': None,
+                'slot': None,
+                'error': None
+            }
+            results.append(result)
+            
+            try:
+                row_params = self._prepare_bulk_row(
+                    scan, shipment_df, pallet_index, layout_locations, truck_indexes
+                )
+            except ValueError as e:
+                result['error'] = str(e)
+                continue
+            
+            result['pallet_sequence_index'] = row_params[3]
+            result['ubicacion'] = row_params[6]
+            result['slot'] = row_params[7]
+            result['success'] = True
+            params.append(row_params)
+        
+        failed = [r for r in results if not r['success']]
+        increment('scans.rejected', len(failed))
+        if strict and failed:
+            for result in results:
+                if result['success']:
+                    result['success'] = False
+                    result['error'] = "No registrado: el lote tiene filas inválidas (modo estricto)"
+            print(f"❌ Lote rechazado: {len(failed)} filas inválidas")
+            return results
+        
+        if not params:
+            return results
+        
+        try:
+            with self._db.transaction() as conn:
+                conn.executemany(INSERT_SCAN_SQL, params)
+                conn.executemany(RESERVE_TRUCK_SQL, {(p[0], p[1]) for p in params})
+                append_events(conn, map(scan_event, params))
+            self._events.record_appended(len(params))
+            self._occupancy.record_scans((p[0], p[2], p[1]) for p in params)
+            self._locations.record_scans((p[0], p[2], p[6], p[7]) for p in params)
+            self._serials.record_scans((p[0], p[2], p[4], p[5], p[6], p[7]) for p in params)
+        except Exception as e:
+            print(f"Error registrando lote de escaneos: {e}")
+            increment('scans.failed', len(params))
+            for result in results:
+                if result['success']:
+                    result['success'] = False
+                    result['error'] = f"Error de base de datos: {e}"
+            return results
+        
+        increment('scans.registered', len(params))
+        print(f"✅ Lote registrado: {len(params)} escaneos, {len(failed)} con error")
+        return results
+    
+    @timed('db.register_journaled_scans')
+    def register_journaled_scans(self, entries: Iterable[Tuple[str, tuple]]) -> Tuple[bool, Dict]:
+        """
+        Aplica escaneos de la bitácora local (ver core.scan_journal).
+        
+        Las claves ya aplicadas se saltan y las nuevas se guardan en la misma
+        transacción que los escaneos, así reenviar un lote después de un
+        corte no duplica nada.
+        
+        Args:
+            entries: Iterable de (clave, parámetros de register_pallet_scan en
+                     orden: packing, layout, pallet, índice, first, last,
+                     ubicacion, slot)
+        
+        Returns:
+            Tuple (success, resultado)
+            - resultado: {'applied': int, 'duplicates': int} o {'error': str}
+        """
+        entries = dict(entries)
+        try:
+            with self._db.transaction() as conn:
+                done = set()
+                for marks, chunk in _in_chunks(list(entries)):
+                    done.update(row[0] for row in conn.execute(
+                        f'SELECT journal_key FROM journal_applied WHERE journal_key IN ({marks})',
+                        chunk
+                    ))
+                params = [
+                    (str(p[0]), str(p[1]), str(p[2]), int(p[3]),
+                     str(p[4]), str(p[5]), str(p[6]), int(p[7]))
+                    for key, p in entries.items() if key not in done
+                ]
+                if params:
+                    conn.executemany(INSERT_SCAN_SQL, params)
+                    conn.executemany(RESERVE_TRUCK_SQL, {(p[0], p[1]) for p in params})
+                    append_events(conn, map(scan_event, params))
+                conn.executemany(
+                    'INSERT INTO journal_applied (journal_key) VALUES (?)',
+                    [(key,) for key in entries if key not in done]
+                )
+        except Exception as e:
+            print(f"Error aplicando escaneos de la bitácora: {e}")
+            increment('scans.failed', len(entries))
+            return False, {'error': str(e)}
+        
+        if params:
+            self._events.record_appended(len(params))
+            self._occupancy.record_scans((p[0], p[2], p[1]) for p in params)
+            self._locations.record_scans((p[0], p[2], p[6], p[7]) for p in params)
+            self._serials.record_scans((p[0], p[2], p[4], p[5], p[6], p[7]) for p in params)
+            increment('scans.registered', len(params))
+        return True, {'applied': len(params), 'duplicates': len(done)}
+    
+    def forget_journal_keys(self, keys: Iterable[str]) -> bool:
+        """
+        Borra claves de la bitácora local que ya no se pueden reaplicar.
+        
+        También borra las claves con más de JOURNAL_KEY_RETENTION_DAYS días
+        (las de una sesión que se cerró entre el ack y el borrado).
+        
+        Args:
+            keys: Claves liberadas por ScanJournal.take_released
+        
+        Returns:
+            True si se borraron
+        """
+        try:
+            with self._db.transaction() as conn:
+                for marks, chunk in _in_chunks(list(keys)):
+                    conn.execute(f'DELETE FROM journal_applied WHERE journal_key IN ({marks})', chunk)
+                conn.execute(
+                    "DELETE FROM journal_applied WHERE applied_at < datetime('now', ?)",
+                    (f'-{JOURNAL_KEY_RETENTION_DAYS} days',)
+                )
+            return True
+        except Exception as e:
+            print(f"Error borrando claves de la bitácora: {e}")
+            return False
+    
+    def _prepare_bulk_row(
+        self,
+        scan: Dict,
+        shipment: Optional[ShipmentTable],
+        pallet_index: Optional[ShipmentPalletIndex],
+        layout_locations: Optional[list],
+        truck_indexes: Dict
+    ) -> tuple:
+        """
+        Valida un escaneo del lote y calcula índice, ubicación y slot.
+        
+        Raises:
+            ValueError: Si el escaneo no es válido
+        
+        Returns:
+            Tupla de parámetros para INSERT_SCAN_SQL
+        """
+        packing_truck_id = scan.get('packing_truck_id')
+        layout_truck_id = scan.get('layout_truck_id')
+        pallet_number = scan.get('pallet_number')
+        
+        if packing_truck_id in (None, '') or pallet_number in (None, ''):
+            raise ValueError("Faltan packing_truck_id o pallet_number")
+        if not layout_truck_id:
+            raise ValueError("Falta layout_truck_id")
+        
+        packing_truck_id = str(packing_truck_id)
+        pallet_number = str(pallet_number)
+        layout_truck_id = str(layout_truck_id)
+        
+        truck_index = None
+        if pallet_index is not None:
+            truck_index = pallet_index.get(packing_truck_id)
+        elif shipment is not None:
+            if packing_truck_id not in truck_indexes:
+                truck_indexes[packing_truck_id] = TruckPalletIndex.from_table(packing_truck_id, shipment)
+            truck_index = truck_indexes[packing_truck_id]
+        
+        sequence_index = scan.get('pallet_sequence_index')
+        if sequence_index is None:
+            if truck_index is None:
+                raise ValueError(f"Sin datos del shipment para el camión {packing_truck_id}")
+            sequence_index = truck_index.get_index(pallet_number)
+            if sequence_index is None:
+                raise ValueError(f"Pallet {pallet_number} no existe en el camión {packing_truck_id}")
+        sequence_index = int(sequence_index)
+        
+        can_scan, message = validate_pallet_can_scan(sequence_index, layout_truck_id, layout_locations)
+        if not can_scan:
+            raise ValueError(message)
+        
+        ubicacion, slot, _ = calculate_location_from_index(sequence_index, layout_truck_id)
+        
+        first_serial = scan.get('first_serial')
+        last_serial = scan.get('last_serial')
+        pallet_info = truck_index.get_pallet(pallet_number) if truck_index is not None else None
+        if pallet_info is not None:
+            if first_serial is None:
+                first_serial = pallet_info['first_serial']
+            if last_serial is None:
+                last_serial = pallet_info['last_serial']
+        
+        return (
+            packing_truck_id,
+            layout_truck_id,
+            pallet_number,
+            sequence_index,
+            str(first_serial if first_serial is not None else ''),
+            str(last_serial if last_serial is not None else ''),
+            str(ubicacion),
+            int(slot)
+        )
+    
+    @timed('db.is_pallet_scanned')
     def is_pallet_scanned(self, packing_truck_id: str, pallet_number: str) -> bool:
         """
         Verifica si un pallet ya fue escaneado.
@@ -132,16 +485,13 @@ class DatabaseManager:
             True si ya fue escaneado, False en caso contrario
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM pallet_scans
-                WHERE packing_truck_id = ? AND pallet_number = ?
-            ''', (str(packing_truck_id), str(pallet_number)))
-            
-            count = cursor.fetchone()[0]
-            conn.close()
+            with self._db.reader() as conn:
+                cursor = conn.execute('''
+                    SELECT COUNT(*) FROM pallet_scans
+                    WHERE packing_truck_id = ? AND pallet_number = ?
+                ''', (str(packing_truck_id), str(pallet_number)))
+                
+                count = cursor.fetchone()[0]
             
             return count > 0
             
@@ -149,6 +499,7 @@ class DatabaseManager:
             print(f"Error verificando pallet: {e}")
             return False
     
+    @timed('db.get_pallet_location')
     def get_pallet_location(
         self, 
         packing_truck_id: str, 
@@ -165,16 +516,13 @@ class DatabaseManager:
             Tuple (ubicacion, slot) o (None, None) si no se encuentra
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT ubicacion, slot FROM pallet_scans
-                WHERE packing_truck_id = ? AND pallet_number = ?
-            ''', (str(packing_truck_id), str(pallet_number)))
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self._db.reader() as conn:
+                cursor = conn.execute('''
+                    SELECT ubicacion, slot FROM pallet_scans
+                    WHERE packing_truck_id = ? AND pallet_number = ?
+                ''', (str(packing_truck_id), str(pallet_number)))
+                
+                result = cursor.fetchone()
             
             if result:
                 return result[0], result[1]
@@ -184,36 +532,49 @@ class DatabaseManager:
             print(f"Error obteniendo ubicación: {e}")
             return None, None
     
-    def get_truck_scans(self, packing_truck_id: str) -> pd.DataFrame:
+    @timed('db.get_truck_scan_records')
+    def get_truck_scan_records(self, packing_truck_id: str) -> ScanTable:
         """
-        Obtiene todos los escaneos de un camión específico.
+        Obtiene todos los escaneos de un camión específico, sin pandas.
         
         Args:
             packing_truck_id: ID del camión en el packing list
         
         Returns:
-            DataFrame con los escaneos del camión
+            ScanTable con los escaneos del camión en orden secuencial
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            
-            df = pd.read_sql('''
-                SELECT * FROM pallet_scans
-                WHERE packing_truck_id = ?
-                ORDER BY pallet_sequence_index
-            ''', conn, params=(str(packing_truck_id),))
-            
-            conn.close()
-            return df
+            with self._db.reader() as conn:
+                return ScanTable.from_query(conn, 'packing_truck_id = ?', (str(packing_truck_id),))
             
         except Exception as e:
             print(f"Error obteniendo scans del camión: {e}")
-            return pd.DataFrame()
+            return ScanTable()
     
+    def get_truck_scans(self, packing_truck_id: str) -> 'pd.DataFrame':
+        """
+        Obtiene todos los escaneos de un camión como DataFrame (para reportes).
+        
+        El escaneo usa get_truck_scan_records; este método solo adapta el
+        resultado a pandas.
+        
+        Args:
+            packing_truck_id: ID del camión en el packing list
+        
+        Returns:
+            DataFrame con los escaneos del camión
+        """
+        return self.get_truck_scan_records(packing_truck_id).to_dataframe()
+    
+    @timed('db.get_location_assignments')
     def get_location_assignments(self) -> Dict[str, List[Dict]]:
         """
         Obtiene todas las asignaciones de ubicaciones.
         
+        Se arma desde la vista de ubicaciones en memoria, sin consultar
+        pallet_scans. Para repintar solo lo que cambió después de cada
+        escaneo conviene get_location_changes.
+        
         Returns:
             Dict con formato:
             {
@@ -225,40 +586,76 @@ class DatabaseManager:
             }
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT ubicacion, packing_truck_id, pallet_number, slot
-                FROM pallet_scans
-                WHERE ubicacion IS NOT NULL
-                ORDER BY ubicacion, slot
-            ''')
-            
-            assignments = {}
-            for row in cursor.fetchall():
-                ubicacion = row[0]
-                pallet_data = {
-                    'packing_truck': row[1],
-                    'pallet': row[2],
-                    'slot': row[3]
-                }
-                
-                if ubicacion not in assignments:
-                    assignments[ubicacion] = []
-                assignments[ubicacion].append(pallet_data)
-            
-            conn.close()
-            return assignments
+            return self._locations.assignments()
             
         except Exception as e:
             print(f"Error obteniendo asignaciones: {e}")
             return {}
     
+    @timed('db.get_location_changes')
+    def get_location_changes(self, since_version: int) -> Tuple[int, Optional[Dict[str, tuple]]]:
+        """
+        Obtiene las ubicaciones que cambiaron desde la última versión pintada.
+        
+        Args:
+            since_version: Versión retornada por la llamada anterior (0 la primera vez)
+        
+        Returns:
+            Tuple (versión actual, {ubicacion: (slot 1, slot 2)})
+            Cada slot es {'packing_truck', 'pallet', 'slot'} o None si quedó
+            libre. El dict es None si hay que repintar todo el layout (usar
+            get_location_assignments).
+        """
+        version, locations = self._locations.changes_since(since_version)
+        if locations is None:
+            return version, None
+        return version, {ubicacion: self._locations.get(ubicacion) for ubicacion in locations}
+    
+    @timed('db.find_serial')
+    def find_serial(self, serial: str) -> Optional[Dict]:
+        """
+        Busca en qué pallet y ubicación está una unidad por su serial.
+        
+        Usa el índice de rangos de seriales en memoria (O(log n)).
+        
+        Args:
+            serial: Serial de la unidad (ej: "SN00012345")
+        
+        Returns:
+            Dict con 'serial', 'packing_truck', 'pallet', 'ubicacion', 'slot',
+            'first_serial', 'last_serial'; o None si no está en ningún pallet
+        """
+        try:
+            return self._serials.lookup(serial)
+        except Exception as e:
+            print(f"Error buscando serial: {e}")
+            return None
+    
+    @timed('db.find_serials')
+    def find_serials(self, serials: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Busca varios seriales de una vez (por ejemplo, una lista pegada).
+        
+        Args:
+            serials: Seriales de las unidades
+        
+        Returns:
+            Dict {serial: resultado de find_serial}, en el orden recibido
+        """
+        try:
+            return self._serials.lookup_many(serials)
+        except Exception as e:
+            print(f"Error buscando seriales: {e}")
+            return {}
+    
+    @timed('db.deliver_truck')
     def deliver_truck(self, packing_truck_id: str) -> bool:
         """
         Elimina todos los registros de un camión (simula entrega/dar de baja).
-        Esto libera todas las ubicaciones del layout ocupadas por este camión.
+        Esto libera todas las ubicaciones del layout ocupadas por este camión
+        y su reserva en truck_assignments, en una sola transacción.
+        
+        Para entregar varios camiones conviene deliver_trucks.
         
         Args:
             packing_truck_id: ID del camión del packing list a entregar
@@ -266,25 +663,120 @@ class DatabaseManager:
         Returns:
             True si se eliminó exitosamente, False en caso de error
         """
+        success, _ = self.deliver_trucks([packing_truck_id])
+        return success
+    
+    @timed('db.deliver_trucks')
+    def deliver_trucks(
+        self,
+        packing_truck_ids: Iterable[str],
+        status_queue=None,
+        status: str = 'Entregado'
+    ) -> Tuple[bool, Dict]:
+        """
+        Entrega varios camiones del packing list en una sola transacción.
+        
+        Borra sus pallets y reservas, agrega un evento de entrega por camión
+        y actualiza una sola vez los índices en memoria (ocupación y vista de
+        ubicaciones). Si se indica status_queue, el estatus de todos los
+        camiones entregados se encola en un solo lote (se envía con flush).
+        
+        Args:
+            packing_truck_ids: IDs de camiones del packing list a entregar
+            status_queue: Cola de estatus hacia Sheets (StatusWriteQueue o
+                          cualquier objeto con enqueue_many); None = no encolar
+            status: Estatus a encolar para cada camión entregado
+        
+        Returns:
+            Tuple (success, resultado) donde resultado tiene:
+            - delivered: camiones entregados (tenían pallets o reserva)
+            - not_found: camiones sin registros
+            - deleted_scans: filas eliminadas de pallet_scans
+            - freed_layout_trucks: camiones del layout que quedaron vacíos (ej: ['C1', 'C4'])
+            - freed_locations: ubicaciones que quedaron libres (ej: ['C1-1', 'C1-2'])
+        """
+        result = {
+            'delivered': [],
+            'not_found': [],
+            'deleted_scans': 0,
+            'freed_layout_trucks': [],
+            'freed_locations': []
+        }
+        truck_ids = list(dict.fromkeys(
+            str(truck_id).strip() for truck_id in packing_truck_ids if str(truck_id).strip()
+        ))
+        if not truck_ids:
+            return True, result
+        
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                DELETE FROM pallet_scans
-                WHERE packing_truck_id = ?
-            ''', (str(packing_truck_id),))
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
-            
-            print(f"Entregado camión {packing_truck_id}: {deleted_count} registros eliminados")
-            return True
-            
+            with self._db.transaction() as conn:
+                found = {}
+                for marks, chunk in _in_chunks(truck_ids):
+                    for truck_id, layout_truck_id, ubicacion in conn.execute(f'''
+                        SELECT DISTINCT packing_truck_id, layout_truck_id, ubicacion
+                        FROM pallet_scans
+                        WHERE packing_truck_id IN ({marks})
+                    ''', chunk):
+                        found.setdefault(truck_id, set()).add((layout_truck_id, ubicacion))
+                    for truck_id, layout_truck_id in conn.execute(f'''
+                        SELECT packing_truck_id, layout_truck_id FROM truck_assignments
+                        WHERE packing_truck_id IN ({marks})
+                    ''', chunk):
+                        found.setdefault(truck_id, set()).add((layout_truck_id, None))
+
+                result['delivered'] = [truck_id for truck_id in truck_ids if truck_id in found]
+                result['not_found'] = [truck_id for truck_id in truck_ids if truck_id not in found]
+                layout_trucks = {row[0] for rows in found.values() for row in rows}
+                locations = {row[1] for rows in found.values() for row in rows if row[1] is not None}
+
+                params = [(truck_id,) for truck_id in result['delivered']]
+                result['deleted_scans'] = conn.executemany(
+                    'DELETE FROM pallet_scans WHERE packing_truck_id = ?', params
+                ).rowcount
+                conn.executemany('DELETE FROM truck_assignments WHERE packing_truck_id = ?', params)
+
+                # El historial de escaneos queda en la bitácora
+                append_events(conn, (deliver_event(truck_id) for truck_id in result['delivered']))
+
+                # Solo cuenta como libre lo que no siga ocupado por otro camión
+                for marks, chunk in _in_chunks(sorted(layout_trucks)):
+                    layout_trucks.difference_update(row[0] for row in conn.execute(f'''
+                        SELECT layout_truck_id FROM pallet_scans WHERE layout_truck_id IN ({marks})
+                        UNION
+                        SELECT layout_truck_id FROM truck_assignments WHERE layout_truck_id IN ({marks})
+                    ''', chunk + chunk))
+                for marks, chunk in _in_chunks(sorted(locations)):
+                    locations.difference_update(row[0] for row in conn.execute(f'''
+                        SELECT DISTINCT ubicacion FROM pallet_scans WHERE ubicacion IN ({marks})
+                    ''', chunk))
+
+            result['freed_layout_trucks'] = sorted(
+                layout_trucks,
+                key=lambda layout_truck_id: (parse_layout_truck_id(layout_truck_id) or 0, layout_truck_id)
+            )
+            result['freed_locations'] = sorted(locations)
+
         except Exception as e:
-            print(f"Error entregando camión: {e}")
-            return False
+            print(f"Error entregando camiones: {e}")
+            # La transacción se revirtió: no se entregó nada
+            result.update(delivered=[], not_found=[], deleted_scans=0,
+                          freed_layout_trucks=[], freed_locations=[])
+            return False, result
+        
+        delivered = result['delivered']
+        if delivered:
+            self._events.record_appended(len(delivered))
+            self._occupancy.record_deliveries(delivered)
+            self._locations.record_deliveries(delivered)
+            self._serials.record_deliveries(delivered)
+            increment('trucks.delivered', len(delivered))
+            
+            if status_queue is not None:
+                status_queue.enqueue_many({truck_id: status for truck_id in delivered})
+        
+        print(f"Entregados {len(delivered)} camiones: {result['deleted_scans']} registros eliminados, "
+              f"{len(result['freed_layout_trucks'])} camiones del layout libres")
+        return True, result
     
     def get_all_scanned_trucks(self) -> List[str]:
         """
@@ -294,17 +786,14 @@ class DatabaseManager:
             Lista de IDs de camiones del packing list
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT DISTINCT packing_truck_id
-                FROM pallet_scans
-                ORDER BY packing_truck_id
-            ''')
-            
-            trucks = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with self._db.reader() as conn:
+                cursor = conn.execute('''
+                    SELECT DISTINCT packing_truck_id
+                    FROM pallet_scans
+                    ORDER BY packing_truck_id
+                ''')
+                
+                trucks = [row[0] for row in cursor.fetchall()]
             
             return trucks
             
@@ -321,12 +810,16 @@ class DatabaseManager:
             True si se eliminó exitosamente
         """
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
+            with self._db.transaction() as conn:
+                conn.execute('DELETE FROM pallet_scans')
+                conn.execute('DELETE FROM truck_assignments')
+                conn.execute('DELETE FROM journal_applied')
+                append_events(conn, [clear_event()])
             
-            cursor.execute('DELETE FROM pallet_scans')
-            conn.commit()
-            conn.close()
+            self._events.record_appended(1)
+            self._occupancy.record_clear()
+            self._locations.record_clear()
+            self._serials.record_clear()
             
             print("⚠️ Base de datos limpiada completamente")
             return True
@@ -334,3 +827,39 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error limpiando base de datos: {e}")
             return False
+    
+    def get_truck_history(self, packing_truck_id: str) -> List[Dict]:
+        """
+        Obtiene el historial de eventos de un camión, incluso si ya se entregó.
+        
+        Args:
+            packing_truck_id: ID del camión en el packing list
+        
+        Returns:
+            Lista de eventos (dicts con event_type, pallet_number, ubicacion,
+            created_at, ...) en orden cronológico
+        """
+        try:
+            return self._events.get_history(packing_truck_id)
+        except Exception as e:
+            print(f"Error obteniendo historial del camión: {e}")
+            return []
+    
+    def rebuild_from_event_log(self) -> bool:
+        """
+        Reconstruye pallet_scans y truck_assignments desde la bitácora.
+        
+        Sirve para recuperar el estado tras una corrupción sin volver a escanear.
+        
+        Returns:
+            True si se reconstruyó exitosamente
+        """
+        try:
+            self._events.rebuild_tables()
+            self._occupancy.load()
+            self._locations.load()
+            self._serials.load()
+            return True
+        except Exception as e:
+            print(f"Error reconstruyendo desde la bitácora: {e}")
+            return False
@@ -0,0 +1,460 @@
+"""
+Módulo de bitácora de eventos de escaneo.
+
+Cada cambio de estado (escaneo, asignación de camión, entrega y limpieza) se
+agrega a la tabla scan_events dentro de la misma transacción que actualiza
+pallet_scans / truck_assignments. La bitácora nunca se modifica: conserva el
+historial completo aunque la entrega borre las filas de pallet_scans.
+
+Cada cierto número de eventos se guarda una foto (snapshot) del estado
+actual en state_snapshots. Al arrancar, el estado se reconstruye con la foto
+más reciente más los eventos posteriores (la cola de la bitácora), sin
+recorrer todo el historial. Las fotos se escriben en un hilo de fondo.
+
+Las fotos solo acortan el arranque: scan_events nunca se recorta, ni
+siquiera los eventos ya cubiertos por una foto, porque get_history (camiones
+entregados) y replay_all dependen del historial completo. La tabla crece con
+cada evento (del orden de 100 bytes por escaneo); para archivar el historial
+de turnos anteriores hay que copiar la base de datos y empezar una nueva.
+
+Si pallet_scans se corrompe, rebuild_tables() la reconstruye desde la
+bitácora sin volver a escanear.
+"""
+
+import json
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .connection_pool import database_key, get_connection_manager
+
+
+EVENT_SCAN = 'scan'
+EVENT_ASSIGN = 'assign'
+EVENT_DELIVER = 'deliver'
+EVENT_CLEAR = 'clear'
+
+# Eventos nuevos que disparan una foto en segundo plano
+SNAPSHOT_INTERVAL = 5000
+
+# Fotos que se conservan (la más reciente más respaldos)
+SNAPSHOTS_TO_KEEP = 2
+
+# Versión del formato de las fotos
+SNAPSHOT_FORMAT = 1
+
+APPEND_EVENT_SQL = '''
+    INSERT INTO scan_events
+    (event_type, packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
+     first_serial, last_serial, ubicacion, slot)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_EVENT_COLUMNS = '''
+    event_id, event_type, packing_truck_id, layout_truck_id, pallet_number,
+    pallet_sequence_index, first_serial, last_serial, ubicacion, slot, created_at
+'''
+
+
+def create_event_log_schema(cursor):
+    """
+    Crea las tablas de la bitácora y la foto inicial si no existen.
+
+    La foto inicial se toma de pallet_scans y truck_assignments, así las
+    bases de datos anteriores a la bitácora arrancan con su estado actual.
+    Debe ejecutarse dentro de la transacción de creación del esquema.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scan_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            packing_truck_id TEXT,
+            layout_truck_id TEXT,
+            pallet_number TEXT,
+            pallet_sequence_index INTEGER,
+            first_serial TEXT,
+            last_serial TEXT,
+            ubicacion TEXT,
+            slot INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_packing_truck
+        ON scan_events(packing_truck_id)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS state_snapshots (
+            snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            last_event_id INTEGER NOT NULL,
+            scan_count INTEGER NOT NULL,
+            state BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    if cursor.execute('SELECT 1 FROM state_snapshots LIMIT 1').fetchone():
+        return
+
+    state = ScanState()
+    for row in cursor.execute('''
+        SELECT packing_truck_id, pallet_number, layout_truck_id, pallet_sequence_index,
+               first_serial, last_serial, ubicacion, slot, scanned_at
+        FROM pallet_scans
+    '''):
+        state.set_scan(row[0], row[1], row[2:])
+    for packing_truck_id, layout_truck_id in cursor.execute(
+        'SELECT packing_truck_id, layout_truck_id FROM truck_assignments'
+    ):
+        state.reserve(packing_truck_id, layout_truck_id)
+
+    state.last_event_id = cursor.execute(
+        'SELECT COALESCE(MAX(event_id), 0) FROM scan_events'
+    ).fetchone()[0]
+    _insert_snapshot(cursor, state)
+
+
+def scan_event(scan_params: tuple) -> tuple:
+    """
+    Convierte los parámetros de INSERT_SCAN_SQL en un evento de escaneo.
+
+    Args:
+        scan_params: (packing, layout, pallet, index, first, last, ubicacion, slot)
+    """
+    return (EVENT_SCAN,) + tuple(scan_params)
+
+
+def assign_event(packing_truck_id: str, layout_truck_id: str) -> tuple:
+    """Evento de reserva de un camión del layout."""
+    return (EVENT_ASSIGN, packing_truck_id, layout_truck_id) + (None,) * 6
+
+
+def deliver_event(packing_truck_id: str) -> tuple:
+    """Evento de entrega de un camión del packing list."""
+    return (EVENT_DELIVER, packing_truck_id) + (None,) * 7
+
+
+def clear_event() -> tuple:
+    """Evento de borrado de todos los datos."""
+    return (EVENT_CLEAR,) + (None,) * 8
+
+
+def append_events(conn, events: Iterable[tuple]) -> int:
+    """
+    Agrega eventos a la bitácora (dentro de la transacción del llamador).
+
+    Returns:
+        Cantidad de eventos agregados
+    """
+    events = list(events)
+    conn.executemany(APPEND_EVENT_SQL, events)
+    return len(events)
+
+
+class ScanState:
+    """
+    Estado actual reconstruido desde la bitácora.
+
+    - scans: packing_truck_id -> {pallet_number: (layout_truck_id,
+      pallet_sequence_index, first_serial, last_serial, ubicacion, slot,
+      scanned_at)}
+    - assignments: packing_truck_id -> layout_truck_id
+    """
+
+    __slots__ = ('scans', 'assignments', '_owners', 'last_event_id')
+
+    def __init__(self):
+        self.scans: Dict[str, Dict[str, tuple]] = {}
+        self.assignments: Dict[str, str] = {}
+        self._owners: Dict[str, str] = {}
+        self.last_event_id = 0
+
+    def set_scan(self, packing_truck_id: str, pallet_number: str, row: tuple):
+        self.scans.setdefault(packing_truck_id, {})[pallet_number] = tuple(row)
+
+    def reserve(self, packing_truck_id: str, layout_truck_id: str):
+        # Igual que INSERT OR IGNORE en truck_assignments (ambas columnas únicas)
+        if packing_truck_id in self.assignments or layout_truck_id in self._owners:
+            return
+        self.assignments[packing_truck_id] = layout_truck_id
+        self._owners[layout_truck_id] = packing_truck_id
+
+    def apply(self, event: tuple):
+        """Aplica una fila de scan_events (en el orden de _EVENT_COLUMNS)."""
+        (event_id, event_type, packing_truck_id, layout_truck_id, pallet_number,
+         sequence_index, first_serial, last_serial, ubicacion, slot, created_at) = event
+
+        if event_type == EVENT_SCAN:
+            self.set_scan(packing_truck_id, pallet_number, (
+                layout_truck_id, sequence_index, first_serial, last_serial,
+                ubicacion, slot, created_at
+            ))
+            self.reserve(packing_truck_id, layout_truck_id)
+        elif event_type == EVENT_ASSIGN:
+            self.reserve(packing_truck_id, layout_truck_id)
+        elif event_type == EVENT_DELIVER:
+            self.scans.pop(packing_truck_id, None)
+            layout_truck_id = self.assignments.pop(packing_truck_id, None)
+            if layout_truck_id is not None:
+                self._owners.pop(layout_truck_id, None)
+        elif event_type == EVENT_CLEAR:
+            self.scans = {}
+            self.assignments = {}
+            self._owners = {}
+
+        self.last_event_id = event_id
+
+    @property
+    def scan_count(self) -> int:
+        return sum(len(pallets) for pallets in self.scans.values())
+
+    def occupancy_rows(self) -> Iterator[Tuple[str, str, str]]:
+        """Filas (packing_truck_id, pallet_number, layout_truck_id) para el índice."""
+        for packing_truck_id, pallets in self.scans.items():
+            for pallet_number, row in pallets.items():
+                if row[0] is not None:
+                    yield packing_truck_id, pallet_number, row[0]
+
+    def location_rows(self) -> Iterator[Tuple[str, str, str, int]]:
+        """Filas (packing_truck_id, pallet_number, ubicacion, slot) para la vista de ubicaciones."""
+        for packing_truck_id, pallets in self.scans.items():
+            for pallet_number, row in pallets.items():
+                if row[4] is not None:
+                    yield packing_truck_id, pallet_number, row[4], row[5]
+
+    def to_blob(self) -> bytes:
+        payload = {
+            'format': SNAPSHOT_FORMAT,
+            'scans': [
+                [packing_truck_id, pallet_number, *row]
+                for packing_truck_id, pallets in self.scans.items()
+                for pallet_number, row in pallets.items()
+            ],
+            'assignments': list(self.assignments.items())
+        }
+        return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 1)
+
+    @classmethod
+    def from_blob(cls, blob: bytes, last_event_id: int) -> 'ScanState':
+        payload = json.loads(zlib.decompress(blob))
+        if payload.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Formato de foto no soportado: {payload.get('format')}")
+
+        state = cls()
+        scans = state.scans
+        for packing_truck_id, pallet_number, *row in payload['scans']:
+            pallets = scans.get(packing_truck_id)
+            if pallets is None:
+                pallets = scans[packing_truck_id] = {}
+            pallets[pallet_number] = tuple(row)
+        for packing_truck_id, layout_truck_id in payload['assignments']:
+            state.reserve(packing_truck_id, layout_truck_id)
+        state.last_event_id = last_event_id
+        return state
+
+
+def _insert_snapshot(cursor, state: ScanState) -> int:
+    cursor.execute('''
+        INSERT INTO state_snapshots (last_event_id, scan_count, state)
+        VALUES (?, ?, ?)
+    ''', (state.last_event_id, state.scan_count, state.to_blob()))
+    snapshot_id = cursor.lastrowid
+
+    # Conservar solo las fotos más recientes
+    cursor.execute('''
+        DELETE FROM state_snapshots
+        WHERE snapshot_id NOT IN (
+            SELECT snapshot_id FROM state_snapshots
+            ORDER BY last_event_id DESC, snapshot_id DESC
+            LIMIT ?
+        )
+    ''', (SNAPSHOTS_TO_KEEP,))
+    return snapshot_id
+
+
+class EventLog:
+    """Lectura, fotos y compactación de la bitácora de una base de datos."""
+
+    def __init__(self, db_path: str = 'scans.db', snapshot_interval: int = SNAPSHOT_INTERVAL):
+        """
+        Inicializa la bitácora.
+
+        Args:
+            db_path: Ruta a la base de datos
+            snapshot_interval: Eventos nuevos que disparan una foto en segundo plano
+        """
+        self.db_path = db_path
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._pending_events = 0
+        self._compactor: Optional[threading.Thread] = None
+
+    def load_state(self) -> ScanState:
+        """
+        Reconstruye el estado actual: foto más reciente + cola de la bitácora.
+
+        Returns:
+            ScanState con el estado al último evento confirmado
+        """
+        state, tail = self._load_state()
+        with self._lock:
+            self._pending_events = tail
+        return state
+
+    def _load_state(self) -> Tuple[ScanState, int]:
+        with get_connection_manager(self.db_path).reader() as conn:
+            snapshot = conn.execute('''
+                SELECT last_event_id, state FROM state_snapshots
+                ORDER BY last_event_id DESC, snapshot_id DESC
+                LIMIT 1
+            ''').fetchone()
+
+            if snapshot is not None:
+                state = ScanState.from_blob(snapshot[1], snapshot[0])
+            else:
+                state = ScanState()
+
+            tail = 0
+            for event in conn.execute(
+                f'SELECT {_EVENT_COLUMNS} FROM scan_events WHERE event_id > ? ORDER BY event_id',
+                (state.last_event_id,)
+            ):
+                state.apply(event)
+                tail += 1
+
+        return state, tail
+
+    def events_since(self, event_id: int) -> List[tuple]:
+        """
+        Eventos posteriores a event_id, en orden.
+
+        Returns:
+            Filas en el orden de columnas de ScanState.apply
+        """
+        with get_connection_manager(self.db_path).reader() as conn:
+            return conn.execute(
+                f'SELECT {_EVENT_COLUMNS} FROM scan_events WHERE event_id > ? ORDER BY event_id',
+                (event_id,)
+            ).fetchall()
+
+    def replay_all(self) -> ScanState:
+        """Reconstruye el estado recorriendo toda la bitácora (sin fotos)."""
+        state = ScanState()
+        with get_connection_manager(self.db_path).reader() as conn:
+            for event in conn.execute(f'SELECT {_EVENT_COLUMNS} FROM scan_events ORDER BY event_id'):
+                state.apply(event)
+        return state
+
+    def write_snapshot(self) -> int:
+        """
+        Guarda una foto del estado actual.
+
+        No borra eventos de scan_events: los anteriores a la foto siguen
+        disponibles para get_history y replay_all.
+
+        Returns:
+            ID de la foto guardada
+        """
+        state, _ = self._load_state()
+        with get_connection_manager(self.db_path).transaction('IMMEDIATE') as conn:
+            return _insert_snapshot(conn.cursor(), state)
+
+    def record_appended(self, count: int):
+        """
+        Cuenta eventos confirmados y lanza una foto en segundo plano al
+        superar snapshot_interval.
+        """
+        with self._lock:
+            self._pending_events += count
+            if self._pending_events < self.snapshot_interval:
+                return
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._pending_events = 0
+            self._compactor = threading.Thread(
+                target=self._compact_in_background, name='event-log-compactor', daemon=True
+            )
+            self._compactor.start()
+
+    def _compact_in_background(self):
+        try:
+            self.write_snapshot()
+        except Exception as e:
+            print(f"⚠️ No se pudo compactar la bitácora: {e}")
+
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        """Espera a que termine la compactación en curso (si hay una)."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+
+    def get_history(self, packing_truck_id: str) -> List[Dict]:
+        """
+        Obtiene todos los eventos de un camión del packing list, en orden.
+
+        Incluye los camiones ya entregados (sus filas ya no están en pallet_scans).
+        """
+        with get_connection_manager(self.db_path).reader() as conn:
+            rows = conn.execute(
+                f'SELECT {_EVENT_COLUMNS} FROM scan_events WHERE packing_truck_id = ? ORDER BY event_id',
+                (str(packing_truck_id),)
+            ).fetchall()
+
+        columns = [column.strip() for column in _EVENT_COLUMNS.split(',')]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def rebuild_tables(self) -> int:
+        """
+        Reconstruye pallet_scans y truck_assignments desde la bitácora.
+
+        Returns:
+            Cantidad de escaneos restaurados
+        """
+        state, _ = self._load_state()
+        rows = [
+            (packing_truck_id, row[0], pallet_number, *row[1:])
+            for packing_truck_id, pallets in state.scans.items()
+            for pallet_number, row in pallets.items()
+        ]
+
+        with get_connection_manager(self.db_path).transaction('IMMEDIATE') as conn:
+            conn.execute('DELETE FROM pallet_scans')
+            conn.execute('DELETE FROM truck_assignments')
+            conn.executemany('''
+                INSERT INTO pallet_scans
+                (packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
+                 first_serial, last_serial, ubicacion, slot, scanned_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+            ''', rows)
+            conn.executemany('''
+                INSERT INTO truck_assignments (packing_truck_id, layout_truck_id)
+                VALUES (?, ?)
+            ''', state.assignments.items())
+
+        print(f"✅ Tablas reconstruidas desde la bitácora: {len(rows)} escaneos")
+        return len(rows)
+
+
+_event_logs: Dict[tuple, EventLog] = {}
+_event_logs_lock = threading.Lock()
+
+
+def get_event_log(db_path: str = 'scans.db') -> EventLog:
+    """
+    Obtiene la bitácora compartida para una base de datos.
+
+    Args:
+        db_path: Ruta a la base de datos
+
+    Returns:
+        EventLog (uno por archivo y proceso)
+    """
+    key = database_key(db_path)
+    with _event_logs_lock:
+        event_log = _event_logs.get(key)
+        if event_log is None:
+            event_log = EventLog(db_path)
+            _event_logs[key] = event_log
+        return event_log
@@ -0,0 +1,360 @@
+"""
+Módulo de vista materializada de ubicaciones del layout.
+
+Mantiene en memoria qué pallet ocupa cada slot de cada ubicación
+(ubicacion -> (slot 1, slot 2)), para que la vista del layout no tenga que
+recorrer y ordenar toda la tabla pallet_scans después de cada escaneo.
+
+Igual que el índice de ocupación, se carga una sola vez desde la bitácora de
+eventos y después DatabaseManager la actualiza en cada registro, entrega y
+limpieza. Cada actualización incrementa un número de versión y anota las
+ubicaciones que cambiaron; con changes_since() el renderizador repinta solo
+esas celdas en lugar de todo el layout.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .connection_pool import database_key, get_connection_manager
+from .event_log import get_event_log
+
+
+# Slots por ubicación (un slot mayor extiende la celda)
+SLOTS_PER_LOCATION = 2
+
+# Cambios que se conservan para changes_since; un lector más atrasado
+# recibe None y debe repintar todo
+MAX_CHANGES = 10000
+
+_ASSIGNMENTS_SQL = '''
+    SELECT ubicacion, packing_truck_id, pallet_number, slot
+    FROM pallet_scans
+    WHERE ubicacion IS NOT NULL
+    ORDER BY ubicacion, slot
+'''
+
+
+class LocationView:
+    """
+    Vista materializada de la ocupación por ubicación para una base de datos.
+
+    Estructuras:
+    - ubicacion -> [ocupante del slot 1, ocupante del slot 2], donde cada
+      ocupante es (packing_truck_id, pallet_number) o None
+    - packing_truck_id -> {pallet_number: (ubicacion, slot)}
+    - bitácora de cambios: versiones crecientes y la ubicación que cambió
+    """
+
+    def __init__(self, db_path: str = 'scans.db'):
+        """
+        Inicializa la vista (la carga desde la BD es diferida).
+
+        Args:
+            db_path: Ruta a la base de datos
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+
+        self._cells: Dict[str, List[Optional[Tuple[str, str]]]] = {}
+        self._placements: Dict[str, Dict[str, Tuple[str, int]]] = {}
+
+        self._version = 0
+        # Versiones anteriores a _floor ya no están en la bitácora de cambios
+        self._floor = 0
+        self._change_versions: List[int] = []
+        self._change_locations: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """
+        Carga (o recarga) la vista desde la bitácora de eventos.
+
+        Los lectores con una versión anterior a la recarga reciben None en
+        changes_since y deben repintar todo.
+        """
+        with self._lock:
+            state = get_event_log(self.db_path).load_state()
+
+            self._cells = {}
+            self._placements = {}
+            for packing_truck_id, pallet_number, ubicacion, slot in state.location_rows():
+                self._place(str(packing_truck_id), str(pallet_number), str(ubicacion), slot)
+            self._reset_changes()
+            self._loaded = True
+
+    def ensure_loaded(self):
+        """Carga la vista si todavía no se ha cargado."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    # ------------------------------------------------------------------
+    # Actualizaciones incrementales
+    # ------------------------------------------------------------------
+
+    def record_scans(self, scans: Iterable[Tuple[str, str, str, int]]) -> int:
+        """
+        Registra escaneos confirmados en la base de datos.
+
+        Un pallet que se vuelve a escanear en otra ubicación deja libre la
+        anterior.
+
+        Args:
+            scans: Iterable de (packing_truck_id, pallet_number, ubicacion, slot)
+
+        Returns:
+            Versión de la vista tras el cambio
+        """
+        if not self._loaded:
+            return self._version
+        with self._lock:
+            dirty = set()
+            for packing_truck_id, pallet_number, ubicacion, slot in scans:
+                if ubicacion is None:
+                    continue
+                packing_truck_id, pallet_number = str(packing_truck_id), str(pallet_number)
+                previous = self._placements.get(packing_truck_id, {}).get(pallet_number)
+                if previous is not None:
+                    self._unplace(packing_truck_id, pallet_number)
+                    dirty.add(previous[0])
+                if self._place(packing_truck_id, pallet_number, str(ubicacion), slot):
+                    dirty.add(str(ubicacion))
+            return self._mark_dirty(dirty)
+
+    def record_delivery(self, packing_truck_id: str) -> List[str]:
+        """
+        Libera las ubicaciones de un camión entregado.
+
+        Args:
+            packing_truck_id: ID del camión del packing list
+
+        Returns:
+            Ubicaciones liberadas (ordenadas)
+        """
+        return self.record_deliveries([packing_truck_id])
+
+    def record_deliveries(self, packing_truck_ids: Iterable[str]) -> List[str]:
+        """
+        Libera las ubicaciones de varios camiones entregados (una sola versión).
+
+        Args:
+            packing_truck_ids: IDs de camiones del packing list
+
+        Returns:
+            Ubicaciones liberadas (ordenadas)
+        """
+        if not self._loaded:
+            return []
+        with self._lock:
+            dirty = set()
+            for packing_truck_id in packing_truck_ids:
+                packing_truck_id = str(packing_truck_id)
+                pallets = self._placements.pop(packing_truck_id, {})
+                for pallet_number, (ubicacion, slot) in pallets.items():
+                    self._clear_slot(packing_truck_id, pallet_number, ubicacion, slot)
+                    dirty.add(ubicacion)
+            self._mark_dirty(dirty)
+            return sorted(dirty)
+
+    def record_clear(self):
+        """Vacía la vista tras borrar toda la base de datos."""
+        with self._lock:
+            self._cells = {}
+            self._placements = {}
+            self._reset_changes()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @property
+    def version(self) -> int:
+        """Versión actual; aumenta con cada cambio confirmado."""
+        self.ensure_loaded()
+        return self._version
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[List[str]]]:
+        """
+        Ubicaciones que cambiaron después de una versión.
+
+        Args:
+            version: Última versión que el lector ya pintó
+
+        Returns:
+            Tuple (versión actual, ubicaciones cambiadas ordenadas)
+            Las ubicaciones son None si la versión es demasiado antigua (o de
+            antes de una recarga): el lector debe repintar todo.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            if version >= self._version:
+                return self._version, []
+            if version < self._floor:
+                return self._version, None
+            start = bisect.bisect_right(self._change_versions, version)
+            return self._version, sorted(set(self._change_locations[start:]))
+
+    def get(self, ubicacion: str) -> Tuple[Optional[Dict], ...]:
+        """
+        Ocupantes de una ubicación.
+
+        Args:
+            ubicacion: Ubicación (ej: "C1-5")
+
+        Returns:
+            Tuple con un elemento por slot: {'packing_truck', 'pallet', 'slot'}
+            o None si el slot está libre
+        """
+        self.ensure_loaded()
+        with self._lock:
+            cell = self._cells.get(str(ubicacion))
+            if cell is None:
+                return (None,) * SLOTS_PER_LOCATION
+            return tuple(
+                {'packing_truck': occupant[0], 'pallet': occupant[1], 'slot': slot}
+                if occupant is not None else None
+                for slot, occupant in enumerate(cell, start=1)
+            )
+
+    def is_occupied(self, ubicacion: str) -> bool:
+        """Indica si la ubicación tiene al menos un pallet."""
+        self.ensure_loaded()
+        return str(ubicacion) in self._cells
+
+    def assignments(self) -> Dict[str, List[Dict]]:
+        """
+        Todas las ubicaciones ocupadas, en el formato de get_location_assignments.
+
+        Returns:
+            {'C1-1': [{'packing_truck': '4', 'pallet': '101', 'slot': 1}, ...], ...}
+            ordenado por ubicación y slot
+        """
+        self.ensure_loaded()
+        with self._lock:
+            return {
+                ubicacion: [
+                    {'packing_truck': occupant[0], 'pallet': occupant[1], 'slot': slot}
+                    for slot, occupant in enumerate(self._cells[ubicacion], start=1)
+                    if occupant is not None
+                ]
+                for ubicacion in sorted(self._cells)
+            }
+
+    def check_consistency(self, repair: bool = False) -> Tuple[bool, List[str]]:
+        """
+        Compara la vista contra pallet_scans.
+
+        Útil cuando varios procesos escriben la misma base de datos.
+
+        Args:
+            repair: Si es True y hay diferencias, recarga la vista
+
+        Returns:
+            Tuple (consistente, ubicaciones con diferencias)
+        """
+        with get_connection_manager(self.db_path).reader() as conn:
+            rows = conn.execute(_ASSIGNMENTS_SQL).fetchall()
+
+        in_db: Dict[str, List[Dict]] = {}
+        for ubicacion, packing_truck_id, pallet_number, slot in rows:
+            in_db.setdefault(ubicacion, []).append(
+                {'packing_truck': packing_truck_id, 'pallet': pallet_number, 'slot': slot}
+            )
+        in_memory = self.assignments()
+
+        differences = sorted(
+            ubicacion for ubicacion in set(in_db) | set(in_memory)
+            if in_db.get(ubicacion) != in_memory.get(ubicacion)
+        )
+        if differences and repair:
+            self.load()
+
+        return not differences, differences
+
+    # ------------------------------------------------------------------
+    # Internos (requieren self._lock)
+    # ------------------------------------------------------------------
+
+    def _place(self, packing_truck_id: str, pallet_number: str, ubicacion: str, slot) -> bool:
+        try:
+            slot = int(slot)
+        except (TypeError, ValueError):
+            return False
+        if slot < 1:
+            return False
+
+        cell = self._cells.get(ubicacion)
+        if cell is None:
+            cell = self._cells[ubicacion] = [None] * SLOTS_PER_LOCATION
+        if slot > len(cell):
+            cell.extend([None] * (slot - len(cell)))
+        cell[slot - 1] = (packing_truck_id, pallet_number)
+        self._placements.setdefault(packing_truck_id, {})[pallet_number] = (ubicacion, slot)
+        return True
+
+    def _unplace(self, packing_truck_id: str, pallet_number: str) -> str:
+        """Quita un pallet de su slot y retorna su ubicación."""
+        ubicacion, slot = self._placements[packing_truck_id].pop(pallet_number)
+        self._clear_slot(packing_truck_id, pallet_number, ubicacion, slot)
+        return ubicacion
+
+    def _clear_slot(self, packing_truck_id: str, pallet_number: str, ubicacion: str, slot: int):
+        cell = self._cells.get(ubicacion)
+        # El slot pudo quedar ocupado por otro pallet escaneado después
+        if cell is not None and cell[slot - 1] == (packing_truck_id, pallet_number):
+            cell[slot - 1] = None
+            if not any(cell):
+                del self._cells[ubicacion]
+
+    def _mark_dirty(self, locations) -> int:
+        if not locations:
+            return self._version
+        self._version += 1
+        for ubicacion in locations:
+            self._change_versions.append(self._version)
+            self._change_locations.append(ubicacion)
+
+        # Recortar en bloque para que el costo por cambio sea constante
+        excess = len(self._change_versions) - MAX_CHANGES
+        if excess > MAX_CHANGES // 2:
+            self._floor = self._change_versions[excess]
+            del self._change_versions[:excess]
+            del self._change_locations[:excess]
+        return self._version
+
+    def _reset_changes(self):
+        self._version += 1
+        self._floor = self._version
+        self._change_versions = []
+        self._change_locations = []
+
+
+_views: Dict[tuple, LocationView] = {}
+_views_lock = threading.Lock()
+
+
+def get_location_view(db_path: str = 'scans.db') -> LocationView:
+    """
+    Obtiene la vista de ubicaciones compartida de una base de datos.
+
+    Args:
+        db_path: Ruta a la base de datos
+
+    Returns:
+        LocationView asociada a la ruta
+    """
+    key = database_key(db_path)
+    view = _views.get(key)
+    if view is None:
+        with _views_lock:
+            view = _views.get(key)
+            if view is None:
+                view = LocationView(db_path)
+                _views[key] = view
+    return view
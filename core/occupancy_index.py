@@ -0,0 +1,376 @@
+"""
+Módulo de índice de ocupación en memoria.
+
+Mantiene en memoria qué camión del layout ocupa cada camión del packing list
+y cuántos pallets tiene cada camión del layout, para que la asignación y las
+estadísticas no tengan que agregar toda la tabla pallet_scans en cada llamada.
+
+El índice se carga desde la bitácora de eventos (foto más reciente +
+eventos posteriores, ver event_log) y después se actualiza de forma
+incremental desde DatabaseManager (registro, entrega y limpieza) y desde la
+asignación de camiones (reservas en truck_assignments). Un camión del layout
+reservado cuenta como ocupado aunque todavía no tenga pallets.
+
+Los cambios de otros procesos que comparten la base no pasan por aquí:
+refresh() recarga el índice cuando PRAGMA data_version indica que otro
+proceso escribió desde la última carga.
+"""
+
+import bisect
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .connection_pool import database_key, get_connection_manager
+from .event_log import get_event_log
+
+
+_LAYOUT_TRUCK_PATTERN = re.compile(r'C(\d+)')
+
+
+def parse_layout_truck_id(layout_truck_id) -> Optional[int]:
+    """
+    Extrae el número de un ID de camión del layout ("C1" -> 1).
+
+    Args:
+        layout_truck_id: ID del camión del layout (ej: "C1") o su número
+
+    Returns:
+        Número del camión o None si el formato no es válido
+    """
+    if isinstance(layout_truck_id, int):
+        return layout_truck_id
+    if layout_truck_id is None:
+        return None
+    match = _LAYOUT_TRUCK_PATTERN.match(str(layout_truck_id))
+    return int(match.group(1)) if match else None
+
+
+class OccupancyIndex:
+    """
+    Índice de ocupación de los camiones del layout para una base de datos.
+
+    Estructuras:
+    - packing_truck_id -> {pallet_number: número de camión del layout}
+    - packing_truck_id -> número de camión del layout reservado
+    - número de camión del layout -> cantidad de pallets
+    - lista ordenada de camiones del layout vacíos (sin pallets ni reserva)
+    """
+
+    def __init__(self, db_path: str = 'scans.db'):
+        """
+        Inicializa el índice (la carga desde la BD es diferida).
+
+        Args:
+            db_path: Ruta a la base de datos
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._data_version = None
+
+        self._packing_pallets: Dict[str, Dict[str, int]] = {}
+        self._reservations: Dict[str, int] = {}
+        self._reserved: Dict[int, str] = {}
+        self._counts: Dict[int, int] = {}
+        self._layout_trucks: Tuple[int, ...] = ()
+        self._empty: List[int] = []
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """
+        Carga (o recarga) el índice desde la bitácora de eventos.
+
+        Usa la foto más reciente del estado más los eventos posteriores, en
+        lugar de recorrer pallet_scans completa.
+        """
+        # El lock se mantiene durante la lectura para no perder
+        # actualizaciones que lleguen mientras se reconstruye el estado.
+        with self._lock:
+            # Antes de leer: un cambio de otro proceso durante la carga
+            # hace que el próximo refresh() vuelva a cargar
+            self._data_version = get_connection_manager(self.db_path).data_version()
+            state = get_event_log(self.db_path).load_state()
+
+            self._packing_pallets = {}
+            self._reservations = {}
+            self._reserved = {}
+            self._counts = {}
+            self._apply_scans(state.occupancy_rows())
+            for packing_truck_id, layout_truck_id in state.assignments.items():
+                self._reserve(packing_truck_id, layout_truck_id)
+            self._rebuild_empty()
+            self._loaded = True
+
+    def ensure_loaded(self):
+        """Carga el índice si todavía no se ha cargado."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def refresh(self):
+        """Recarga el índice si otro proceso escribió la base desde la última carga."""
+        version = get_connection_manager(self.db_path).data_version()
+        with self._lock:
+            if not self._loaded or version != self._data_version:
+                self.load()
+
+    def set_layout_trucks(self, layout_trucks: Iterable[int]):
+        """
+        Define los camiones del layout cargado.
+
+        Solo recalcula la lista de vacíos si el conjunto cambió.
+
+        Args:
+            layout_trucks: IDs de camiones en el layout
+        """
+        trucks = tuple(sorted(set(layout_trucks)))
+        with self._lock:
+            if trucks != self._layout_trucks:
+                self._layout_trucks = trucks
+                self._rebuild_empty()
+
+    # ------------------------------------------------------------------
+    # Actualizaciones incrementales
+    # ------------------------------------------------------------------
+
+    def record_scans(self, scans: Iterable[Tuple[str, str, str]]):
+        """
+        Registra escaneos confirmados en la base de datos.
+
+        Args:
+            scans: Iterable de (packing_truck_id, pallet_number, layout_truck_id)
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            self._apply_scans(scans)
+
+    def record_reservation(self, packing_truck_id: str, layout_truck_id: str):
+        """
+        Registra una reserva confirmada en truck_assignments.
+
+        Args:
+            packing_truck_id: ID del camión del packing list
+            layout_truck_id: ID del camión del layout reservado (ej: "C1")
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            self._reserve(packing_truck_id, layout_truck_id)
+
+    def record_delivery(self, packing_truck_id: str):
+        """
+        Libera todos los pallets y la reserva de un camión entregado.
+
+        Args:
+            packing_truck_id: ID del camión del packing list
+        """
+        self.record_deliveries([packing_truck_id])
+
+    def record_deliveries(self, packing_truck_ids: Iterable[str]):
+        """
+        Libera los pallets y reservas de varios camiones entregados.
+
+        Los conteos se descuentan por camión del layout, no pallet por pallet.
+
+        Args:
+            packing_truck_ids: IDs de camiones del packing list
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            for packing_truck_id in packing_truck_ids:
+                packing_truck_id = str(packing_truck_id)
+                layout_num = self._reservations.pop(packing_truck_id, None)
+                if layout_num is not None and self._reserved.get(layout_num) == packing_truck_id:
+                    del self._reserved[layout_num]
+                    self._refresh_empty(layout_num)
+
+                pallets = self._packing_pallets.pop(packing_truck_id, {})
+                for layout_num, count in Counter(pallets.values()).items():
+                    self._decrement(layout_num, count)
+
+    def record_clear(self):
+        """Vacía el índice tras borrar toda la base de datos."""
+        with self._lock:
+            self._packing_pallets = {}
+            self._reservations = {}
+            self._reserved = {}
+            self._counts = {}
+            self._rebuild_empty()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def get_assignment(self, packing_truck_id: str) -> Optional[str]:
+        """
+        Obtiene el camión del layout asignado a un camión del packing list.
+
+        Args:
+            packing_truck_id: ID del camión en el packing list
+
+        Returns:
+            ID del layout truck (ej: "C1") o None si no tiene asignación
+        """
+        self.ensure_loaded()
+        with self._lock:
+            layout_num = self._reservations.get(str(packing_truck_id))
+            if layout_num is not None:
+                return f"C{layout_num}"
+            pallets = self._packing_pallets.get(str(packing_truck_id))
+            if not pallets:
+                return None
+            return f"C{next(iter(pallets.values()))}"
+
+    def get_counts(self) -> Dict[int, int]:
+        """Retorna {layout_truck_id: pallet_count} de los camiones ocupados."""
+        self.ensure_loaded()
+        with self._lock:
+            return {truck: count for truck, count in self._counts.items() if count > 0}
+
+    def get_count(self, layout_truck: int) -> int:
+        """Retorna la cantidad de pallets de un camión del layout."""
+        self.ensure_loaded()
+        return self._counts.get(layout_truck, 0)
+
+    def get_empty_trucks(self, layout_trucks: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Retorna los camiones del layout completamente vacíos, ordenados.
+
+        Args:
+            layout_trucks: IDs de camiones del layout (None = los ya definidos)
+
+        Returns:
+            Lista ordenada de IDs vacíos
+        """
+        self.ensure_loaded()
+        with self._lock:
+            if layout_trucks is not None:
+                self.set_layout_trucks(layout_trucks)
+            return list(self._empty)
+
+    def first_empty_truck(self, layout_trucks: Optional[Iterable[int]] = None) -> Optional[int]:
+        """Retorna el primer camión vacío del layout o None si no hay."""
+        self.ensure_loaded()
+        with self._lock:
+            if layout_trucks is not None:
+                self.set_layout_trucks(layout_trucks)
+            return self._empty[0] if self._empty else None
+
+    def check_consistency(self, repair: bool = False) -> Tuple[bool, Dict[int, Tuple[int, int]]]:
+        """
+        Compara los conteos en memoria contra la base de datos.
+
+        Útil cuando varios procesos escriben la misma base de datos.
+
+        Args:
+            repair: Si es True y hay diferencias, recarga el índice
+
+        Returns:
+            Tuple (consistente, diferencias)
+            - diferencias: {layout_truck_id: (conteo_memoria, conteo_bd)}
+        """
+        from .truck_assignment import get_occupied_layout_trucks
+
+        db_counts = get_occupied_layout_trucks(self.db_path)
+        memory_counts = self.get_counts()
+
+        differences = {}
+        for truck in set(db_counts) | set(memory_counts):
+            in_memory = memory_counts.get(truck, 0)
+            in_db = db_counts.get(truck, 0)
+            if in_memory != in_db:
+                differences[truck] = (in_memory, in_db)
+
+        if differences and repair:
+            self.load()
+
+        return not differences, differences
+
+    # ------------------------------------------------------------------
+    # Internos (requieren self._lock)
+    # ------------------------------------------------------------------
+
+    def _apply_scans(self, scans: Iterable[Tuple[str, str, str]]):
+        for packing_truck_id, pallet_number, layout_truck_id in scans:
+            layout_num = parse_layout_truck_id(layout_truck_id)
+            if layout_num is None:
+                continue
+
+            pallets = self._packing_pallets.setdefault(str(packing_truck_id), {})
+            previous = pallets.get(str(pallet_number))
+            if previous == layout_num:
+                continue  # re-escaneo del mismo pallet
+            if previous is not None:
+                self._decrement(previous)
+
+            pallets[str(pallet_number)] = layout_num
+            self._increment(layout_num)
+
+    def _reserve(self, packing_truck_id, layout_truck_id):
+        layout_num = parse_layout_truck_id(layout_truck_id)
+        if layout_num is None:
+            return
+        self._reservations[str(packing_truck_id)] = layout_num
+        self._reserved[layout_num] = str(packing_truck_id)
+        self._refresh_empty(layout_num)
+
+    def _increment(self, layout_num: int):
+        self._counts[layout_num] = self._counts.get(layout_num, 0) + 1
+        self._refresh_empty(layout_num)
+
+    def _decrement(self, layout_num: int, amount: int = 1):
+        count = self._counts.get(layout_num, 0) - amount
+        if count <= 0:
+            self._counts.pop(layout_num, None)
+        else:
+            self._counts[layout_num] = count
+        self._refresh_empty(layout_num)
+
+    def _is_free(self, layout_num: int) -> bool:
+        return self._counts.get(layout_num, 0) == 0 and layout_num not in self._reserved
+
+    def _refresh_empty(self, layout_num: int):
+        """Agrega o quita un camión de la lista ordenada de vacíos."""
+        pos = bisect.bisect_left(self._empty, layout_num)
+        listed = pos < len(self._empty) and self._empty[pos] == layout_num
+        should_list = layout_num in self._layout_trucks and self._is_free(layout_num)
+        if should_list and not listed:
+            self._empty.insert(pos, layout_num)
+        elif listed and not should_list:
+            del self._empty[pos]
+
+    def _rebuild_empty(self):
+        self._empty = [t for t in self._layout_trucks if self._is_free(t)]
+
+
+_indexes: Dict[tuple, OccupancyIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_occupancy_index(db_path: str = 'scans.db') -> OccupancyIndex:
+    """
+    Obtiene el índice de ocupación compartido de una base de datos.
+
+    Args:
+        db_path: Ruta a la base de datos
+
+    Returns:
+        OccupancyIndex asociado a la ruta
+    """
+    key = database_key(db_path)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = OccupancyIndex(db_path)
+                _indexes[key] = index
+    return index
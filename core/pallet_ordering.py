@@ -14,9 +14,53 @@ LÓGICA CRÍTICA:
 - Pallet índice 10 → Ubicación 5, Slot 2
 """
 
+import math
 import re
-import pandas as pd
-from typing import Tuple, Optional
+import sys
+from functools import lru_cache
+from typing import TYPE_CHECKING, Tuple, Optional, Dict, List, Iterable, Union
+
+from .records import ShipmentTable
+
+# pandas y numpy solo se importan en las funciones que procesan columnas
+# completas; el escaneo (TruckPalletIndex, ubicaciones) no los necesita.
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Máximo de ubicaciones por camión del layout (2 pallets por ubicación)
+MAX_LOCATIONS_PER_TRUCK = 57
+
+
+# Un solo patrón con las cuatro reglas de extract_pallet_number, en orden de
+# prioridad. Cada alternativa es un lookahead anclado al inicio, así gana la
+# primera regla que aplique (no la coincidencia más a la izquierda):
+# 1. 2-3 dígitos al final del código
+# 2. 2-3 dígitos después de "PALLET", "PLT" o "P" (con _ o - opcional)
+# 3. El código es un solo dígito
+# 4. Cualquier secuencia de 2-3 dígitos
+PALLET_CODE_PATTERN = re.compile(
+    r'\A(?:'
+    # Igual a search(r'\d{2,3}$') pero recorriendo desde el final
+    r'(?=.*((?<!\d)\d\d|\d{3})$)'
+    r'|(?=.*?(?i:PALLET|PLT|P)[_-]?(\d{2,3}))'
+    r'|(?=(\d)\Z)'
+    r'|(?=.*?(\d{2,3}))'
+    r')',
+    re.DOTALL
+)
+
+# Códigos distintos que se recuerdan (re-escaneos del mismo pallet)
+PALLET_CODE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PALLET_CODE_CACHE_SIZE)
+def _extract_pallet_number_cached(pallet_code: str) -> Optional[int]:
+    match = PALLET_CODE_PATTERN.match(pallet_code)
+    if match is None:
+        return None
+    # Solo el grupo de la regla que aplicó tiene valor
+    return int(match.group(match.lastindex))
 
 
 def extract_pallet_number(pallet_code: str) -> Optional[int]:
@@ -29,38 +73,421 @@ def extract_pallet_number(pallet_code: str) -> Optional[int]:
     - "P_012" -> 12
     - "456" -> 456
     
+    Usa un solo patrón precompilado (PALLET_CODE_PATTERN) y recuerda los
+    últimos códigos procesados, así los re-escaneos no vuelven a evaluarlo.
+    
     Args:
         pallet_code: Código del pallet escaneado
     
     Returns:
         Número del pallet o None si no se puede extraer
     """
-    try:
-        # Buscar  números al final del código
-        match = re.search(r'(\d{2,3})$', pallet_code)
-        if match:
-            return int(match.group(1))
+    if not isinstance(pallet_code, str):
+        return None
+    return _extract_pallet_number_cached(pallet_code)
+
+
+def extract_pallet_numbers(pallet_codes: 'pd.Series') -> 'pd.Series':
+    """
+    Versión vectorizada de extract_pallet_number para una columna completa.
+    
+    Args:
+        pallet_codes: Serie con códigos escaneados (valores no texto -> <NA>)
+    
+    Returns:
+        Serie Int64 con el número de cada pallet (<NA> si no se puede
+        extraer), alineada al índice de entrada
+    """
+    import pandas as pd
+    
+    # Una columna del sheet repite muchos códigos: se evalúa cada uno una vez
+    positions, uniques = pd.factorize(pallet_codes.astype(object))
+    if len(uniques) == 0:
+        return pd.Series(pd.NA, index=pallet_codes.index, dtype='Int64')
+    
+    groups = pd.Series(uniques, dtype=object).str.extract(PALLET_CODE_PATTERN)
+    # La regla que aplicó es el primer grupo no vacío de la fila
+    numbers = groups.bfill(axis=1).iloc[:, 0].astype('Int64').array
+    
+    values = numbers.take(positions, allow_fill=True)
+    return pd.Series(values, index=pallet_codes.index)
+
+
+def normalize_pallet_number(pallet_number) -> str:
+    """
+    Normaliza un número de pallet para usarlo como llave.
+    
+    Los números llegan como int, float (101.0), o texto con espacios o ceros
+    a la izquierda según venga del sheet, del escáner o de la base de datos.
+    
+    Ejemplos:
+    - 101, 101.0, "101", " 101 ", "0101" -> "101"
+    - "A-12" -> "A-12"
+    
+    Args:
+        pallet_number: Número del pallet en cualquier formato
+    
+    Returns:
+        Llave normalizada como string
+    """
+    if isinstance(pallet_number, float) and pallet_number.is_integer():
+        return str(int(pallet_number))
+    
+    text = str(pallet_number).strip()
+    if text.isdigit():
+        return str(int(text))
+    return text
+
+
+def pallet_sort_key(pallet_number) -> Tuple[int, int, str]:
+    """
+    Llave de ordenamiento natural para números de pallet.
+    
+    Los pallets numéricos se ordenan por valor (9 antes que 10) sin importar
+    si vienen como número o como texto; los no numéricos van al final en
+    orden alfabético.
+    
+    Args:
+        pallet_number: Número del pallet en cualquier formato
+    
+    Returns:
+        Tupla comparable
+    """
+    key = normalize_pallet_number(pallet_number)
+    if key.isdigit():
+        return 0, int(key), key
+    return 1, 0, key
+
+
+class TruckPalletIndex:
+    """
+    Índice precalculado de los pallets de un camión del packing list.
+    
+    Se construye una vez cuando se cargan los datos del shipment y permite
+    resolver en O(1) el índice secuencial, los seriales y la ubicación de un
+    pallet en lugar de reordenar el DataFrame del camión en cada escaneo.
+    """
+    
+    __slots__ = ('packing_truck_id', 'pallet_numbers', 'first_serials', 'last_serials', '_ranks', '_slots')
+    
+    def __init__(
+        self,
+        packing_truck_id: str,
+        pallet_numbers: Iterable,
+        first_serials: Optional[Iterable] = None,
+        last_serials: Optional[Iterable] = None
+    ):
+        """
+        Construye el índice de un camión.
         
-        # Buscar números después de "PALLET", "PLT", "P", etc.
-        match = re.search(r'(?:PALLET|PLT|P)[_-]?(\d{2,3})', pallet_code, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
+        Args:
+            packing_truck_id: ID del camión en el packing list
+            pallet_numbers: Números de pallet del camión (cualquier orden)
+            first_serials: Primer serial de cada pallet (mismo orden)
+            last_serials: Último serial de cada pallet (mismo orden)
+        """
+        pallet_numbers = list(pallet_numbers)
+        first_serials = list(first_serials) if first_serials is not None else [None] * len(pallet_numbers)
+        last_serials = list(last_serials) if last_serials is not None else [None] * len(pallet_numbers)
         
-        # Si el código es completamente numérico
-        if pallet_code.isdigit():
-            return int(pallet_code)
+        rows = sorted(
+            (
+                (pallet_sort_key(pallet), normalize_pallet_number(pallet), first, last)
+                for pallet, first, last in zip(pallet_numbers, first_serials, last_serials)
+                if not _is_missing(pallet)
+            ),
+            key=lambda row: row[0]
+        )
         
-        # Intentar extraer cualquier secuencia de 2-3 dígitos
-        match = re.search(r'(\d{2,3})', pallet_code)
-        if match:
-            return int(match.group(1))
+        self.packing_truck_id = packing_truck_id
+        self.pallet_numbers: Tuple[str, ...] = tuple(row[1] for row in rows)
+        self.first_serials: Tuple = tuple(row[2] for row in rows)
+        self.last_serials: Tuple = tuple(row[3] for row in rows)
         
+        # pallet -> índice 1-based; un pallet duplicado conserva su primer índice
+        self._ranks: Dict[str, int] = {}
+        for rank, pallet in enumerate(self.pallet_numbers, start=1):
+            self._ranks.setdefault(pallet, rank)
+        
+        # índice -> (número de ubicación, slot), None si excede el límite
+        self._slots: Tuple[Optional[Tuple[int, int]], ...] = tuple(
+            _location_for_index(rank) for rank in range(1, len(rows) + 1)
+        )
+    
+    @classmethod
+    def from_dataframe(cls, packing_truck_id: str, truck_df: 'pd.DataFrame') -> 'TruckPalletIndex':
+        """
+        Construye el índice desde el DataFrame de pallets de un camión.
+        
+        Args:
+            packing_truck_id: ID del camión en el packing list
+            truck_df: DataFrame con columna 'Pallet number' y opcionalmente
+                      'first_serial' y 'last_serial'
+        
+        Returns:
+            TruckPalletIndex del camión
+        """
+        return cls(
+            packing_truck_id,
+            truck_df['Pallet number'].tolist(),
+            truck_df['first_serial'].tolist() if 'first_serial' in truck_df.columns else None,
+            truck_df['last_serial'].tolist() if 'last_serial' in truck_df.columns else None
+        )
+    
+    @classmethod
+    def from_table(cls, packing_truck_id: str, shipment: ShipmentTable) -> 'TruckPalletIndex':
+        """
+        Construye el índice de un camión desde la tabla columnar del shipment.
+        
+        Args:
+            packing_truck_id: ID del camión en el packing list
+            shipment: ShipmentTable del shipment completo
+        
+        Returns:
+            TruckPalletIndex del camión (vacío si el camión no está en la tabla)
+        """
+        return cls(packing_truck_id, *shipment.truck_columns(packing_truck_id))
+    
+    def __len__(self) -> int:
+        return len(self.pallet_numbers)
+    
+    def __contains__(self, pallet_number) -> bool:
+        return normalize_pallet_number(pallet_number) in self._ranks
+    
+    def get_index(self, pallet_number) -> Optional[int]:
+        """
+        Obtiene el índice secuencial (1-based) de un pallet.
+        
+        Args:
+            pallet_number: Número del pallet
+        
+        Returns:
+            Índice secuencial o None si el pallet no es de este camión
+        """
+        return self._ranks.get(normalize_pallet_number(pallet_number))
+    
+    def get_pallet(self, pallet_number) -> Optional[dict]:
+        """
+        Obtiene la información de un pallet.
+        
+        Args:
+            pallet_number: Número del pallet
+        
+        Returns:
+            Dict con 'pallet_number', 'index', 'first_serial', 'last_serial'
+            o None si el pallet no es de este camión
+        """
+        rank = self.get_index(pallet_number)
+        if rank is None:
+            return None
+        return self.pallet_at(rank)
+    
+    def pallet_at(self, index: int) -> Optional[dict]:
+        """
+        Obtiene la información del pallet en un índice secuencial.
+        
+        Args:
+            index: Índice secuencial (1-based)
+        
+        Returns:
+            Dict con la información del pallet o None si el índice no existe
+        """
+        if not 1 <= index <= len(self.pallet_numbers):
+            return None
+        return {
+            'pallet_number': self.pallet_numbers[index - 1],
+            'index': index,
+            'first_serial': self.first_serials[index - 1],
+            'last_serial': self.last_serials[index - 1]
+        }
+    
+    def get_location(
+        self,
+        pallet_number,
+        layout_truck_id: str
+    ) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+        """
+        Obtiene la ubicación precalculada de un pallet en un camión del layout.
+        
+        Mismo contrato que calculate_location_from_index.
+        
+        Args:
+            pallet_number: Número del pallet
+            layout_truck_id: ID del camión del layout (ej: "C1")
+        
+        Returns:
+            Tuple (ubicacion, slot, error_message)
+        """
+        rank = self.get_index(pallet_number)
+        if rank is None:
+            return None, None, f"❌ Pallet {pallet_number} no pertenece al camión {self.packing_truck_id}"
+        
+        location = self._slots[rank - 1]
+        if location is None:
+            return calculate_location_from_index(rank, layout_truck_id)
+        
+        ubicacion_num, slot = location
+        return f"C{_layout_truck_number(layout_truck_id)}-{ubicacion_num}", slot, None
+
+
+class ShipmentPalletIndex:
+    """
+    Índices de pallets de todos los camiones de un shipment.
+    
+    Solo reconstruye el índice de un camión cuando sus pallets cambian
+    entre cargas del sheet.
+    """
+    
+    def __init__(self):
+        self._trucks: Dict[str, TruckPalletIndex] = {}
+        self._fingerprints: Dict[str, int] = {}
+    
+    def load(
+        self,
+        shipment: Union[ShipmentTable, 'pd.DataFrame'],
+        truck_column: str = 'CAMION'
+    ) -> List[str]:
+        """
+        Sincroniza los índices con los datos del shipment.
+        
+        Args:
+            shipment: ShipmentTable o DataFrame del shipment completo
+            truck_column: Columna con el ID del camión (solo para DataFrame)
+        
+        Returns:
+            Lista de IDs de camiones cuyo índice se reconstruyó
+        """
+        if not isinstance(shipment, ShipmentTable):
+            shipment = ShipmentTable.from_dataframe(shipment, truck_column)
+        
+        rebuilt = []
+        seen = set()
+        
+        for truck_id in shipment.truck_ids:
+            seen.add(truck_id)
+            columns = shipment.truck_columns(truck_id)
+            
+            fingerprint = _truck_fingerprint(*columns)
+            if self._fingerprints.get(truck_id) == fingerprint:
+                continue
+            
+            self._trucks[truck_id] = TruckPalletIndex(truck_id, *columns)
+            self._fingerprints[truck_id] = fingerprint
+            rebuilt.append(truck_id)
+        
+        for truck_id in set(self._trucks) - seen:
+            self.invalidate([truck_id])
+        
+        return rebuilt
+    
+    def refresh(self, shipment: ShipmentTable, packing_truck_ids: Iterable[str]) -> List[str]:
+        """
+        Reconstruye solo los índices de algunos camiones (por ejemplo, los
+        de un SheetDiff); los demás no se revisan.
+        
+        Args:
+            shipment: ShipmentTable del shipment completo
+            packing_truck_ids: Camiones con filas agregadas, quitadas o cambiadas
+        
+        Returns:
+            Lista de IDs de camiones cuyo índice se reconstruyó
+        """
+        rebuilt = []
+        for truck_id in packing_truck_ids:
+            truck_id = str(truck_id).strip()
+            if truck_id not in shipment:
+                self.invalidate([truck_id])
+                continue
+            columns = shipment.truck_columns(truck_id)
+            self._trucks[truck_id] = TruckPalletIndex(truck_id, *columns)
+            self._fingerprints[truck_id] = _truck_fingerprint(*columns)
+            rebuilt.append(truck_id)
+        return rebuilt
+    
+    def get(self, packing_truck_id: str) -> Optional[TruckPalletIndex]:
+        """Retorna el índice de un camión o None si no está cargado."""
+        return self._trucks.get(str(packing_truck_id).strip())
+    
+    def invalidate(self, packing_truck_ids: Optional[Iterable[str]] = None):
+        """
+        Descarta índices para forzar su reconstrucción en la próxima carga.
+        
+        Args:
+            packing_truck_ids: Camiones a invalidar (None = todos)
+        """
+        if packing_truck_ids is None:
+            self._trucks.clear()
+            self._fingerprints.clear()
+            return
+        
+        for truck_id in packing_truck_ids:
+            truck_id = str(truck_id).strip()
+            self._trucks.pop(truck_id, None)
+            self._fingerprints.pop(truck_id, None)
+    
+    def __contains__(self, packing_truck_id) -> bool:
+        return str(packing_truck_id).strip() in self._trucks
+    
+    def __len__(self) -> int:
+        return len(self._trucks)
+
+
+def _is_missing(value) -> bool:
+    """Indica si un valor de celda está vacío (None, NaN, NA o texto vacío)."""
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    if isinstance(value, str):
+        return not value.strip()
+    # pd.NA / pd.NaT solo pueden aparecer si pandas ya está cargado
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        try:
+            return bool(pd.isna(value))
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _truck_fingerprint(pallet_numbers: list, first_serials: list, last_serials: list) -> int:
+    """Hash de los pallets y seriales de un camión para detectar cambios."""
+    # Como texto: NaN no es igual a sí mismo y cambiaría el hash en cada carga
+    return hash(tuple(map(str, pallet_numbers + first_serials + last_serials)))
+
+
+def _layout_truck_number(layout_truck_id: str) -> str:
+    """Extrae el número del camión del layout ("C1" -> "1")."""
+    layout_truck_id = str(layout_truck_id)
+    return layout_truck_id.replace('C', '') if layout_truck_id.startswith('C') else layout_truck_id
+
+
+def _location_for_index(pallet_index: int) -> Optional[Tuple[int, int]]:
+    """Número de ubicación y slot de un índice, o None si excede el límite."""
+    ubicacion_num = ((pallet_index - 1) // 2) + 1
+    if ubicacion_num > MAX_LOCATIONS_PER_TRUCK:
         return None
-    except:
-        return None
+    return ubicacion_num, ((pallet_index - 1) % 2) + 1
 
 
-def get_pallet_sequence_index(pallet_number: str, truck_pallets_df: pd.DataFrame) -> Optional[int]:
+def as_truck_index(truck_pallets) -> TruckPalletIndex:
+    """
+    Obtiene el TruckPalletIndex de los pallets de un camión.
+    
+    Acepta el índice ya construido (se usa tal cual), un DataFrame con la
+    columna 'Pallet number' o una secuencia de números de pallet.
+    """
+    if isinstance(truck_pallets, TruckPalletIndex):
+        return truck_pallets
+    if hasattr(truck_pallets, 'columns'):
+        return TruckPalletIndex.from_dataframe(None, truck_pallets)
+    return TruckPalletIndex(None, truck_pallets)
+
+
+def get_pallet_sequence_index(
+    pallet_number: str,
+    truck_pallets: Union[TruckPalletIndex, Iterable, 'pd.DataFrame']
+) -> Optional[int]:
     """
     Obtiene el índice secuencial de un pallet dentro de su camión.
     
@@ -74,24 +501,15 @@ def get_pallet_sequence_index(pallet_number: str, truck_pallets_df: pd.DataFrame
     
     Args:
         pallet_number: Número del pallet a buscar
-        truck_pallets_df: DataFrame con los pallets del camión
+        truck_pallets: TruckPalletIndex del camión (búsqueda O(1)), lista de
+                       números de pallet o DataFrame con los pallets del camión
     
     Returns:
         Índice secuencial (1-based) o None si no se encuentra
     """
     try:
-        # Convertir todo a string para comparación
-        pallet_str = str(pallet_number)
-        
-        # Ordenar pallets por número
-        sorted_pallets = truck_pallets_df.sort_values('Pallet number')
-        
-        # Buscar el índice (1-based)
-        for idx, row in enumerate(sorted_pallets.itertuples(), start=1):
-            if str(row.__getattribute__('Pallet number')) == pallet_str:
-                return idx
-        
-        return None
+        # Sin índice precalculado se construye uno para esta consulta
+        return as_truck_index(truck_pallets).get_index(pallet_number)
     except Exception as e:
         print(f"Error obteniendo índice secuencial: {e}")
         return None
@@ -133,7 +551,7 @@ def calculate_location_from_index(
         ubicacion_num = ((pallet_index - 1) // 2) + 1
         
         # Validar límite de 57 ubicaciones
-        if ubicacion_num > 57:
+        if ubicacion_num > MAX_LOCATIONS_PER_TRUCK:
             return None, None, f"❌ Límite de 57 ubicaciones alcanzado. Pallet índice {pallet_index} requiere ubicación {ubicacion_num}."
         
         # Calcular slot (1 o 2)
@@ -141,8 +559,7 @@ def calculate_location_from_index(
         
         # Construir ubicación
         # Extraer el número del camión si viene como "C1", "C2", etc.
-        truck_num = layout_truck_id.replace('C', '') if layout_truck_id.startswith('C') else layout_truck_id
-        ubicacion = f"C{truck_num}-{ubicacion_num}"
+        ubicacion = f"C{_layout_truck_number(layout_truck_id)}-{ubicacion_num}"
         
         return ubicacion, slot, None
         
@@ -150,6 +567,18 @@ def calculate_location_from_index(
         return None, None, f"Error calculando ubicación: {e}"
 
 
+def as_location_set(layout_locations: Iterable[str]) -> Union[set, frozenset]:
+    """
+    Convierte las ubicaciones del layout en un conjunto para validar en O(1).
+    
+    Acepta una lista, un set o un LayoutModel (usa su location_set sin copiar).
+    """
+    location_set = getattr(layout_locations, 'location_set', layout_locations)
+    if isinstance(location_set, (set, frozenset)):
+        return location_set
+    return set(location_set)
+
+
 def validate_pallet_can_scan(
     pallet_index: int,
     layout_truck_id: str,
@@ -165,7 +594,7 @@ def validate_pallet_can_scan(
     Args:
         pallet_index: Índice secuencial del pallet
         layout_truck_id: ID del camión del layout
-        layout_locations: Lista de ubicaciones disponibles en el layout
+        layout_locations: Ubicaciones disponibles en el layout (lista, set o LayoutModel)
     
     Returns:
         Tuple (can_scan, message)
@@ -183,36 +612,113 @@ def validate_pallet_can_scan(
     return True, f"✅ Pallet puede escanearse en {ubicacion} slot {slot}"
 
 
+def plan_truck_locations(
+    pallet_numbers,
+    layout_truck_id: str,
+    layout_locations: Optional[Iterable[str]] = None
+) -> 'pd.DataFrame':
+    """
+    Calcula de una vez la ubicación de todos los pallets de un camión.
+    
+    Equivale a llamar get_pallet_sequence_index + validate_pallet_can_scan por
+    cada pallet, pero en una sola pasada vectorizada. Permite mostrar la
+    colocación completa del camión y detectar desbordes antes del primer
+    escaneo.
+    
+    Args:
+        pallet_numbers: Columna 'Pallet number' del camión (Series, lista o array)
+        layout_truck_id: ID del camión del layout (ej: "C1")
+        layout_locations: Ubicaciones del layout para marcar las que faltan (opcional)
+    
+    Returns:
+        DataFrame alineado con la entrada, con columnas:
+        - pallet_number: número normalizado
+        - pallet_sequence_index: índice secuencial (1-based)
+        - ubicacion: ubicación asignada (None si desborda)
+        - slot: 1 o 2 (<NA> si desborda)
+        - overflow: True si el pallet excede las 57 ubicaciones
+        - missing_in_layout: True si la ubicación no existe en el layout
+    """
+    import numpy as np
+    import pandas as pd
+    
+    pallets = pallet_numbers if isinstance(pallet_numbers, pd.Series) else pd.Series(list(pallet_numbers))
+    
+    valid = ~pallets.isna().to_numpy()
+    if not pd.api.types.is_numeric_dtype(pallets.dtype):
+        # object en pandas 2, str en pandas 3: las celdas en blanco no cuentan
+        valid &= (pallets.astype(str).str.strip() != '').to_numpy()
+    
+    # Llave normalizada (mismo criterio que normalize_pallet_number)
+    if pd.api.types.is_numeric_dtype(pallets.dtype):
+        numeric = pallets.to_numpy(dtype='float64', na_value=np.nan)
+        is_numeric = valid & (numeric == np.floor(numeric))
+        keys = np.where(is_numeric, np.nan_to_num(numeric).astype('int64').astype(str), pallets.astype(str))
+    else:
+        text = pallets.astype(str).str.strip()
+        is_numeric = valid & text.str.fullmatch(r'\d+').fillna(False).to_numpy(dtype=bool)
+        numeric = np.where(is_numeric, pd.to_numeric(text.where(is_numeric, '0')), 0).astype('float64')
+        keys = np.where(is_numeric, numeric.astype('int64').astype(str), text.to_numpy(dtype=object))
+    numeric = np.where(is_numeric, numeric, 0)
+    
+    # Orden natural: numéricos por valor, luego texto; los vacíos al final
+    order = np.lexsort((keys.astype(str), numeric, ~is_numeric, ~valid))
+    positions = np.empty(len(pallets), dtype='int64')
+    positions[order] = np.arange(1, len(pallets) + 1)
+    
+    # Un pallet duplicado conserva el primer índice (igual que TruckPalletIndex)
+    ranks = positions.copy()
+    ranks[valid] = pd.Series(positions[valid]).groupby(keys[valid].astype(str), sort=False).transform('min')
+    
+    ubicacion_num = (ranks - 1) // 2 + 1
+    slots = (ranks - 1) % 2 + 1
+    overflow = valid & (ubicacion_num > MAX_LOCATIONS_PER_TRUCK)
+    placed = valid & ~overflow
+    
+    prefix = f"C{_layout_truck_number(layout_truck_id)}-"
+    ubicaciones = np.where(placed, np.char.add(prefix, ubicacion_num.astype(str)), None)
+    
+    if layout_locations:
+        missing = placed & ~pd.Series(ubicaciones).isin(as_location_set(layout_locations)).to_numpy()
+    else:
+        missing = np.zeros(len(pallets), dtype=bool)
+    
+    plan = pd.DataFrame({
+        'pallet_number': np.where(valid, keys, None),
+        'pallet_sequence_index': pd.array(ranks, dtype='Int64'),
+        'ubicacion': ubicaciones,
+        'slot': pd.array(slots, dtype='Int64'),
+        'overflow': overflow,
+        'missing_in_layout': missing
+    }, index=pallets.index)
+    plan['pallet_sequence_index'] = plan['pallet_sequence_index'].mask(~valid)
+    plan['slot'] = plan['slot'].mask(~placed)
+    return plan
+
+
 def get_next_expected_pallet(
-    scanned_pallets: list,
-    all_pallets_df: pd.DataFrame
+    scanned_pallets: Iterable,
+    all_pallets: Union[TruckPalletIndex, Iterable, 'pd.DataFrame']
 ) -> Optional[dict]:
     """
     OPCIONAL: Obtiene el siguiente pallet esperado en el orden secuencial.
     
-    Útil si se quiere validar que se escanean en orden.
+    Útil si se quiere validar que se escanean en orden. Para un turno
+    completo conviene un SequenceTracker por camión (ver sequence_tracker),
+    que avanza su cursor con cada escaneo en lugar de reconstruirse.
     
     Args:
-        scanned_pallets: Lista de pallets ya escaneados
-        all_pallets_df: DataFrame con todos los pallets del camión
+        scanned_pallets: Pallets ya escaneados
+        all_pallets: TruckPalletIndex del camión, lista de números de pallet o
+                     DataFrame con todos los pallets del camión
     
     Returns:
         Dict con información del siguiente pallet esperado o None
     """
+    from .sequence_tracker import SequenceTracker
+    
     try:
-        sorted_pallets = all_pallets_df.sort_values('Pallet number')
-        
-        for idx, row in sorted_pallets.iterrows():
-            pallet_num = str(row['Pallet number'])
-            if pallet_num not in scanned_pallets:
-                return {
-                    'pallet_number': pallet_num,
-                    'index': len([p for p in sorted_pallets['Pallet number'] if str(p) <= pallet_num]),
-                    'first_serial': row['first_serial'],
-                    'last_serial': row['last_serial']
-                }
-        
-        return None
+        return SequenceTracker.from_scans(as_truck_index(all_pallets), scanned_pallets).next_expected()
     except Exception as e:
         print(f"Error obteniendo siguiente pallet: {e}")
         return None
@@ -0,0 +1,345 @@
+"""
+Registros columnares del shipment y de los escaneos, sin pandas.
+
+El escaneo solo hace búsquedas pequeñas (un pallet, los escaneos de un
+camión). Cargar pandas y armar un DataFrame por consulta pesa más que la
+búsqueda misma, sobre todo en el móvil. Aquí los datos se guardan por
+columna en tuplas y arrays, y cada fila se materializa como un registro con
+__slots__ solo cuando se pide.
+
+pandas queda como adaptador de exportación: to_dataframe() y from_dataframe()
+lo importan en el momento de usarse.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Columnas de pallet_scans, en el orden de la tabla
+SCAN_COLUMNS = (
+    'id',
+    'packing_truck_id',
+    'layout_truck_id',
+    'pallet_number',
+    'pallet_sequence_index',
+    'first_serial',
+    'last_serial',
+    'ubicacion',
+    'slot',
+    'scanned_at'
+)
+
+SELECT_SCANS_SQL = f"SELECT {', '.join(SCAN_COLUMNS)} FROM pallet_scans"
+
+# Columnas del shipment que usa el escaneo
+SHIPMENT_COLUMNS = ('CAMION', 'Pallet number', 'first_serial', 'last_serial')
+
+_CANONICAL_HEADERS = {name.upper(): name for name in SHIPMENT_COLUMNS}
+
+
+def canonical_headers(headers: Sequence[str]) -> List[str]:
+    """
+    Header con las columnas de SHIPMENT_COLUMNS escritas como en el código.
+
+    El header se busca sin distinguir mayúsculas (ver find_header_row), así
+    que una hoja con "Camion" también se carga; aquí esa celda pasa a ser
+    "CAMION" para ubicar las columnas igual que con el nombre exacto.
+
+    Args:
+        headers: Fila del header de la hoja
+
+    Returns:
+        Lista nueva con los nombres corregidos (el resto queda igual)
+    """
+    return [_CANONICAL_HEADERS.get(str(name).upper(), name) for name in headers]
+
+
+class ScanRecord:
+    """Un escaneo de pallet_scans."""
+
+    __slots__ = SCAN_COLUMNS
+
+    def __init__(self, *values):
+        for name, value in zip(SCAN_COLUMNS, values):
+            setattr(self, name, value)
+
+    def as_dict(self) -> Dict:
+        """Retorna el escaneo como dict (columna -> valor)."""
+        return {name: getattr(self, name) for name in SCAN_COLUMNS}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ScanRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in SCAN_COLUMNS)
+
+    def __repr__(self) -> str:
+        return (f"ScanRecord({self.packing_truck_id!r}, {self.pallet_number!r}, "
+                f"{self.ubicacion!r}, slot={self.slot})")
+
+
+class ScanTable:
+    """
+    Escaneos en columnas (una tupla por columna de pallet_scans).
+
+    Se recorre como una secuencia de ScanRecord.
+    """
+
+    __slots__ = ('_columns', '_length')
+
+    def __init__(self, rows: Iterable[Sequence] = ()):
+        """
+        Construye la tabla a partir de filas en el orden de SCAN_COLUMNS.
+
+        Args:
+            rows: Filas (por ejemplo, el resultado de un cursor sobre SELECT_SCANS_SQL)
+        """
+        rows = list(rows)
+        columns = tuple(zip(*rows)) if rows else ((),) * len(SCAN_COLUMNS)
+        self._columns: Dict[str, tuple] = dict(zip(SCAN_COLUMNS, columns))
+        self._length = len(rows)
+
+    @classmethod
+    def from_query(cls, conn, where: str = '', params: Sequence = (), order_by: str = 'pallet_sequence_index') -> 'ScanTable':
+        """
+        Lee escaneos de pallet_scans.
+
+        Args:
+            conn: Conexión SQLite
+            where: Condición SQL opcional (sin la palabra WHERE)
+            params: Parámetros de la condición
+            order_by: Columna de orden
+
+        Returns:
+            ScanTable con las filas encontradas
+        """
+        sql = SELECT_SCANS_SQL
+        if where:
+            sql += f' WHERE {where}'
+        if order_by:
+            sql += f' ORDER BY {order_by}'
+        return cls(conn.execute(sql, tuple(params)))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int) -> ScanRecord:
+        return ScanRecord(*(self._columns[name][i] for name in SCAN_COLUMNS))
+
+    def __iter__(self) -> Iterator[ScanRecord]:
+        columns = [self._columns[name] for name in SCAN_COLUMNS]
+        for values in zip(*columns):
+            yield ScanRecord(*values)
+
+    def column(self, name: str) -> tuple:
+        """Retorna una columna completa (ej: 'pallet_number')."""
+        return self._columns[name]
+
+    @property
+    def empty(self) -> bool:
+        return self._length == 0
+
+    def to_dicts(self) -> List[Dict]:
+        """Retorna las filas como lista de dicts."""
+        return [record.as_dict() for record in self]
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Exporta la tabla a un DataFrame de pandas (para reportes)."""
+        import pandas as pd
+
+        return pd.DataFrame({name: list(self._columns[name]) for name in SCAN_COLUMNS})
+
+
+class ShipmentTable:
+    """
+    Filas del shipment en columnas, agrupadas por camión del packing list.
+
+    Guarda solo lo que necesita el escaneo: camión, número de pallet y
+    seriales, más la etiqueta de fila de origen (para volver a la hoja).
+    """
+
+    __slots__ = ('trucks', 'pallet_numbers', 'first_serials', 'last_serials', 'row_labels', '_truck_rows')
+
+    def __init__(
+        self,
+        trucks: Iterable,
+        pallet_numbers: Iterable,
+        first_serials: Optional[Iterable] = None,
+        last_serials: Optional[Iterable] = None,
+        row_labels: Optional[Iterable[int]] = None
+    ):
+        """
+        Construye la tabla a partir de sus columnas (todas del mismo largo).
+
+        Args:
+            trucks: ID del camión de cada fila
+            pallet_numbers: Número de pallet de cada fila
+            first_serials: Primer serial de cada fila (opcional)
+            last_serials: Último serial de cada fila (opcional)
+            row_labels: Posición de cada fila en los datos de origen (default: 0..n-1)
+        """
+        self.trucks: Tuple[str, ...] = tuple('' if t is None else str(t).strip() for t in trucks)
+        count = len(self.trucks)
+        self.pallet_numbers: tuple = tuple(pallet_numbers)
+        self.first_serials: tuple = tuple(first_serials) if first_serials is not None else (None,) * count
+        self.last_serials: tuple = tuple(last_serials) if last_serials is not None else (None,) * count
+        self.row_labels: tuple = tuple(row_labels) if row_labels is not None else tuple(range(count))
+
+        if not (len(self.pallet_numbers) == len(self.first_serials) == len(self.last_serials)
+                == len(self.row_labels) == count):
+            raise ValueError("Las columnas del shipment no tienen el mismo largo")
+
+        # camión -> posiciones de sus filas (array de enteros), en orden de aparición
+        self._truck_rows: Dict[str, array] = {}
+        for i, truck in enumerate(self.trucks):
+            if truck:
+                rows = self._truck_rows.get(truck)
+                if rows is None:
+                    rows = self._truck_rows[truck] = array('i')
+                rows.append(i)
+
+    @classmethod
+    def from_values(cls, values: List[List[str]], header_row: int) -> 'ShipmentTable':
+        """
+        Construye la tabla desde los valores crudos de la hoja (get_all_values).
+
+        Las filas sin CAMION se descartan; row_labels conserva la posición de
+        cada fila debajo del header.
+
+        Args:
+            values: Lista de filas de la hoja
+            header_row: Posición (0-based) de la fila del header
+
+        Returns:
+            ShipmentTable
+        """
+        headers = canonical_headers(values[header_row])
+        positions = {name: headers.index(name) for name in SHIPMENT_COLUMNS if name in headers}
+        if 'CAMION' not in positions:
+            raise ValueError("La hoja no tiene columna CAMION")
+
+        def cell(row, name):
+            i = positions.get(name)
+            return row[i] if i is not None and i < len(row) else None
+
+        rows = [
+            (label, row) for label, row in enumerate(values[header_row + 1:])
+            if (cell(row, 'CAMION') or '').strip()
+        ]
+        return cls(
+            (cell(row, 'CAMION') for _, row in rows),
+            (cell(row, 'Pallet number') for _, row in rows),
+            (cell(row, 'first_serial') for _, row in rows),
+            (cell(row, 'last_serial') for _, row in rows),
+            (label for label, _ in rows)
+        )
+
+    @classmethod
+    def from_dataframe(cls, df: 'pd.DataFrame', truck_column: str = 'CAMION') -> 'ShipmentTable':
+        """
+        Construye la tabla desde el DataFrame del shipment.
+
+        Args:
+            df: DataFrame del shipment
+            truck_column: Columna con el ID del camión del packing list
+
+        Returns:
+            ShipmentTable (row_labels = índice del DataFrame)
+        """
+        def column(name):
+            return df[name].tolist() if name in df.columns else None
+
+        return cls(
+            df[truck_column].tolist(),
+            column('Pallet number') or [None] * len(df),
+            column('first_serial'),
+            column('last_serial'),
+            df.index.tolist()
+        )
+
+    def with_rows(self, rows: Dict[int, Sequence[str]], headers: Sequence[str]) -> 'ShipmentTable':
+        """
+        Copia de la tabla con algunas filas reemplazadas (recarga incremental).
+
+        Si ninguna fila cambia de camión, la copia comparte el agrupamiento
+        por camión con esta tabla; copiar las columnas es trabajo de C.
+
+        Args:
+            rows: {etiqueta de fila: fila cruda de la hoja}; las etiquetas
+                  deben existir en la tabla
+            headers: Header de la hoja (para ubicar las columnas)
+
+        Returns:
+            ShipmentTable nueva
+
+        Raises:
+            KeyError: Si una etiqueta no está en la tabla
+        """
+        headers = canonical_headers(headers)
+        positions = {name: headers.index(name) for name in SHIPMENT_COLUMNS if name in headers}
+        columns = (list(self.trucks), list(self.pallet_numbers), list(self.first_serials), list(self.last_serials))
+        trucks_changed = False
+
+        for label, row in rows.items():
+            i = bisect_left(self.row_labels, label)
+            if i == len(self.row_labels) or self.row_labels[i] != label:
+                raise KeyError(label)
+            for column, name in zip(columns, SHIPMENT_COLUMNS):
+                j = positions.get(name)
+                column[i] = row[j] if j is not None and j < len(row) else None
+            truck = '' if columns[0][i] is None else str(columns[0][i]).strip()
+            columns[0][i] = truck
+            trucks_changed = trucks_changed or truck != self.trucks[i]
+
+        if trucks_changed:
+            return ShipmentTable(*columns, self.row_labels)
+
+        table = ShipmentTable.__new__(ShipmentTable)
+        table.trucks = self.trucks
+        table.pallet_numbers, table.first_serials, table.last_serials = map(tuple, columns[1:])
+        table.row_labels = self.row_labels
+        table._truck_rows = self._truck_rows
+        return table
+
+    def __len__(self) -> int:
+        return len(self.trucks)
+
+    @property
+    def truck_ids(self) -> List[str]:
+        """Camiones del shipment, en orden de aparición."""
+        return list(self._truck_rows)
+
+    def __contains__(self, packing_truck_id) -> bool:
+        return str(packing_truck_id).strip() in self._truck_rows
+
+    def truck_rows(self, packing_truck_id: str) -> Sequence[int]:
+        """Posiciones de las filas de un camión (vacío si no existe)."""
+        return self._truck_rows.get(str(packing_truck_id).strip(), ())
+
+    def truck_columns(self, packing_truck_id: str) -> Tuple[list, list, list]:
+        """
+        Columnas de un camión.
+
+        Returns:
+            Tuple (pallet_numbers, first_serials, last_serials)
+        """
+        rows = self.truck_rows(packing_truck_id)
+        return (
+            [self.pallet_numbers[i] for i in rows],
+            [self.first_serials[i] for i in rows],
+            [self.last_serials[i] for i in rows]
+        )
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Exporta la tabla a un DataFrame de pandas (para reportes)."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'CAMION': list(self.trucks),
+            'Pallet number': list(self.pallet_numbers),
+            'first_serial': list(self.first_serials),
+            'last_serial': list(self.last_serials)
+        }, index=list(self.row_labels))
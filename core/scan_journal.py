@@ -0,0 +1,457 @@
+"""
+Módulo de bitácora local de escaneos para trabajar sin conexión.
+
+Si el escáner pierde el Wi-Fi o la base de datos está ocupada,
+register_pallet_scan y las llamadas a Sheets solo imprimen el error y el
+escaneo se pierde. ScanJournal recibe el escaneo primero en un archivo local
+de solo agregado y retorna de inmediato; JournalSyncWorker lo aplica en
+segundo plano a pallet_scans y a la cola de estatus de Sheets.
+
+Formato del archivo: registros consecutivos
+    [longitud uint32 LE][crc32 uint32 LE][payload JSON UTF-8]
+- Un registro con longitud o CRC inválido marca el final (escritura cortada
+  por un apagón): al abrir se trunca ahí.
+- Cada registro se pasa al sistema operativo al agregarlo (sobrevive a que
+  se cierre la app); el fsync a disco se agrupa cada FSYNC_INTERVAL segundos
+  o FSYNC_EVERY registros.
+- Lo aplicado se confirma con un registro 'ack'; el archivo se compacta
+  cuando todo está confirmado o hay muchos registros confirmados.
+
+La entrega es al menos una vez: cada registro lleva una clave de
+idempotencia y la base de datos guarda las claves aplicadas en la misma
+transacción que los escaneos, así reaplicar un registro no lo duplica.
+Una clave solo hace falta mientras su registro siga en el archivo: después
+de compactar, JournalSyncWorker la borra de la base (take_released).
+"""
+
+import json
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import increment, timed
+
+
+DEFAULT_JOURNAL_FILE = 'scans.journal'
+
+# fsync agrupado: cada cuántos segundos y cada cuántos registros
+FSYNC_INTERVAL = 0.05
+FSYNC_EVERY = 256
+
+# Registros confirmados que disparan una compactación del archivo
+COMPACT_AFTER = 10000
+
+RECORD_SCAN = 'scan'
+RECORD_STATUS = 'status'
+RECORD_ACK = 'ack'
+
+_HEADER = struct.Struct('<II')
+
+
+def encode_record(payload) -> bytes:
+    """Serializa un registro con su longitud y CRC32."""
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(data), zlib.crc32(data)) + data
+
+
+def decode_records(data: bytes):
+    """
+    Lee los registros válidos de un archivo.
+
+    Yields:
+        Tuple (payload, offset de inicio, offset de fin) de cada registro.
+        Se detiene en el primer registro incompleto o con CRC inválido.
+    """
+    view = memoryview(data)
+    offset = 0
+    end = len(data)
+    while offset + _HEADER.size <= end:
+        length, crc = _HEADER.unpack_from(view, offset)
+        start = offset + _HEADER.size
+        if start + length > end:
+            return
+        body = view[start:start + length]
+        if zlib.crc32(body) != crc:
+            return
+        try:
+            payload = json.loads(bytes(body))
+        except ValueError:
+            return
+        yield payload, offset, start + length
+        offset = start + length
+
+
+class ScanJournal:
+    """
+    Archivo de escaneos y estatus pendientes de aplicar.
+
+    Los registros pendientes se mantienen también en memoria, en el orden
+    en que llegaron: {clave: (registro, bytes codificados)}; los bytes se
+    reutilizan al compactar.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_JOURNAL_FILE,
+        fsync_interval: float = FSYNC_INTERVAL,
+        fsync_every: int = FSYNC_EVERY
+    ):
+        """
+        Abre la bitácora y recupera lo pendiente de una sesión anterior.
+
+        Args:
+            path: Archivo de la bitácora
+            fsync_interval: Segundos máximos entre fsync (0 = fsync en cada registro)
+            fsync_every: Registros que fuerzan un fsync inmediato
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.fsync_every = fsync_every
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[list, bytes]] = {}
+        # Claves confirmadas que siguen en el archivo / que ya salieron de él
+        self._acked_keys: List[str] = []
+        self._released: List[str] = []
+        self._acked = 0
+        self._dirty = 0
+        self._session = os.urandom(6).hex()
+        self._counter = count(1)
+        self._closed = threading.Event()
+
+        self.recovered = self._replay()
+        self._file = open(path, 'ab')
+
+        self._flusher = None
+        if fsync_interval > 0:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name='scan-journal-fsync', daemon=True
+            )
+            self._flusher.start()
+
+    # ------------------------------------------------------------------
+    # Agregar
+    # ------------------------------------------------------------------
+
+    def append_scan(
+        self,
+        packing_truck_id: str,
+        layout_truck_id: str,
+        pallet_number: str,
+        pallet_sequence_index: int,
+        first_serial: str,
+        last_serial: str,
+        ubicacion: str,
+        slot: int
+    ) -> str:
+        """
+        Guarda un escaneo (mismos argumentos que register_pallet_scan).
+
+        Returns:
+            Clave de idempotencia del registro
+        """
+        params = [
+            str(packing_truck_id),
+            str(layout_truck_id),
+            str(pallet_number),
+            int(pallet_sequence_index),
+            str(first_serial),
+            str(last_serial),
+            str(ubicacion),
+            int(slot)
+        ]
+        return self._append(RECORD_SCAN, params)
+
+    def append_status(self, truck_id: str, status: str) -> str:
+        """
+        Guarda un cambio de estatus de un camión para la hoja.
+
+        Returns:
+            Clave de idempotencia del registro
+        """
+        return self._append(RECORD_STATUS, [str(truck_id).strip(), str(status)])
+
+    def _append(self, kind: str, data: list) -> str:
+        key = f'{self._session}-{next(self._counter)}'
+        record = [kind, key, data]
+        encoded = encode_record(record)
+        with self._lock:
+            self._file.write(encoded)
+            self._file.flush()
+            self._pending[key] = (record, encoded)
+            self._dirty += 1
+            if self.fsync_interval <= 0 or self._dirty >= self.fsync_every:
+                self._fsync()
+        return key
+
+    # ------------------------------------------------------------------
+    # Pendientes y confirmación
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Cantidad de registros pendientes."""
+        return len(self._pending)
+
+    def pending(self, limit: Optional[int] = None) -> List[list]:
+        """
+        Registros pendientes en orden de llegada.
+
+        Args:
+            limit: Máximo de registros (None = todos)
+
+        Returns:
+            Lista de [tipo, clave, datos]; datos son los parámetros de
+            INSERT_SCAN_SQL para 'scan' o [truck_id, status] para 'status'
+        """
+        with self._lock:
+            if limit is None:
+                return [record for record, _ in self._pending.values()]
+            result = []
+            for record, _ in self._pending.values():
+                if len(result) >= limit:
+                    break
+                result.append(record)
+            return result
+
+    def ack(self, keys: List[str]):
+        """
+        Confirma registros ya aplicados.
+
+        El ack no necesita fsync: si se pierde, el registro se vuelve a
+        aplicar y la clave de idempotencia evita el duplicado.
+
+        Args:
+            keys: Claves de los registros aplicados
+        """
+        with self._lock:
+            keys = [key for key in keys if key in self._pending]
+            if not keys:
+                return
+            self._file.write(encode_record([RECORD_ACK, keys]))
+            self._file.flush()
+            for key in keys:
+                del self._pending[key]
+            self._acked_keys.extend(keys)
+            self._acked += len(keys)
+            self._dirty += 1
+            # Compactar cuesta lo pendiente: solo cuando lo confirmado pesa más
+            if not self._pending or self._acked >= max(COMPACT_AFTER, len(self._pending)):
+                self._compact()
+
+    def take_released(self) -> List[str]:
+        """
+        Retorna (y olvida) las claves que ya no están en el archivo.
+
+        Un registro compactado no se vuelve a leer al abrir, así que su
+        clave de idempotencia ya no hace falta en la base de datos.
+
+        Returns:
+            Claves liberadas desde la llamada anterior
+        """
+        with self._lock:
+            released, self._released = self._released, []
+            return released
+
+    def sync(self):
+        """Fuerza el fsync de lo escrito."""
+        with self._lock:
+            self._fsync()
+
+    def close(self):
+        """Hace fsync y cierra el archivo."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=1.0)
+        with self._lock:
+            if not self._file.closed:
+                self._fsync()
+                self._file.close()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _replay(self) -> int:
+        """Lee el archivo al abrir y descarta una cola incompleta. Retorna los pendientes."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+
+        valid_end = 0
+        records = 0
+        pending = self._pending
+        for payload, start, valid_end in decode_records(data):
+            records += 1
+            if payload[0] == RECORD_ACK:
+                for key in payload[1]:
+                    pending.pop(key, None)
+                self._acked_keys.extend(payload[1])
+            else:
+                pending[payload[1]] = (payload, data[start:valid_end])
+
+        if valid_end < len(data):
+            print(f"⚠️ Bitácora de escaneos cortada: se descartan {len(data) - valid_end} bytes al final")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+                os.fsync(f.fileno())
+
+        self._acked = records - len(pending)
+        if pending:
+            print(f"📥 {len(pending)} registros pendientes recuperados de la bitácora")
+        return len(pending)
+
+    def _fsync(self):
+        """Baja a disco lo escrito (requiere self._lock)."""
+        if self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = 0
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.fsync_interval):
+            if self._dirty:
+                with self._lock:
+                    if not self._file.closed:
+                        self._fsync()
+
+    def _compact(self):
+        """Reescribe el archivo solo con los pendientes (requiere self._lock)."""
+        if not self._pending:
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+        else:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(b''.join(encoded for _, encoded in self._pending.values()))
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'ab')
+        self._released.extend(self._acked_keys)
+        self._acked_keys = []
+        self._acked = 0
+        self._dirty = 0
+
+
+class JournalSyncWorker:
+    """Hilo que aplica la bitácora a la base de datos y a la cola de estatus."""
+
+    def __init__(
+        self,
+        journal: ScanJournal,
+        db,
+        status_queue=None,
+        interval: float = 1.0,
+        batch_size: int = 500,
+        max_backoff: float = 60.0
+    ):
+        """
+        Inicializa el sincronizador (no arranca hasta start()).
+
+        Args:
+            journal: Bitácora a vaciar
+            db: DatabaseManager destino de los escaneos
+            status_queue: StatusWriteQueue de la hoja (None = los estatus
+                          quedan pendientes en la bitácora)
+            interval: Segundos entre intentos cuando no hay avisos
+            batch_size: Registros por transacción
+            max_backoff: Espera máxima entre reintentos tras un error
+        """
+        self.journal = journal
+        self.db = db
+        self.status_queue = status_queue
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_result: Optional[Dict] = None
+
+    def start(self):
+        """Arranca el hilo de sincronización."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scan-journal-sync', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Pide una sincronización inmediata (por ejemplo, tras un escaneo)."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene el hilo después de la sincronización en curso."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @timed('journal.sync')
+    def sync_once(self) -> Dict:
+        """
+        Aplica todo lo pendiente, en lotes de batch_size registros.
+
+        Returns:
+            Dict con 'scans' (aplicados), 'duplicates' (ya estaban aplicados),
+            'statuses' (enviados a la cola), 'pending' (restantes) y 'error'
+        """
+        result = {'scans': 0, 'duplicates': 0, 'statuses': 0, 'pending': 0, 'error': None}
+        records = self.journal.pending()
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            scans = [(key, data) for kind, key, data in batch if kind == RECORD_SCAN]
+            statuses = [(key, data) for kind, key, data in batch if kind == RECORD_STATUS]
+            applied = []
+
+            if scans:
+                success, outcome = self.db.register_journaled_scans(scans)
+                if not success:
+                    result['error'] = outcome.get('error')
+                    break
+                applied.extend(key for key, _ in scans)
+                result['scans'] += outcome['applied']
+                result['duplicates'] += outcome['duplicates']
+
+            if statuses and self.status_queue is not None:
+                # La cola guarda lo pendiente en disco antes de confirmar aquí
+                self.status_queue.enqueue_many(data for _, data in statuses)
+                applied.extend(key for key, _ in statuses)
+                result['statuses'] += len(statuses)
+
+            self.journal.ack(applied)
+
+        released = self.journal.take_released()
+        if released and not self.db.forget_journal_keys(released):
+            # Quedan en la base hasta que venza JOURNAL_KEY_RETENTION_DAYS
+            result['error'] = result['error'] or "No se pudieron borrar claves de la bitácora"
+
+        result['pending'] = len(self.journal)
+        increment('journal.scans.synced', result['scans'])
+        if result['statuses'] and self.status_queue is not None:
+            self.status_queue.flush()
+        return result
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.is_set():
+            if len(self.journal):
+                try:
+                    self.last_result = self.sync_once()
+                    error = self.last_result['error']
+                except Exception as e:
+                    error = str(e)
+                if error:
+                    print(f"📴 Sincronización pendiente ({len(self.journal)} registros): {error}")
+                    delay = min(delay * 2, self.max_backoff)
+                else:
+                    delay = self.interval
+            self._wake.wait(delay)
+            self._wake.clear()
@@ -0,0 +1,303 @@
+"""
+Módulo de seguimiento del orden de escaneo por camión.
+
+Un SequenceTracker guarda qué índices secuenciales de un camión del packing
+list ya se escanearon y un cursor al siguiente pallet esperado. El cursor
+solo avanza, así que recorrer un camión completo cuesta O(n) en total y
+cada consulta del siguiente pallet es O(1) amortizado, sin volver a ordenar
+ni recorrer los datos del shipment.
+
+También reporta huecos (pallets saltados que siguen pendientes) y escaneos
+fuera de orden, para el modo de escaneo estricto. Al arrancar, el estado se
+reconstruye desde pallet_scans.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .pallet_ordering import ShipmentPalletIndex, TruckPalletIndex, normalize_pallet_number
+
+
+class SequenceTracker:
+    """Estado de escaneo secuencial de un camión del packing list."""
+
+    __slots__ = (
+        'truck_index', '_scanned', '_scanned_count', '_duplicates',
+        '_cursor', '_max_scanned', 'out_of_order'
+    )
+
+    def __init__(self, truck_index: TruckPalletIndex):
+        """
+        Inicializa el seguimiento sin pallets escaneados.
+
+        Args:
+            truck_index: Índice de pallets del camión
+        """
+        self.truck_index = truck_index
+        # Un byte por índice secuencial (1-based; la posición 0 no se usa)
+        self._scanned = bytearray(len(truck_index) + 1)
+        self._scanned_count = 0
+        self._cursor = 1
+        self._max_scanned = 0
+        # (pallet, índice, índice esperado) de cada escaneo fuera de orden
+        self.out_of_order: List[Tuple[str, int, int]] = []
+
+        # Un pallet repetido en el sheet conserva su primer índice; sus otros
+        # índices nunca se escanean y no deben detener el cursor
+        self._duplicates = 0
+        for rank, pallet in enumerate(truck_index.pallet_numbers, start=1):
+            if truck_index.get_index(pallet) != rank:
+                self._scanned[rank] = 1
+                self._duplicates += 1
+        self._scanned_count = self._duplicates
+        self._advance()
+
+    @classmethod
+    def from_scans(cls, truck_index: TruckPalletIndex, scanned_pallets: Iterable) -> 'SequenceTracker':
+        """
+        Reconstruye el seguimiento a partir de pallets ya escaneados.
+
+        El orden original de los escaneos no se conoce, así que no se
+        reportan escaneos fuera de orden anteriores; los huecos sí.
+
+        Args:
+            truck_index: Índice de pallets del camión
+            scanned_pallets: Números de pallet escaneados (cualquier orden)
+
+        Returns:
+            SequenceTracker con el cursor en el primer pallet pendiente
+        """
+        tracker = cls(truck_index)
+        for pallet in scanned_pallets:
+            rank = truck_index.get_index(pallet)
+            if rank is not None:
+                tracker._mark(rank)
+        tracker._advance()
+        return tracker
+
+    def _mark(self, rank: int) -> bool:
+        """Marca un índice como escaneado. Retorna False si ya lo estaba."""
+        if self._scanned[rank]:
+            return False
+        self._scanned[rank] = 1
+        self._scanned_count += 1
+        if rank > self._max_scanned:
+            self._max_scanned = rank
+        return True
+
+    def _advance(self):
+        """Mueve el cursor al primer índice pendiente."""
+        scanned = self._scanned
+        cursor = self._cursor
+        total = len(scanned) - 1
+        while cursor <= total and scanned[cursor]:
+            cursor += 1
+        self._cursor = cursor
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @property
+    def packing_truck_id(self) -> Optional[str]:
+        return self.truck_index.packing_truck_id
+
+    @property
+    def expected_index(self) -> Optional[int]:
+        """Índice secuencial del siguiente pallet esperado (None si el camión está completo)."""
+        return self._cursor if self._cursor < len(self._scanned) else None
+
+    def next_expected(self) -> Optional[dict]:
+        """
+        Obtiene el siguiente pallet esperado en el orden secuencial.
+
+        Returns:
+            Dict con 'pallet_number', 'index', 'first_serial', 'last_serial'
+            o None si todos los pallets ya se escanearon
+        """
+        index = self.expected_index
+        return self.truck_index.pallet_at(index) if index is not None else None
+
+    def is_scanned(self, pallet_number) -> bool:
+        """Indica si un pallet del camión ya se escaneó."""
+        rank = self.truck_index.get_index(pallet_number)
+        return rank is not None and bool(self._scanned[rank])
+
+    @property
+    def scanned_count(self) -> int:
+        return self._scanned_count - self._duplicates
+
+    @property
+    def remaining(self) -> int:
+        return len(self._scanned) - 1 - self._scanned_count
+
+    @property
+    def complete(self) -> bool:
+        return self.remaining == 0
+
+    def gaps(self) -> List[str]:
+        """
+        Pallets saltados: pendientes con índice menor al mayor escaneado.
+
+        Solo recorre el tramo entre el cursor y el mayor índice escaneado.
+
+        Returns:
+            Números de pallet en orden secuencial
+        """
+        pallets = self.truck_index.pallet_numbers
+        return [
+            pallets[rank - 1]
+            for rank in range(self._cursor, self._max_scanned)
+            if not self._scanned[rank]
+        ]
+
+    # ------------------------------------------------------------------
+    # Escaneo
+    # ------------------------------------------------------------------
+
+    def check(self, pallet_number, strict: bool = True) -> Tuple[bool, str]:
+        """
+        Valida un escaneo sin registrarlo.
+
+        Args:
+            pallet_number: Número del pallet escaneado
+            strict: Si es True, solo acepta el siguiente pallet esperado
+
+        Returns:
+            Tuple (puede_escanear, mensaje)
+        """
+        rank = self.truck_index.get_index(pallet_number)
+        if rank is None:
+            return False, f"❌ Pallet {pallet_number} no pertenece al camión {self.packing_truck_id}"
+        if self._scanned[rank]:
+            return False, f"⚠️ Pallet {normalize_pallet_number(pallet_number)} ya fue escaneado"
+        if strict and rank != self._cursor:
+            expected = self.truck_index.pallet_numbers[self._cursor - 1]
+            return False, (f"❌ Fuera de orden: se esperaba el pallet {expected} "
+                           f"(índice {self._cursor}), se escaneó el índice {rank}")
+        return True, f"✅ Pallet {normalize_pallet_number(pallet_number)} en orden (índice {rank})"
+
+    def record(self, pallet_number) -> Optional[dict]:
+        """
+        Registra un escaneo y avanza el cursor.
+
+        Args:
+            pallet_number: Número del pallet escaneado
+
+        Returns:
+            Dict con:
+            - index: índice secuencial del pallet
+            - expected_index: índice que se esperaba antes del escaneo
+            - in_order: True si era el pallet esperado
+            - duplicate: True si ya estaba escaneado (no cambia el estado)
+            - skipped: pallets pendientes que quedaron atrás con este escaneo
+            O None si el pallet no es de este camión
+        """
+        rank = self.truck_index.get_index(pallet_number)
+        if rank is None:
+            return None
+
+        expected = self._cursor
+        result = {
+            'index': rank,
+            'expected_index': expected,
+            'in_order': rank == expected,
+            'duplicate': False,
+            'skipped': []
+        }
+        if not self._mark(rank):
+            result['duplicate'] = True
+            result['in_order'] = False
+            return result
+
+        if rank == expected:
+            self._advance()
+        else:
+            self.out_of_order.append((self.truck_index.pallet_numbers[rank - 1], rank, expected))
+            if rank > expected:
+                pallets = self.truck_index.pallet_numbers
+                result['skipped'] = [
+                    pallets[i - 1] for i in range(expected, rank) if not self._scanned[i]
+                ]
+        return result
+
+    def unrecord(self, pallet_number) -> bool:
+        """
+        Quita un escaneo (por ejemplo, si la escritura en la base falló).
+
+        Returns:
+            True si el pallet estaba marcado como escaneado
+        """
+        rank = self.truck_index.get_index(pallet_number)
+        if rank is None or not self._scanned[rank]:
+            return False
+        self._scanned[rank] = 0
+        self._scanned_count -= 1
+        if rank < self._cursor:
+            self._cursor = rank
+        if rank == self._max_scanned:
+            while self._max_scanned and not self._scanned[self._max_scanned]:
+                self._max_scanned -= 1
+        return True
+
+
+class SequenceTrackers:
+    """
+    Seguimiento secuencial de todos los camiones de un shipment.
+
+    Cada tracker se crea la primera vez que se consulta su camión, a partir
+    de los pallets ya guardados en pallet_scans. Si el índice del camión se
+    reconstruye (el sheet cambió), su tracker también.
+    """
+
+    def __init__(self, pallet_index: ShipmentPalletIndex, db_manager=None):
+        """
+        Inicializa el registro de trackers.
+
+        Args:
+            pallet_index: Índices de pallets del shipment
+            db_manager: DatabaseManager para reconstruir desde pallet_scans
+                        (None = empezar sin escaneos)
+        """
+        self.pallet_index = pallet_index
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, SequenceTracker] = {}
+
+    def get(self, packing_truck_id: str) -> Optional[SequenceTracker]:
+        """
+        Retorna el tracker de un camión, o None si el camión no está cargado.
+        """
+        truck_id = str(packing_truck_id).strip()
+        truck_index = self.pallet_index.get(truck_id)
+        if truck_index is None:
+            return None
+
+        with self._lock:
+            tracker = self._trackers.get(truck_id)
+            if tracker is None or tracker.truck_index is not truck_index:
+                scanned = ()
+                if self.db_manager is not None:
+                    scanned = self.db_manager.get_truck_scan_records(truck_id).column('pallet_number')
+                tracker = SequenceTracker.from_scans(truck_index, scanned)
+                self._trackers[truck_id] = tracker
+            return tracker
+
+    def record(self, packing_truck_id: str, pallet_number) -> Optional[dict]:
+        """Registra un escaneo en el tracker de su camión (ver SequenceTracker.record)."""
+        tracker = self.get(packing_truck_id)
+        return tracker.record(pallet_number) if tracker is not None else None
+
+    def invalidate(self, packing_truck_ids: Optional[Iterable[str]] = None):
+        """
+        Descarta trackers para reconstruirlos desde pallet_scans en el próximo uso.
+
+        Args:
+            packing_truck_ids: Camiones a descartar (None = todos)
+        """
+        with self._lock:
+            if packing_truck_ids is None:
+                self._trackers.clear()
+                return
+            for truck_id in packing_truck_ids:
+                self._trackers.pop(str(truck_id).strip(), None)
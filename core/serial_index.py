@@ -0,0 +1,461 @@
+"""
+Módulo de índice de seriales por intervalos.
+
+Cada pallet escaneado cubre un rango de seriales [first_serial, last_serial].
+Este índice responde en O(log n) en qué camión, pallet, ubicación y slot
+está una unidad a partir de su serial, sin recorrer pallet_scans.
+
+Los seriales se comparan en orden natural: las letras como texto y los
+números por su valor, así 'SN9' < 'SN10' y los prefijos alfanuméricos
+('LG-2024-000123') funcionan aunque cambie la cantidad de dígitos.
+
+Los rangos se guardan en arreglos ordenados por serial inicial (bisect) con
+el máximo acumulado del serial final, para encontrar también rangos que se
+traslapan. Los escaneos nuevos entran a un búfer ordenado pequeño que se
+mezcla con el arreglo principal cuando crece. El arreglo ordenado se
+persiste en la base de datos; al arrancar se carga y solo se aplican los
+eventos posteriores de la bitácora.
+"""
+
+import bisect
+import json
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .connection_pool import database_key, get_connection_manager
+from .event_log import EVENT_CLEAR, EVENT_DELIVER, EVENT_SCAN, get_event_log
+
+
+# Versión del formato guardado
+SERIAL_INDEX_FORMAT = 1
+
+# Eventos aplicados al cargar que justifican guardar el índice de nuevo
+SAVE_AFTER_EVENTS = 5000
+
+# Tamaño mínimo del búfer de escaneos nuevos antes de mezclarlo
+MIN_PENDING = 512
+
+_DIGITS = re.compile(r'(\d+)')
+
+# Posiciones en cada entrada del índice
+_END, _TRUCK, _PALLET, _UBICACION, _SLOT, _FIRST, _LAST = range(7)
+
+
+def serial_key(serial) -> str:
+    """
+    Clave de orden natural de un serial.
+
+    Cada grupo de dígitos se codifica con su longitud delante (sin ceros a
+    la izquierda), así la comparación de strings equivale a comparar los
+    números por valor. Mayúsculas y espacios no importan.
+
+    Ejemplo: serial_key('sn9') < serial_key('SN10')
+    """
+    parts = _DIGITS.split(str(serial).strip().upper())
+    for i in range(1, len(parts), 2):
+        digits = parts[i].lstrip('0') or '0'
+        parts[i] = '\x00' + chr(0x20 + len(digits)) + digits
+    return ''.join(parts)
+
+
+def _prefix_max(entries: List[tuple]) -> List[str]:
+    """Máximo acumulado del serial final (para cortar la búsqueda hacia atrás)."""
+    result = []
+    current = ''
+    for entry in entries:
+        if entry[_END] > current:
+            current = entry[_END]
+        result.append(current)
+    return result
+
+
+def _make_entry(packing_truck_id, pallet_number, first_serial, last_serial,
+                ubicacion, slot) -> Optional[Tuple[str, tuple]]:
+    """Clave inicial y entrada del índice de un pallet (None sin seriales)."""
+    if not first_serial or not last_serial:
+        return None
+    start, end = serial_key(first_serial), serial_key(last_serial)
+    if end < start:
+        start, end = end, start
+        first_serial, last_serial = last_serial, first_serial
+    return start, (end, str(packing_truck_id), str(pallet_number), ubicacion, slot,
+                   str(first_serial), str(last_serial))
+
+
+def _as_match(serial, entry: tuple) -> Dict:
+    return {
+        'serial': serial,
+        'packing_truck': entry[_TRUCK],
+        'pallet': entry[_PALLET],
+        'ubicacion': entry[_UBICACION],
+        'slot': entry[_SLOT],
+        'first_serial': entry[_FIRST],
+        'last_serial': entry[_LAST]
+    }
+
+
+class SerialIndex:
+    """
+    Índice de rangos de seriales de los pallets escaneados de una base de datos.
+
+    Estructuras:
+    - arreglo principal: claves iniciales ordenadas, entradas y máximo
+      acumulado de la clave final
+    - búfer de escaneos nuevos con la misma forma
+    - packing_truck_id -> {pallet_number: entrada vigente}; una entrada que
+      ya no es la vigente (pallet re-escaneado o entregado) se ignora y se
+      descarta en la siguiente mezcla
+    """
+
+    def __init__(self, db_path: str = 'scans.db'):
+        """
+        Inicializa el índice (la carga desde la BD es diferida).
+
+        Args:
+            db_path: Ruta a la base de datos
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._clear()
+
+    def _clear(self):
+        self._starts: List[str] = []
+        self._entries: List[tuple] = []
+        self._max_ends: List[str] = []
+        self._pending_starts: List[str] = []
+        self._pending: List[tuple] = []
+        self._pending_max_ends: List[str] = []
+        self._live: Dict[str, Dict[str, tuple]] = {}
+        self._count = 0
+        self._stale = 0
+
+    # ------------------------------------------------------------------
+    # Carga y persistencia
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """
+        Carga (o recarga) el índice.
+
+        Usa el arreglo guardado más los eventos posteriores de la bitácora;
+        sin arreglo guardado, lo arma desde el estado actual y lo guarda.
+        """
+        with self._lock:
+            self._clear()
+            saved = self._read_saved()
+            event_log = get_event_log(self.db_path)
+
+            if saved is None:
+                state = event_log.load_state()
+                keyed = sorted(
+                    (
+                        item for item in (
+                            _make_entry(packing_truck_id, pallet_number, *row[2:6])
+                            for packing_truck_id, pallets in state.scans.items()
+                            for pallet_number, row in pallets.items()
+                        )
+                        if item is not None
+                    ),
+                    key=lambda item: item[0]
+                )
+                self._set_main([item[0] for item in keyed], [item[1] for item in keyed])
+                last_event_id = state.last_event_id
+                applied = SAVE_AFTER_EVENTS
+            else:
+                last_event_id, starts, entries = saved
+                self._set_main(starts, entries)
+                applied = 0
+                for event in event_log.events_since(last_event_id):
+                    self._apply_event(event)
+                    last_event_id = event[0]
+                    applied += 1
+
+            self._merge()
+            self._loaded = True
+            if applied >= SAVE_AFTER_EVENTS:
+                self._save(last_event_id)
+
+    def ensure_loaded(self):
+        """Carga el índice si todavía no se ha cargado."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def _read_saved(self) -> Optional[Tuple[int, List[str], List[tuple]]]:
+        try:
+            with get_connection_manager(self.db_path).reader() as conn:
+                row = conn.execute('''
+                    SELECT last_event_id, data FROM serial_index_snapshots
+                    ORDER BY last_event_id DESC LIMIT 1
+                ''').fetchone()
+        except Exception:
+            # La tabla se crea con el primer guardado
+            return None
+        if row is None:
+            return None
+
+        try:
+            payload = json.loads(zlib.decompress(row[1]))
+            if payload.get('format') != SERIAL_INDEX_FORMAT:
+                return None
+            return row[0], payload['starts'], [tuple(entry) for entry in payload['entries']]
+        except Exception as e:
+            print(f"⚠️ Índice de seriales guardado ilegible, se reconstruye: {e}")
+            return None
+
+    def _save(self, last_event_id: int):
+        """Guarda el arreglo principal ya mezclado (requiere self._lock)."""
+        payload = {
+            'format': SERIAL_INDEX_FORMAT,
+            'starts': self._starts,
+            'entries': self._entries
+        }
+        blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 1)
+        try:
+            with get_connection_manager(self.db_path).transaction('IMMEDIATE') as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS serial_index_snapshots (
+                        last_event_id INTEGER NOT NULL,
+                        serial_count INTEGER NOT NULL,
+                        data BLOB NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                conn.execute('DELETE FROM serial_index_snapshots')
+                conn.execute('''
+                    INSERT INTO serial_index_snapshots (last_event_id, serial_count, data)
+                    VALUES (?, ?, ?)
+                ''', (last_event_id, len(self._entries), blob))
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el índice de seriales: {e}")
+
+    # ------------------------------------------------------------------
+    # Actualizaciones incrementales
+    # ------------------------------------------------------------------
+
+    def record_scans(self, scans: Iterable[Tuple[str, str, str, str, str, int]]):
+        """
+        Registra escaneos confirmados en la base de datos.
+
+        Args:
+            scans: Iterable de (packing_truck_id, pallet_number, first_serial,
+                   last_serial, ubicacion, slot)
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            for scan in scans:
+                self._add(*scan)
+            self._merge_if_needed()
+
+    def record_deliveries(self, packing_truck_ids: Iterable[str]):
+        """Quita los rangos de camiones entregados."""
+        if not self._loaded:
+            return
+        with self._lock:
+            for packing_truck_id in packing_truck_ids:
+                self._remove_truck(str(packing_truck_id))
+            self._merge_if_needed()
+
+    def record_clear(self):
+        """Vacía el índice tras borrar toda la base de datos."""
+        with self._lock:
+            self._clear()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Cantidad de rangos vigentes (pallets con seriales)."""
+        self.ensure_loaded()
+        return self._count
+
+    def lookup(self, serial) -> Optional[Dict]:
+        """
+        Busca el pallet que contiene un serial.
+
+        Args:
+            serial: Serial de la unidad
+
+        Returns:
+            Dict con 'serial', 'packing_truck', 'pallet', 'ubicacion', 'slot',
+            'first_serial', 'last_serial'; o None si ningún pallet lo contiene.
+            Si varios rangos lo contienen, el de serial inicial mayor.
+        """
+        self.ensure_loaded()
+        key = serial_key(serial)
+        with self._lock:
+            entry = self._find(key)
+        return _as_match(serial, entry) if entry is not None else None
+
+    def lookup_many(self, serials: Iterable) -> Dict[str, Optional[Dict]]:
+        """
+        Busca varios seriales (por ejemplo, una lista pegada de un reclamo).
+
+        Las claves se ordenan primero, así cada búsqueda parte de la
+        posición de la anterior.
+
+        Args:
+            serials: Seriales a buscar (se ignoran los vacíos)
+
+        Returns:
+            Dict {serial: resultado de lookup}, en el orden recibido
+        """
+        self.ensure_loaded()
+        wanted = [str(serial).strip() for serial in serials if str(serial).strip()]
+        keyed = sorted((serial_key(serial), serial) for serial in set(wanted))
+
+        found = {}
+        with self._lock:
+            low = 0
+            for key, serial in keyed:
+                low = bisect.bisect_right(self._starts, key, low)
+                entry = self._find(key, low)
+                found[serial] = _as_match(serial, entry) if entry is not None else None
+        return {serial: found[serial] for serial in wanted}
+
+    # ------------------------------------------------------------------
+    # Internos (requieren self._lock)
+    # ------------------------------------------------------------------
+
+    def _find(self, key: str, position: Optional[int] = None) -> Optional[tuple]:
+        """
+        Entrada vigente que contiene la clave (la de clave inicial mayor).
+
+        Args:
+            key: Clave del serial
+            position: bisect_right de la clave en el arreglo principal, si ya se conoce
+        """
+        best = None
+        best_start = None
+        for starts, entries, max_ends, pos in (
+            (self._starts, self._entries, self._max_ends, position),
+            (self._pending_starts, self._pending, self._pending_max_ends, None)
+        ):
+            i = (bisect.bisect_right(starts, key) if pos is None else pos) - 1
+            # Hacia atrás mientras algún rango anterior pueda llegar a la clave
+            while i >= 0 and max_ends[i] >= key:
+                entry = entries[i]
+                if entry[_END] >= key and self._is_live(entry):
+                    if best is None or starts[i] > best_start:
+                        best, best_start = entry, starts[i]
+                    break
+                i -= 1
+        return best
+
+    def _is_live(self, entry: tuple) -> bool:
+        return self._live.get(entry[_TRUCK], {}).get(entry[_PALLET]) is entry
+
+    def _set_main(self, starts: List[str], entries: List[tuple]):
+        self._starts = starts
+        self._entries = entries
+        self._max_ends = _prefix_max(entries)
+        self._live = {}
+        for entry in entries:
+            self._live.setdefault(entry[_TRUCK], {})[entry[_PALLET]] = entry
+        self._count = len(entries)
+        self._stale = 0
+
+    def _add(self, packing_truck_id, pallet_number, first_serial, last_serial, ubicacion, slot):
+        item = _make_entry(packing_truck_id, pallet_number, first_serial, last_serial, ubicacion, slot)
+        if item is None:
+            return
+        start, entry = item
+
+        pallets = self._live.setdefault(entry[_TRUCK], {})
+        if entry[_PALLET] in pallets:
+            self._stale += 1
+        else:
+            self._count += 1
+        pallets[entry[_PALLET]] = entry
+
+        pos = bisect.bisect_right(self._pending_starts, start)
+        self._pending_starts.insert(pos, start)
+        self._pending.insert(pos, entry)
+        # Recalcular el máximo acumulado desde la posición insertada
+        max_ends = self._pending_max_ends
+        del max_ends[pos:]
+        current = max_ends[-1] if max_ends else ''
+        for later in self._pending[pos:]:
+            if later[_END] > current:
+                current = later[_END]
+            max_ends.append(current)
+
+    def _remove_truck(self, packing_truck_id: str):
+        pallets = self._live.pop(packing_truck_id, None)
+        if pallets:
+            self._count -= len(pallets)
+            self._stale += len(pallets)
+
+    def _apply_event(self, event: tuple):
+        event_type, packing_truck_id = event[1], event[2]
+        if event_type == EVENT_SCAN:
+            self._add(packing_truck_id, event[4], event[6], event[7], event[8], event[9])
+        elif event_type == EVENT_DELIVER:
+            self._remove_truck(str(packing_truck_id))
+        elif event_type == EVENT_CLEAR:
+            self._clear()
+
+    def _merge_if_needed(self):
+        # Mezclar cuesta O(n): el búfer crece con el índice para amortizarlo
+        limit = max(MIN_PENDING, int(len(self._starts) ** 0.5))
+        if len(self._pending) > limit or self._stale > max(MIN_PENDING, len(self._starts) // 4):
+            self._merge()
+
+    def _merge(self):
+        """Mezcla el búfer con el arreglo principal y descarta entradas vencidas."""
+        if not self._pending and not self._stale:
+            return
+        starts: List[str] = []
+        entries: List[tuple] = []
+        main_starts, main_entries = self._starts, self._entries
+        new_starts, new_entries = self._pending_starts, self._pending
+        i = j = 0
+        while i < len(main_starts) or j < len(new_starts):
+            if j >= len(new_starts) or (i < len(main_starts) and main_starts[i] <= new_starts[j]):
+                start, entry = main_starts[i], main_entries[i]
+                i += 1
+            else:
+                start, entry = new_starts[j], new_entries[j]
+                j += 1
+            if self._is_live(entry):
+                starts.append(start)
+                entries.append(entry)
+
+        self._starts = starts
+        self._entries = entries
+        self._max_ends = _prefix_max(entries)
+        self._pending_starts = []
+        self._pending = []
+        self._pending_max_ends = []
+        self._stale = 0
+
+
+_indexes: Dict[tuple, SerialIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_serial_index(db_path: str = 'scans.db') -> SerialIndex:
+    """
+    Obtiene el índice de seriales compartido de una base de datos.
+
+    Args:
+        db_path: Ruta a la base de datos
+
+    Returns:
+        SerialIndex asociado a la ruta
+    """
+    key = database_key(db_path)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = SerialIndex(db_path)
+                _indexes[key] = index
+    return index
@@ -0,0 +1,348 @@
+"""
+Módulo de servicio asíncrono entre la interfaz y core.
+
+La interfaz de Flet corre en un event loop de asyncio; cualquier llamada
+bloqueante (Google Sheets, SQLite, parseo del layout) congelaría la pantalla.
+WarehouseService ejecuta ese trabajo en hilos y expone corrutinas:
+
+- Cargas de Sheets y parseo de layouts en un executor de E/S.
+- Escrituras a la base de datos en un executor propio de un solo hilo, así un
+  escaneo no espera a que termine una recarga de la hoja.
+- Cada carga recibe un CancelToken; cancelarla libera a la interfaz de
+  inmediato y el resultado de la llamada en curso se descarta: SheetsManager
+  no aplica los datos de una carga cancelada.
+- queue_scan / queue_status guardan en la bitácora local y retornan al
+  instante; un hilo los aplica a la base y a la hoja cuando se puede. La
+  bitácora y cada gestor tienen su propio lock: abrir la bitácora o la base
+  no espera a que otro hilo termine de crear SheetsManager (importar pandas,
+  autenticar con Google).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class LoadCancelled(Exception):
+    """La operación se canceló con su CancelToken."""
+
+
+class CancelToken:
+    """
+    Señal de cancelación compartida entre la interfaz y los hilos de trabajo.
+
+    Es seguro llamar cancel() desde cualquier hilo; las corrutinas que esperan
+    con wait() se despiertan en su propio event loop.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Marca la operación como cancelada."""
+        with self._lock:
+            self._event.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def raise_if_cancelled(self):
+        """Lanza LoadCancelled si la operación fue cancelada (para usar en hilos)."""
+        if self._event.is_set():
+            raise LoadCancelled()
+
+    async def wait(self):
+        """Espera hasta que se cancele la operación."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._waiters.append((loop, future))
+        await future
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class WarehouseService:
+    """Fachada asíncrona sobre SheetsManager, DatabaseManager y el layout."""
+
+    def __init__(
+        self,
+        credentials_file: str = 'ProductoTerminado.json',
+        db_path: str = 'scans.db',
+        io_workers: int = 2,
+        journal_path: str = 'scans.journal'
+    ):
+        """
+        Inicializa el servicio (los gestores se crean en el primer uso).
+
+        Args:
+            credentials_file: Ruta al archivo JSON de credenciales de Google
+            db_path: Ruta a la base de datos SQLite
+            io_workers: Hilos para Sheets y layouts
+            journal_path: Archivo de la bitácora local de escaneos
+        """
+        self.credentials_file = credentials_file
+        self.db_path = db_path
+        self.journal_path = journal_path
+        self._io_executor = ThreadPoolExecutor(io_workers, thread_name_prefix='warehouse-io')
+        self._db_executor = ThreadPoolExecutor(1, thread_name_prefix='warehouse-db')
+
+        # Un lock por gestor: crear uno no espera a que termine el otro
+        self._sheets_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._sheets = None
+        self._db = None
+        self._journal = None
+        self._sync_worker = None
+        self._load_token: Optional[CancelToken] = None
+
+    # ------------------------------------------------------------------
+    # Ejecución en hilos
+    # ------------------------------------------------------------------
+
+    async def _run(self, executor, func: Callable, *args, token: Optional[CancelToken] = None):
+        """
+        Ejecuta func en el executor y espera su resultado sin bloquear el loop.
+
+        Raises:
+            LoadCancelled: Si el token se cancela antes de que termine
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, func, *args)
+        if token is None:
+            return await future
+
+        token.raise_if_cancelled()
+        cancel_wait = asyncio.ensure_future(token.wait())
+        done, _ = await asyncio.wait({future, cancel_wait}, return_when=asyncio.FIRST_COMPLETED)
+        if future in done:
+            cancel_wait.cancel()
+            return future.result()
+
+        # La llamada bloqueante no se puede interrumpir: se abandona su resultado
+        future.cancel()
+        raise LoadCancelled()
+
+    def _get_sheets(self):
+        with self._sheets_lock:
+            if self._sheets is None:
+                from .sheets_manager import SheetsManager
+                self._sheets = SheetsManager(self.credentials_file)
+            return self._sheets
+
+    def _get_db(self):
+        with self._db_lock:
+            if self._db is None:
+                from .db_manager import DatabaseManager
+                self._db = DatabaseManager(self.db_path)
+            return self._db
+
+    def _get_journal(self):
+        # Solo abre el archivo: los gestores se crean en el hilo de la base
+        with self._journal_lock:
+            if self._journal is None:
+                from .scan_journal import ScanJournal
+                self._journal = ScanJournal(self.journal_path)
+                self._db_executor.submit(self._start_sync_worker)
+            return self._journal
+
+    def _start_sync_worker(self):
+        from .scan_journal import JournalSyncWorker
+        try:
+            worker = JournalSyncWorker(
+                self._journal, self._get_db(), status_queue=self._get_sheets().status_queue
+            )
+        except Exception as e:
+            print(f"❌ No se pudo iniciar la sincronización de la bitácora: {e}")
+            return
+        worker.start()
+        self._sync_worker = worker
+
+    def _wake_sync_worker(self):
+        # Si el hilo aún no arranca, aplicará lo pendiente al arrancar
+        if self._sync_worker is not None:
+            self._sync_worker.wake()
+
+    # ------------------------------------------------------------------
+    # Google Sheets
+    # ------------------------------------------------------------------
+
+    def new_load_token(self) -> CancelToken:
+        """
+        Crea el token para una carga nueva y cancela la carga anterior.
+
+        Returns:
+            CancelToken de la carga nueva
+        """
+        if self._load_token is not None:
+            self._load_token.cancel()
+        self._load_token = CancelToken()
+        return self._load_token
+
+    def cancel_load(self):
+        """Cancela la carga de Sheets en curso (si hay una)."""
+        if self._load_token is not None:
+            self._load_token.cancel()
+
+    async def load_shipment(
+        self,
+        url: str,
+        token: Optional[CancelToken] = None,
+        progress: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Carga el shipment desde una URL de Google Sheets sin bloquear la interfaz.
+
+        Args:
+            url: URL o ID de la hoja
+            token: Token de cancelación (None = uno nuevo que cancela la carga anterior)
+            progress: Función que recibe mensajes de avance (puede llamarse desde hilos)
+
+        Returns:
+            Dict con 'df', 'header_row', 'sheet', 'source' o 'error'
+
+        Raises:
+            LoadCancelled: Si la carga se cancela
+        """
+        token = token or self.new_load_token()
+        report = progress or (lambda message: None)
+
+        def load():
+            report("🔧 Preparando Google Sheets...")
+            sheets = self._get_sheets()
+            if not sheets.client:
+                report("⚠️ Sin credenciales: se usará la copia local si existe")
+            token.raise_if_cancelled()
+
+            sheet_id = sheets.extract_sheet_id(url)
+            if not sheet_id:
+                return {'error': "URL inválida"}
+            report(f"✅ Sheet ID: {sheet_id[:20]}...")
+            report("📡 Cargando datos de Google Sheets...")
+            token.raise_if_cancelled()
+
+            # Si se cancela durante la descarga, los datos no se aplican
+            df, header_row, sheet = sheets.load_shipment_data(
+                sheet_id, cancelled=lambda: token.cancelled
+            )
+            token.raise_if_cancelled()
+            if df is None:
+                return {'error': "Error cargando datos"}
+            return {
+                'df': df,
+                'header_row': header_row,
+                'sheet': sheet,
+                'source': sheets.last_load_source
+            }
+
+        return await self._run(self._io_executor, load, token=token)
+
+    async def flush_status_updates(self):
+        """Envía los estatus pendientes a Google Sheets en segundo plano."""
+        return await self._run(self._io_executor, lambda: self._get_sheets().flush_status_updates())
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    async def load_layout(self, content, token: Optional[CancelToken] = None):
+        """
+        Parsea un layout (SVG/XML o texto) en un hilo, usando la caché.
+
+        Returns:
+            LayoutModel
+        """
+        from utils.layout_model import load_layout
+        return await self._run(self._io_executor, load_layout, content, token=token)
+
+    # ------------------------------------------------------------------
+    # Base de datos
+    # ------------------------------------------------------------------
+
+    async def register_scan(self, **scan) -> bool:
+        """
+        Registra un escaneo (argumentos de DatabaseManager.register_pallet_scan).
+
+        Las escrituras se serializan en su propio hilo: no esperan a las
+        cargas de Sheets.
+        """
+        return await self._run(self._db_executor, lambda: self._get_db().register_pallet_scan(**scan))
+
+    async def register_scans(self, scans: List[Dict], **kwargs) -> List[Dict]:
+        """Registra un lote de escaneos (ver register_pallet_scans_bulk)."""
+        return await self._run(
+            self._db_executor,
+            lambda: self._get_db().register_pallet_scans_bulk(scans, **kwargs)
+        )
+
+    async def deliver_truck(self, packing_truck_id: str) -> bool:
+        """Entrega un camión del packing list."""
+        return await self._run(self._db_executor, lambda: self._get_db().deliver_truck(packing_truck_id))
+
+    async def deliver_trucks(self, packing_truck_ids: List[str], status: str = 'Entregado') -> Tuple[bool, Dict]:
+        """
+        Entrega varios camiones en una transacción (ver DatabaseManager.deliver_trucks).
+
+        Los estatus quedan en la cola de Sheets; se envían con flush_status_updates.
+        """
+        def deliver():
+            status_queue = self._get_sheets().status_queue
+            return self._get_db().deliver_trucks(packing_truck_ids, status_queue=status_queue, status=status)
+
+        return await self._run(self._db_executor, deliver)
+
+    async def find_serials(self, serials: List[str]) -> Dict[str, Optional[Dict]]:
+        """Busca pallet y ubicación de una lista de seriales (ver DatabaseManager.find_serials)."""
+        return await self._run(self._io_executor, lambda: self._get_db().find_serials(serials))
+
+    # ------------------------------------------------------------------
+    # Bitácora local (sin conexión)
+    # ------------------------------------------------------------------
+
+    def queue_scan(self, **scan) -> str:
+        """
+        Guarda un escaneo en la bitácora local y retorna de inmediato.
+
+        Recibe los argumentos de DatabaseManager.register_pallet_scan; el
+        hilo de sincronización lo aplica a la base de datos.
+
+        Returns:
+            Clave de idempotencia del registro
+        """
+        key = self._get_journal().append_scan(**scan)
+        self._wake_sync_worker()
+        return key
+
+    def queue_status(self, truck_id: str, status: str) -> str:
+        """Guarda un cambio de estatus en la bitácora local para la hoja."""
+        key = self._get_journal().append_status(truck_id, status)
+        self._wake_sync_worker()
+        return key
+
+    def pending_sync(self) -> int:
+        """Registros de la bitácora que aún no se aplican."""
+        return len(self._journal) if self._journal is not None else 0
+
+    def shutdown(self):
+        """Cancela la carga en curso y detiene los hilos."""
+        self.cancel_load()
+        self._io_executor.shutdown(wait=False, cancel_futures=True)
+        # Espera también al arranque pendiente del hilo de sincronización
+        self._db_executor.shutdown(wait=True)
+        if self._sync_worker is not None:
+            self._sync_worker.stop()
+        if self._journal is not None:
+            self._journal.close()
@@ -0,0 +1,175 @@
+"""
+Módulo de diferencias entre dos cargas de la hoja del shipment.
+
+Al recargar, la hoja casi siempre cambia en pocas filas (un estatus, un
+pallet corregido). diff_shipment_values compara los valores nuevos de
+get_all_values con los de la carga anterior y reporta solo las filas
+agregadas, quitadas y cambiadas, por clave de fila (CAMION + Pallet number).
+
+La comparación fila contra fila se hace con operaciones de listas en C; solo
+las filas que no coinciden pasan por el trabajo por clave:
+- Mismo número de filas: se comparan posición por posición.
+- Si se insertaron o borraron filas: se recortan el prefijo y el sufijo
+  comunes y se compara por clave lo que queda en medio.
+"""
+
+from itertools import compress
+from operator import ne
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+def _cells(row: list, positions: List[int]) -> list:
+    return [row[i] if i < len(row) else None for i in positions]
+
+
+def _common_length(old_rows, new_rows, limit: int) -> int:
+    """Cantidad de filas iguales al inicio de ambos iterables (hasta limit)."""
+    return next(compress(range(limit), map(ne, old_rows, new_rows)), limit)
+
+
+class SheetDiff:
+    """
+    Cambios entre dos cargas del shipment.
+
+    Las etiquetas de fila son la posición de la fila debajo del header (las
+    mismas del índice del DataFrame).
+
+    Atributos:
+        added: {clave: etiqueta nueva}
+        removed: {clave: etiqueta anterior}
+        changed: {clave: (etiqueta anterior, etiqueta nueva)} de filas con
+                 contenido distinto
+        moved: {clave: (etiqueta anterior, etiqueta nueva)} de filas iguales
+               que cambiaron de posición dentro de la zona comparada (no
+               afectan los índices de pallets)
+        rows: {etiqueta nueva: fila} de las filas agregadas, cambiadas y movidas
+        trucks: Camiones del packing list con filas agregadas, quitadas o
+                cambiadas (en las columnas indicadas con index_columns)
+        in_place: True si ninguna fila se movió de posición y ninguna fila
+                  entró o salió del shipment (CAMION vacío): se puede aplicar
+                  reemplazando filas por etiqueta
+    """
+
+    __slots__ = ('added', 'removed', 'changed', 'moved', 'rows', 'trucks', 'in_place')
+
+    def __init__(self):
+        self.added: Dict[Tuple[str, str], int] = {}
+        self.removed: Dict[Tuple[str, str], int] = {}
+        self.changed: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self.moved: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self.rows: Dict[int, list] = {}
+        self.trucks: Set[str] = set()
+        self.in_place = True
+
+    @property
+    def empty(self) -> bool:
+        """True si la hoja no cambió."""
+        return not self.rows and not self.removed
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __repr__(self) -> str:
+        return (f'SheetDiff(added={len(self.added)}, removed={len(self.removed)}, '
+                f'changed={len(self.changed)}, moved={len(self.moved)}, trucks={len(self.trucks)})')
+
+
+def diff_shipment_values(
+    old_values: List[List[str]],
+    old_header_row: int,
+    new_values: List[List[str]],
+    new_header_row: int,
+    truck_column: str = 'CAMION',
+    pallet_column: str = 'Pallet number',
+    index_columns: Optional[Sequence[str]] = None
+) -> Optional[SheetDiff]:
+    """
+    Compara dos cargas de la hoja (valores de get_all_values).
+
+    Args:
+        old_values: Valores de la carga anterior
+        old_header_row: Fila del header en la carga anterior (0-based)
+        new_values: Valores de la carga nueva
+        new_header_row: Fila del header en la carga nueva (0-based)
+        truck_column: Columna con el ID del camión
+        pallet_column: Columna con el número de pallet
+        index_columns: Columnas de las que dependen los índices por camión;
+                       una fila cambiada solo en otras columnas (por ejemplo,
+                       el estatus) no marca a su camión (None = todas)
+
+    Returns:
+        SheetDiff, o None si el header cambió (hay que recargar todo)
+    """
+    headers = new_values[new_header_row]
+    if old_values[old_header_row] != headers or truck_column not in headers:
+        return None
+    truck_pos = headers.index(truck_column)
+    pallet_pos = headers.index(pallet_column) if pallet_column in headers else None
+    watched = None
+    if index_columns is not None:
+        watched = [headers.index(name) for name in index_columns if name in headers]
+
+    old_rows = old_values[old_header_row + 1:]
+    new_rows = new_values[new_header_row + 1:]
+    diff = SheetDiff()
+
+    if len(old_rows) == len(new_rows):
+        old_window = new_window = list(compress(range(len(new_rows)), map(ne, old_rows, new_rows)))
+    else:
+        diff.in_place = False
+        shortest = min(len(old_rows), len(new_rows))
+        prefix = _common_length(old_rows, new_rows, shortest)
+        suffix = _common_length(reversed(old_rows), reversed(new_rows), shortest - prefix)
+        old_window = range(prefix, len(old_rows) - suffix)
+        new_window = range(prefix, len(new_rows) - suffix)
+
+    def keyed(rows: list, window) -> Dict[Tuple[str, str], int]:
+        found = {}
+        count = 0
+        for label in window:
+            row = rows[label]
+            truck = row[truck_pos].strip() if truck_pos < len(row) else ''
+            if truck:
+                pallet = row[pallet_pos].strip() if pallet_pos is not None and pallet_pos < len(row) else ''
+                found[(truck, pallet)] = label
+                count += 1
+        if count != len(found):
+            # Clave repetida: solo la última fila queda en el diff
+            diff.in_place = False
+        return found
+
+    old_keys = keyed(old_rows, old_window)
+    new_keys = keyed(new_rows, new_window)
+
+    for key, label in new_keys.items():
+        old_label = old_keys.get(key)
+        if old_label is None:
+            diff.added[key] = label
+        elif old_rows[old_label] != new_rows[label]:
+            diff.changed[key] = (old_label, label)
+            diff.rows[label] = new_rows[label]
+            if watched is None or _cells(old_rows[old_label], watched) != _cells(new_rows[label], watched):
+                diff.trucks.add(key[0])
+            continue
+        elif old_label != label:
+            diff.moved[key] = (old_label, label)
+            diff.rows[label] = new_rows[label]
+            continue
+        else:
+            continue
+        diff.rows[label] = new_rows[label]
+        diff.trucks.add(key[0])
+    for key, label in old_keys.items():
+        if key not in new_keys:
+            diff.removed[key] = label
+            diff.trucks.add(key[0])
+
+    if diff.in_place:
+        # Una fila que gana o pierde CAMION entra o sale del DataFrame
+        old_labels = set(old_keys.values())
+        new_labels = set(new_keys.values())
+        diff.in_place = old_labels == new_labels and not diff.moved and all(
+            old_label == label for old_label, label in diff.changed.values()
+        )
+
+    return diff
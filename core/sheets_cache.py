@@ -0,0 +1,121 @@
+"""
+Módulo de caché local de hojas de Google Sheets.
+
+Guarda en disco, por sheet_id, el DataFrame ya procesado del shipment junto
+con la fila del header y la revisión (fecha de modificación) de la hoja.
+Permite:
+- Cargas en caliente en milisegundos cuando la hoja no cambió.
+- Arrancar la app desde la última copia cuando no hay red.
+
+Formato: un archivo pickle por hoja (las columnas del DataFrame conservan su
+dtype), escrito de forma atómica para no dejar archivos a medias.
+"""
+
+import os
+import pickle
+import re
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+
+# Versión del formato en disco; un cambio invalida las copias anteriores
+SNAPSHOT_FORMAT = 2
+
+DEFAULT_CACHE_DIR = '.sheets_cache'
+
+
+class SheetSnapshotCache:
+    """Copias locales de hojas de Google Sheets, una por sheet_id."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir: Carpeta donde se guardan las copias
+        """
+        self.cache_dir = cache_dir
+
+    def _path_for(self, sheet_id: str) -> str:
+        """Ruta del archivo de una hoja (el ID se limpia para el sistema de archivos)."""
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', sheet_id)
+        return os.path.join(self.cache_dir, f'{safe_id}.pkl')
+
+    def load(self, sheet_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lee la copia local de una hoja.
+
+        Args:
+            sheet_id: ID de la hoja de Google Sheets
+
+        Returns:
+            Dict con 'df', 'header_row', 'headers', 'revision', 'saved_at'
+            o None si no hay copia válida
+        """
+        path = self._path_for(sheet_id)
+        try:
+            with open(path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Copia local de la hoja ilegible, se ignora: {e}")
+            return None
+
+        if snapshot.get('format') != SNAPSHOT_FORMAT or snapshot.get('sheet_id') != sheet_id:
+            return None
+        return snapshot
+
+    def save(
+        self,
+        sheet_id: str,
+        df,
+        header_row: int,
+        headers: list,
+        revision: Optional[str] = None
+    ) -> bool:
+        """
+        Guarda la copia local de una hoja.
+
+        Args:
+            sheet_id: ID de la hoja de Google Sheets
+            df: DataFrame procesado del shipment
+            header_row: Número de fila del header
+            headers: Valores de la fila del header
+            revision: Fecha de modificación / revisión de la hoja (si se conoce)
+
+        Returns:
+            True si se guardó exitosamente
+        """
+        snapshot = {
+            'format': SNAPSHOT_FORMAT,
+            'sheet_id': sheet_id,
+            'revision': revision,
+            'header_row': header_row,
+            'headers': list(headers),
+            'df': df,
+            'saved_at': time.time()
+        }
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._path_for(sheet_id))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return True
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la copia local de la hoja: {e}")
+            return False
+
+    def invalidate(self, sheet_id: str):
+        """Elimina la copia local de una hoja."""
+        try:
+            os.remove(self._path_for(sheet_id))
+        except FileNotFoundError:
+            pass
@@ -5,40 +5,93 @@ Maneja la conexión y operaciones con Google Sheets para el sistema de warehouse
 Adaptado del código original de Streamlit para Flet.
 """
 
-import gspread
-from google.oauth2.service_account import Credentials
+import os
 import pandas as pd
+import threading
 import time
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 
+from .pallet_ordering import ShipmentPalletIndex
+from .records import SHIPMENT_COLUMNS, ShipmentTable
+from .sheet_diff import SheetDiff, diff_shipment_values
+from .shipment_loader import (
+    build_shipment_frame, find_header_row, patch_shipment_frame, prune_shipment_values
+)
+from .sheets_cache import SheetSnapshotCache, DEFAULT_CACHE_DIR
+from .sheets_writeback import StatusWriteQueue, DEFAULT_PENDING_FILE
+from utils.metrics import increment, timed, timer
 
-SCOPE = ['https://www.googleapis.com/auth/spreadsheets']
+
+SCOPE = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    # Fecha de modificación de la hoja, para revalidar la copia local
+    'https://www.googleapis.com/auth/drive.metadata.readonly'
+]
 
 
 class SheetsManager:
     """Gestor de Google Sheets para el sistema de warehouse."""
     
-    def __init__(self, credentials_file: str = 'ProductoTerminado.json'):
+    def __init__(
+        self,
+        credentials_file: str = 'ProductoTerminado.json',
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        pending_file: Optional[str] = DEFAULT_PENDING_FILE
+    ):
         """
         Inicializa el gestor de Google Sheets.
         
         Args:
             credentials_file: Ruta al archivo JSON de credenciales de Google
+            cache_dir: Carpeta de las copias locales de las hojas
+            pending_file: Archivo de estatus pendientes de enviar (None = no persistir)
         """
         self.credentials_file = credentials_file
-        self.client = None
-        self._initialize_client()
+        # gspread y google-auth se cargan en el primer uso de self.client
+        self._client = None
+        self._client_ready = False
+        self.cache = SheetSnapshotCache(cache_dir)
+        self.last_load_source = None
+        self.last_headers = None
+        # Copia columnar del shipment para el escaneo (sin pandas)
+        self.shipment: Optional[ShipmentTable] = None
+        # Índices de pallets por camión; se reconstruyen solo si el sheet cambia
+        self.pallet_index = ShipmentPalletIndex()
+        # Cambios de estatus agrupados y enviados con batch_update
+        self.status_queue = StatusWriteQueue(pending_file)
+        # Última carga desde la red: (sheet_id, revisión, valores reducidos, df);
+        # los valores solo tienen las columnas del DataFrame (prune_shipment_values)
+        self._last_network_load = None
+        # Diferencias de la última recarga (None = se reconstruyó todo)
+        self.last_diff: Optional[SheetDiff] = None
+        # Serializa la aplicación de cargas concurrentes (ver load_shipment_data)
+        self._apply_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """Cliente de gspread (se inicializa la primera vez que se usa)."""
+        if not self._client_ready:
+            self._initialize_client()
+        return self._client
+    
+    @client.setter
+    def client(self, value):
+        self._client = value
+        self._client_ready = True
     
+    @timed('sheets.initialize_client')
     def _initialize_client(self):
         """Inicializa el cliente de Google Sheets."""
         try:
-            import os
             if not os.path.exists(self.credentials_file):
                 print(f"⚠️ Archivo de credenciales no encontrado: {self.credentials_file}")
                 print("   Google Sheets no estará disponible.")
                 self.client = None
                 return
-                
+            
+            import gspread
+            from google.oauth2.service_account import Credentials
+            
             creds = Credentials.from_service_account_file(
                 self.credentials_file,
                 scopes=SCOPE
@@ -49,61 +102,256 @@ class SheetsManager:
             print(f"❌ Error inicializando Google Sheets: {e}")
             self.client = None
     
+    @timed('sheets.load_shipment_data')
     def load_shipment_data(
         self, 
-        sheet_id: str
+        sheet_id: str,
+        use_cache: bool = True,
+        cancelled: Optional[Callable[[], bool]] = None
     ) -> Tuple[Optional[pd.DataFrame], Optional[int], Optional[any]]:
         """
         Carga los datos del shipment desde Google Sheets.
         
+        Flujo con caché local:
+        1. Abrir la hoja y leer su fecha de modificación (llamada ligera)
+        2. Si coincide con la copia local -> usar la copia, sin descargar
+        3. Si no, descargar todos los valores y guardar una copia nueva; si
+           la hoja ya se había cargado, aplicar solo las filas que cambiaron
+           (ver core.sheet_diff y self.last_diff)
+        4. Sin red o sin credenciales -> usar la última copia local
+        
+        El origen de la última carga queda en self.last_load_source
+        ('network', 'cache' u 'offline').
+        
+        Los datos se aplican (estado derivado, índices, cola de estatus) con
+        un lock y solo si cancelled() es falso en ese momento: una carga
+        cancelada no pisa a la carga que la reemplazó.
+        
         Args:
             sheet_id: ID de la hoja de Google Sheets
+            use_cache: Si es False, ignora la copia local y descarga todo
+            cancelled: Función que indica si la carga se canceló (None = nunca)
         
         Returns:
             Tuple (DataFrame con datos, número de fila del header, objeto sheet)
+            El objeto sheet es None cuando se carga sin conexión; todo es
+            None si la carga se canceló.
         """
+        start_time = time.time()
+        snapshot = self.cache.load(sheet_id) if use_cache else None
+        
         if not self.client:
             print("❌ Cliente no inicializado")
-            return None, None, None
+            return self._load_from_snapshot(snapshot, None, start_time, cancelled)
+        
+        try:
+            with timer('sheets.open'):
+                spreadsheet = self.client.open_by_key(sheet_id)
+                sheet = spreadsheet.get_worksheet(0)
+        except Exception as e:
+            print(f"❌ Error conectando con Google Sheets: {e}")
+            return self._load_from_snapshot(snapshot, None, start_time, cancelled)
+        
+        revision = self._get_revision(spreadsheet)
+        if snapshot is not None and revision is not None and snapshot['revision'] == revision:
+            return self._load_from_snapshot(snapshot, sheet, start_time, cancelled)
         
         try:
-            start_time = time.time()
-            
-            spreadsheet = self.client.open_by_key(sheet_id)
-            sheet = spreadsheet.get_worksheet(0)
-            
             # Obtener todos los valores
-            all_values = sheet.get_all_values()
-            
-            # Buscar fila del header
-            header_row = None
-            for idx, row in enumerate(all_values):
-                if 'CAMION' in [cell.upper() for cell in row]:
-                    header_row = idx
-                    break
-            
-            if header_row is None:
-                print("❌ No se encontró fila de header")
-                return None, None, None
-            
-# Crear DataFrame
-            headers = all_values[header_row]
-            data = all_values[header_row + 1:]
-            
-            df = pd.DataFrame(data, columns=headers)
+            with timer('sheets.get_all_values'):
+                all_values = sheet.get_all_values()
             
-            # Limpiar datos vacíos
-            df = df[df['CAMION'].str.strip() != '']
+            with self._apply_lock:
+                # Una recarga incremental modifica el DataFrame anterior:
+                # se revisa la cancelación antes de tocarlo
+                if self._is_cancelled(cancelled):
+                    return None, None, None
+                df, header_row, diff, values = self._reload_values(sheet_id, all_values)
+                if df is None:
+                    return None, None, None
+                
+                self.cache.save(sheet_id, df, header_row, all_values[header_row], revision)
+                self._on_data_loaded(df, header_row, all_values[header_row], sheet, 'network', diff)
+                self._last_network_load = (sheet_id, revision, values, df)
             
             load_time = time.time() - start_time
-            print(f"✅ Datos cargados en {load_time:.1f}s - {len(df)} filas")
+            if diff is not None and diff.in_place:
+                print(f"✅ Datos actualizados en {load_time:.1f}s - {len(diff)} filas cambiaron "
+                      f"en {len(diff.trucks)} camiones")
+            else:
+                print(f"✅ Datos cargados en {load_time:.1f}s - {len(df)} filas")
             
             return df, header_row, sheet
             
         except Exception as e:
             print(f"❌ Error cargando datos: {e}")
+            return self._load_from_snapshot(snapshot, None, start_time, cancelled)
+    
+    @timed('sheets.diff_values')
+    def _reload_values(
+        self,
+        sheet_id: str,
+        all_values: list
+    ) -> Tuple[Optional[pd.DataFrame], Optional[int], Optional[SheetDiff], Optional[list]]:
+        """
+        Obtiene el DataFrame de valores recién descargados.
+        
+        Si la misma hoja ya se cargó desde la red, compara por clave de fila
+        (CAMION + Pallet number) y, cuando ninguna fila se movió, actualiza
+        en su lugar solo las filas que cambiaron del DataFrame anterior.
+        Si no, arma el DataFrame completo. Solo se comparan las columnas que
+        conserva el DataFrame: un cambio en otra columna no cuenta.
+        
+        Returns:
+            Tuple (DataFrame, número de fila del header, SheetDiff o None,
+            valores reducidos para la siguiente comparación)
+        """
+        previous = self._last_network_load
+        header_row = find_header_row(all_values)
+        if header_row is None:
+            print("❌ No se encontró fila de header")
+            return None, None, None, None
+        values = prune_shipment_values(all_values, header_row, self.status_queue.status_column)
+        
+        diff = None
+        if previous is not None and previous[0] == sheet_id:
+            _, _, old_values, df = previous
+            diff = diff_shipment_values(old_values, 0, values, 0, index_columns=SHIPMENT_COLUMNS)
+        if diff is not None and diff.in_place:
+            try:
+                patch_shipment_frame(df, diff.rows, values[0])
+                return df, header_row, diff, values
+            except Exception as e:
+                print(f"⚠️ No se pudieron aplicar los cambios, se recarga todo: {e}")
+        
+        df, header_row = self._parse_shipment_values(all_values)
+        return df, header_row, diff, values
+    
+    @timed('sheets.parse_values')
+    def _parse_shipment_values(
+        self,
+        all_values: list
+    ) -> Tuple[Optional[pd.DataFrame], Optional[int]]:
+        """
+        Convierte los valores crudos de la hoja en el DataFrame del shipment.
+        
+        Solo conserva las columnas que se usan, con tipos compactos (ver
+        core.shipment_loader).
+        
+        Args:
+            all_values: Lista de filas (resultado de get_all_values)
+        
+        Returns:
+            Tuple (DataFrame, número de fila del header) o (None, None)
+        """
+        # Buscar fila del header
+        header_row = find_header_row(all_values)
+        
+        if header_row is None:
+            print("❌ No se encontró fila de header")
+            return None, None
+        
+        # DataFrame tipado, sin filas vacías ni columnas que no se usan
+        df = build_shipment_frame(all_values, header_row, self.status_queue.status_column)
+        
+        return df, header_row
+    
+    def _get_revision(self, spreadsheet) -> Optional[str]:
+        """
+        Obtiene la fecha de modificación de la hoja (metadatos de Drive).
+        
+        Returns:
+            Revisión como string o None si no se puede obtener
+        """
+        try:
+            getter = getattr(spreadsheet, 'get_lastUpdateTime', None)
+            revision = getter() if callable(getter) else spreadsheet.lastUpdateTime
+            return str(revision) if revision else None
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la revisión de la hoja: {e}")
+            return None
+    
+    def _load_from_snapshot(
+        self,
+        snapshot: Optional[dict],
+        sheet: Optional[any],
+        start_time: float,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Tuple[Optional[pd.DataFrame], Optional[int], Optional[any]]:
+        """Retorna los datos de la copia local (o Nones si no hay copia o se canceló)."""
+        if snapshot is None:
             return None, None, None
+        
+        source = 'cache' if sheet is not None else 'offline'
+        df = snapshot['df']
+        with self._apply_lock:
+            if self._is_cancelled(cancelled):
+                return None, None, None
+            previous = self._last_network_load
+            if previous is not None and previous[1] != snapshot['revision']:
+                # La copia local no es la última carga de esta sesión
+                self._last_network_load = None
+            self._on_data_loaded(df, snapshot['header_row'], snapshot['headers'], sheet, source)
+        
+        load_time = (time.time() - start_time) * 1000
+        if source == 'offline':
+            saved = time.strftime('%Y-%m-%d %H:%M', time.localtime(snapshot['saved_at']))
+            print(f"📴 Sin conexión: usando copia local del {saved} - {len(df)} filas")
+        else:
+            print(f"✅ Hoja sin cambios: copia local en {load_time:.0f}ms - {len(df)} filas")
+        
+        return df, snapshot['header_row'], sheet
+    
+    def _is_cancelled(self, cancelled: Optional[Callable[[], bool]]) -> bool:
+        """Indica si la carga se canceló (los datos no deben aplicarse)."""
+        if cancelled is not None and cancelled():
+            print("⏹️ Carga cancelada: los datos no se aplican")
+            return True
+        return False
+    
+    def _on_data_loaded(
+        self,
+        df: pd.DataFrame,
+        header_row: int,
+        headers: list,
+        sheet: Optional[any],
+        source: str,
+        diff: Optional[SheetDiff] = None
+    ):
+        """
+        Actualiza el estado derivado tras cualquier carga exitosa.
+        
+        Con un diff aplicado en su lugar solo se tocan las filas cambiadas y
+        los índices de los camiones afectados.
+        """
+        self.last_load_source = source
+        self.last_diff = diff
+        increment(f'sheets.load.{source}')
+        self.last_headers = list(headers)
+        incremental = diff is not None and diff.in_place and self.shipment is not None
+        previous = self.shipment
+        if 'Pallet number' in df.columns:
+            if incremental:
+                # Sin camiones afectados solo cambiaron columnas que el escaneo no usa
+                if diff.trucks or diff.added or diff.removed:
+                    # Las filas ya convertidas del DataFrame, con los mismos tipos
+                    columns = [name for name in SHIPMENT_COLUMNS if name in df.columns]
+                    changed = df.loc[list(diff.rows), columns]
+                    rows = zip(*(changed[name].tolist() for name in columns))
+                    self.shipment = self.shipment.with_rows(dict(zip(changed.index.tolist(), rows)), columns)
+            else:
+                self.shipment = ShipmentTable.from_dataframe(df)
+            if diff is not None and self.pallet_index:
+                self.pallet_index.refresh(self.shipment, diff.trucks)
+            else:
+                self.pallet_index.load(self.shipment)
+        if incremental and 'Pallet number' in df.columns and self.shipment.trucks is previous.trucks:
+            # Ninguna fila cambió de camión: las filas de la hoja siguen igual
+            self.status_queue.bind_sheet(sheet)
+        else:
+            self.status_queue.bind(sheet, df, header_row)
     
+    @timed('sheets.update_truck_status')
     def update_truck_status(
         self, 
         sheet: any, 
@@ -115,6 +363,9 @@ class SheetsManager:
         """
         Actualiza el estatus de un camión en Google Sheets.
         
+        Hace una búsqueda y una escritura por camión; para varios camiones
+        conviene queue_truck_status + flush_status_updates.
+        
         Args:
             sheet: Objeto de la hoja de Google Sheets
             truck_id: ID del camión a actualizar
@@ -142,6 +393,33 @@ class SheetsManager:
             print(f"❌ Error actualizando estatus: {e}")
             return False
     
+    def queue_truck_status(self, truck_id: str, status: str):
+        """
+        Agrega un cambio de estatus a la cola (no llama a la API).
+        
+        Varios cambios al mismo camión se combinan: solo se envía el último.
+        Los cambios se guardan en disco hasta que flush_status_updates los envíe.
+        
+        Args:
+            truck_id: ID del camión a actualizar
+            status: Nuevo estatus (ej: "Listo", "Entregado")
+        """
+        self.status_queue.enqueue(truck_id, status)
+    
+    @timed('sheets.flush_status_updates')
+    def flush_status_updates(self) -> Tuple[bool, dict]:
+        """
+        Envía a Google Sheets todos los estatus pendientes en una sola llamada.
+        
+        Las filas se resuelven desde el DataFrame de la última carga, así que
+        primero debe llamarse load_shipment_data. Sin conexión, los cambios
+        quedan pendientes para el siguiente flush.
+        
+        Returns:
+            Tuple (success, {truck_id: resultado})
+        """
+        return self.status_queue.flush()
+    
     def extract_sheet_id(self, url: str) -> Optional[str]:
         """
         Extrae el ID de la hoja desde una URL de Google Sheets.
@@ -0,0 +1,247 @@
+"""
+Módulo de cola de escritura de estatus hacia Google Sheets.
+
+En lugar de buscar cada camión con findall y escribir celda por celda, la
+cola:
+- Resuelve la fila de cada camión desde el DataFrame ya cargado.
+- Agrupa los cambios pendientes (el último estatus de cada camión gana).
+- Los envía en una sola llamada batch_update.
+- Reintenta con espera exponencial ante errores de cuota (429) o 5xx.
+- Guarda en disco lo pendiente para no perderlo al reiniciar la app.
+"""
+
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+
+DEFAULT_PENDING_FILE = '.sheets_pending.json'
+
+# Códigos HTTP que justifican reintentar
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+def rowcol_to_a1(row: int, col: int) -> str:
+    """
+    Convierte fila/columna (1-based) a notación A1.
+
+    Ejemplo: (12, 19) -> "S12"
+    """
+    letters = ''
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return f'{letters}{row}'
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Indica si un error de la API de Sheets es temporal (cuota o servidor)."""
+    status = getattr(error, 'code', None)
+    response = getattr(error, 'response', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+    if status in RETRYABLE_STATUS:
+        return True
+
+    text = str(error).lower()
+    return 'quota' in text or 'rate limit' in text or 'resource_exhausted' in text
+
+
+class StatusWriteQueue:
+    """Cola de cambios de estatus de camiones, enviada en lotes."""
+
+    def __init__(
+        self,
+        persist_path: Optional[str] = DEFAULT_PENDING_FILE,
+        status_column: int = 19,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Inicializa la cola y recupera lo pendiente de una sesión anterior.
+
+        Args:
+            persist_path: Archivo JSON para lo pendiente (None = no persistir)
+            status_column: Número de columna del estatus (default: 19)
+            max_retries: Reintentos ante errores de cuota
+            base_delay: Espera inicial en segundos (se duplica en cada reintento)
+            sleep: Función de espera (inyectable para pruebas)
+        """
+        self.persist_path = persist_path
+        self.status_column = status_column
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._rows: Dict[str, int] = {}
+        self.sheet = None
+
+        self._load_pending()
+
+    def bind(self, sheet, df, header_row: int, truck_column: str = 'CAMION'):
+        """
+        Asocia la cola a la hoja cargada y resuelve la fila de cada camión.
+
+        La fila se calcula desde el índice del DataFrame (posición del dato
+        debajo del header), así que no hace falta buscar en la hoja.
+
+        Args:
+            sheet: Objeto worksheet de gspread (None si se cargó sin conexión)
+            df: DataFrame del shipment tal como lo retorna load_shipment_data
+            header_row: Número de fila del header (0-based)
+            truck_column: Columna con el ID del camión
+        """
+        rows = {}
+        for label, truck_id in zip(df.index.tolist(), df[truck_column].tolist()):
+            truck_id = str(truck_id).strip()
+            if truck_id and truck_id not in rows:
+                # +1 por el header, +1 porque las filas de la hoja son 1-based
+                rows[truck_id] = header_row + 2 + int(label)
+
+        with self._lock:
+            self.sheet = sheet
+            self._rows = rows
+
+    def bind_sheet(self, sheet):
+        """
+        Cambia solo el objeto de la hoja; las filas de los camiones se
+        conservan (recarga sin filas movidas ni camiones cambiados).
+
+        Args:
+            sheet: Objeto worksheet de gspread (None si se cargó sin conexión)
+        """
+        with self._lock:
+            self.sheet = sheet
+
+    def enqueue(self, truck_id: str, status: str):
+        """
+        Agrega (o reemplaza) el estatus pendiente de un camión.
+
+        Args:
+            truck_id: ID del camión
+            status: Nuevo estatus (ej: "Listo", "Entregado")
+        """
+        self.enqueue_many({truck_id: status})
+
+    def enqueue_many(self, updates: Union[Dict[str, str], Iterable[Tuple[str, str]]]):
+        """
+        Agrega varios cambios de estatus de una vez.
+
+        Args:
+            updates: Dict {truck_id: status} o iterable de (truck_id, status)
+        """
+        items = updates.items() if isinstance(updates, dict) else updates
+        with self._lock:
+            for truck_id, status in items:
+                self._pending[str(truck_id).strip()] = str(status)
+            self._save_pending()
+
+    @property
+    def pending(self) -> Dict[str, str]:
+        """Copia de los cambios pendientes."""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> Tuple[bool, Dict[str, str]]:
+        """
+        Envía todos los cambios pendientes en una sola llamada batch_update.
+
+        Returns:
+            Tuple (success, resultado)
+            - success: True si no quedó nada pendiente por error de envío
+            - resultado: {truck_id: 'ok' | 'no encontrado' | mensaje de error}
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = dict(self._pending)
+                sheet = self.sheet
+                rows = self._rows
+
+            if not batch:
+                return True, {}
+
+            if sheet is None:
+                print(f"📴 Sin conexión: {len(batch)} estatus quedan pendientes")
+                return False, {truck_id: 'sin conexión' for truck_id in batch}
+
+            results = {}
+            data = []
+            for truck_id, status in batch.items():
+                row = rows.get(truck_id)
+                if row is None:
+                    results[truck_id] = 'no encontrado'
+                    continue
+                data.append({
+                    'range': rowcol_to_a1(row, self.status_column),
+                    'values': [[status]]
+                })
+
+            error = self._send_with_retry(sheet, data) if data else None
+
+            with self._lock:
+                for truck_id, status in batch.items():
+                    if truck_id in results:
+                        print(f"⚠️ Camión {truck_id} no encontrado en la hoja")
+                    elif error is None:
+                        results[truck_id] = 'ok'
+                    else:
+                        results[truck_id] = error
+                        continue
+                    # Solo se quita si no cambió mientras se enviaba
+                    if self._pending.get(truck_id) == status:
+                        del self._pending[truck_id]
+                self._save_pending()
+
+            if error is None:
+                print(f"✅ {len(data)} estatus actualizados en una sola llamada")
+            return error is None, results
+
+    def _send_with_retry(self, sheet, data: list) -> Optional[str]:
+        """Envía el lote reintentando ante errores temporales. Retorna el error o None."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                sheet.batch_update(data)
+                return None
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == self.max_retries:
+                    print(f"❌ Error actualizando estatus: {e}")
+                    return str(e)
+                delay = self.base_delay * (2 ** attempt) * (1 + random.random() * 0.25)
+                print(f"⏳ Cuota de Sheets alcanzada, reintento en {delay:.1f}s")
+                self._sleep(delay)
+        return None
+
+    def _load_pending(self):
+        """Recupera los cambios no enviados de una sesión anterior."""
+        if not self.persist_path:
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                self._pending = {str(k): str(v) for k, v in json.load(f).items()}
+            if self._pending:
+                print(f"📤 {len(self._pending)} estatus pendientes recuperados")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ No se pudieron leer los estatus pendientes: {e}")
+
+    def _save_pending(self):
+        """Guarda los cambios pendientes de forma atómica (requiere self._lock)."""
+        if not self.persist_path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.persist_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._pending, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"⚠️ No se pudieron guardar los estatus pendientes: {e}")
@@ -0,0 +1,251 @@
+"""
+Módulo de carga tipada del shipment desde los valores de la hoja.
+
+get_all_values entrega todo como texto. Armar con eso un DataFrame de object
+con las ~20 columnas de la hoja ocupa varias veces lo necesario y el
+escaneo solo usa unas pocas. Aquí:
+- El header se busca por bloques de filas con operaciones de conjuntos:
+  cada texto distinto del bloque se revisa una vez, no cada celda.
+- Solo se conservan las columnas que se usan (CAMION, Pallet number,
+  seriales y estatus); el resto se descarta antes de crear el DataFrame.
+- CAMION y estatus son categóricas (pocos valores distintos que se repiten).
+- Pallet number es Int64 (entero con nulos) cuando todos los valores son
+  numéricos; si hay códigos con letras se conserva como texto.
+
+Las conversiones de texto (strip, ¿es número?) se hacen una vez por valor
+distinto (pd.factorize), no una vez por fila.
+"""
+
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .records import SHIPMENT_COLUMNS, canonical_headers
+
+
+HEADER_MARKER = 'CAMION'
+
+# Filas por bloque al buscar el header: el primero es chico (el header
+# casi siempre está arriba) y cada bloque siguiente es el doble
+HEADER_FIRST_ROWS = 8
+HEADER_SCAN_ROWS = 64
+
+# Nombres con los que aparece la columna de estatus
+STATUS_HEADERS = ('ESTATUS', 'STATUS')
+
+TRUCK_COLUMN = 'CAMION'
+PALLET_COLUMN = 'Pallet number'
+
+
+def find_header_row(values: List[List[str]], marker: str = HEADER_MARKER) -> Optional[int]:
+    """
+    Busca la fila del header: la primera con una celda igual a marker
+    (sin distinguir mayúsculas).
+
+    Args:
+        values: Filas de la hoja (get_all_values)
+        marker: Texto de la celda que identifica el header
+
+    Returns:
+        Posición (0-based) de la fila o None si no hay header
+    """
+    marker = marker.upper()
+    start = 0
+    size = HEADER_FIRST_ROWS
+    while start < len(values):
+        rows = values[start:start + size]
+        # Las filas de título repiten celdas vacías: el conjunto es pequeño
+        hits = {cell for cell in set(chain.from_iterable(rows)) if cell.upper() == marker}
+        if hits:
+            return start + next(i for i, row in enumerate(rows) if not hits.isdisjoint(row))
+        start += size
+        size = min(size * 2, HEADER_SCAN_ROWS)
+    return None
+
+
+def shipment_columns(headers: Sequence[str], status_column: Optional[int] = 19) -> List[str]:
+    """
+    Columnas del header que se conservan, en el orden de la hoja.
+
+    Args:
+        headers: Fila del header
+        status_column: Número de columna (1-based) del estatus en la hoja
+
+    Returns:
+        Nombres de las columnas usadas (los de SHIPMENT_COLUMNS con su
+        escritura canónica, ver canonical_headers)
+    """
+    headers = canonical_headers(headers)
+    keep = set(SHIPMENT_COLUMNS) | _status_names(headers, status_column)
+    columns = []
+    for name in headers:
+        if name in keep and name not in columns:
+            columns.append(name)
+    return columns
+
+
+def _status_names(headers: Sequence[str], status_column: Optional[int]) -> set:
+    """Nombres de la(s) columna(s) de estatus del header."""
+    names = {name for name in headers if name.strip().upper() in STATUS_HEADERS}
+    if status_column and status_column <= len(headers) and headers[status_column - 1].strip():
+        names.add(headers[status_column - 1])
+    return names
+
+
+def _column_values(data: List[List[str]], position: int) -> List[str]:
+    """Valores de una columna; las filas cortas cuentan como vacías."""
+    try:
+        return list(map(itemgetter(position), data))
+    except IndexError:
+        return [row[position] if position < len(row) else '' for row in data]
+
+
+def _stripped_categorical(values: Sequence) -> pd.Categorical:
+    """Categórica con los valores sin espacios a los lados."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    stripped = [str(value).strip() for value in uniques]
+    # Dos valores que solo difieren en espacios quedan en la misma categoría
+    final, categories = pd.factorize(np.asarray(stripped, dtype=object))
+    return pd.Categorical.from_codes(final[codes], categories=categories)
+
+
+def _pallet_array(values: Sequence):
+    """
+    Convierte números de pallet a Int64 si todos son numéricos.
+
+    Returns:
+        Arreglo Int64 (vacíos -> <NA>) o None si hay valores no numéricos
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    numbers = []
+    for value in uniques:
+        text = str(value).strip()
+        if text.isdigit() and text.isascii() and len(text) <= 18:
+            numbers.append(int(text))
+        elif text == '':
+            numbers.append(None)
+        else:
+            return None
+    return pd.array(numbers, dtype='Int64').take(codes, allow_fill=True)
+
+
+def build_shipment_frame(
+    values: List[List[str]],
+    header_row: int,
+    status_column: Optional[int] = 19
+) -> pd.DataFrame:
+    """
+    Arma el DataFrame tipado del shipment.
+
+    Las filas sin CAMION se descartan; el índice es la posición de cada fila
+    debajo del header (como el DataFrame sin tipar que se usaba antes).
+
+    Args:
+        values: Filas de la hoja (get_all_values)
+        header_row: Posición (0-based) del header
+        status_column: Número de columna (1-based) del estatus
+
+    Returns:
+        DataFrame con las columnas de shipment_columns
+    """
+    headers = canonical_headers(values[header_row])
+    data = values[header_row + 1:]
+    columns = shipment_columns(headers, status_column)
+    statuses = _status_names(headers, status_column)
+
+    trucks = _stripped_categorical(_column_values(data, headers.index(TRUCK_COLUMN)))
+    keep = np.asarray(trucks != '')
+    labels = np.flatnonzero(keep)
+
+    frame = {}
+    for name in columns:
+        if name == TRUCK_COLUMN:
+            frame[name] = trucks[keep].remove_unused_categories()
+            continue
+        column = np.array(_column_values(data, headers.index(name)), dtype=object)[keep]
+        if name == PALLET_COLUMN:
+            pallets = _pallet_array(column)
+            frame[name] = pallets if pallets is not None else column
+        elif name in statuses:
+            frame[name] = pd.Categorical(column)
+        else:
+            frame[name] = column
+    return pd.DataFrame(frame, index=pd.Index(labels), columns=columns)
+
+
+def prune_shipment_values(
+    values: List[List[str]],
+    header_row: int,
+    status_column: Optional[int] = 19
+) -> List[tuple]:
+    """
+    Reduce los valores de la hoja a las columnas de shipment_columns.
+
+    Sirve para comparar con la siguiente carga (ver core.sheet_diff) sin
+    guardar todas las columnas de get_all_values; las celdas son las mismas
+    cadenas, no copias.
+
+    Args:
+        values: Filas de la hoja (get_all_values)
+        header_row: Posición (0-based) del header
+        status_column: Número de columna (1-based) del estatus
+
+    Returns:
+        Lista con el header reducido seguido de las filas reducidas (tuplas)
+    """
+    headers = canonical_headers(values[header_row])
+    data = values[header_row + 1:]
+    columns = shipment_columns(headers, status_column)
+    positions = [headers.index(name) for name in columns]
+    try:
+        # itemgetter con varias posiciones ya retorna tuplas
+        rows = list(map(itemgetter(*positions), data)) if len(positions) > 1 else None
+    except IndexError:
+        rows = None
+    if rows is None:
+        rows = list(zip(*(_column_values(data, position) for position in positions)))
+    return [tuple(columns)] + rows
+
+
+def patch_shipment_frame(df: pd.DataFrame, rows: Dict[int, Sequence[str]], headers: Sequence[str]):
+    """
+    Reemplaza filas de un DataFrame de build_shipment_frame (recarga
+    incremental), con los mismos tipos.
+
+    Args:
+        df: DataFrame a modificar (en su lugar)
+        rows: {etiqueta: fila cruda de la hoja}; las etiquetas deben existir
+        headers: Fila del header de la hoja
+
+    Raises:
+        ValueError: Si un valor no cabe en el tipo de su columna (por
+                    ejemplo, un pallet con letras en una columna Int64)
+    """
+    if not rows:
+        return
+    headers = canonical_headers(headers)
+    labels = list(rows)
+    data = list(rows.values())
+
+    # Convertir todo antes de escribir: un error no deja el DataFrame a medias
+    updates = []
+    for name in df.columns:
+        values = _column_values(data, headers.index(name))
+        dtype = df[name].dtype
+        if name == TRUCK_COLUMN:
+            values = [value.strip() for value in values]
+        if name == PALLET_COLUMN and dtype == 'Int64':
+            values = _pallet_array(values)
+            if values is None:
+                raise ValueError("Pallet number con valores no numéricos")
+        updates.append((name, dtype, values))
+
+    for name, dtype, values in updates:
+        if isinstance(dtype, pd.CategoricalDtype):
+            new = set(values).difference(dtype.categories)
+            if new:
+                df[name] = df[name].cat.add_categories(sorted(new))
+        df.loc[labels, name] = values
@@ -6,12 +6,26 @@ a camiones físicos del layout, con las siguientes reglas:
 1. Solo asignar a camiones del layout completamente vacíos
 2. Bloquear cuando no hay camiones vacíos disponibles
 3. Mantener mapeo consistente packing_truck_id -> layout_truck_id
+
+La asignación se reserva en la tabla truck_assignments dentro de una
+transacción BEGIN IMMEDIATE, de modo que varios escáneres que comparten la
+misma base de datos nunca reciben el mismo camión del layout. El candidato
+sale del índice de ocupación en memoria (ver occupancy_index) y se confirma
+con una consulta de una fila bajo el lock de escritura; si ningún candidato
+sirve, se buscan camiones libres en la base. Las estadísticas también se
+resuelven con el índice, que se recarga antes de leer si otro proceso
+escribió la base (OccupancyIndex.refresh); get_occupied_layout_trucks
+consulta la base de datos directamente y sirve como referencia.
 """
 
 import re
-import sqlite3
 from typing import List, Dict, Tuple, Optional
 
+from .connection_pool import get_connection_manager
+from .event_log import append_events, assign_event, get_event_log
+from .occupancy_index import get_occupancy_index
+from utils.metrics import increment, timed
+
 
 def get_layout_trucks_from_locations(layout_locations: List[str]) -> List[int]:
     """
@@ -23,6 +37,10 @@ def get_layout_trucks_from_locations(layout_locations: List[str]) -> List[int]:
     Returns:
         Lista ordenada de IDs de camiones ej: [1, 2, 3]
     """
+    # Un LayoutModel ya trae los camiones calculados
+    if hasattr(layout_locations, 'truck_location_counts'):
+        return sorted(layout_locations.truck_location_counts)
+    
     camiones = set()
     for location in layout_locations:
         match = re.match(r'C(\d+)-\d+', location)
@@ -32,6 +50,7 @@ def get_layout_trucks_from_locations(layout_locations: List[str]) -> List[int]:
     return sorted(camiones)
 
 
+@timed('assignment.get_occupied_layout_trucks')
 def get_occupied_layout_trucks(db_path: str = 'scans.db') -> Dict[int, int]:
     """
     Obtiene la cantidad de pallets por camión del layout.
@@ -44,25 +63,22 @@ def get_occupied_layout_trucks(db_path: str = 'scans.db') -> Dict[int, int]:
         Ejemplo: {1: 5, 2: 0, 3: 12} significa C1 tiene 5 pallets, C2 vacío, C3 tiene 12
     """
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT layout_truck_id, COUNT(*) 
-            FROM pallet_scans 
-            WHERE layout_truck_id IS NOT NULL 
-            GROUP BY layout_truck_id
-        ''')
+        with get_connection_manager(db_path).reader() as conn:
+            rows = conn.execute('''
+                SELECT layout_truck_id, COUNT(*) 
+                FROM pallet_scans 
+                WHERE layout_truck_id IS NOT NULL 
+                GROUP BY layout_truck_id
+            ''').fetchall()
         
         occupied = {}
-        for row in cursor.fetchall():
+        for row in rows:
             # Extraer número del layout_truck_id (ej: "C1" -> 1)
             match = re.match(r'C(\d+)', row[0])
             if match:
                 truck_id = int(match.group(1))
                 occupied[truck_id] = row[1]
         
-        conn.close()
         return occupied
         
     except Exception as e:
@@ -70,6 +86,7 @@ def get_occupied_layout_trucks(db_path: str = 'scans.db') -> Dict[int, int]:
         return {}
 
 
+@timed('assignment.get_empty_layout_trucks')
 def get_empty_layout_trucks(layout_trucks: List[int], db_path: str = 'scans.db') -> List[int]:
     """
     Retorna solo los camiones del layout que están completamente vacíos.
@@ -84,14 +101,13 @@ def get_empty_layout_trucks(layout_trucks: List[int], db_path: str = 'scans.db')
     Returns:
         Lista ordenada de IDs de camiones completamente vacíos
     """
-    occupied = get_occupied_layout_trucks(db_path)
-    
-    empty_trucks = []
-    for truck_id in layout_trucks:
-        if truck_id not in occupied or occupied[truck_id] == 0:
-            empty_trucks.append(truck_id)
-    
-    return sorted(empty_trucks)
+    try:
+        index = get_occupancy_index(db_path)
+        index.refresh()
+        return index.get_empty_trucks(layout_trucks)
+    except Exception as e:
+        print(f"Error obteniendo camiones vacíos: {e}")
+        return []
 
 
 def get_packing_truck_assignment(packing_truck_id: str, db_path: str = 'scans.db') -> Optional[str]:
@@ -106,18 +122,12 @@ def get_packing_truck_assignment(packing_truck_id: str, db_path: str = 'scans.db
         ID del layout truck asignado (ej: "C1") o None si no tiene asignación
     """
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT DISTINCT layout_truck_id 
-            FROM pallet_scans 
-            WHERE packing_truck_id = ? AND layout_truck_id IS NOT NULL
-            LIMIT 1
-        ''', (str(packing_truck_id),))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with get_connection_manager(db_path).reader() as conn:
+            result = conn.execute('''
+                SELECT layout_truck_id
+                FROM truck_assignments
+                WHERE packing_truck_id = ?
+            ''', (str(packing_truck_id),)).fetchone()
         
         return result[0] if result else None
         
@@ -126,6 +136,7 @@ def get_packing_truck_assignment(packing_truck_id: str, db_path: str = 'scans.db
         return None
 
 
+@timed('assignment.assign_packing_truck_to_layout')
 def assign_packing_truck_to_layout(
     packing_truck_id: str, 
     layout_trucks: List[int],
@@ -139,6 +150,14 @@ def assign_packing_truck_to_layout(
     2. Si no, buscar el PRIMER camión completamente vacío en el layout
     3. Si no hay camiones vacíos -> BLOQUEAR (retornar False)
     
+    Los pasos 2 y 3 se hacen en una sola transacción BEGIN IMMEDIATE que
+    reserva el camión en truck_assignments, así que la asignación es atómica
+    aunque varios escáneres compartan la base de datos. El primer camión
+    vacío sale del índice de ocupación y se confirma con una consulta de una
+    fila (sin reserva ni pallets); si otro proceso lo ocupó, el índice se
+    corrige y se prueba el siguiente. La reserva se libera al entregar el
+    camión (DatabaseManager.deliver_truck).
+    
     Args:
         packing_truck_id: ID del camión en el packing list
         layout_trucks: Lista de IDs disponibles en el layout
@@ -150,22 +169,86 @@ def assign_packing_truck_to_layout(
         - message: Mensaje descriptivo
         - layout_truck_id: ID del camión asignado (ej: "C1") o None
     """
-    # 1. Verificar si ya tiene asignación
+    packing_truck_id = str(packing_truck_id)
+    
+    # 1. Verificar si ya tiene asignación (lectura sin bloquear escritores)
     existing_assignment = get_packing_truck_assignment(packing_truck_id, db_path)
     if existing_assignment:
         return True, f"✅ Camión ya asignado a {existing_assignment}", existing_assignment
     
-    # 2. Buscar camiones completamente vacíos
-    empty_trucks = get_empty_layout_trucks(layout_trucks, db_path)
+    index = get_occupancy_index(db_path)
+    stale = False
+    layout_truck_id = None
+    try:
+        with get_connection_manager(db_path).transaction('IMMEDIATE') as conn:
+            # Otro escáner pudo reservarlo entre la lectura y el lock
+            row = conn.execute('''
+                SELECT layout_truck_id FROM truck_assignments
+                WHERE packing_truck_id = ?
+            ''', (packing_truck_id,)).fetchone()
+            if row:
+                return True, f"✅ Camión ya asignado a {row[0]}", row[0]
+            
+            # 2. Primer camión vacío según el índice, confirmado en la BD
+            index.refresh()
+            for candidate in index.get_empty_trucks(layout_trucks):
+                reserved_by, has_pallets = conn.execute('''
+                    SELECT
+                        (SELECT packing_truck_id FROM truck_assignments WHERE layout_truck_id = ?),
+                        EXISTS(SELECT 1 FROM pallet_scans WHERE layout_truck_id = ?)
+                ''', (f"C{candidate}", f"C{candidate}")).fetchone()
+                if reserved_by is None and not has_pallets:
+                    layout_truck_id = f"C{candidate}"
+                    break
+                # Otro proceso ocupó el camión: el índice está atrasado
+                if reserved_by is not None:
+                    index.record_reservation(reserved_by, f"C{candidate}")
+                else:
+                    stale = True
+            
+            if layout_truck_id is None:
+                # Ningún candidato del índice sirve: otro proceso pudo liberar
+                # camiones que el índice no conoce; se busca en la BD
+                free = _free_layout_trucks(conn, layout_trucks)
+                if free:
+                    layout_truck_id = f"C{free[0]}"
+                    stale = True
+            
+            if layout_truck_id is None:
+                increment('assignment.blocked')
+                return False, "❌ No hay camiones disponibles. Entrega un camión para liberar espacio.", None
+            
+            # 3. Reservar el primer camión vacío
+            conn.execute('''
+                INSERT INTO truck_assignments (packing_truck_id, layout_truck_id)
+                VALUES (?, ?)
+            ''', (packing_truck_id, layout_truck_id))
+            append_events(conn, [assign_event(packing_truck_id, layout_truck_id)])
+    
+    except Exception as e:
+        print(f"Error asignando camión: {e}")
+        return False, f"❌ Error asignando camión: {e}", None
     
-    if len(empty_trucks) == 0:
-        return False, "❌ No hay camiones disponibles. Entrega un camión para liberar espacio.", None
+    finally:
+        if stale:
+            # Cambios de otro proceso que el índice no conoce: recargar
+            index.load()
     
-    # 3. Asignar al primer camión vacío
-    layout_truck_id = f"C{empty_trucks[0]}"
+    get_event_log(db_path).record_appended(1)
+    index.record_reservation(packing_truck_id, layout_truck_id)
     return True, f"✅ Asignado a {layout_truck_id}", layout_truck_id
 
 
+def _free_layout_trucks(conn, layout_trucks: List[int]) -> List[int]:
+    """Camiones del layout sin reserva ni pallets según la BD (dentro de la transacción)."""
+    taken = {row[0] for row in conn.execute('SELECT layout_truck_id FROM truck_assignments')}
+    taken.update(row[0] for row in conn.execute(
+        'SELECT DISTINCT layout_truck_id FROM pallet_scans WHERE layout_truck_id IS NOT NULL'
+    ))
+    return sorted(truck for truck in set(layout_trucks) if f"C{truck}" not in taken)
+
+
+@timed('assignment.get_layout_truck_statistics')
 def get_layout_truck_statistics(layout_trucks: List[int], db_path: str = 'scans.db') -> Dict:
     """
     Obtiene estadísticas de ocupación de todos los camiones del layout.
@@ -178,11 +261,22 @@ def get_layout_truck_statistics(layout_trucks: List[int], db_path: str = 'scans.
         Dict con estadísticas por camión:
         {
             'C1': {'pallets': 10, 'locations_used': 5, 'is_empty': False, 'is_full': False},
-            'C2': {'pallets': 0, 'locations_used': 0, 'is_empty': True, 'is_full': False},
+            'C2': {'pallets': 0, 'locations_used': 0, 'is_empty': False, 'is_full': False},
+            'C3': {'pallets': 0, 'locations_used': 0, 'is_empty': True, 'is_full': False},
             ...
         }
+        is_empty sigue el mismo criterio que get_empty_layout_trucks: un
+        camión reservado (C2) no está vacío aunque todavía no tenga pallets.
     """
-    occupied = get_occupied_layout_trucks(db_path)
+    try:
+        index = get_occupancy_index(db_path)
+        index.refresh()
+        occupied = index.get_counts()
+        empty = set(index.get_empty_trucks(layout_trucks))
+    except Exception as e:
+        print(f"Error obteniendo ocupación: {e}")
+        occupied = {}
+        empty = set()
     
     stats = {}
     for truck_id in layout_trucks:
@@ -193,7 +287,7 @@ def get_layout_truck_statistics(layout_trucks: List[int], db_path: str = 'scans.
         stats[f'C{truck_id}'] = {
             'pallets': pallet_count,
             'locations_used': locations_used,
-            'is_empty': pallet_count == 0,
+            'is_empty': truck_id in empty,
             'is_full': locations_used >= 57  # Límite de 57 ubicaciones
         }
     
@@ -1,20 +1,38 @@
 """
 App Warehouse - Versión Funcional
 """
+import asyncio
+import os
+import sys
+
 import flet as ft
 
-def main(page: ft.Page):
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ui.update_batcher import UpdateBatcher
+
+
+async def main(page: ft.Page):
     page.title = "Warehouse Manager"
     page.padding = 20
     
     # Log area
     log = ft.ListView(expand=True, spacing=5, padding=10)
     
-    def add_log(message: str):
-        log.controls.append(ft.Text(message, size=12))
+    def apply_logs(messages: list):
+        # Un solo page.update() por lote de mensajes
+        log.controls.extend(ft.Text(message, size=12) for message in messages)
         page.update()
     
+    log_batcher = UpdateBatcher(apply_logs, max_fps=20)
+    
+    def add_log(message: str):
+        # Se puede llamar desde los hilos de carga
+        log_batcher.post(message)
+    
     def show_alert(title: str, message: str):
+        log_batcher.flush()
+        
         def close_dlg(e):
             dlg.open = False
             page.update()
@@ -35,66 +53,76 @@ def main(page: ft.Page):
         expand=True
     )
     
-    def cargar_todo(e):
+    # Servicio de core (se importa en un hilo la primera vez)
+    service = None
+    
+    def create_service():
+        from core.service import WarehouseService
+        return WarehouseService()
+    
+    def set_loading(loading: bool):
+        btn_cancelar.disabled = not loading
+        page.update()
+    
+    async def cargar_todo(e):
+        nonlocal service
         add_log("🔘 Botón presionado")
         
-        try:
-            url = url_field.value
-            add_log(f"📝 URL recibida")
-            
-            if not url:
-                show_alert("Error", "Por favor pega una URL")
-                add_log("❌ URL vacía")
-                return
-            
+        url = url_field.value
+        add_log(f"📝 URL recibida")
+        
+        if not url:
+            show_alert("Error", "Por favor pega una URL")
+            add_log("❌ URL vacía")
+            return
+        
+        if service is None:
             add_log("📦 Importando módulos...")
-            
-            # Importar SOLO cuando se necesite
             try:
-                import sys
-                import os
-                sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-                
-                from core.sheets_manager import SheetsManager
-                add_log("✅ SheetsManager importado")
+                service = await asyncio.to_thread(create_service)
+                add_log("✅ Servicio de datos listo")
             except Exception as import_err:
                 show_alert("Error de Importación", f"No se pudo importar: {str(import_err)}")
                 add_log(f"❌ Error importando: {str(import_err)}")
                 return
-            
-            add_log("🔧 Creando SheetsManager...")
-            sheets = SheetsManager()
-            add_log(f"✅ SheetsManager creado")
-            
-            if not sheets.client:
-                show_alert("Sin Credenciales", "ProductoTerminado.json no encontrado")
-                add_log("❌ Sin credenciales")
-                return
-            
-            add_log("🔍 Extrayendo Sheet ID...")
-            sheet_id = sheets.extract_sheet_id(url)
-            
-            if not sheet_id:
-                show_alert("Error", "URL inválida")
-                add_log("❌ URL inválida")
-                return
-            
-            add_log(f"✅ Sheet ID: {sheet_id[:20]}...")
-            add_log("📡 Cargando datos de Google Sheets...")
-            
-            df, header_row, sheet = sheets.load_shipment_data(sheet_id)
-            
-            if df is not None:
-                show_alert("Éxito", f"✅ {len(df)} camiones cargados")
-                add_log(f"✅ {len(df)} camiones cargados correctamente")
-            else:
-                show_alert("Error", "Error cargando datos")
-                add_log("❌ Error cargando datos")
-                
+        
+        from core.service import LoadCancelled
+        
+        # Una carga nueva cancela la anterior
+        token = service.new_load_token()
+        set_loading(True)
+        
+        try:
+            result = await service.load_shipment(url, token, progress=add_log)
+        except LoadCancelled:
+            add_log("⏹️ Carga cancelada")
+            return
         except Exception as e:
             error_msg = str(e)
             show_alert("Error", f"❌ {error_msg}")
             add_log(f"❌ Error: {error_msg}")
+            return
+        finally:
+            if not token.cancelled:
+                set_loading(False)
+        
+        if 'error' in result:
+            show_alert("Error", result['error'])
+            add_log(f"❌ {result['error']}")
+            return
+        
+        df = result['df']
+        show_alert("Éxito", f"✅ {len(df)} camiones cargados")
+        add_log(f"✅ {len(df)} camiones cargados correctamente")
+        if result['source'] == 'offline':
+            add_log("📴 Datos de la copia local (sin conexión)")
+        elif result['source'] == 'cache':
+            add_log("⚡ Hoja sin cambios: datos de la copia local")
+    
+    def cancelar(e):
+        if service is not None:
+            service.cancel_load()
+        set_loading(False)
     
     # Botón principal
     btn_cargar = ft.ElevatedButton(
@@ -103,13 +131,19 @@ def main(page: ft.Page):
         expand=True
     )
     
+    btn_cancelar = ft.OutlinedButton(
+        "⏹️ CANCELAR",
+        on_click=cancelar,
+        disabled=True
+    )
+    
     # Layout
     page.add(
         ft.Column([
             ft.Text("🗂️ Warehouse Manager", size=24, weight=ft.FontWeight.BOLD),
             ft.Divider(),
             ft.Row([url_field]),
-            ft.Row([btn_cargar]),
+            ft.Row([btn_cargar, btn_cancelar]),
             ft.Divider(),
             ft.Text("📋 Log:", size=16),
             ft.Container(
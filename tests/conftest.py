@@ -0,0 +1,22 @@
+"""
+Configuración común de las pruebas.
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.connection_pool import close_all_connections
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Ruta de una base de datos nueva; cierra las conexiones al terminar."""
+    yield str(tmp_path / 'scans.db')
+    close_all_connections()
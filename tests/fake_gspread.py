@@ -0,0 +1,131 @@
+"""
+Sustituto mínimo de gspread para las pruebas sin conexión.
+
+Implementa solo lo que usa el sistema de warehouse: open_by_key,
+get_worksheet, get_all_values, get_lastUpdateTime, batch_update,
+update_cell y findall. Permite simular errores de cuota (HTTP 429) y
+cuenta las llamadas a la API.
+"""
+
+import re
+from typing import List, Optional
+
+
+class FakeResponse:
+    """Respuesta HTTP simulada (solo status_code)."""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+class FakeAPIError(Exception):
+    """Error de la API con el mismo formato que gspread.exceptions.APIError."""
+
+    def __init__(self, status_code: int = 429, message: str = 'Quota exceeded'):
+        super().__init__(f'APIError: [{status_code}]: {message}')
+        self.code = status_code
+        self.response = FakeResponse(status_code)
+
+
+class FakeCell:
+    """Celda encontrada por findall."""
+
+    def __init__(self, row: int, col: int, value: str):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class FakeWorksheet:
+    """Hoja en memoria con contador de llamadas a la API."""
+
+    def __init__(self, values: List[List[str]]):
+        self.values = [list(row) for row in values]
+        self.api_calls = 0
+        self._failures: List[Exception] = []
+
+    def fail_next(self, count: int = 1, status_code: int = 429):
+        """Hace que las próximas ``count`` llamadas de escritura fallen."""
+        self._failures.extend(FakeAPIError(status_code) for _ in range(count))
+
+    def _call(self):
+        self.api_calls += 1
+
+    def _raise_pending_failure(self):
+        if self._failures:
+            raise self._failures.pop(0)
+
+    def get_all_values(self) -> List[List[str]]:
+        self._call()
+        return [list(row) for row in self.values]
+
+    def cell_value(self, row: int, col: int) -> Optional[str]:
+        """Lee una celda sin contar como llamada a la API (para verificar)."""
+        if row - 1 < len(self.values) and col - 1 < len(self.values[row - 1]):
+            return self.values[row - 1][col - 1]
+        return None
+
+    def update_cell(self, row: int, col: int, value):
+        self._call()
+        self._raise_pending_failure()
+        self._set(row, col, value)
+
+    def batch_update(self, data: list, **kwargs):
+        self._call()
+        self._raise_pending_failure()
+        for item in data:
+            row, col = _a1_to_rowcol(item['range'])
+            self._set(row, col, item['values'][0][0])
+
+    def findall(self, query: str) -> List[FakeCell]:
+        self._call()
+        return [
+            FakeCell(r + 1, c + 1, value)
+            for r, row in enumerate(self.values)
+            for c, value in enumerate(row)
+            if value == query
+        ]
+
+    def _set(self, row: int, col: int, value):
+        while len(self.values) < row:
+            self.values.append([])
+        line = self.values[row - 1]
+        while len(line) < col:
+            line.append('')
+        line[col - 1] = str(value)
+
+
+class FakeSpreadsheet:
+    """Libro con una o más hojas y fecha de modificación controlable."""
+
+    def __init__(self, worksheets: List[FakeWorksheet], modified_time: str = '2024-01-01T00:00:00Z'):
+        self.worksheets = worksheets
+        self.modified_time = modified_time
+
+    def get_worksheet(self, index: int) -> FakeWorksheet:
+        return self.worksheets[index]
+
+    def get_lastUpdateTime(self) -> str:
+        return self.modified_time
+
+
+class FakeClient:
+    """Cliente con el mismo open_by_key que gspread.Client."""
+
+    def __init__(self, spreadsheets: dict):
+        self.spreadsheets = spreadsheets
+        self.offline = False
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        if self.offline:
+            raise ConnectionError('Sin conexión (simulado)')
+        return self.spreadsheets[key]
+
+
+def _a1_to_rowcol(label: str):
+    match = re.match(r'^([A-Z]+)(\d+)$', label)
+    letters, row = match.groups()
+    col = 0
+    for char in letters:
+        col = col * 26 + (ord(char) - 64)
+    return int(row), col
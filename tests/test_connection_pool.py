@@ -0,0 +1,115 @@
+"""
+Pruebas de las conexiones SQLite compartidas.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import core.connection_pool as connection_pool
+from core.connection_pool import ConnectionManager, database_key, get_connection_manager
+
+
+@pytest.fixture
+def manager(db_path):
+    manager = get_connection_manager(db_path)
+    with manager.transaction() as conn:
+        conn.execute('CREATE TABLE counter (n INTEGER)')
+        conn.execute('INSERT INTO counter VALUES (0)')
+    return manager
+
+
+def test_connections_use_wal(manager):
+    with manager.transaction() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    with manager.reader() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_concurrent_writers_share_one_serialized_connection(manager):
+    inside = []
+    connections = set()
+    errors = []
+
+    def increment():
+        try:
+            for _ in range(5):
+                with manager.transaction('IMMEDIATE') as conn:
+                    inside.append(1)
+                    connections.add(id(conn))
+                    assert len(inside) == 1, "dos escritores dentro de la transacción"
+                    n = conn.execute('SELECT n FROM counter').fetchone()[0]
+                    time.sleep(0.001)
+                    conn.execute('UPDATE counter SET n = ?', (n + 1,))
+                    inside.pop()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=increment) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [] and len(connections) == 1
+    with manager.reader() as conn:
+        assert conn.execute('SELECT n FROM counter').fetchone()[0] == 40
+
+
+def test_readers_are_reused_last_in_first_out(manager):
+    with manager.reader() as first:
+        with manager.reader() as second:
+            assert second is not first
+    # first se devolvió al último: es el siguiente en prestarse
+    with manager.reader() as conn:
+        assert conn is first
+        with manager.reader() as other:
+            assert other is second
+    assert manager._reader_count == 2
+
+
+def test_reader_pool_waits_when_full(db_path):
+    manager = ConnectionManager(db_path, pool_size=1)
+    borrowed = []
+    with manager.reader() as conn:
+        thread = threading.Thread(target=lambda: borrowed.append(manager._acquire_reader()))
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive() and borrowed == []
+    thread.join(2)
+    assert borrowed == [conn]
+    manager._readers.put(conn)
+    manager.close()
+
+
+def test_connection_returns_to_the_pool_when_the_block_raises(manager):
+    with pytest.raises(ValueError):
+        with manager.reader() as conn:
+            raise ValueError('falla dentro del bloque')
+    assert manager._readers.qsize() == 1
+    with manager.reader() as again:
+        assert again is conn
+
+    with pytest.raises(ValueError):
+        with manager.transaction() as writer:
+            writer.execute('UPDATE counter SET n = 99')
+            raise ValueError('falla dentro de la transacción')
+    # ROLLBACK: el escritor queda libre y sin cambios
+    assert not writer.in_transaction
+    with manager.reader() as conn:
+        assert conn.execute('SELECT n FROM counter').fetchone()[0] == 0
+
+
+def test_managers_are_keyed_per_process_and_path(db_path, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    manager = get_connection_manager(db_path)
+    assert get_connection_manager(os.path.basename(db_path)) is manager
+    assert database_key(db_path) == (os.getpid(), os.path.abspath(db_path))
+
+    # Un proceso hijo (otro PID) no hereda las conexiones del padre
+    monkeypatch.setattr(connection_pool.os, 'getpid', lambda: -1)
+    child = get_connection_manager(db_path)
+    assert child is not manager
+    assert database_key(db_path)[0] == -1
@@ -0,0 +1,97 @@
+"""
+Pruebas del registro de escaneos en DatabaseManager.
+"""
+
+import pandas as pd
+import pytest
+
+from core.db_manager import DatabaseManager
+
+SHIPMENT = pd.DataFrame({
+    'CAMION': ['T1', 'T1', 'T1'],
+    'Pallet number': ['101', '102', '103'],
+    'first_serial': ['S1a', 'S2a', 'S3a'],
+    'last_serial': ['S1z', 'S2z', 'S3z'],
+})
+
+SCANS = [
+    {'packing_truck_id': 'T1', 'layout_truck_id': 'C1', 'pallet_number': '102'},
+    {'packing_truck_id': 'T1', 'pallet_number': '101'},
+    {'packing_truck_id': 'T1', 'layout_truck_id': 'C1', 'pallet_number': '999'},
+    {'packing_truck_id': 'T1', 'layout_truck_id': 'C1', 'pallet_number': '103'},
+]
+
+
+@pytest.mark.parametrize('strict', [False, True])
+def test_bulk_register_reports_each_row(db_path, strict):
+    db = DatabaseManager(db_path)
+
+    results = db.register_pallet_scans_bulk(SCANS, shipment_df=SHIPMENT, strict=strict)
+
+    assert [r['row'] for r in results] == [0, 1, 2, 3]
+    assert results[1]['error'] == "Falta layout_truck_id"
+    assert results[2]['error'] == "Pallet 999 no existe en el camión T1"
+    for row in (0, 3):
+        assert results[row]['pallet_sequence_index'] == int(SCANS[row]['pallet_number']) - 100
+        assert results[row]['success'] is not strict
+
+    registered = [db.is_pallet_scanned('T1', p) for p in ('101', '102', '103', '999')]
+    if strict:
+        assert results[0]['error'] == "No registrado: el lote tiene filas inválidas (modo estricto)"
+        assert registered == [False, False, False, False]
+    else:
+        assert (results[3]['ubicacion'], results[3]['slot']) == ('C1-2', 1)
+        assert results[3]['error'] is None
+        assert registered == [False, True, True, False]
+
+
+class RecordingQueue:
+    """Cola de estatus que solo guarda lo encolado."""
+
+    def __init__(self):
+        self.batches = []
+
+    def enqueue_many(self, updates):
+        self.batches.append(dict(updates))
+
+
+def register(db: DatabaseManager, truck: str, ubicaciones: list):
+    for n, ubicacion in enumerate(ubicaciones, start=1):
+        assert db.register_pallet_scan(
+            truck, ubicacion.split('-')[0], str(n), n, f'{truck}S{n}a', f'{truck}S{n}z', ubicacion, 1
+        )
+
+
+def test_deliver_trucks_in_one_transaction(db_path):
+    db = DatabaseManager(db_path)
+    register(db, 'T1', ['C1-1', 'C1-2'])
+    register(db, 'T2', ['C2-1'])
+    # C2 lo comparten T2 y T3: sigue ocupado mientras quede T3
+    register(db, 'T3', ['C2-2', 'C10-1'])
+    queue = RecordingQueue()
+
+    success, result = db.deliver_trucks(['T1', 'T2', 'T1', 'T9'], status_queue=queue)
+
+    assert success
+    assert result['delivered'] == ['T1', 'T2'] and result['not_found'] == ['T9']
+    assert result['deleted_scans'] == 3
+    assert result['freed_layout_trucks'] == ['C1']
+    assert result['freed_locations'] == ['C1-1', 'C1-2', 'C2-1']
+    assert queue.batches == [{'T1': 'Entregado', 'T2': 'Entregado'}]
+    assert db.get_all_scanned_trucks() == ['T3']
+
+    success, result = db.deliver_trucks(['T3'], status_queue=queue, status='Despachado')
+    # Al irse T3 se libera C2; el orden es numérico (C2 antes que C10)
+    assert result['freed_layout_trucks'] == ['C2', 'C10']
+    assert result['freed_locations'] == ['C10-1', 'C2-2']
+    assert queue.batches[-1] == {'T3': 'Despachado'}
+
+
+def test_deliver_trucks_without_records_enqueues_nothing(db_path):
+    db = DatabaseManager(db_path)
+    queue = RecordingQueue()
+
+    success, result = db.deliver_trucks(['T9', ' '], status_queue=queue)
+
+    assert success and result['delivered'] == [] and result['not_found'] == ['T9']
+    assert queue.batches == []
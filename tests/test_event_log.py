@@ -0,0 +1,71 @@
+"""
+Pruebas de la bitácora de eventos y la reconstrucción de las tablas.
+"""
+
+from core.connection_pool import get_connection_manager
+from core.db_manager import DatabaseManager
+from core.event_log import get_event_log
+from core.occupancy_index import get_occupancy_index
+from core.truck_assignment import assign_packing_truck_to_layout
+
+
+def table_rows(db_path: str) -> tuple:
+    with get_connection_manager(db_path).reader() as conn:
+        # Sin el id autoincremental, que cambia al reinsertar
+        scans = sorted(conn.execute('''
+            SELECT packing_truck_id, layout_truck_id, pallet_number, pallet_sequence_index,
+                   first_serial, last_serial, ubicacion, slot, scanned_at
+            FROM pallet_scans
+        ''').fetchall())
+        assignments = sorted(conn.execute(
+            'SELECT packing_truck_id, layout_truck_id FROM truck_assignments'
+        ).fetchall())
+    return scans, assignments
+
+
+def register(db: DatabaseManager, truck: str, layout_truck: str, pallets: range):
+    for n in pallets:
+        assert db.register_pallet_scan(
+            truck, layout_truck, f'{truck}-{n}', n, f'S{n}a', f'S{n}z', f'{layout_truck}-{n}', 1
+        )
+
+
+def test_rebuild_from_event_log_round_trip(db_path):
+    db = DatabaseManager(db_path)
+    assert assign_packing_truck_to_layout('T1', [1, 2, 3], db_path)[2] == 'C1'
+    register(db, 'T1', 'C1', range(1, 4))
+    # Foto intermedia: la reconstrucción usa la foto más los eventos posteriores
+    get_event_log(db_path).write_snapshot()
+    assert assign_packing_truck_to_layout('T2', [1, 2, 3], db_path)[2] == 'C2'
+    register(db, 'T2', 'C2', range(1, 3))
+    register(db, 'T3', 'C3', range(1, 2))
+    assert db.deliver_truck('T3')
+
+    expected = table_rows(db_path)
+    locations = db.get_location_assignments()
+    counts = get_occupancy_index(db_path).get_counts()
+
+    with get_connection_manager(db_path).transaction() as conn:
+        conn.execute('DELETE FROM pallet_scans')
+        conn.execute('DELETE FROM truck_assignments')
+
+    assert db.rebuild_from_event_log()
+    assert table_rows(db_path) == expected
+    assert len(expected[0]) == 5 and len(expected[1]) == 2
+    assert db.get_location_assignments() == locations
+    assert get_occupancy_index(db_path).get_counts() == counts == {1: 3, 2: 2}
+
+
+def test_snapshot_keeps_the_full_history(db_path):
+    db = DatabaseManager(db_path)
+    register(db, 'T1', 'C1', range(1, 4))
+    assert db.deliver_truck('T1')
+    events = len(db.get_truck_history('T1'))
+
+    log = get_event_log(db_path)
+    log.write_snapshot()
+    register(db, 'T2', 'C2', range(1, 2))
+
+    # La foto no recorta la bitácora: el camión entregado conserva su historial
+    assert len(db.get_truck_history('T1')) == events == 4
+    assert log.replay_all().scans == log.load_state().scans
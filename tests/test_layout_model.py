@@ -0,0 +1,69 @@
+"""
+Pruebas del modelo compacto del layout y su caché binaria.
+"""
+
+import os
+from collections import Counter
+
+from benchmarks.generators import layout_svg
+from utils.layout_model import LayoutCache, LayoutModel, content_hash, load_layout
+from utils.svg_parser import parse_svg_xml
+
+TAP_SVG = """<svg xmlns="http://www.w3.org/2000/svg">
+  <rect id="C1-1" x="0" y="0" width="100" height="100"/>
+  <rect id="C1-2" x="10" y="10" width="20" height="20"/>
+  <circle id="C2-1" cx="200" cy="50" r="10"/>
+  <polygon id="C10-1" points="300,0 340,0 340,40"/>
+  <text id="C3-1" x="5" y="5">Pasillo</text>
+</svg>"""
+
+
+def test_locations_and_counts_match_the_parser():
+    xml_content = layout_svg(12, locations=15)
+    locations, shapes_data = parse_svg_xml(xml_content)
+
+    model = LayoutModel(locations, shapes_data)
+
+    assert model.location_set == set(locations) and len(model) == len(set(locations))
+    assert model.truck_location_counts == Counter(int(loc[1:].split('-')[0]) for loc in locations)
+    # Orden numérico por camión y posición, no alfabético
+    assert model.trucks == list(range(1, 13))
+    assert model.locations_for_truck(10)[:3] == ['C10-1', 'C10-2', 'C10-3']
+    assert 'C12-15' in model and 'C13-1' not in model
+
+
+def test_hit_test_resolves_a_tap_to_the_smallest_box():
+    model = LayoutModel(*parse_svg_xml(TAP_SVG))
+
+    # Dentro de dos cajas: gana la más pequeña
+    assert model.hit_test(15, 15) == 'C1-2'
+    assert model.hit_test(50, 50) == 'C1-1'
+    assert model.hit_test(205, 45) == 'C2-1'
+    assert model.hit_test(335, 5) == 'C10-1'
+    assert model.hit_test(150, 50) is None and model.hit_test(-5, -5) is None
+    # Un texto no tiene caja
+    assert model.bounds('C3-1') is None
+    assert model.locations_in(0, 0, 210, 45) == ['C1-1', 'C1-2', 'C2-1']
+
+
+def test_binary_cache_round_trip_by_content_hash(tmp_path):
+    cache = LayoutCache(str(tmp_path / 'layouts'))
+
+    model = load_layout(TAP_SVG, cache)
+    files = os.listdir(cache.cache_dir)
+    assert files == [f'{content_hash(TAP_SVG)}.layout']
+
+    cached = load_layout(TAP_SVG.encode('utf-8'), cache)
+    assert cached is not model
+    assert cached.locations == model.locations
+    assert cached.truck_location_counts == model.truck_location_counts
+    assert cached.hit_test(15, 15) == 'C1-2'
+
+    # Un archivo con el nombre de otro hash no se usa
+    other = TAP_SVG.replace('width="20"', 'width="25"')
+    os.replace(
+        os.path.join(cache.cache_dir, files[0]),
+        os.path.join(cache.cache_dir, f'{content_hash(other)}.layout')
+    )
+    assert cache.load(content_hash(other)) is None
+    assert load_layout(other, cache).bounds('C1-2') == (10, 10, 35, 30)
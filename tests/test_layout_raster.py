@@ -0,0 +1,119 @@
+"""
+Pruebas del raster del layout en tiles con capa de ocupación.
+"""
+
+import os
+
+import utils.layout_raster as layout_raster
+from core.db_manager import DatabaseManager
+from utils.layout_model import LayoutModel, content_hash
+from utils.layout_raster import LayoutRaster
+from utils.svg_parser import parse_svg_xml
+
+
+def grid_svg(columns: int = 10, rows: int = 4) -> str:
+    """Layout de un camión por fila, con ubicaciones de 50x30 separadas."""
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg">']
+    for row in range(rows):
+        for column in range(columns):
+            parts.append(
+                f'<rect id="C{row + 1}-{column + 1}" x="{column * 60}" y="{row * 40}" '
+                f'width="50" height="30" fill="#eeeeee" stroke="#333333"/>'
+            )
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def layout_model() -> LayoutModel:
+    content = grid_svg()
+    return LayoutModel(*parse_svg_xml(content), content_hash(content))
+
+
+def count_draws(monkeypatch) -> list:
+    calls = []
+    draw = LayoutRaster._draw
+
+    def counting(self, image, key, fills, region=None):
+        calls.append((key, fills is None))
+        return draw(self, image, key, fills, region)
+
+    monkeypatch.setattr(LayoutRaster, '_draw', counting)
+    return calls
+
+
+def all_keys(raster: LayoutRaster) -> list:
+    return [
+        (level, tx, ty)
+        for level in range(raster.levels)
+        for ty in range(raster.grid_size(level)[1])
+        for tx in range(raster.grid_size(level)[0])
+    ]
+
+
+def scan(db: DatabaseManager, ubicacion: str, pallet: str, slot: int = 1):
+    truck = ubicacion.split('-')[0]
+    assert db.register_pallet_scan('T1', truck, pallet, int(pallet), 'Sa', 'Sz', ubicacion, slot)
+
+
+def test_base_tile_is_drawn_once_then_read_from_the_cache(tmp_path, monkeypatch):
+    model = layout_model()
+    calls = count_draws(monkeypatch)
+    raster = LayoutRaster(model, cache_dir=str(tmp_path), tile_size=128)
+
+    first = raster.base_tile(0, 1, 0)
+    assert raster.base_tile(0, 1, 0) is first
+    assert calls == [((0, 1, 0), True)]
+    folder, = os.listdir(tmp_path)
+    assert folder.startswith(model.content_hash)
+    assert os.listdir(os.path.join(tmp_path, folder, '0')) == ['1_0.png']
+
+    # Otra sesión con el mismo layout lee el PNG sin dibujar
+    reopened = LayoutRaster(layout_model(), cache_dir=str(tmp_path), tile_size=128)
+    assert reopened.base_tile(0, 1, 0).tobytes() == first.tobytes()
+    assert len(calls) == 1
+
+
+def test_refresh_returns_only_tiles_with_changed_locations(db_path):
+    db = DatabaseManager(db_path)
+    raster = LayoutRaster(layout_model(), cache_dir=None, tile_size=128)
+    assert raster.grid_size(0) == (5, 2)
+    raster.refresh(db)
+    for key in all_keys(raster):
+        raster.tile(*key)
+
+    scan(db, 'C1-1', '1')
+    dirty = raster.refresh(db)
+    # Esquina superior izquierda: un solo tile por nivel
+    assert dirty == {(level, 0, 0) for level in range(raster.levels)}
+
+    scan(db, 'C4-10', '2', slot=1)
+    scan(db, 'C4-10', '3', slot=2)
+    # El margen de la etiqueta alcanza el tile de arriba en el nivel 0
+    assert raster.refresh(db) == {(0, 4, 0), (0, 4, 1), (1, 2, 0), (2, 1, 0), (3, 0, 0)}
+    assert raster.refresh(db) == set()
+
+    # Repintar solo el recuadro da lo mismo que componer el tile de nuevo
+    fresh = LayoutRaster(layout_model(), cache_dir=None, tile_size=128)
+    fresh.set_assignments(db.get_location_assignments())
+    for key in all_keys(raster):
+        assert raster.tile(*key).tobytes() == fresh.tile(*key).tobytes()
+
+
+def test_changes_over_the_repaint_limit_drop_composed_tiles(monkeypatch):
+    monkeypatch.setattr(layout_raster, 'REPAINT_LIMIT', 2)
+    raster = LayoutRaster(layout_model(), cache_dir=None, tile_size=128)
+    composed = [(0, 0, 0), (0, 4, 1)]
+    for key in composed:
+        raster.tile(*key)
+
+    occupant = ({'packing_truck': 'T1', 'pallet': '1', 'slot': 1}, None)
+    dirty = raster.apply_changes({'C1-1': occupant})
+    assert dirty == {(level, 0, 0) for level in range(raster.levels)}
+
+    calls = count_draws(monkeypatch)
+    dirty = raster.apply_changes({f'C2-{n}': occupant for n in range(1, 4)})
+    assert dirty == set(composed)
+    # Sin repintar: los tiles se vuelven a componer al pedirlos
+    assert calls == []
+    raster.tile(0, 0, 0)
+    assert calls == [((0, 0, 0), False)]
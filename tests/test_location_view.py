@@ -0,0 +1,93 @@
+"""
+Pruebas de la vista materializada de ubicaciones.
+"""
+
+import core.location_view as location_view
+from core.connection_pool import get_connection_manager
+from core.db_manager import DatabaseManager
+from core.location_view import _ASSIGNMENTS_SQL, get_location_view
+
+
+def scan(db: DatabaseManager, truck: str, pallet: str, ubicacion: str, slot: int = 1):
+    assert db.register_pallet_scan(
+        truck, ubicacion.split('-')[0], pallet, int(pallet), f'S{pallet}a', f'S{pallet}z', ubicacion, slot
+    )
+
+
+def assignments_from_table(db_path: str) -> dict:
+    """Mismo armado que hacía get_location_assignments sobre pallet_scans."""
+    assignments = {}
+    with get_connection_manager(db_path).reader() as conn:
+        for ubicacion, truck, pallet, slot in conn.execute(_ASSIGNMENTS_SQL):
+            assignments.setdefault(ubicacion, []).append(
+                {'packing_truck': truck, 'pallet': pallet, 'slot': slot}
+            )
+    return assignments
+
+
+def test_changes_since_after_scan_rescan_and_delivery(db_path):
+    db = DatabaseManager(db_path)
+    view = get_location_view(db_path)
+    start = view.version
+
+    scan(db, 'T1', '1', 'C1-1')
+    scan(db, 'T1', '2', 'C1-1', slot=2)
+    after_scans, changed = view.changes_since(start)
+    assert changed == ['C1-1']
+    assert view.changes_since(after_scans) == (after_scans, [])
+
+    # Volver a escanear el pallet en otra ubicación libera la anterior
+    scan(db, 'T1', '2', 'C1-2')
+    after_rescan, changed = view.changes_since(after_scans)
+    assert changed == ['C1-1', 'C1-2']
+    assert [slot and slot['pallet'] for slot in view.get('C1-1')] == ['1', None]
+
+    scan(db, 'T2', '7', 'C2-1')
+    assert db.deliver_truck('T1')
+    version, changed = view.changes_since(after_rescan)
+    assert changed == ['C1-1', 'C1-2', 'C2-1']
+    assert not view.is_occupied('C1-1') and view.is_occupied('C2-1')
+
+    version, cells = db.get_location_changes(after_rescan)
+    assert cells['C1-2'] == (None, None)
+    assert cells['C2-1'][0] == {'packing_truck': 'T2', 'pallet': '7', 'slot': 1}
+
+
+def test_changes_since_needs_full_repaint_after_reload_or_trim(db_path, monkeypatch):
+    db = DatabaseManager(db_path)
+    view = get_location_view(db_path)
+    scan(db, 'T1', '1', 'C1-1')
+    before = view.version
+
+    view.load()
+    assert view.changes_since(before) == (view.version, None)
+
+    monkeypatch.setattr(location_view, 'MAX_CHANGES', 4)
+    before = view.version
+    for pallet in range(2, 10):
+        scan(db, 'T1', str(pallet), f'C1-{pallet}')
+    # Los cambios más antiguos se recortaron de la bitácora
+    assert view.changes_since(before)[1] is None
+    recent = view.version - 2
+    assert view.changes_since(recent) == (view.version, ['C1-8', 'C1-9'])
+
+
+def test_assignments_match_the_pallet_scans_table(db_path):
+    db = DatabaseManager(db_path)
+    scan(db, 'T1', '1', 'C1-1')
+    scan(db, 'T1', '2', 'C1-1', slot=2)
+    scan(db, 'T2', '3', 'C10-1')
+    scan(db, 'T2', '4', 'C2-1', slot=2)
+    scan(db, 'T1', '1', 'C1-3')
+    scan(db, 'T3', '5', 'C3-1')
+    assert db.deliver_truck('T3')
+
+    expected = assignments_from_table(db_path)
+    assert db.get_location_assignments() == expected
+    assert list(expected) == ['C1-1', 'C1-3', 'C10-1', 'C2-1']
+    assert expected['C1-1'] == [{'packing_truck': 'T1', 'pallet': '2', 'slot': 2}]
+
+    # Una vista nueva, cargada desde la bitácora, da lo mismo
+    fresh = location_view.LocationView(db_path)
+    assert fresh.assignments() == expected
+    assert fresh.check_consistency() == (True, [])
@@ -0,0 +1,51 @@
+"""Pruebas del decorador timed."""
+
+import pytest
+
+from utils import metrics
+
+
+class Sample:
+    @metrics.timed('test.sample_method')
+    def method(self, value):
+        return value * 2
+
+
+@metrics.timed('test.sample_function')
+def sample_function(value):
+    return value + 1
+
+
+@pytest.fixture
+def metrics_off():
+    was_enabled = metrics.is_enabled()
+    metrics.disable()
+    metrics.reset()
+    yield
+    if was_enabled:
+        metrics.enable()
+    else:
+        metrics.disable()
+    metrics.reset()
+
+
+def test_timed_is_the_original_function_when_disabled(metrics_off):
+    assert not hasattr(Sample.method, '__wrapped__')
+    assert not hasattr(sample_function, '__wrapped__')
+    assert Sample().method(3) == 6
+    assert metrics.snapshot()['latency'] == {}
+
+
+def test_enable_installs_wrappers_and_disable_restores(metrics_off):
+    original = Sample.method
+    metrics.enable()
+    assert Sample.method.__wrapped__ is original
+    assert Sample().method(3) == 6
+    assert globals()['sample_function'](1) == 2
+    latency = metrics.snapshot()['latency']
+    assert latency['test.sample_method']['count'] == 1
+    assert latency['test.sample_function']['count'] == 1
+
+    metrics.disable()
+    assert Sample.method is original
+    assert not hasattr(globals()['sample_function'], '__wrapped__')
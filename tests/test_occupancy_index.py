@@ -0,0 +1,81 @@
+"""
+Pruebas del índice de ocupación en memoria.
+"""
+
+from core.connection_pool import get_connection_manager
+from core.db_manager import INSERT_SCAN_SQL, DatabaseManager
+from core.event_log import append_events, scan_event
+from core.occupancy_index import OccupancyIndex, get_occupancy_index
+from core.truck_assignment import assign_packing_truck_to_layout
+
+LAYOUT_TRUCKS = [1, 2, 3, 4, 5]
+PACKING_TRUCKS = ['T1', 'T2', 'T3', 'T4']
+
+
+def state_of(index: OccupancyIndex) -> tuple:
+    return (
+        index.get_counts(),
+        index.get_empty_trucks(LAYOUT_TRUCKS),
+        {truck: index.get_assignment(truck) for truck in PACKING_TRUCKS},
+    )
+
+
+def assert_matches_fresh_load(db_path: str):
+    fresh = OccupancyIndex(db_path)
+    fresh.load()
+    assert state_of(get_occupancy_index(db_path)) == state_of(fresh)
+
+
+def scan(db: DatabaseManager, truck: str, layout_truck: str, pallet: int):
+    assert db.register_pallet_scan(
+        truck, layout_truck, str(pallet), pallet, f'S{pallet}a', f'S{pallet}z', f'{layout_truck}-{pallet}', 1
+    )
+
+
+def test_incremental_updates_match_a_fresh_load(db_path):
+    db = DatabaseManager(db_path)
+    index = get_occupancy_index(db_path)
+
+    assert assign_packing_truck_to_layout('T1', LAYOUT_TRUCKS, db_path)[2] == 'C1'
+    assert assign_packing_truck_to_layout('T4', LAYOUT_TRUCKS, db_path)[2] == 'C2'
+    for pallet in (1, 2, 3):
+        scan(db, 'T1', 'C1', pallet)
+    scan(db, 'T2', 'C3', 1)
+    scan(db, 'T3', 'C3', 2)
+    assert_matches_fresh_load(db_path)
+    # C2 está reservado sin pallets: no cuenta pallets pero no está vacío
+    assert index.get_counts() == {1: 3, 3: 2}
+    assert index.get_empty_trucks(LAYOUT_TRUCKS) == [4, 5]
+
+    # Re-escaneo del mismo pallet en otro camión del layout
+    scan(db, 'T1', 'C4', 3)
+    assert index.get_counts() == {1: 2, 3: 2, 4: 1}
+    assert_matches_fresh_load(db_path)
+
+    success, _ = db.deliver_trucks(['T2', 'T4'])
+    assert success and index.get_empty_trucks(LAYOUT_TRUCKS) == [2, 5]
+    assert_matches_fresh_load(db_path)
+
+    assert db.clear_all_data()
+    assert index.get_counts() == {} and index.get_empty_trucks(LAYOUT_TRUCKS) == LAYOUT_TRUCKS
+    assert_matches_fresh_load(db_path)
+
+
+def test_check_consistency_repairs_a_row_written_behind_its_back(db_path):
+    db = DatabaseManager(db_path)
+    index = get_occupancy_index(db_path)
+    scan(db, 'T1', 'C1', 1)
+    assert index.check_consistency() == (True, {})
+
+    # Escritura directa (como otro proceso): tabla y bitácora, sin pasar por el índice
+    params = ('T2', 'C3', '1', 1, 'S1a', 'S1z', 'C3-1', 1)
+    with get_connection_manager(db_path).transaction() as conn:
+        conn.execute(INSERT_SCAN_SQL, params)
+        append_events(conn, [scan_event(params)])
+
+    assert index.check_consistency() == (False, {3: (0, 1)})
+    assert index.get_counts() == {1: 1}
+
+    assert index.check_consistency(repair=True) == (False, {3: (0, 1)})
+    assert index.get_counts() == {1: 1, 3: 1}
+    assert index.check_consistency() == (True, {})
@@ -0,0 +1,41 @@
+"""
+Pruebas de las exportaciones diferidas de los paquetes core y utils.
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'numpy', 'gspread', 'google.oauth2')
+
+
+def test_database_manager_does_not_import_heavy_modules():
+    script = (
+        'import sys\n'
+        'import core\n'
+        'core.DatabaseManager\n'
+        f'print([name for name in {HEAVY_MODULES!r} if name in sys.modules])\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=REPO_ROOT, capture_output=True, text=True, timeout=60
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
+
+
+@pytest.mark.parametrize('package', ['core', 'utils'])
+def test_every_exported_name_resolves(package):
+    module = importlib.import_module(package)
+
+    for name in module.__all__:
+        assert getattr(module, name) is not None, name
+    assert sorted(module.__all__) == sorted(set(module.__all__))
+    assert set(module.__all__) <= set(dir(module))
+    with pytest.raises(AttributeError):
+        getattr(module, 'no_existe')
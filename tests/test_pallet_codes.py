@@ -0,0 +1,38 @@
+"""
+Pruebas de la extracción de números de pallet contra la cascada de regex anterior.
+"""
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_pallet_codes import legacy_extract_pallet_number
+from benchmarks.generators import pallet_codes
+from core.pallet_ordering import PALLET_CODE_PATTERN, extract_pallet_number, extract_pallet_numbers
+
+# Casos límite que deben coincidir exactamente con la versión anterior
+EDGE_CASES = [
+    'PALLET003', 'PLT-045', 'P_012', '456', '7', '', 'P', 'PLT-', 'pallet12',
+    'plt_9', 'P1', '12345', 'A1B', 'P12X', 'PLT045A', 'X99Y', 'P-12-3',
+    'LOT7-P_34Z', '0', '00', '1234567', 'PALLET\n12', 'P12\n', '²', '²5',
+    '٣٤', 'P٣٤', 'ABC', 'PALLET 12', 'p_007-x', None, 456, 12.0
+]
+
+
+@pytest.mark.parametrize('code', EDGE_CASES, ids=repr)
+def test_pattern_matches_the_legacy_cascade(code):
+    expected = legacy_extract_pallet_number(code)
+
+    assert extract_pallet_number(code) == expected
+    if isinstance(code, str):
+        assert (PALLET_CODE_PATTERN.match(code) is not None) == (expected is not None)
+
+
+def test_vectorized_extraction_matches_the_legacy_cascade():
+    corpus = EDGE_CASES + pallet_codes(5000)
+
+    numbers = extract_pallet_numbers(pd.Series(corpus, dtype=object))
+
+    assert numbers.dtype == 'Int64'
+    assert [None if pd.isna(n) else int(n) for n in numbers] == [
+        legacy_extract_pallet_number(code) for code in corpus
+    ]
@@ -0,0 +1,59 @@
+"""Pruebas de la planificación de ubicaciones por camión."""
+
+import pandas as pd
+import pytest
+
+from core.pallet_ordering import TruckPalletIndex, get_next_expected_pallet, plan_truck_locations
+
+PALLETS = ['3', '', ' ', '1', '2', None, '4']
+
+
+# object es el dtype de texto de pandas 2; str el de pandas 3
+@pytest.mark.parametrize('dtype', [object, 'string', 'str'])
+def test_plan_skips_blank_pallets_like_truck_index(dtype):
+    try:
+        pallets = pd.Series(PALLETS, dtype=dtype)
+    except TypeError:
+        pytest.skip(f'dtype {dtype} no disponible en pandas {pd.__version__}')
+
+    plan = plan_truck_locations(pallets, 'C1')
+    index = TruckPalletIndex('T1', PALLETS)
+
+    blank = [1, 2, 5]
+    assert plan['pallet_sequence_index'].iloc[blank].isna().all()
+    assert plan['ubicacion'].iloc[blank].isna().all()
+    assert plan['slot'].iloc[blank].isna().all()
+
+    for row, pallet in enumerate(PALLETS):
+        if row in blank:
+            continue
+        ubicacion, slot, error = index.get_location(pallet, 'C1')
+        assert error is None
+        assert plan['pallet_sequence_index'].iloc[row] == index.get_index(pallet)
+        assert (plan['ubicacion'].iloc[row], plan['slot'].iloc[row]) == (ubicacion, slot)
+
+
+def test_index_orders_numeric_before_alphanumeric_codes():
+    index = TruckPalletIndex('T1', ['10', 'B1', '9', 'A-2', '0011', 8.0, '100', ' 7 '])
+
+    # Numéricos por valor (9 antes que 10), después los alfanuméricos
+    assert index.pallet_numbers == ('7', '8', '9', '10', '11', '100', 'A-2', 'B1')
+    assert [index.get_index(p) for p in ('007', 8, 'Z9', 'A-2', 'B1')] == [1, 2, None, 7, 8]
+    assert index.get_location('11', 'C3') == ('C3-3', 1, None)
+    assert index.get_location(' B1', 'C3') == ('C3-4', 2, None)
+
+
+def test_next_expected_pallet_after_out_of_order_scan():
+    truck = pd.DataFrame({
+        'Pallet number': ['3', '10', '1', '2', 'A1'],
+        'first_serial': ['S3a', 'S10a', 'S1a', 'S2a', 'SAa'],
+        'last_serial': ['S3z', 'S10z', 'S1z', 'S2z', 'SAz'],
+    })
+    index = TruckPalletIndex.from_dataframe('T1', truck)
+
+    # Se saltó el 2: sigue siendo el esperado
+    expected = get_next_expected_pallet(['1', '3'], index)
+    assert expected == {'pallet_number': '2', 'index': 2, 'first_serial': 'S2a', 'last_serial': 'S2z'}
+    assert get_next_expected_pallet([1.0, ' 03', '2'], truck)['pallet_number'] == '10'
+    assert get_next_expected_pallet(['10', '3', '2', '1'], index)['index'] == 5
+    assert get_next_expected_pallet(['A1', '10', '3', '2', '1'], index) is None
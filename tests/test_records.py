@@ -0,0 +1,110 @@
+"""
+Pruebas de los registros columnares contra los DataFrames equivalentes.
+"""
+
+import copy
+
+import pandas as pd
+import pytest
+
+from core.connection_pool import get_connection_manager
+from core.db_manager import DatabaseManager
+from core.pallet_ordering import normalize_pallet_number
+from core.records import SCAN_COLUMNS, ScanRecord, ScanTable, ShipmentTable
+from core.shipment_loader import build_shipment_frame, find_header_row, patch_shipment_frame
+
+VALUES = [
+    ['Shipment 42'],
+    ['Nota', 'CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus'],
+    ['a', 'T1', '2', 'S3', 'S4', ''],
+    ['b', ' T1 ', '1', 'S1', 'S2', 'Listo'],
+    ['c', '', '', '', '', ''],
+    ['d', 'T2', '1', 'S5', 'S6', ''],
+    ['e', 'T2'],
+]
+
+
+def shipment_from_frame(values) -> ShipmentTable:
+    return ShipmentTable.from_dataframe(build_shipment_frame(values, find_header_row(values)))
+
+
+def cells(column) -> list:
+    """Valores comparables: celdas vacías, None y <NA> cuentan igual."""
+    return [None if value is None or pd.isna(value) or value == '' else normalize_pallet_number(value)
+            for value in column]
+
+
+def assert_same_shipment(table: ShipmentTable, expected: ShipmentTable):
+    assert table.trucks == expected.trucks
+    assert table.row_labels == expected.row_labels
+    assert table.truck_ids == expected.truck_ids
+    # El DataFrame guarda Pallet number como Int64; la hoja, como texto
+    for name in ('pallet_numbers', 'first_serials', 'last_serials'):
+        assert cells(getattr(table, name)) == cells(getattr(expected, name)), name
+
+
+def test_scan_table_round_trip_matches_the_query_frame(db_path):
+    db = DatabaseManager(db_path)
+    for n in (3, 1, 2):
+        assert db.register_pallet_scan('T1', 'C1', str(n), n, f'S{n}a', f'S{n}z', f'C1-{n}', 1)
+    assert db.register_pallet_scan('T2', 'C2', '1', 1, 'X', 'Y', 'C2-1', 2)
+
+    table = db.get_truck_scan_records('T1')
+    with get_connection_manager(db_path).reader() as conn:
+        expected = pd.read_sql_query(
+            'SELECT * FROM pallet_scans WHERE packing_truck_id = ? ORDER BY pallet_sequence_index',
+            conn, params=('T1',)
+        )
+
+    assert len(table) == 3 and not table.empty
+    assert table.column('pallet_number') == ('1', '2', '3')
+    pd.testing.assert_frame_equal(table.to_dataframe(), expected[list(SCAN_COLUMNS)], check_dtype=False)
+    assert table.to_dicts() == expected.to_dict('records')
+
+    record = table[1]
+    assert record == ScanRecord(*(record.as_dict()[name] for name in SCAN_COLUMNS))
+    assert (record.ubicacion, record.slot) == ('C1-2', 1)
+    assert list(table)[1] == record and record != table[0]
+
+    empty = db.get_truck_scan_records('T9')
+    assert empty.empty and list(empty.to_dataframe().columns) == list(SCAN_COLUMNS)
+
+
+def test_shipment_table_from_values_matches_the_frame():
+    table = ShipmentTable.from_values(VALUES, 1)
+
+    assert_same_shipment(table, shipment_from_frame(VALUES))
+    assert table.row_labels == (0, 1, 3, 4)
+    assert table.truck_columns('T1') == (['2', '1'], ['S3', 'S1'], ['S4', 'S2'])
+    assert table.truck_columns('T2') == (['1', None], ['S5', None], ['S6', None])
+    assert 'T1' in table and 'T9' not in table and table.truck_rows('T9') == ()
+
+
+def test_with_rows_matches_a_patched_frame():
+    df = build_shipment_frame(VALUES, 1)
+    table = ShipmentTable.from_dataframe(df)
+    headers = VALUES[1]
+
+    # Sin cambio de camión: se comparte el agrupamiento
+    edited = copy.deepcopy(VALUES)
+    edited[3][2:5] = ['7', 'S70', 'S71']
+    rows = {1: edited[3]}
+    patched = table.with_rows(rows, headers)
+    patch_shipment_frame(df, rows, headers)
+
+    assert_same_shipment(patched, ShipmentTable.from_dataframe(df))
+    assert patched.trucks is table.trucks
+    assert table.pallet_numbers[1] == 1
+
+    # Con cambio de camión: se reagrupa
+    edited[6] = ['e', 'T3', '3', 'S8', 'S9']
+    rows = {4: edited[6]}
+    regrouped = patched.with_rows(rows, headers)
+    patch_shipment_frame(df, rows, headers)
+
+    assert_same_shipment(regrouped, ShipmentTable.from_dataframe(df))
+    assert regrouped.truck_ids == ['T1', 'T2', 'T3']
+    assert regrouped.truck_columns('T2') == ([1], ['S5'], ['S6'])
+
+    with pytest.raises(KeyError):
+        table.with_rows({2: edited[4]}, headers)
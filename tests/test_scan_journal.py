@@ -0,0 +1,110 @@
+"""
+Pruebas de la bitácora local de escaneos y su sincronización.
+"""
+
+import os
+
+import pytest
+
+from core.db_manager import DatabaseManager
+from core.scan_journal import JournalSyncWorker, ScanJournal
+
+
+def scan(pallet: int) -> dict:
+    return dict(
+        packing_truck_id='T1', layout_truck_id='C1', pallet_number=str(pallet),
+        pallet_sequence_index=pallet, first_serial=f'S{pallet}a', last_serial=f'S{pallet}z',
+        ubicacion=f'C1-{pallet}', slot=1
+    )
+
+
+def journal_keys(db: DatabaseManager) -> list:
+    with db._db.reader() as conn:
+        return [row[0] for row in conn.execute('SELECT journal_key FROM journal_applied')]
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'scans.journal')
+
+
+def test_applied_keys_are_forgotten_after_compaction(db_path, journal_path):
+    db = DatabaseManager(db_path)
+    journal = ScanJournal(journal_path, fsync_interval=0)
+    for pallet in (1, 2, 3):
+        journal.append_scan(**scan(pallet))
+
+    result = JournalSyncWorker(journal, db).sync_once()
+
+    # Todo quedó confirmado: el archivo se compactó y las claves sobran
+    assert result['scans'] == 3 and result['error'] is None
+    assert journal_keys(db) == []
+    assert db.is_pallet_scanned('T1', '3')
+    journal.close()
+
+
+def test_acked_keys_from_previous_session_are_released(db_path, journal_path):
+    db = DatabaseManager(db_path)
+    journal = ScanJournal(journal_path, fsync_interval=0)
+    keys = [journal.append_scan(**scan(pallet)) for pallet in (1, 2, 3)]
+    db.register_journaled_scans([(key, data) for _, key, data in journal.pending()[:2]])
+    # Con un pendiente el ack no compacta: las claves siguen en el archivo
+    journal.ack(keys[:2])
+    journal.close()
+
+    reopened = ScanJournal(journal_path, fsync_interval=0)
+    assert len(reopened) == 1 and sorted(journal_keys(db)) == sorted(keys[:2])
+    JournalSyncWorker(reopened, db).sync_once()
+
+    assert len(reopened) == 0 and journal_keys(db) == []
+    reopened.close()
+
+
+def test_clear_all_data_forgets_journal_keys(db_path, journal_path):
+    db = DatabaseManager(db_path)
+    journal = ScanJournal(journal_path, fsync_interval=0)
+    key = journal.append_scan(**scan(1))
+    db.register_journaled_scans([(key, data) for _, key, data in journal.pending()])
+
+    assert journal_keys(db) == [key]
+    assert db.clear_all_data()
+    assert journal_keys(db) == []
+    journal.close()
+
+
+def test_torn_tail_is_dropped_on_open(journal_path):
+    journal = ScanJournal(journal_path, fsync_interval=0)
+    keys = [journal.append_scan(**scan(pallet)) for pallet in (1, 2, 3)]
+    journal.close()
+    # Apagón a mitad del último registro
+    with open(journal_path, 'r+b') as f:
+        f.truncate(os.path.getsize(journal_path) - 5)
+    size = os.path.getsize(journal_path)
+
+    reopened = ScanJournal(journal_path, fsync_interval=0)
+    assert reopened.recovered == 2
+    assert [key for _, key, _ in reopened.pending()] == keys[:2]
+    assert os.path.getsize(journal_path) < size
+
+    # Lo que se agrega después de la cola cortada se lee bien
+    reopened.append_scan(**scan(4))
+    reopened.close()
+    assert ScanJournal(journal_path, fsync_interval=0).recovered == 3
+
+
+def test_replay_after_crash_does_not_duplicate_scans(db_path, journal_path):
+    db = DatabaseManager(db_path)
+    journal = ScanJournal(journal_path, fsync_interval=0)
+    for pallet in (1, 2):
+        journal.append_scan(**scan(pallet))
+    # Se aplicó a la base pero la app se cerró antes del ack
+    db.register_journaled_scans([(key, data) for _, key, data in journal.pending()])
+    journal.close()
+
+    reopened = ScanJournal(journal_path, fsync_interval=0)
+    reopened.append_scan(**scan(3))
+    result = JournalSyncWorker(reopened, db).sync_once()
+
+    assert (result['scans'], result['duplicates'], result['pending']) == (1, 2, 0)
+    assert len(db.get_truck_scans('T1')) == 3
+    reopened.close()
@@ -0,0 +1,53 @@
+"""
+Pruebas del seguimiento del orden de escaneo por camión.
+"""
+
+from core.pallet_ordering import TruckPalletIndex
+from core.sequence_tracker import SequenceTracker
+
+
+def tracker(*pallets) -> SequenceTracker:
+    return SequenceTracker(TruckPalletIndex('T1', pallets or ['105', '101', '104', '102', '103']))
+
+
+def test_skipped_pallets_are_gaps_until_scanned():
+    seq = tracker()
+    assert seq.record('101')['in_order']
+
+    result = seq.record('104')
+    assert not result['in_order'] and result['skipped'] == ['102', '103']
+    assert seq.gaps() == ['102', '103']
+    assert seq.next_expected()['pallet_number'] == '102'
+    assert seq.out_of_order == [('104', 4, 2)]
+
+    seq.record('102')
+    assert seq.gaps() == ['103'] and seq.expected_index == 3
+    assert seq.record('104')['duplicate']
+    assert seq.scanned_count == 3 and seq.remaining == 2
+
+
+def test_unrecord_moves_the_cursor_back_and_shrinks_gaps():
+    seq = tracker()
+    for pallet in ('101', '102', '104'):
+        seq.record(pallet)
+
+    assert seq.unrecord('104')
+    assert seq.gaps() == [] and seq.expected_index == 3
+    assert seq.unrecord('101')
+    # 102 sigue escaneado: 101 queda como hueco
+    assert seq.expected_index == 1 and seq.gaps() == ['101']
+    assert not seq.unrecord('101') and not seq.unrecord('999')
+    assert seq.check('101') == (True, "✅ Pallet 101 en orden (índice 1)")
+    assert seq.scanned_count == 1
+
+
+def test_from_scans_and_repeated_pallets():
+    seq = SequenceTracker.from_scans(tracker().truck_index, ['103', '101'])
+    assert seq.expected_index == 2 and seq.gaps() == ['102']
+    assert seq.out_of_order == []
+
+    # Un pallet repetido en el sheet no detiene el cursor
+    repeated = tracker('101', '102', '102', '103')
+    for pallet in ('101', '102', '103'):
+        assert repeated.record(pallet)['in_order']
+    assert repeated.complete and repeated.next_expected() is None
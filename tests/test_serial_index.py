@@ -0,0 +1,66 @@
+"""
+Pruebas del índice de seriales por intervalos.
+"""
+
+from core.db_manager import DatabaseManager
+from core.serial_index import SerialIndex, serial_key
+
+PALLETS = [
+    # (camión, pallet, primer serial, último serial, ubicación)
+    ('T1', '1', 'SN9', 'SN12', 'C1-1'),
+    ('T1', '2', 'SN100', 'SN200', 'C1-2'),
+    ('T2', '1', 'sn150', 'SN160', 'C2-1'),
+    ('T2', '2', 'LG-2024-000999', 'LG-2024-001001', 'C2-2'),
+]
+
+
+def register_pallets(db_path: str) -> DatabaseManager:
+    db = DatabaseManager(db_path)
+    for n, (truck, pallet, first, last, ubicacion) in enumerate(PALLETS, start=1):
+        assert db.register_pallet_scan(truck, ubicacion.split('-')[0], pallet, n, first, last, ubicacion, 1)
+    return db
+
+
+def pallets_of(results: dict) -> dict:
+    return {serial: match and (match['packing_truck'], match['pallet']) for serial, match in results.items()}
+
+
+def test_serial_key_natural_order():
+    serials = ['SN10', 'sn9', 'SN009a', 'SN100', 'SN9 ', 'LG-2024-1000', 'LG-2024-999']
+    assert sorted(serials, key=serial_key) == [
+        'LG-2024-999', 'LG-2024-1000', 'sn9', 'SN9 ', 'SN009a', 'SN10', 'SN100'
+    ]
+    assert serial_key('sn9') == serial_key(' SN009')
+
+
+def test_lookup_natural_ranges_and_overlaps(db_path):
+    db = register_pallets(db_path)
+
+    results = db.find_serials(['SN10', 'SN155', 'SN170', 'SN13', 'LG-2024-1000', 'SN99'])
+
+    assert pallets_of(results) == {
+        'SN10': ('T1', '1'),
+        # Dentro de dos rangos: gana el de serial inicial mayor
+        'SN155': ('T2', '1'),
+        # El rango que empieza después ya terminó; el anterior lo contiene
+        'SN170': ('T1', '2'),
+        'SN13': None,
+        'LG-2024-1000': ('T2', '2'),
+        'SN99': None,
+    }
+    assert list(results) == ['SN10', 'SN155', 'SN170', 'SN13', 'LG-2024-1000', 'SN99']
+    assert results['SN155']['ubicacion'] == 'C2-1'
+
+
+def test_delivery_and_reload(db_path):
+    db = register_pallets(db_path)
+    assert db.deliver_truck('T2')
+
+    assert pallets_of(db.find_serials(['SN155', 'LG-2024-1000'])) == {
+        'SN155': ('T1', '2'), 'LG-2024-1000': None
+    }
+
+    reloaded = SerialIndex(db_path)
+    reloaded.load()
+    assert len(reloaded) == 2
+    assert reloaded.lookup('SN11')['pallet'] == '1'
@@ -0,0 +1,101 @@
+"""
+Pruebas del servicio asíncrono entre la interfaz y core.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.db_manager import DatabaseManager
+from core.service import LoadCancelled, WarehouseService
+from core.sheets_manager import SheetsManager
+from tests.fake_gspread import FakeClient, FakeSpreadsheet, FakeWorksheet
+
+SCAN = dict(
+    packing_truck_id='T1', layout_truck_id='C1', pallet_number='P1',
+    pallet_sequence_index=1, first_serial='S1', last_serial='S2',
+    ubicacion='C1-1', slot=1
+)
+
+
+def test_queue_scan_does_not_wait_for_manager_creation(db_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = WarehouseService(
+        credentials_file=str(tmp_path / 'missing.json'),
+        db_path=db_path,
+        journal_path=str(tmp_path / 'scans.journal')
+    )
+
+    # Otro hilo está creando los gestores (importar pandas, autenticar)
+    with service._sheets_lock, service._db_lock:
+        done = threading.Event()
+        threading.Thread(target=lambda: (service.queue_scan(**SCAN), done.set()), daemon=True).start()
+        assert done.wait(2), "queue_scan esperó al lock de los gestores"
+        assert service.pending_sync() == 1
+
+    deadline = time.monotonic() + 5
+    while service.pending_sync() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    service.shutdown()
+
+    assert service.pending_sync() == 0
+    assert DatabaseManager(db_path).is_pallet_scanned('T1', 'P1')
+
+
+class SlowWorksheet(FakeWorksheet):
+    """Hoja cuya descarga espera a que la prueba la libere."""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_all_values(self):
+        self.started.set()
+        assert self.release.wait(5)
+        return super().get_all_values()
+
+
+def test_cancelled_load_does_not_apply_downloaded_data(tmp_path):
+    service = WarehouseService(
+        credentials_file=str(tmp_path / 'missing.json'), db_path=str(tmp_path / 'scans.db')
+    )
+    sheets = SheetsManager(str(tmp_path / 'missing.json'), cache_dir=str(tmp_path / 'cache'), pending_file=None)
+    sheet = SlowWorksheet([['CAMION', 'Pallet number', 'first_serial', 'last_serial'], ['T1', '1', 'S1', 'S2']])
+    sheets.client = FakeClient({'sheet-1': FakeSpreadsheet([sheet])})
+    service._sheets = sheets
+    finished = threading.Event()
+    on_data_loaded = sheets._on_data_loaded
+    sheets._on_data_loaded = lambda *args: (on_data_loaded(*args), finished.set())
+
+    async def load_and_cancel():
+        token = service.new_load_token()
+        task = asyncio.ensure_future(service.load_shipment('/spreadsheets/d/sheet-1', token=token))
+        await asyncio.get_running_loop().run_in_executor(None, sheet.started.wait, 5)
+        token.cancel()
+        with pytest.raises(LoadCancelled):
+            await task
+
+    asyncio.run(load_and_cancel())
+    # La descarga termina después de cancelar: sus datos se descartan
+    sheet.release.set()
+    service._io_executor.shutdown(wait=True)
+
+    assert not finished.is_set()
+    assert sheets.shipment is None and sheets.last_load_source is None
+    assert sheets._last_network_load is None and sheets.cache.load('sheet-1') is None
+    service.shutdown()
+
+
+def test_database_does_not_wait_for_sheets_creation(db_path, tmp_path):
+    service = WarehouseService(credentials_file=str(tmp_path / 'missing.json'), db_path=db_path)
+
+    with service._sheets_lock:
+        result = []
+        thread = threading.Thread(target=lambda: result.append(service._get_db()), daemon=True)
+        thread.start()
+        thread.join(2)
+        assert result and result[0] is service._get_db()
+    service.shutdown()
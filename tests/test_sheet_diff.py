@@ -0,0 +1,76 @@
+"""
+Pruebas de las diferencias entre dos cargas del shipment.
+"""
+
+import copy
+
+from core.sheet_diff import diff_shipment_values
+
+HEADERS = ['CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus']
+
+VALUES = [
+    ['Shipment'],
+    HEADERS,
+    ['T1', '1', 'S1', 'S2', ''],
+    ['T1', '2', 'S3', 'S4', ''],
+    ['T2', '1', 'S5', 'S6', ''],
+    ['T2', '2', 'S7', 'S8', ''],
+]
+
+
+def diff(new_values, old_values=VALUES):
+    return diff_shipment_values(old_values, 1, new_values, 1, index_columns=HEADERS[:4])
+
+
+def test_status_change_is_in_place_and_marks_no_truck():
+    new = copy.deepcopy(VALUES)
+    new[3][4] = 'Listo'
+
+    result = diff(new)
+
+    assert result.changed == {('T1', '2'): (1, 1)}
+    assert result.rows == {1: new[3]}
+    assert result.in_place and result.trucks == set()
+    assert diff(copy.deepcopy(VALUES)).empty
+
+
+def test_inserted_row():
+    new = copy.deepcopy(VALUES)
+    new.insert(3, ['T1', '3', 'S9', 'S10', ''])
+
+    result = diff(new)
+
+    assert result.added == {('T1', '3'): 1}
+    assert not result.removed and not result.changed and not result.moved
+    assert result.trucks == {'T1'} and not result.in_place
+    assert list(result.rows) == [1]
+
+
+def test_deleted_row():
+    new = copy.deepcopy(VALUES)
+    del new[4]
+
+    result = diff(new)
+
+    assert result.removed == {('T2', '1'): 2}
+    assert not result.added and not result.changed
+    assert result.trucks == {'T2'} and not result.in_place
+
+
+def test_moved_rows():
+    new = copy.deepcopy(VALUES)
+    new[2], new[5] = new[5], new[2]
+
+    result = diff(new)
+
+    assert result.moved == {('T2', '2'): (3, 0), ('T1', '1'): (0, 3)}
+    assert not result.added and not result.removed and not result.changed
+    # Mover filas no cambia los índices de pallets pero sí las etiquetas
+    assert result.trucks == set() and not result.in_place
+    assert result.rows == {0: new[2], 3: new[5]}
+
+
+def test_header_change_needs_full_reload():
+    new = copy.deepcopy(VALUES)
+    new[1] = HEADERS + ['Notas']
+    assert diff(new) is None
@@ -0,0 +1,78 @@
+"""
+Pruebas de la carga del shipment con copia local por revisión de la hoja.
+"""
+
+from core.sheets_manager import SheetsManager
+from tests.fake_gspread import FakeClient, FakeSpreadsheet, FakeWorksheet
+
+SHEET_ID = 'sheet-1'
+
+VALUES = [
+    ['Shipment'],
+    ['CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus'],
+    ['T1', '1', 'S1', 'S2', ''],
+    ['T1', '2', 'S3', 'S4', ''],
+    ['T2', '1', 'S5', 'S6', 'Listo'],
+]
+
+
+def new_session(tmp_path, client: FakeClient) -> SheetsManager:
+    """Un SheetsManager nuevo (como al reabrir la app) sobre la misma carpeta."""
+    manager = SheetsManager(str(tmp_path / 'missing.json'), cache_dir=str(tmp_path / 'cache'), pending_file=None)
+    manager.client = client
+    return manager
+
+
+def fake_client(values=VALUES, modified_time='2024-05-01T10:00:00Z'):
+    sheet = FakeWorksheet(values)
+    return FakeClient({SHEET_ID: FakeSpreadsheet([sheet], modified_time)}), sheet
+
+
+def test_same_revision_uses_the_snapshot_without_downloading(tmp_path):
+    client, sheet = fake_client()
+    df, header_row, _ = new_session(tmp_path, client).load_shipment_data(SHEET_ID)
+    assert sheet.api_calls == 1 and len(df) == 3
+
+    manager = new_session(tmp_path, client)
+    cached, cached_header, loaded_sheet = manager.load_shipment_data(SHEET_ID)
+
+    assert sheet.api_calls == 1
+    assert manager.last_load_source == 'cache' and loaded_sheet is sheet
+    assert cached_header == header_row
+    assert cached.equals(df)
+    assert len(manager.pallet_index.get('T2')) == 1
+
+
+def test_changed_revision_downloads_again(tmp_path):
+    client, sheet = fake_client()
+    new_session(tmp_path, client).load_shipment_data(SHEET_ID)
+
+    sheet.values[4][4] = 'Entregado'
+    client.spreadsheets[SHEET_ID].modified_time = '2024-05-01T11:00:00Z'
+    manager = new_session(tmp_path, client)
+    df, _, _ = manager.load_shipment_data(SHEET_ID)
+
+    assert sheet.api_calls == 2 and manager.last_load_source == 'network'
+    assert df['Estatus'].tolist()[-1] == 'Entregado'
+
+    # La copia nueva queda guardada con la revisión nueva
+    again = new_session(tmp_path, client)
+    assert again.load_shipment_data(SHEET_ID)[0].equals(df)
+    assert again.last_load_source == 'cache' and sheet.api_calls == 2
+
+
+def test_network_failure_falls_back_to_the_snapshot(tmp_path):
+    client, sheet = fake_client()
+    df, header_row, _ = new_session(tmp_path, client).load_shipment_data(SHEET_ID)
+
+    client.offline = True
+    manager = new_session(tmp_path, client)
+    offline, offline_header, loaded_sheet = manager.load_shipment_data(SHEET_ID)
+
+    assert manager.last_load_source == 'offline'
+    assert loaded_sheet is None and offline_header == header_row
+    assert offline.equals(df)
+
+    # Sin copia local no hay nada que mostrar
+    empty = new_session(tmp_path, client)
+    assert empty.load_shipment_data('otra-hoja') == (None, None, None)
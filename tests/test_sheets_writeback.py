@@ -0,0 +1,84 @@
+"""
+Pruebas de la cola de escritura de estatus hacia Google Sheets.
+"""
+
+import pandas as pd
+
+from core.sheets_writeback import StatusWriteQueue
+from tests.fake_gspread import FakeWorksheet
+
+# Fila 1: título; fila 2: header; los datos empiezan en la fila 3
+VALUES = [
+    ['Shipment'],
+    ['CAMION', 'Estatus'],
+    ['T1', ''],
+    ['T1', ''],
+    ['T2', ''],
+]
+
+
+def bound_queue(tmp_path, sheet, **kwargs) -> StatusWriteQueue:
+    queue = StatusWriteQueue(str(tmp_path / 'pending.json'), status_column=2, **kwargs)
+    df = pd.DataFrame(VALUES[2:], columns=VALUES[1])
+    queue.bind(sheet, df, header_row=1)
+    return queue
+
+
+def test_changes_are_coalesced_into_one_batch(tmp_path):
+    sheet = FakeWorksheet(VALUES)
+    queue = bound_queue(tmp_path, sheet)
+    queue.enqueue('T1', 'Listo')
+    queue.enqueue_many({'T2': 'Listo', 'T1': 'Entregado'})
+    queue.enqueue('T9', 'Listo')
+
+    # El último estatus de cada camión gana
+    assert queue.pending == {'T1': 'Entregado', 'T2': 'Listo', 'T9': 'Listo'}
+    success, results = queue.flush()
+
+    assert success and results == {'T1': 'ok', 'T2': 'ok', 'T9': 'no encontrado'}
+    assert sheet.api_calls == 1
+    assert sheet.cell_value(3, 2) == 'Entregado' and sheet.cell_value(5, 2) == 'Listo'
+    assert queue.pending == {}
+
+
+def test_quota_errors_retry_with_exponential_backoff(tmp_path):
+    sheet = FakeWorksheet(VALUES)
+    delays = []
+    queue = bound_queue(tmp_path, sheet, base_delay=1.0, sleep=delays.append)
+    sheet.fail_next(3, status_code=429)
+    queue.enqueue('T2', 'Listo')
+
+    success, results = queue.flush()
+
+    assert success and results == {'T2': 'ok'}
+    assert sheet.api_calls == 4 and sheet.cell_value(5, 2) == 'Listo'
+    # Cada espera duplica la anterior (más hasta un 25% de variación)
+    assert [int(delay) for delay in delays] == [1, 2, 4]
+
+
+def test_exhausted_retries_keep_the_change_pending(tmp_path):
+    sheet = FakeWorksheet(VALUES)
+    delays = []
+    queue = bound_queue(tmp_path, sheet, max_retries=2, sleep=delays.append)
+    sheet.fail_next(3, status_code=429)
+    queue.enqueue('T1', 'Listo')
+
+    success, results = queue.flush()
+
+    assert not success and '429' in results['T1']
+    assert len(delays) == 2 and queue.pending == {'T1': 'Listo'}
+
+
+def test_pending_changes_survive_a_restart(tmp_path):
+    queue = bound_queue(tmp_path, None)
+    queue.enqueue_many([('T1', 'Listo'), ('T2', 'Entregado')])
+    assert queue.flush()[0] is False
+
+    # Nueva sesión: la cola recupera lo pendiente del archivo y lo envía
+    sheet = FakeWorksheet(VALUES)
+    restarted = bound_queue(tmp_path, sheet)
+    assert restarted.pending == {'T1': 'Listo', 'T2': 'Entregado'}
+    assert restarted.flush() == (True, {'T1': 'ok', 'T2': 'ok'})
+    assert sheet.api_calls == 1
+
+    assert StatusWriteQueue(str(tmp_path / 'pending.json')).pending == {}
@@ -0,0 +1,58 @@
+"""
+Pruebas de la carga tipada del shipment y de la recarga incremental.
+"""
+
+import copy
+
+from core.records import ShipmentTable
+from core.sheets_manager import SheetsManager
+from core.shipment_loader import build_shipment_frame, find_header_row, prune_shipment_values
+
+VALUES = [
+    ['Shipment'],
+    ['Nota', 'CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus'],
+    ['a', 'T1', '1', 'S1', 'S2', ''],
+    ['b', 'T1', '2', 'S3', 'S4', 'Listo'],
+    ['c', 'T2'],
+]
+
+
+def test_prune_keeps_only_frame_columns():
+    pruned = prune_shipment_values(VALUES, 1)
+
+    assert pruned[0] == ('CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus')
+    assert pruned[1] == ('T1', '1', 'S1', 'S2', '')
+    # Las filas cortas se completan con celdas vacías
+    assert pruned[3] == ('T2', '', '', '', '')
+
+
+def test_reload_keeps_pruned_values_and_ignores_unused_columns(tmp_path):
+    manager = SheetsManager(str(tmp_path / 'missing.json'), cache_dir=str(tmp_path), pending_file=None)
+
+    df, header_row, diff, values = manager._reload_values('sheet', copy.deepcopy(VALUES))
+    assert diff is None and header_row == 1
+    manager._last_network_load = ('sheet', None, values, df)
+    assert all('a' not in row for row in values)
+
+    edited = copy.deepcopy(VALUES)
+    edited[2][0] = 'nota nueva'
+    edited[3][5] = 'Entregado'
+    patched, _, diff, _ = manager._reload_values('sheet', edited)
+
+    assert diff.in_place and list(diff.rows) == [1]
+    assert patched is df and str(df.loc[1, 'Estatus']) == 'Entregado'
+
+
+def test_header_names_match_case_insensitively():
+    values = copy.deepcopy(VALUES)
+    values[1][1:3] = ['Camion', 'PALLET NUMBER']
+
+    header_row = find_header_row(values)
+    df = build_shipment_frame(values, header_row)
+
+    assert header_row == 1
+    assert list(df.columns) == ['CAMION', 'Pallet number', 'first_serial', 'last_serial', 'Estatus']
+    assert df.equals(build_shipment_frame(VALUES, 1))
+    assert prune_shipment_values(values, 1) == prune_shipment_values(VALUES, 1)
+    assert ShipmentTable.from_values(values, 1).truck_ids == ['T1', 'T2']
+    assert values[1][1] == 'Camion'
@@ -0,0 +1,36 @@
+"""
+Pruebas del parser de layouts SVG contra el parser anterior.
+"""
+
+from benchmarks.bench_svg_parser import legacy_parse_svg_xml
+from benchmarks.generators import layout_svg
+from utils.svg_parser import parse_svg_layout
+
+NESTED_SVG = """<svg xmlns="http://www.w3.org/2000/svg">
+  <g id="C1-2" transform="translate(10, 0)">
+    <rect id="C1-1" x="0" y="0" width="40" height="20"/>
+    <g id="C2-1">
+      <circle id="C2-2" cx="5" cy="5" r="3"/>
+      <text id="C2-3" x="1" y="2">Pasillo</text>
+    </g>
+    <polygon id="C3-1" points="0,0 1,0 1,1"/>
+  </g>
+  <text id="C3-2" x="4" y="4"/>
+</svg>"""
+
+
+def test_nested_groups_keep_document_order():
+    index, shapes_data = parse_svg_layout(NESTED_SVG)
+
+    assert (index.locations, shapes_data) == legacy_parse_svg_xml(NESTED_SVG)
+    assert [shape['ubicacion'] for shape in shapes_data] == [
+        'C1-2', 'C1-1', 'C2-1', 'C2-2', 'C2-3', 'C3-1', 'C3-2'
+    ]
+    assert shapes_data[4]['content'] == 'Pasillo'
+
+
+def test_generated_layout_matches_legacy_parser():
+    xml_content = layout_svg(20)
+    index, shapes_data = parse_svg_layout(xml_content.encode('utf-8'))
+
+    assert (index.locations, shapes_data) == legacy_parse_svg_xml(xml_content)
@@ -0,0 +1,100 @@
+"""
+Pruebas de la asignación de camiones del packing list al layout.
+"""
+
+import os
+import subprocess
+import sys
+
+from core.connection_pool import get_connection_manager
+from core.db_manager import DatabaseManager
+from core.event_log import append_events, assign_event
+from core.occupancy_index import get_occupancy_index
+from core.truck_assignment import (
+    assign_packing_truck_to_layout,
+    get_empty_layout_trucks,
+    get_layout_truck_statistics,
+)
+
+LAYOUT_TRUCKS = [1, 2, 3]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_reserved_truck_is_not_empty_in_statistics(db_path):
+    db = DatabaseManager(db_path)
+    assert assign_packing_truck_to_layout('T1', LAYOUT_TRUCKS, db_path)[2] == 'C1'
+    assert db.register_pallet_scan('T1', 'C1', 'P1', 1, 'S1', 'S2', 'C1-1', 1)
+    assert assign_packing_truck_to_layout('T2', LAYOUT_TRUCKS, db_path)[2] == 'C2'
+
+    stats = get_layout_truck_statistics(LAYOUT_TRUCKS, db_path)
+    empty = get_empty_layout_trucks(LAYOUT_TRUCKS, db_path)
+
+    assert empty == [3]
+    assert [t for t in LAYOUT_TRUCKS if stats[f"C{t}"]['is_empty']] == empty
+    assert stats['C2']['pallets'] == 0
+
+
+def test_assignment_skips_truck_reserved_by_another_process(db_path):
+    DatabaseManager(db_path)
+    assert get_empty_layout_trucks(LAYOUT_TRUCKS, db_path) == LAYOUT_TRUCKS
+
+    # Otro escáner reserva C1 sin pasar por el índice de este proceso
+    with get_connection_manager(db_path).transaction('IMMEDIATE') as conn:
+        conn.execute(
+            'INSERT INTO truck_assignments (packing_truck_id, layout_truck_id) VALUES (?, ?)',
+            ('T9', 'C1')
+        )
+        append_events(conn, [assign_event('T9', 'C1')])
+
+    success, _, layout_truck_id = assign_packing_truck_to_layout('T1', LAYOUT_TRUCKS, db_path)
+
+    assert success and layout_truck_id == 'C2'
+    assert get_empty_layout_trucks(LAYOUT_TRUCKS, db_path) == [3]
+
+
+def test_assignment_blocks_when_no_truck_is_empty(db_path):
+    DatabaseManager(db_path)
+    for packing in ('T1', 'T2', 'T3'):
+        assert assign_packing_truck_to_layout(packing, LAYOUT_TRUCKS, db_path)[0]
+
+    success, _, layout_truck_id = assign_packing_truck_to_layout('T4', LAYOUT_TRUCKS, db_path)
+
+    assert not success and layout_truck_id is None
+    assert assign_packing_truck_to_layout('T2', LAYOUT_TRUCKS, db_path)[2] == 'C2'
+
+
+def run_other_process(db_path: str, code: str):
+    """Ejecuta código en otro proceso que comparte la base de datos."""
+    script = (
+        'from core.db_manager import DatabaseManager\n'
+        'from core.truck_assignment import assign_packing_truck_to_layout\n'
+        f'db_path = {db_path!r}\n'
+        'db = DatabaseManager(db_path)\n'
+        + code
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT, check=True, capture_output=True)
+
+
+def test_truck_delivered_by_another_process_can_be_assigned_again(db_path):
+    DatabaseManager(db_path)
+    run_other_process(db_path, "assert assign_packing_truck_to_layout('T9', [1], db_path)[2] == 'C1'\n")
+    assert get_empty_layout_trucks([1], db_path) == []
+
+    run_other_process(db_path, "assert db.deliver_truck('T9')\n")
+
+    assert get_empty_layout_trucks([1], db_path) == [1]
+    assert get_layout_truck_statistics([1], db_path)['C1']['is_empty']
+    assert assign_packing_truck_to_layout('T1', [1], db_path)[2] == 'C1'
+
+
+def test_assignment_falls_back_to_the_database(db_path, monkeypatch):
+    DatabaseManager(db_path)
+    run_other_process(db_path, "assert assign_packing_truck_to_layout('T9', [1], db_path)[2] == 'C1'\n")
+    assert get_empty_layout_trucks([1], db_path) == []
+    run_other_process(db_path, "assert db.deliver_truck('T9')\n")
+
+    # Aunque el índice no se entere de la entrega, la BD tiene la última palabra
+    monkeypatch.setattr(get_occupancy_index(db_path), 'refresh', lambda: None)
+    assert assign_packing_truck_to_layout('T1', [1], db_path)[2] == 'C1'
+    assert get_occupancy_index(db_path).get_empty_trucks([1]) == []
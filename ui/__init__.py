@@ -1,6 +1,7 @@
 """UI components package."""
 
-# Placeholder for future UI components
+from .update_batcher import UpdateBatcher
+
 # TODO: Implement layout_viewer, pallet_table, etc.
 
-__all__ = []
+__all__ = ['UpdateBatcher']
@@ -0,0 +1,66 @@
+"""
+Agrupador de actualizaciones de la interfaz.
+
+Cada page.update() de Flet envía el árbol de controles modificado al
+cliente. Si se llama una vez por mensaje de log, una carga con decenas de
+mensajes re-renderiza decenas de veces. UpdateBatcher junta los elementos
+que llegan en el mismo intervalo y los aplica en un solo lote, como máximo
+max_fps veces por segundo.
+"""
+
+import asyncio
+import threading
+from typing import Callable, List, Optional
+
+
+class UpdateBatcher:
+    """Cola de actualizaciones aplicada por lotes a ritmo de cuadros."""
+
+    def __init__(
+        self,
+        apply: Callable[[List], None],
+        max_fps: float = 20,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        """
+        Inicializa el agrupador.
+
+        Args:
+            apply: Función que recibe la lista de elementos pendientes y
+                   actualiza la interfaz (una sola vez por lote)
+            max_fps: Lotes por segundo como máximo
+            loop: Event loop de la interfaz (default: el loop en ejecución)
+        """
+        self._apply = apply
+        self._interval = 1.0 / max_fps
+        self._loop = loop or asyncio.get_running_loop()
+        self._lock = threading.Lock()
+        self._pending: List = []
+        self._scheduled = False
+        self._last_flush = 0.0
+
+    def post(self, item):
+        """
+        Agrega un elemento al próximo lote.
+
+        Se puede llamar desde cualquier hilo (por ejemplo, los hilos de carga).
+        """
+        with self._lock:
+            self._pending.append(item)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self):
+        delay = self._last_flush + self._interval - self._loop.time()
+        self._loop.call_later(max(0.0, delay), self.flush)
+
+    def flush(self):
+        """Aplica de inmediato los elementos pendientes (en el hilo del loop)."""
+        with self._lock:
+            items, self._pending = self._pending, []
+            self._scheduled = False
+        self._last_flush = self._loop.time()
+        if items:
+            self._apply(items)
@@ -1,5 +1,52 @@
-"""Utilities package."""
+"""
+Utilities package.
 
-from .svg_parser import parse_svg_xml, create_simple_layout_from_text
+Los submódulos se importan en el primer acceso a cada nombre (PEP 562).
+"""
 
-__all__ = ['parse_svg_xml', 'create_simple_layout_from_text']
+import importlib
+from typing import TYPE_CHECKING
+
+# Nombre exportado -> submódulo que lo define
+_EXPORTS = {
+    'parse_svg_xml': 'svg_parser',
+    'parse_svg_layout': 'svg_parser',
+    'parse_svg_file': 'svg_parser',
+    'create_simple_layout_from_text': 'svg_parser',
+    'LocationIndex': 'svg_parser',
+    'LayoutModel': 'layout_model',
+    'LayoutCache': 'layout_model',
+    'load_layout': 'layout_model',
+    'LayoutRaster': 'layout_raster',
+    'timed': 'metrics',
+    'timer': 'metrics',
+    'serve_metrics': 'metrics'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    submodule = _EXPORTS.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{submodule}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .svg_parser import (
+        parse_svg_xml,
+        parse_svg_layout,
+        parse_svg_file,
+        create_simple_layout_from_text,
+        LocationIndex
+    )
+    from .layout_model import LayoutModel, LayoutCache, load_layout
+    from .layout_raster import LayoutRaster
+    from .metrics import timed, timer, serve_metrics
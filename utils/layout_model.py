@@ -0,0 +1,352 @@
+"""
+Modelo compacto del layout del almacén.
+
+Reúne en un solo objeto lo que antes se derivaba una y otra vez de la lista
+de ubicaciones y la lista de formas:
+- Conjunto de ubicaciones para validar en O(1).
+- Conteo de ubicaciones por camión del layout, ya calculado.
+- Índice espacial en cuadrícula para resolver toques sobre el layout dibujado.
+
+Las coordenadas y cajas se guardan en arrays tipados. El modelo se guarda en
+una caché binaria cuyo nombre es el hash del contenido del layout, así que
+al reabrir la app con el mismo archivo no se vuelve a parsear.
+"""
+
+import hashlib
+import math
+import os
+import pickle
+import re
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple, Union
+
+from .svg_parser import create_simple_layout_from_text, parse_location_id, parse_svg_xml
+
+
+# Versión del formato en disco; un cambio invalida las copias anteriores
+LAYOUT_FORMAT = 1
+
+DEFAULT_LAYOUT_CACHE_DIR = '.layout_cache'
+
+_POINT_SEPARATOR = re.compile(r'[\s,]+')
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    """Hash SHA-256 del contenido de un layout."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def polygon_points(shape: Dict) -> Optional[List[Tuple[float, float]]]:
+    """Vértices [(x, y), ...] de una forma polygon, o None si no se pueden leer."""
+    # Acepta "x,y x,y" y "x y x y"
+    tokens = _POINT_SEPARATOR.split(' '.join(shape.get('points', [])).strip())
+    try:
+        coords = [float(token) for token in tokens if token]
+    except ValueError:
+        return None
+    points = list(zip(coords[0::2], coords[1::2]))
+    return points or None
+
+
+def _shape_bounds(shape: Dict) -> Optional[Tuple[float, float, float, float]]:
+    """Caja (x0, y0, x1, y1) de una forma, o None si no tiene extensión."""
+    shape_type = shape.get('type')
+    if shape_type == 'rect':
+        x, y = shape['x'], shape['y']
+        return x, y, x + shape['width'], y + shape['height']
+    if shape_type == 'circle':
+        cx, cy, r = shape['cx'], shape['cy'], shape['r']
+        return cx - r, cy - r, cx + r, cy + r
+    if shape_type == 'polygon':
+        points = polygon_points(shape)
+        if points:
+            xs, ys = zip(*points)
+            return min(xs), min(ys), max(xs), max(ys)
+    return None
+
+
+class LayoutModel:
+    """Layout con índice de ubicaciones, conteos por camión y búsqueda espacial."""
+
+    __slots__ = (
+        'content_hash', 'locations', 'location_set', '_rows', 'shapes',
+        'truck_ids', 'positions', 'truck_location_counts',
+        'x0', 'y0', 'x1', 'y1',
+        '_cell_size', '_grid'
+    )
+
+    def __init__(
+        self,
+        locations: List[str],
+        shapes_data: List[Dict],
+        content_hash: Optional[str] = None
+    ):
+        """
+        Construye el modelo a partir de la salida de parse_svg_xml o
+        create_simple_layout_from_text.
+
+        Args:
+            locations: Ubicaciones del layout (ej: ['C1-1', 'C1-2', ...])
+            shapes_data: Formas de cada ubicación
+            content_hash: Hash del contenido de origen (para la caché)
+        """
+        self.content_hash = content_hash
+        self.shapes = shapes_data
+
+        parsed = sorted(
+            {entry for entry in map(parse_location_id, locations) if entry is not None}
+        )
+        self.locations = [entry.ubicacion for entry in parsed]
+        self.location_set = frozenset(self.locations)
+        self._rows = {ubicacion: i for i, ubicacion in enumerate(self.locations)}
+        self.truck_ids = array('i', (entry.truck for entry in parsed))
+        self.positions = array('i', (entry.position for entry in parsed))
+
+        self.truck_location_counts: Dict[int, int] = {}
+        for truck in self.truck_ids:
+            self.truck_location_counts[truck] = self.truck_location_counts.get(truck, 0) + 1
+
+        self._compute_bounds()
+        self._build_grid()
+
+    def _compute_bounds(self):
+        """Calcula la caja de cada ubicación como unión de sus formas."""
+        nan = float('nan')
+        count = len(self.locations)
+        self.x0 = array('d', [nan]) * count
+        self.y0 = array('d', [nan]) * count
+        self.x1 = array('d', [nan]) * count
+        self.y1 = array('d', [nan]) * count
+
+        for shape in self.shapes:
+            i = self._rows.get(shape.get('ubicacion'))
+            if i is None:
+                continue
+            bounds = _shape_bounds(shape)
+            if bounds is None:
+                continue
+            if math.isnan(self.x0[i]):
+                self.x0[i], self.y0[i], self.x1[i], self.y1[i] = bounds
+            else:
+                self.x0[i] = min(self.x0[i], bounds[0])
+                self.y0[i] = min(self.y0[i], bounds[1])
+                self.x1[i] = max(self.x1[i], bounds[2])
+                self.y1[i] = max(self.y1[i], bounds[3])
+
+    def _build_grid(self):
+        """Reparte las cajas en celdas de una cuadrícula uniforme."""
+        self._grid = {}
+        boxes = [i for i in range(len(self.locations)) if not math.isnan(self.x0[i])]
+        if not boxes:
+            self._cell_size = 1.0
+            return
+
+        # Celda del tamaño de una ubicación típica: cada caja cae en 1-4 celdas
+        sizes = sorted(max(self.x1[i] - self.x0[i], self.y1[i] - self.y0[i]) for i in boxes)
+        self._cell_size = max(sizes[len(sizes) // 2], 1.0)
+
+        size = self._cell_size
+        for i in boxes:
+            for gx in range(math.floor(self.x0[i] / size), math.floor(self.x1[i] / size) + 1):
+                for gy in range(math.floor(self.y0[i] / size), math.floor(self.y1[i] / size) + 1):
+                    self._grid.setdefault((gx, gy), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def __iter__(self):
+        return iter(self.locations)
+
+    def __contains__(self, ubicacion: str) -> bool:
+        return ubicacion in self.location_set
+
+    @property
+    def trucks(self) -> List[int]:
+        """IDs de camiones del layout, ordenados."""
+        return sorted(self.truck_location_counts)
+
+    def locations_for_truck(self, truck: int) -> List[str]:
+        """Ubicaciones de un camión del layout, en orden."""
+        # truck_ids está ordenado igual que locations
+        start = bisect_left(self.truck_ids, truck)
+        return self.locations[start:bisect_right(self.truck_ids, truck, start)]
+
+    def bounds(self, ubicacion: str) -> Optional[Tuple[float, float, float, float]]:
+        """Caja (x0, y0, x1, y1) de una ubicación, o None si no tiene forma."""
+        i = self._rows.get(ubicacion)
+        if i is None or math.isnan(self.x0[i]):
+            return None
+        return self.x0[i], self.y0[i], self.x1[i], self.y1[i]
+
+    def locations_in(self, x0: float, y0: float, x1: float, y1: float) -> List[str]:
+        """
+        Ubicaciones cuya caja toca el rectángulo (x0, y0)-(x1, y1).
+
+        Args:
+            x0, y0, x1, y1: Rectángulo en el sistema del layout
+
+        Returns:
+            Ubicaciones en el orden del modelo (camión, posición)
+        """
+        size = self._cell_size
+        gx0, gx1 = math.floor(x0 / size), math.floor(x1 / size)
+        gy0, gy1 = math.floor(y0 / size), math.floor(y1 / size)
+        if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > len(self._grid):
+            # Rectángulo grande: es más barato revisar todas las cajas
+            candidates = range(len(self.locations))
+        else:
+            candidates = set()
+            for gx in range(gx0, gx1 + 1):
+                for gy in range(gy0, gy1 + 1):
+                    candidates.update(self._grid.get((gx, gy), ()))
+            candidates = sorted(candidates)
+
+        # Las cajas NaN (sin forma) no pasan ninguna comparación
+        return [
+            self.locations[i] for i in candidates
+            if self.x0[i] <= x1 and x0 <= self.x1[i] and self.y0[i] <= y1 and y0 <= self.y1[i]
+        ]
+
+    def hit_test(self, x: float, y: float) -> Optional[str]:
+        """
+        Retorna la ubicación dibujada en el punto (x, y).
+
+        Si varias cajas contienen el punto, gana la más pequeña (la más
+        específica).
+
+        Args:
+            x, y: Coordenadas en el sistema del layout
+
+        Returns:
+            Ubicación (ej: "C3-12") o None
+        """
+        size = self._cell_size
+        candidates = self._grid.get((math.floor(x / size), math.floor(y / size)), ())
+
+        best = None
+        best_area = None
+        for i in candidates:
+            if self.x0[i] <= x <= self.x1[i] and self.y0[i] <= y <= self.y1[i]:
+                area = (self.x1[i] - self.x0[i]) * (self.y1[i] - self.y0[i])
+                if best is None or area < best_area:
+                    best, best_area = i, area
+
+        return self.locations[best] if best is not None else None
+
+    def __getstate__(self):
+        # La cuadrícula se reconstruye al cargar; se guardan los arrays
+        return {
+            'content_hash': self.content_hash,
+            'locations': self.locations,
+            'shapes': self.shapes,
+            'truck_ids': self.truck_ids,
+            'positions': self.positions,
+            'truck_location_counts': self.truck_location_counts,
+            'bounds': (self.x0, self.y0, self.x1, self.y1)
+        }
+
+    def __setstate__(self, state):
+        self.content_hash = state['content_hash']
+        self.locations = state['locations']
+        self.location_set = frozenset(self.locations)
+        self._rows = {ubicacion: i for i, ubicacion in enumerate(self.locations)}
+        self.shapes = state['shapes']
+        self.truck_ids = state['truck_ids']
+        self.positions = state['positions']
+        self.truck_location_counts = state['truck_location_counts']
+        self.x0, self.y0, self.x1, self.y1 = state['bounds']
+        self._build_grid()
+
+
+class LayoutCache:
+    """Caché binaria de LayoutModel, un archivo por hash de contenido."""
+
+    def __init__(self, cache_dir: str = DEFAULT_LAYOUT_CACHE_DIR):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir: Carpeta donde se guardan los modelos
+        """
+        self.cache_dir = cache_dir
+
+    def _path_for(self, layout_hash: str) -> str:
+        return os.path.join(self.cache_dir, f'{layout_hash}.layout')
+
+    def load(self, layout_hash: str) -> Optional[LayoutModel]:
+        """Lee el modelo guardado para un hash, o None si no hay copia válida."""
+        try:
+            with open(self._path_for(layout_hash), 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Caché de layout ilegible, se ignora: {e}")
+            return None
+
+        if payload.get('format') != LAYOUT_FORMAT:
+            return None
+        model = payload.get('model')
+        if not isinstance(model, LayoutModel) or model.content_hash != layout_hash:
+            return None
+        return model
+
+    def save(self, model: LayoutModel) -> bool:
+        """Guarda el modelo de forma atómica. Retorna True si se guardó."""
+        if not model.content_hash:
+            return False
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(
+                        {'format': LAYOUT_FORMAT, 'model': model},
+                        f, protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                os.replace(tmp_path, self._path_for(model.content_hash))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return True
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la caché del layout: {e}")
+            return False
+
+
+def load_layout(
+    content: Union[str, bytes],
+    cache: Optional[LayoutCache] = None
+) -> LayoutModel:
+    """
+    Carga un layout (SVG/XML o texto) usando la caché por hash de contenido.
+
+    Args:
+        content: Contenido del archivo de layout
+        cache: Caché a usar (None = LayoutCache() en la carpeta por defecto)
+
+    Returns:
+        LayoutModel (vacío si el contenido no pudo parsearse)
+    """
+    cache = cache or LayoutCache()
+    layout_hash = content_hash(content)
+
+    model = cache.load(layout_hash)
+    if model is not None:
+        print(f"✅ Layout desde caché: {len(model)} ubicaciones")
+        return model
+
+    text = content.decode('utf-8') if isinstance(content, bytes) else content
+    if text.lstrip().startswith('<'):
+        locations, shapes_data = parse_svg_xml(content)
+    else:
+        locations, shapes_data = create_simple_layout_from_text(text)
+
+    model = LayoutModel(locations, shapes_data, layout_hash)
+    if len(model):
+        cache.save(model)
+    return model
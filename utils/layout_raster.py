@@ -0,0 +1,514 @@
+"""
+Raster del layout en mosaicos (tiles) con capa de ocupación.
+
+Dibujar el layout como cientos de controles de Flet obliga a recolorear
+cada control en cada escaneo. Aquí el layout estático (formas y etiquetas de
+shapes_data) se rasteriza una sola vez con Pillow en una pirámide de tiles:
+- Nivel 0 a la escala completa; cada nivel siguiente es la mitad, hasta que
+  todo el layout cabe en un tile.
+- Cada tile base se dibuja al pedirlo por primera vez y se guarda como PNG
+  en una carpeta cuyo nombre incluye el hash del layout; al reabrir la app
+  con el mismo layout se lee del disco.
+- Encima va la capa de ocupación: al componer un tile solo se pintan las
+  ubicaciones ocupadas que caen en él, y tras un escaneo solo se repinta el
+  recuadro de las ubicaciones que cambiaron en los tiles ya compuestos.
+
+Uso típico con la vista de ubicaciones:
+
+    raster = LayoutRaster(model)
+    raster.set_assignments(db.get_location_assignments())
+    ...
+    for key in raster.refresh(db):   # después de cada escaneo
+        ...                          # volver a mostrar raster.tile(*key)
+"""
+
+import io
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from .layout_model import LayoutModel, polygon_points
+
+
+# Versión del dibujo; un cambio invalida los tiles guardados
+RASTER_FORMAT = 1
+
+DEFAULT_RASTER_CACHE_DIR = os.path.join('.layout_cache', 'tiles')
+
+TILE_SIZE = 256
+
+BACKGROUND = '#ffffff'
+
+# Relleno de una ubicación con 1 slot ocupado y con los 2 slots ocupados
+OCCUPANCY_FILLS = ('#ffd166', '#ef476f')
+
+# Escala mínima (px por unidad del layout) para dibujar etiquetas
+LABEL_MIN_SCALE = 0.75
+
+# Margen en px alrededor de cada ubicación que puede cubrir su etiqueta
+LABEL_PAD = 24
+
+# Margen en px alrededor del layout a escala completa
+MARGIN = 8
+
+# Debajo de este tamaño en px las formas se dibujan sin borde
+MIN_OUTLINE_SIZE = 4
+
+# Con más ubicaciones cambiadas que esto (una carga completa) se descartan
+# los tiles compuestos en lugar de repintarlos uno por uno
+REPAINT_LIMIT = 256
+
+TileKey = Tuple[int, int, int]
+
+
+def _color(value, default: Optional[str] = None):
+    """Color de SVG a RGB de Pillow; None si es 'none' o no se reconoce."""
+    if not value or value == 'none':
+        return ImageColor.getrgb(default) if default else None
+    try:
+        return ImageColor.getrgb(value)
+    except ValueError:
+        return ImageColor.getrgb(default) if default else None
+
+
+class _LRU:
+    """Diccionario con límite de elementos (descarta el menos usado)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, item):
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def keys(self) -> List:
+        return list(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+
+class LayoutRaster:
+    """Pirámide de tiles del layout con la ocupación pintada encima."""
+
+    def __init__(
+        self,
+        model: LayoutModel,
+        cache_dir: Optional[str] = DEFAULT_RASTER_CACHE_DIR,
+        scale: float = 1.0,
+        tile_size: int = TILE_SIZE,
+        memory_tiles: int = 64
+    ):
+        """
+        Prepara la pirámide (los tiles se dibujan al pedirlos).
+
+        Args:
+            model: Layout a dibujar
+            cache_dir: Carpeta de los tiles en disco (None = solo en memoria)
+            scale: Píxeles por unidad del layout en el nivel 0
+            tile_size: Lado de cada tile en píxeles
+            memory_tiles: Tiles base y tiles compuestos que se conservan en memoria
+        """
+        self.model = model
+        self.scale = scale
+        self.tile_size = tile_size
+        self.version = 0
+
+        self._lock = threading.RLock()
+        self._base = _LRU(memory_tiles)
+        self._composed = _LRU(memory_tiles)
+        self._fills: Dict[str, str] = {}
+        self._font = ImageFont.load_default()
+        self._labels: Dict[str, object] = {}
+
+        self._shapes: Dict[str, List[Dict]] = {}
+        for shape in model.shapes:
+            self._shapes.setdefault(shape.get('ubicacion'), []).append(shape)
+
+        boxes = [box for box in map(model.bounds, model.locations) if box is not None]
+        margin = MARGIN / scale
+        if boxes:
+            self.origin = (min(b[0] for b in boxes) - margin, min(b[1] for b in boxes) - margin)
+            width = max(b[2] for b in boxes) + margin - self.origin[0]
+            height = max(b[3] for b in boxes) + margin - self.origin[1]
+        else:
+            self.origin = (0.0, 0.0)
+            width = height = 0.0
+        self.size = (width, height)
+
+        longest = max(width, height) * scale / tile_size
+        self.levels = 1 + max(0, math.ceil(math.log2(longest))) if longest > 1 else 1
+
+        self._tile_dir = None
+        if cache_dir and model.content_hash:
+            self._tile_dir = os.path.join(
+                cache_dir, f'{model.content_hash}-{scale:g}x{tile_size}-v{RASTER_FORMAT}'
+            )
+
+    # ------------------------------------------------------------------
+    # Geometría de la pirámide
+    # ------------------------------------------------------------------
+
+    def scale_at(self, level: int) -> float:
+        """Píxeles por unidad del layout en un nivel."""
+        return self.scale / (1 << level)
+
+    def grid_size(self, level: int) -> Tuple[int, int]:
+        """Columnas y filas de tiles de un nivel."""
+        scale = self.scale_at(level)
+        return (
+            max(1, math.ceil(self.size[0] * scale / self.tile_size)),
+            max(1, math.ceil(self.size[1] * scale / self.tile_size))
+        )
+
+    def tiles_in(self, level: int, x0: float, y0: float, x1: float, y1: float) -> List[TileKey]:
+        """
+        Tiles de un nivel que cubren un rectángulo del layout (la vista actual).
+
+        Args:
+            level: Nivel de la pirámide
+            x0, y0, x1, y1: Rectángulo en el sistema del layout
+
+        Returns:
+            Claves (level, tx, ty) fila por fila
+        """
+        scale = self.scale_at(level) / self.tile_size
+        cols, rows = self.grid_size(level)
+        tx0 = max(0, math.floor((x0 - self.origin[0]) * scale))
+        ty0 = max(0, math.floor((y0 - self.origin[1]) * scale))
+        tx1 = min(cols - 1, math.floor((x1 - self.origin[0]) * scale))
+        ty1 = min(rows - 1, math.floor((y1 - self.origin[1]) * scale))
+        return [(level, tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+
+    def _pixel_box(self, level: int, ubicacion: str) -> Optional[Tuple[int, int, int, int]]:
+        """Recuadro en px del nivel (con el margen de la etiqueta) de una ubicación."""
+        bounds = self.model.bounds(ubicacion)
+        if bounds is None:
+            return None
+        scale = self.scale_at(level)
+        pad = LABEL_PAD if scale >= LABEL_MIN_SCALE else 2
+        return (
+            math.floor((bounds[0] - self.origin[0]) * scale) - pad,
+            math.floor((bounds[1] - self.origin[1]) * scale) - pad,
+            math.ceil((bounds[2] - self.origin[0]) * scale) + pad + 1,
+            math.ceil((bounds[3] - self.origin[1]) * scale) + pad + 1
+        )
+
+    # ------------------------------------------------------------------
+    # Dibujo
+    # ------------------------------------------------------------------
+
+    def _draw(
+        self,
+        image,
+        key: TileKey,
+        fills: Optional[Dict[str, str]],
+        region: Optional[Tuple[int, int, int, int]] = None
+    ):
+        """
+        Dibuja sobre la imagen de un tile las ubicaciones que caen en él.
+
+        Args:
+            image: Imagen del tile (tile_size x tile_size)
+            key: Tile (level, tx, ty)
+            fills: {ubicacion: relleno} para pintar solo esas ubicaciones
+                   (capa de ocupación); None dibuja el layout base
+            region: Recuadro (px del tile) fuera del cual no hace falta
+                    dibujar (None = todo el tile)
+        """
+        level, tx, ty = key
+        scale = self.scale_at(level)
+        labels = scale >= LABEL_MIN_SCALE
+        left, top, right, bottom = region or (0, 0, self.tile_size, self.tile_size)
+        left += tx * self.tile_size
+        right += tx * self.tile_size
+        top += ty * self.tile_size
+        bottom += ty * self.tile_size
+        x_origin, y_origin = self.origin
+        x_offset, y_offset = tx * self.tile_size, ty * self.tile_size
+        pad = LABEL_PAD if labels else 2
+        draw = ImageDraw.Draw(image)
+
+        def px(x, y):
+            return (x - x_origin) * scale - x_offset, (y - y_origin) * scale - y_offset
+
+        for ubicacion in self.model.locations_in(
+            x_origin + (left - pad) / scale, y_origin + (top - pad) / scale,
+            x_origin + (right + pad) / scale, y_origin + (bottom + pad) / scale
+        ):
+            fill = None
+            if fills is not None:
+                fill = fills.get(ubicacion)
+                if fill is None:
+                    continue
+            for shape in self._shapes.get(ubicacion, ()):
+                self._draw_shape(image, draw, shape, px, scale, fill, labels)
+
+    def _label(self, text: str):
+        """Máscara de una etiqueta, dibujada una vez por texto distinto."""
+        mask = self._labels.get(text)
+        if mask is None:
+            left, top, right, bottom = self._font.getbbox(text)
+            mask = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+            ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=self._font)
+            self._labels[text] = mask
+        return mask
+
+    def _draw_shape(self, image, draw, shape: Dict, px, scale: float, fill, labels: bool):
+        shape_type = shape.get('type')
+        fill = _color(fill or shape.get('fill'))
+        outline = _color(shape.get('stroke'))
+
+        if shape_type == 'rect':
+            x, y = shape['x'], shape['y']
+            w, h = shape['width'], shape['height']
+            if min(w, h) * scale < MIN_OUTLINE_SIZE:
+                outline = None
+            draw.rectangle([px(x, y), px(x + w, y + h)], fill=fill, outline=outline)
+        elif shape_type == 'circle':
+            cx, cy, r = shape['cx'], shape['cy'], shape['r']
+            if 2 * r * scale < MIN_OUTLINE_SIZE:
+                outline = None
+            draw.ellipse([px(cx - r, cy - r), px(cx + r, cy + r)], fill=fill, outline=outline)
+        elif shape_type == 'polygon':
+            points = polygon_points(shape)
+            if points and len(points) > 1:
+                draw.polygon([px(x, y) for x, y in points], fill=fill, outline=outline)
+        elif shape_type == 'text' and labels:
+            mask = self._label(str(shape.get('content') or shape.get('ubicacion')))
+            x, y = px(shape['x'], shape['y'])
+            # Centrada en (x, y); paste recorta lo que cae fuera del tile
+            image.paste(
+                _color(shape.get('color'), '#000000'),
+                (math.floor(x - mask.width / 2 + 0.5), math.floor(y - mask.height / 2 + 0.5)),
+                mask
+            )
+
+    def _tile_path(self, key: TileKey) -> Optional[str]:
+        if self._tile_dir is None:
+            return None
+        level, tx, ty = key
+        return os.path.join(self._tile_dir, str(level), f'{tx}_{ty}.png')
+
+    def _read_tile(self, key: TileKey):
+        path = self._tile_path(key)
+        if path is None:
+            return None
+        try:
+            with Image.open(path) as image:
+                image.load()
+                return image.convert('RGB')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Tile del layout ilegible, se vuelve a dibujar: {e}")
+            return None
+
+    def _write_tile(self, key: TileKey, image):
+        path = self._tile_path(key)
+        if path is None:
+            return
+        try:
+            folder = os.path.dirname(path)
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, format='PNG', compress_level=1)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el tile del layout: {e}")
+
+    # ------------------------------------------------------------------
+    # Tiles
+    # ------------------------------------------------------------------
+
+    def base_tile(self, level: int, tx: int, ty: int):
+        """
+        Tile del layout sin ocupación (memoria -> disco -> dibujo).
+
+        Returns:
+            Imagen RGB de tile_size x tile_size (no modificar)
+        """
+        key = (level, tx, ty)
+        with self._lock:
+            image = self._base.get(key)
+            if image is not None:
+                return image
+            image = self._read_tile(key)
+            if image is None:
+                image = Image.new('RGB', (self.tile_size, self.tile_size), BACKGROUND)
+                self._draw(image, key, None)
+                self._write_tile(key, image)
+            self._base.put(key, image)
+            return image
+
+    def tile(self, level: int, tx: int, ty: int):
+        """
+        Tile con la ocupación actual pintada encima.
+
+        Returns:
+            Imagen RGB de tile_size x tile_size (no modificar)
+        """
+        key = (level, tx, ty)
+        with self._lock:
+            image = self._composed.get(key)
+            if image is None:
+                image = self.base_tile(level, tx, ty).copy()
+                if self._fills:
+                    self._draw(image, key, self._fills)
+                self._composed.put(key, image)
+            return image
+
+    def tile_png(self, level: int, tx: int, ty: int) -> bytes:
+        """Tile compuesto como PNG (para un ft.Image con src_base64)."""
+        buffer = io.BytesIO()
+        self.tile(level, tx, ty).save(buffer, format='PNG', compress_level=1)
+        return buffer.getvalue()
+
+    def prerender(self, levels: Optional[Iterable[int]] = None) -> int:
+        """
+        Dibuja y guarda en disco los tiles base que falten.
+
+        Pensado para un hilo en segundo plano después de cargar el layout.
+
+        Args:
+            levels: Niveles a dibujar (default: todos, del más grueso al más fino)
+
+        Returns:
+            Cantidad de tiles recorridos
+        """
+        if levels is None:
+            levels = range(self.levels - 1, -1, -1)
+        count = 0
+        for level in levels:
+            cols, rows = self.grid_size(level)
+            for ty in range(rows):
+                for tx in range(cols):
+                    self.base_tile(level, tx, ty)
+                    count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # Capa de ocupación
+    # ------------------------------------------------------------------
+
+    def set_assignments(self, assignments: Dict[str, List[Dict]]) -> Set[TileKey]:
+        """
+        Reemplaza toda la ocupación (formato de get_location_assignments).
+
+        Returns:
+            Tiles que cambiaron (ver apply_changes)
+        """
+        return self._update({
+            ubicacion: len([slot for slot in slots if slot])
+            for ubicacion, slots in assignments.items()
+        }, replace=True)
+
+    def apply_changes(self, changes: Dict[str, tuple]) -> Set[TileKey]:
+        """
+        Aplica las ubicaciones que cambiaron (formato de get_location_changes).
+
+        Solo se repinta el recuadro de cada ubicación cambiada en los tiles
+        compuestos que están en memoria; el resto se compone al pedirlo.
+
+        Returns:
+            Tiles (level, tx, ty) de todos los niveles que tocan alguna
+            ubicación cambiada; la vista debe volver a mostrar los visibles.
+            Con más de REPAINT_LIMIT ubicaciones cambiadas se descartan los
+            tiles compuestos y se retornan esos
+        """
+        return self._update({
+            ubicacion: len([slot for slot in slots if slot])
+            for ubicacion, slots in changes.items()
+        })
+
+    def refresh(self, db) -> Set[TileKey]:
+        """
+        Trae de DatabaseManager lo que cambió desde la última llamada.
+
+        Args:
+            db: DatabaseManager con la vista de ubicaciones
+
+        Returns:
+            Tiles que cambiaron (ver apply_changes)
+        """
+        version, changes = db.get_location_changes(self.version)
+        if changes is None:
+            dirty = self.set_assignments(db.get_location_assignments())
+        else:
+            dirty = self.apply_changes(changes)
+        self.version = version
+        return dirty
+
+    def _update(self, counts: Dict[str, int], replace: bool = False) -> Set[TileKey]:
+        with self._lock:
+            fills = {} if replace else dict(self._fills)
+            for ubicacion, count in counts.items():
+                if count:
+                    fills[ubicacion] = OCCUPANCY_FILLS[min(count, len(OCCUPANCY_FILLS)) - 1]
+                else:
+                    fills.pop(ubicacion, None)
+
+            changed = [
+                ubicacion for ubicacion in set(fills) | set(self._fills)
+                if fills.get(ubicacion) != self._fills.get(ubicacion)
+            ]
+            self._fills = fills
+
+            if len(changed) > REPAINT_LIMIT:
+                dirty = set(self._composed.keys())
+                self._composed.clear()
+                return dirty
+
+            dirty = set()
+            for level in range(self.levels):
+                for ubicacion in changed:
+                    box = self._pixel_box(level, ubicacion)
+                    if box is not None:
+                        dirty.update(self._repaint(level, box))
+            return dirty
+
+    def _repaint(self, level: int, box: Tuple[int, int, int, int]) -> List[TileKey]:
+        """Recompone un recuadro (px del nivel) en los tiles compuestos en memoria."""
+        size = self.tile_size
+        cols, rows = self.grid_size(level)
+        keys = []
+        for ty in range(max(0, box[1] // size), min(rows - 1, (box[3] - 1) // size) + 1):
+            for tx in range(max(0, box[0] // size), min(cols - 1, (box[2] - 1) // size) + 1):
+                key = (level, tx, ty)
+                keys.append(key)
+                image = self._composed.get(key)
+                if image is None:
+                    continue
+                # Se dibuja sobre una copia del tile base completo (mismas
+                # coordenadas que al componer) y solo se copia el recuadro,
+                # así el resultado es idéntico a componer el tile de nuevo
+                region = (
+                    max(box[0] - tx * size, 0), max(box[1] - ty * size, 0),
+                    min(box[2] - tx * size, size), min(box[3] - ty * size, size)
+                )
+                scratch = self.base_tile(level, tx, ty).copy()
+                self._draw(scratch, key, self._fills, region)
+                image.paste(scratch.crop(region), region[:2])
+        return keys
@@ -0,0 +1,379 @@
+"""
+Métricas ligeras de los caminos críticos.
+
+Contadores e histogramas de latencia al estilo HDR (cubetas log-lineales con
+~1.5% de error relativo y memoria acotada) para escaneos, consultas a la base,
+llamadas a Google Sheets y parseo de layouts.
+
+Se instrumenta con el decorador ``timed`` o el context manager ``timer``.
+Desactivadas (el default), ``timed`` deja la función original sin envoltura
+(costo cero por llamada) y ``timer`` solo revisa una bandera global. Se
+activan con la variable de entorno WAREHOUSE_METRICS=1 o con enable().
+
+snapshot() retorna p50/p95/p99 por operación; serve_metrics() los expone en
+JSON por HTTP local (GET /metrics).
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# Precisión de las cubetas: 2^SUB_BUCKET_BITS valores exactos y después
+# 2^(SUB_BUCKET_BITS - 1) cubetas por potencia de 2
+SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+PERCENTILES = (50, 95, 99)
+
+_enabled = os.environ.get('WAREHOUSE_METRICS', '').lower() in ('1', 'true', 'yes')
+
+# Funciones decoradas con timed: (módulo, qualname, original, envoltura)
+_INSTRUMENTED = []
+
+
+def _install(use_wrapper: bool):
+    """Pone la envoltura (o la función original) de cada función timed en su módulo o clase."""
+    for module_name, qualname, func, wrapper in _INSTRUMENTED:
+        owner = sys.modules.get(module_name)
+        *path, name = qualname.split('.')
+        for part in path:
+            owner = getattr(owner, part, None)
+        if owner is None:
+            continue
+        current = owner.__dict__.get(name)
+        if current is func or current is wrapper:
+            setattr(owner, name, wrapper if use_wrapper else func)
+
+
+def enable():
+    """
+    Activa el registro de métricas.
+
+    Las funciones timed se reemplazan por su envoltura en el módulo o la
+    clase que las define; un nombre ya importado con ``from x import f``
+    antes de activar sigue apuntando a la función sin medir.
+    """
+    global _enabled
+    _enabled = True
+    _install(True)
+
+
+def disable():
+    """Desactiva el registro de métricas (las funciones timed vuelven a la original)."""
+    global _enabled
+    _enabled = False
+    _install(False)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _bucket_index(value: int) -> int:
+    """Cubeta de un valor entero no negativo."""
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + (value >> shift) - _SUB_BUCKET_HALF
+
+
+def _bucket_value(index: int) -> int:
+    """Valor representativo (punto medio) de una cubeta."""
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    shift, offset = divmod(index - _SUB_BUCKET_COUNT, _SUB_BUCKET_HALF)
+    shift += 1
+    low = (offset + _SUB_BUCKET_HALF) << shift
+    return low + ((1 << shift) >> 1)
+
+
+class Counter:
+    """Contador entero seguro entre hilos."""
+
+    __slots__ = ('name', '_value', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+
+class Histogram:
+    """
+    Histograma de latencias en microsegundos.
+
+    Cada potencia de 2 se divide en 64 cubetas, así el percentil reportado
+    está a menos de ~1.6% del valor real, con memoria fija sin importar
+    cuántas muestras se registren.
+    """
+
+    __slots__ = ('name', '_counts', '_count', '_total', '_max', '_errors', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts: Dict[int, int] = {}
+            self._count = 0
+            self._total = 0
+            self._max = 0
+            self._errors = 0
+
+    def record(self, micros: int, error: bool = False):
+        """Registra una muestra (en microsegundos)."""
+        micros = max(int(micros), 0)
+        index = _bucket_index(micros)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self._count += 1
+            self._total += micros
+            if micros > self._max:
+                self._max = micros
+            if error:
+                self._errors += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def percentile(self, percent: float) -> int:
+        """Valor (µs) bajo el que cae ``percent``% de las muestras."""
+        with self._lock:
+            if not self._count:
+                return 0
+            target = max(1, -(-self._count * percent // 100))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= target:
+                    return min(_bucket_value(index), self._max)
+            return self._max
+
+    def summary(self) -> Dict:
+        """Resumen en milisegundos: count, errors, mean, p50/p95/p99 y max."""
+        summary = {
+            'count': self._count,
+            'errors': self._errors,
+            'mean_ms': round(self._total / self._count / 1000, 3) if self._count else 0.0,
+            'max_ms': round(self._max / 1000, 3)
+        }
+        for percent in PERCENTILES:
+            summary[f'p{percent}_ms'] = round(self.percentile(percent) / 1000, 3)
+        return summary
+
+
+class MetricsRegistry:
+    """Contadores e histogramas por nombre."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter(name))
+        return counter
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(name))
+        return histogram
+
+    def snapshot(self) -> Dict:
+        """
+        Estado actual de todas las métricas con al menos una muestra.
+
+        Returns:
+            Dict con 'enabled', 'counters' {nombre: valor} y 'latency'
+            {nombre: resumen de Histogram.summary}
+        """
+        return {
+            'enabled': _enabled,
+            'counters': {
+                name: counter.value
+                for name, counter in sorted(self._counters.items()) if counter.value
+            },
+            'latency': {
+                name: histogram.summary()
+                for name, histogram in sorted(self._histograms.items()) if histogram.count
+            }
+        }
+
+    def reset(self):
+        """Pone en cero todas las métricas (los objetos se conservan)."""
+        for counter in list(self._counters.values()):
+            counter.reset()
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def snapshot() -> Dict:
+    """Estado actual de las métricas del registro global."""
+    return REGISTRY.snapshot()
+
+
+def reset():
+    """Pone en cero las métricas del registro global."""
+    REGISTRY.reset()
+
+
+def increment(name: str, amount: int = 1):
+    """Incrementa un contador (no hace nada si las métricas están desactivadas)."""
+    if _enabled:
+        REGISTRY.counter(name).increment(amount)
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorador que registra la duración de cada llamada en el histograma ``name``.
+
+    Las llamadas que lanzan una excepción se cuentan como errores. Con las
+    métricas desactivadas retorna la función original (sin costo por
+    llamada); enable() instala la envoltura después. Una función anidada
+    (sin módulo o clase donde reemplazarla) siempre queda envuelta.
+    """
+    def decorator(func: Callable) -> Callable:
+        histogram = REGISTRY.histogram(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                histogram.record((time.perf_counter_ns() - start) // 1000, error)
+
+        if '<locals>' in func.__qualname__:
+            return wrapper
+        _INSTRUMENTED.append((func.__module__, func.__qualname__, func, wrapper))
+        return wrapper if _enabled else func
+
+    return decorator
+
+
+class _Timer:
+    """Context manager de timer() cuando las métricas están activas."""
+
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.record((time.perf_counter_ns() - self._start) // 1000, exc_type is not None)
+        return False
+
+
+class _NullTimer:
+    """Context manager vacío, compartido, para métricas desactivadas."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """
+    Context manager que registra la duración del bloque en el histograma ``name``.
+
+    Ejemplo:
+        with timer('sheets.get_all_values'):
+            values = worksheet.get_all_values()
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(REGISTRY.histogram(name))
+
+
+def serve_metrics(port: int = 9464, host: str = '127.0.0.1'):
+    """
+    Expone snapshot() en http://host:port/metrics desde un hilo en segundo plano.
+
+    json y http.server se importan aquí para no cargarlos en el camino de escaneo.
+
+    Args:
+        port: Puerto (0 = uno libre; ver server.server_address)
+        host: Interfaz; por defecto solo local
+
+    Returns:
+        El ThreadingHTTPServer (llamar shutdown() para detenerlo)
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') not in ('', '/metrics'):
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot(), indent=2).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Sin una línea por petición en la consola de la app
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True)
+    thread.start()
+    print(f"📊 Métricas en http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
+
+
+def format_snapshot(data: Optional[Dict] = None) -> str:
+    """Tabla de texto con las latencias y contadores (para logs)."""
+    data = data or snapshot()
+    lines = [f"{'Operación':<44}{'n':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+    for name, s in data['latency'].items():
+        lines.append(f"{name:<44}{s['count']:>8}{s['p50_ms']:>8.2f}ms{s['p95_ms']:>8.2f}ms"
+                     f"{s['p99_ms']:>8.2f}ms{s['max_ms']:>8.2f}ms")
+    for name, value in data['counters'].items():
+        lines.append(f"{name:<44}{value:>8}")
+    return '\n'.join(lines)
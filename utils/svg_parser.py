@@ -2,14 +2,220 @@
 Parser de archivos SVG/XML para extraer ubicaciones del layout.
 
 Adaptado del código original de Streamlit para trabajar con Flet.
+
+El SVG se recorre en streaming con iterparse: los namespaces se resuelven de
+forma nativa (no se reescribe el XML) y cada elemento se libera después de
+procesarlo, así los layouts exportados de CAD con decenas de miles de
+elementos no construyen el árbol completo en memoria.
 """
 
+import io
 import xml.etree.ElementTree as ET
 import re
-from typing import List, Tuple, Dict
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Union
+
+from .metrics import timed
+
+
+# Ubicación del layout: C<camión>-<posición>
+LOCATION_PATTERN = re.compile(r'C(\d+)-(\d+)')
+
+DEFAULT_FILL = '#cccccc'
+DEFAULT_STROKE = '#666666'
+
+
+class LayoutLocation(NamedTuple):
+    """Ubicación del layout con sus componentes numéricos ya extraídos."""
+    truck: int
+    position: int
+    ubicacion: str
+
+
+class LocationIndex:
+    """
+    Índice ordenado de ubicaciones del layout.
+    
+    Las ubicaciones se ordenan por (camión, posición) numéricos, así que
+    C2-1 va antes de C10-1 y C1-2 antes de C1-10.
+    """
+    
+    def __init__(self, entries: List[LayoutLocation]):
+        """
+        Inicializa el índice.
+        
+        Args:
+            entries: Ubicaciones en cualquier orden (se ordenan aquí)
+        """
+        self.entries = tuple(sorted(entries))
+        self.locations = [entry.ubicacion for entry in self.entries]
+        self._location_set = frozenset(self.locations)
+        
+        self.by_truck: Dict[int, List[str]] = {}
+        for entry in self.entries:
+            self.by_truck.setdefault(entry.truck, []).append(entry.ubicacion)
+    
+    @property
+    def trucks(self) -> List[int]:
+        """IDs de camiones del layout, ordenados."""
+        return list(self.by_truck)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.locations)
+    
+    def __contains__(self, ubicacion: str) -> bool:
+        return ubicacion in self._location_set
+
+
+def parse_location_id(element_id: str):
+    """
+    Valida un ID de ubicación y extrae sus componentes.
+    
+    Args:
+        element_id: ID del elemento (ej: "C12-3")
+    
+    Returns:
+        LayoutLocation o None si el ID no es una ubicación
+    """
+    match = LOCATION_PATTERN.fullmatch(element_id)
+    if match is None:
+        return None
+    return LayoutLocation(int(match.group(1)), int(match.group(2)), element_id)
+
+
+def _shape_rect(element, shape_info: Dict):
+    get = element.get
+    shape_info['type'] = 'rect'
+    shape_info['x'] = float(get('x', 0))
+    shape_info['y'] = float(get('y', 0))
+    shape_info['width'] = float(get('width', 50))
+    shape_info['height'] = float(get('height', 30))
+    shape_info['fill'] = get('fill', DEFAULT_FILL)
+    shape_info['stroke'] = get('stroke', DEFAULT_STROKE)
+
+
+def _shape_polygon(element, shape_info: Dict):
+    get = element.get
+    shape_info['type'] = 'polygon'
+    shape_info['points'] = get('points', '').split()
+    shape_info['fill'] = get('fill', DEFAULT_FILL)
+    shape_info['stroke'] = get('stroke', DEFAULT_STROKE)
+
+
+def _shape_circle(element, shape_info: Dict):
+    get = element.get
+    shape_info['type'] = 'circle'
+    shape_info['cx'] = float(get('cx', 0))
+    shape_info['cy'] = float(get('cy', 0))
+    shape_info['r'] = float(get('r', 20))
+    shape_info['fill'] = get('fill', DEFAULT_FILL)
+    shape_info['stroke'] = get('stroke', DEFAULT_STROKE)
+
+
+def _shape_text(element, shape_info: Dict):
+    shape_info['type'] = 'text'
+    shape_info['x'] = float(element.get('x', 0))
+    shape_info['y'] = float(element.get('y', 0))
+    shape_info['content'] = element.text or shape_info['ubicacion']
+
+
+def _shape_unknown(element, shape_info: Dict):
+    # Forma desconocida, intentar extraer coordenadas básicas
+    shape_info['type'] = 'unknown'
+    shape_info['x'] = float(element.get('x', 0))
+    shape_info['y'] = float(element.get('y', 0))
+
 
+SHAPE_BUILDERS = {
+    'rect': _shape_rect,
+    'polygon': _shape_polygon,
+    'circle': _shape_circle,
+    'text': _shape_text
+}
 
-def parse_svg_xml(xml_content: str) -> Tuple[List[str], List[Dict]]:
+
+def _parse_events(events) -> Tuple[LocationIndex, List[Dict]]:
+    """
+    Recorre los eventos 'start'/'end' de iterparse y extrae ubicaciones y formas.
+    
+    Cada ubicación ocupa su lugar en shapes_data en el evento 'start', así
+    las formas quedan en orden de documento (un grupo antes que sus hijos);
+    se completa en el evento 'end', cuando el elemento ya tiene su texto.
+    Después se vacía, y al cerrarse cada grupo se descartan sus hijos, así
+    el árbol nunca se construye completo en memoria.
+    """
+    entries = []
+    shapes_data = []
+    # Ubicaciones abiertas: (elemento, shape_info), en orden de anidamiento
+    open_shapes = []
+    
+    for event, element in events:
+        if event == 'start':
+            element_id = element.get('id')
+            if element_id:
+                location = parse_location_id(element_id)
+                if location is not None:
+                    entries.append(location)
+                    shape_info = {'ubicacion': element_id}
+                    shapes_data.append(shape_info)
+                    open_shapes.append((element, shape_info))
+            continue
+        
+        if open_shapes and open_shapes[-1][0] is element:
+            shape_info = open_shapes.pop()[1]
+            # Los namespaces llegan como '{uri}tag'
+            tag = element.tag.rpartition('}')[2]
+            SHAPE_BUILDERS.get(tag, _shape_unknown)(element, shape_info)
+        
+        element.clear()
+    
+    return LocationIndex(entries), shapes_data
+
+
+def _iterparse(source) -> Iterator:
+    return ET.iterparse(source, events=('start', 'end'))
+
+
+@timed('layout.parse_svg_layout')
+def parse_svg_layout(
+    source: Union[str, bytes]
+) -> Tuple[LocationIndex, List[Dict]]:
+    """
+    Parsea un SVG/XML en streaming y retorna el índice de ubicaciones.
+    
+    Args:
+        source: Contenido del archivo SVG/XML (str o bytes)
+    
+    Returns:
+        Tuple (LocationIndex, shapes_data)
+    
+    Raises:
+        ET.ParseError: Si el XML no es válido
+    """
+    stream = io.BytesIO(source) if isinstance(source, bytes) else io.StringIO(source)
+    return _parse_events(_iterparse(stream))
+
+
+@timed('layout.parse_svg_file')
+def parse_svg_file(path: str) -> Tuple[LocationIndex, List[Dict]]:
+    """
+    Parsea un archivo SVG/XML leyéndolo en streaming desde disco.
+    
+    Args:
+        path: Ruta del archivo
+    
+    Returns:
+        Tuple (LocationIndex, shapes_data)
+    
+    Raises:
+        ET.ParseError: Si el XML no es válido
+    """
+    return _parse_events(_iterparse(path))
+
+
+def parse_svg_xml(xml_content: Union[str, bytes]) -> Tuple[List[str], List[Dict]]:
     """
     Parsea un archivo SVG/XML y extrae las ubicaciones y formas.
     
@@ -22,79 +228,18 @@ def parse_svg_xml(xml_content: str) -> Tuple[List[str], List[Dict]]:
         - shapes_data: Lista de dicts con información de las formas
     """
     try:
-        # Remover namespace si existe para facilitar parsing
-        xml_content = re.sub(r'xmlns="[^"]+"', '', xml_content)
-        xml_content = re.sub(r'xmlns:[\w]+="[^"]+"', '', xml_content)
+        index, shapes_data = parse_svg_layout(xml_content)
         
-        root = ET.fromstring(xml_content)
+        print(f"✅ SVG parseado: {len(index)} ubicaciones, {len(shapes_data)} formas")
         
-        locations = []
-        shapes_data = []
-        
-        # Buscar todos los elementos con IDs que sigan el patrón CX-Y
-        for element in root.iter():
-            element_id = element.get('id', '')
-            
-            # Verificar si el ID sigue el patrón C+número-número
-            if re.match(r'^C\d+-\d+$', element_id):
-                locations.append(element_id)
-                
-                # Extraer información de la forma
-                shape_info = {'ubicacion': element_id}
-                
-                # Detectar tipo de forma
-                tag = element.tag.split('}')[-1] if '}' in element.tag else element.tag
-                
-                if tag == 'rect':
-                    shape_info['type'] = 'rect'
-                    shape_info['x'] = float(element.get('x', 0))
-                    shape_info['y'] = float(element.get('y', 0))
-                    shape_info['width'] = float(element.get('width', 50))
-                    shape_info['height'] = float(element.get('height', 30))
-                    shape_info['fill'] = element.get('fill', '#cccccc')
-                    shape_info['stroke'] = element.get('stroke', '#666666')
-                
-                elif tag == 'polygon':
-                    shape_info['type'] = 'polygon'
-                    points_str = element.get('points', '')
-                    shape_info['points'] = points_str.split()
-                    shape_info['fill'] = element.get('fill', '#cccccc')
-                    shape_info['stroke'] = element.get('stroke', '#666666')
-                
-                elif tag == 'circle':
-                    shape_info['type'] = 'circle'
-                    shape_info['cx'] = float(element.get('cx', 0))
-                    shape_info['cy'] = float(element.get('cy', 0))
-                    shape_info['r'] = float(element.get('r', 20))
-                    shape_info['fill'] = element.get('fill', '#cccccc')
-                    shape_info['stroke'] = element.get('stroke', '#666666')
-                
-                elif tag == 'text':
-                    shape_info['type'] = 'text'
-                    shape_info['x'] = float(element.get('x', 0))
-                    shape_info['y'] = float(element.get('y', 0))
-                    shape_info['content'] = element.text or element_id
-                
-                else:
-                    # Forma desconocida, intentar extraer coordenadas básicas
-                    shape_info['type'] = 'unknown'
-                    shape_info['x'] = float(element.get('x', 0))
-                    shape_info['y'] = float(element.get('y', 0))
-                
-                shapes_data.append(shape_info)
-        
-        # Ordenar ubicaciones
-        locations.sort(key=lambda x: (int(x.split('-')[0][1:]), int(x.split('-')[1])))
-        
-        print(f"✅ SVG parseado: {len(locations)} ubicaciones, {len(shapes_data)} formas")
-        
-        return locations, shapes_data
+        return index.locations, shapes_data
         
     except Exception as e:
         print(f"❌ Error parseando SVG: {e}")
         return [], []
 
 
+@timed('layout.parse_text')
 def create_simple_layout_from_text(layout_text: str) -> Tuple[List[str], List[Dict]]:
     """
     Crea un layout simple desde texto.
@@ -115,7 +260,7 @@ def create_simple_layout_from_text(layout_text: str) -> Tuple[List[str], List[Di
             cells = re.split(r'\t|,|\s{2,}', line.strip())
             for cell in cells:
                 cell = cell.strip()
-                if cell and re.match(r'^C\d+-\d+$', cell):
+                if cell and LOCATION_PATTERN.fullmatch(cell):
                     locations.append(cell)
         
         # Crear formas simples en una cuadrícula